@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Measure the per-component memory footprint of NetFlux5G topologies
+
+Builds N components (mixed 5G core / RAN / network types) with the shared
+flyweight defaults and compares them against the previous layout, where every
+component carried its own full properties dict and instance __dict__.
+
+Usage:
+    python scripts/benchmark_topology_memory.py [--count 50000] [--gui]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from models.component_types import COMPONENT_COLORS, get_default_properties
+from models.topology import Topology
+
+TYPES = list(COMPONENT_COLORS)
+
+
+class LegacyComponent:
+    """Component layout before shared defaults (one full dict per component)"""
+
+    def __init__(self, component_type, x, y):
+        self.component_type = component_type
+        self.component_id = str(uuid.uuid4())[:8]
+        self.properties = {"name": f"{component_type}_{self.component_id}"}
+        self.properties.update(get_default_properties(component_type))
+        self.x = float(x)
+        self.y = float(y)
+        self.links = []
+
+
+def measure(build, count):
+    """Return (bytes per component, peak bytes) for building count components"""
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    objects = build(count)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    gc.collect()
+    return (current - start) / count, peak - start
+
+
+def build_legacy(count):
+    return [LegacyComponent(TYPES[i % len(TYPES)], i, i) for i in range(count)]
+
+
+def build_topology(count):
+    topology = Topology()
+    for i in range(count):
+        topology.add_component(TYPES[i % len(TYPES)], i, i)
+    return topology
+
+
+def measure_gui(count):
+    """Measure process RSS growth for Qt canvas items (Qt memory is not traced)"""
+    try:
+        import psutil
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtCore import QPointF
+    except ImportError as e:
+        print(f"⚠️ Skipping GUI measurement: {e}")
+        return None
+
+    from models.component_factory import ComponentFactory
+
+    app = QApplication.instance() or QApplication(["benchmark"])
+    process = psutil.Process()
+    factory = ComponentFactory()
+
+    gc.collect()
+    before = process.memory_info().rss
+    items = [factory.create_component(TYPES[i % len(TYPES)], QPointF(i, i)) for i in range(count)]
+    after = process.memory_info().rss
+    del items, app
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NetFlux5G topology memory benchmark")
+    parser.add_argument("--count", type=int, default=50000, help="number of components to build")
+    parser.add_argument("--gui", action="store_true", help="also measure Qt canvas components (needs PyQt5 and psutil)")
+    args = parser.parse_args()
+
+    print(f"Building {args.count} components...")
+    print("=" * 60)
+
+    legacy_per, legacy_peak = measure(build_legacy, args.count)
+    shared_per, shared_peak = measure(build_topology, args.count)
+
+    print(f"Legacy layout:       {legacy_per:8.0f} B/component  (peak {legacy_peak / 1e6:.1f} MB)")
+    print(f"Shared defaults:     {shared_per:8.0f} B/component  (peak {shared_peak / 1e6:.1f} MB)")
+    print(f"Reduction:           {100 * (1 - shared_per / legacy_per):7.1f}%")
+
+    if args.gui:
+        gui_per = measure_gui(args.count)
+        if gui_per is not None:
+            print(f"Qt canvas component: {gui_per:8.0f} B/component  (RSS growth)")
+
+    print("=" * 60)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
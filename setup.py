@@ -51,6 +51,10 @@ setup(
             "flake8",
             "mypy",
         ],
+        "fast-io": [
+            "orjson>=3.8",
+            "zstandard>=0.19",
+        ],
     },
     include_package_data=True,
     package_data={
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+NetFlux5G command line interface
+Runs saved topologies without the GUI (no PyQt5 import)
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+# Constant-only modules: importing them does not load docker or the container manager
+from models.component_types import SCALABLE_TYPES
+from simulation.data_plane import DRIVERS as DATA_PLANE_DRIVERS
+from simulation.placement import PROFILES as PLACEMENT_PROFILES
+from simulation.reference_points import NETWORK_MODES, REFERENCE_POINTS
+
+# Subcommands handled by the CLI instead of the GUI
+COMMANDS = ("run", "plan", "cleanup", "build-images", "bench-dataplane", "bench-scaleout", "bench-slices",
+            "capture")
+
+
+def add_deployment_arguments(parser, network=True):
+    """Options of how a topology is deployed, shared by 'run' and the 'bench-*' subcommands"""
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="Always provision subscribers instead of restoring a core snapshot")
+    parser.add_argument("--mongodb-tmpfs", action="store_true",
+                        help="Keep the data directory of a restored MongoDB on tmpfs")
+    parser.add_argument("--queue-timeout", type=float, default=0,
+                        help="Seconds to wait for capacity when the host is busy (default: fail at once)")
+    parser.add_argument("--no-densify", action="store_true",
+                        help="Never run several UEs per container to fit the host")
+    parser.add_argument("--no-adaptive-limits", action="store_true",
+                        help="Use the configured memory limits instead of limits learned from earlier runs")
+    parser.add_argument("--pin-upf", action="store_true",
+                        help="Same as --placement performance: the UPF gets dedicated CPUs sized from its "
+                             "observed peak CPU use")
+    parser.add_argument("--placement", choices=PLACEMENT_PROFILES,
+                        help="CPU placement profile (default: the topology's setting, else dense)")
+    parser.add_argument("--no-link-emulation", action="store_true",
+                        help="Ignore link bandwidth/delay/jitter/loss instead of applying them with tc")
+    if network:
+        parser.add_argument("--network-mode", choices=NETWORK_MODES,
+                            help="One flat run network, or one network per 5G reference point "
+                                 "(default: the topology's setting, else flat)")
+        parser.add_argument("--data-plane", choices=DATA_PLANE_DRIVERS,
+                            help="Driver of the N3/N6 networks in multi-network mode "
+                                 "(default: the topology's setting, else bridge)")
+    parser.add_argument("--protocol-stats", action="store_true",
+                        help="Stream NGAP/PFCP/GTP-U/SBI statistics from tcpdump on the core NFs into the report")
+    parser.add_argument("--publish-ports", action="store_true",
+                        help="Publish the AMF (NGAP) and UPF (PFCP) ports on host ports chosen by Docker")
+
+
+def deployment_options(args):
+    """HeadlessRunner keyword arguments of the add_deployment_arguments options"""
+    options = dict(
+        core_snapshots=not args.no_snapshot,
+        mongodb_tmpfs=args.mongodb_tmpfs,
+        allow_densify=not args.no_densify,
+        queue_timeout=args.queue_timeout,
+        adaptive_limits=not args.no_adaptive_limits,
+        upf_cpu_pinning=args.pin_upf,
+        placement=args.placement,
+        link_emulation=not args.no_link_emulation,
+        protocol_stats=True if args.protocol_stats else None,
+        publish_ports=args.publish_ports
+    )
+    if hasattr(args, "network_mode"):
+        options.update(network_mode=args.network_mode, data_plane_driver=args.data_plane)
+    return options
+
+
+def bench_run_id(args, variant):
+    """Run ID of one deployment of a multi-deployment benchmark (--run-id is their prefix)"""
+    return f"{args.run_id}-{variant}" if args.run_id else None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="netflux5g", description="NetFlux5G headless runner")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="Deploy, test, benchmark and tear down a saved topology")
+    run_parser.add_argument("topology", help="Saved project file (.nfx, .yaml or .json)")
+    run_parser.add_argument("--report", help="Write the JSON run report to this file")
+    run_parser.add_argument("--no-tests", action="store_true", help="Skip connectivity tests")
+    run_parser.add_argument("--no-benchmark", action="store_true", help="Skip the latency benchmark")
+    run_parser.add_argument("--keep", action="store_true", help="Leave containers running after the run")
+    run_parser.add_argument("--run-id", help="Run ID used to name and label resources (default: random, "
+                                             "or $NETFLUX5G_RUN_ID)")
+    run_parser.add_argument("--throughput", type=float, default=0, metavar="SECONDS",
+                            help="Also measure iperf3 throughput through uesimtun0 for this long per direction")
+    add_deployment_arguments(run_parser)
+
+    plan_parser = subparsers.add_parser("plan", help="Show the capacity plan of a topology without deploying")
+    plan_parser.add_argument("topology", help="Saved project file (.nfx, .yaml or .json)")
+    plan_parser.add_argument("--no-densify", action="store_true", help="Do not consider multi-UE containers")
+    plan_parser.add_argument("--placement", choices=PLACEMENT_PROFILES,
+                             help="CPU placement profile (default: the topology's setting, else dense)")
+
+    bench_parser = subparsers.add_parser("bench-dataplane",
+                                         help="Compare UE throughput through the UPF per N3/N6 network driver")
+    bench_parser.add_argument("topology", help="Saved project file (.nfx, .yaml or .json)")
+    bench_parser.add_argument("--drivers", nargs="+", choices=DATA_PLANE_DRIVERS, default=["bridge", "ipvlan"],
+                              help="Drivers to compare, one deployment each (default: bridge ipvlan)")
+    bench_parser.add_argument("--duration", type=float, default=10,
+                              help="Seconds of iperf3 traffic per UE and direction (default: 10)")
+    bench_parser.add_argument("--report", help="Write the JSON reports of all runs to this file")
+    bench_parser.add_argument("--run-id", help="Prefix of the run IDs, one per driver: <run-id>-<driver>")
+    add_deployment_arguments(bench_parser, network=False)
+
+    scaleout_parser = subparsers.add_parser("bench-scaleout",
+                                            help="Measure registration and throughput capacity per number of "
+                                                 "AMF/SMF/UPF instances")
+    scaleout_parser.add_argument("topology", help="Saved project file (.nfx, .yaml or .json)")
+    scaleout_parser.add_argument("--nf", nargs="+", choices=SCALABLE_TYPES, default=list(SCALABLE_TYPES),
+                                 help="NF types to scale (default: amf smf upf)")
+    scaleout_parser.add_argument("--instances", nargs="+", type=int, default=[1, 2, 4],
+                                 help="Instance counts to compare, one deployment each (default: 1 2 4)")
+    scaleout_parser.add_argument("--duration", type=float, default=10,
+                                 help="Seconds of concurrent iperf3 traffic per direction (default: 10)")
+    scaleout_parser.add_argument("--report", help="Write the JSON reports of all runs to this file")
+    scaleout_parser.add_argument("--run-id", help="Prefix of the run IDs, one per instance count: "
+                                                  "<run-id>-<instances>")
+    add_deployment_arguments(scaleout_parser)
+
+    slices_parser = subparsers.add_parser("bench-slices",
+                                          help="Saturate each network slice in turn and measure the impact on "
+                                               "the throughput and latency of the others")
+    slices_parser.add_argument("topology", help="Saved project file (.nfx, .yaml or .json) with several slices")
+    slices_parser.add_argument("--duration", type=float, default=10,
+                               help="Seconds of every iperf3/ping measurement (default: 10)")
+    slices_parser.add_argument("--report", help="Write the JSON run report to this file")
+    slices_parser.add_argument("--run-id", help="Run ID used to name and label resources (default: random, "
+                                                "or $NETFLUX5G_RUN_ID)")
+    add_deployment_arguments(slices_parser)
+
+    capture_parser = subparsers.add_parser("capture",
+                                           help="Start, stop or list tcpdump ring-buffer captures of a running "
+                                                "(--keep) run")
+    capture_parser.add_argument("action", choices=("start", "stop", "list"))
+    capture_parser.add_argument("target", nargs="?",
+                                help="Container (component name) to capture on; stop: only its captures")
+    capture_parser.add_argument("--run-id", required=True, help="Run ID of the running topology")
+    capture_interface = capture_parser.add_mutually_exclusive_group()
+    capture_interface.add_argument("--reference-point", choices=REFERENCE_POINTS,
+                                   help="Capture on the target's interface in this network (multi-network mode)")
+    capture_interface.add_argument("--interface", help="Capture on this interface (default: all interfaces)")
+    capture_parser.add_argument("--size", type=int, default=10, metavar="MB",
+                                help="Megabytes per pcap file (default: 10)")
+    capture_parser.add_argument("--files", type=int, default=5,
+                                help="pcap files kept; older ones are overwritten (default: 5)")
+    capture_parser.add_argument("--rotate", type=int, metavar="SECONDS",
+                                help="Also start a new file every SECONDS (timestamped file names)")
+    capture_parser.add_argument("--filter", help="Capture filter expression, e.g. 'udp port 2152'")
+    capture_parser.add_argument("--dir", help="Host directory of the pcaps (default: config/captures, "
+                                              "or $NETFLUX5G_CAPTURE_DIR)")
+
+    cleanup_parser = subparsers.add_parser("cleanup", help="Remove the containers and networks of a run")
+    cleanup_target = cleanup_parser.add_mutually_exclusive_group(required=True)
+    cleanup_target.add_argument("--run-id", help="Run ID to remove")
+    cleanup_target.add_argument("--all", action="store_true", help="Remove the resources of every NetFlux5G run")
+    cleanup_target.add_argument("--snapshots", action="store_true", help="Remove all MongoDB core snapshots")
+    cleanup_parser.add_argument("--grace-period", type=float, default=10.0,
+                                help="Seconds containers get to exit after SIGTERM before they are killed")
+
+    images_parser = subparsers.add_parser("build-images",
+                                          help="Build the local router, internet-gw, data network and nettools helper images")
+    images_parser.add_argument("--force", action="store_true", help="Rebuild even if the images are up to date")
+
+    return parser
+
+
+def run_command(args):
+    """Execute the 'run' subcommand"""
+    from simulation.headless import HeadlessRunner
+
+    try:
+        runner = HeadlessRunner.from_file(
+            args.topology,
+            run_tests=not args.no_tests,
+            run_benchmark=not args.no_benchmark,
+            teardown=not args.keep,
+            run_id=args.run_id,
+            throughput_duration=args.throughput,
+            **deployment_options(args)
+        )
+    except Exception as e:
+        logging.error(f"Failed to load topology {args.topology}: {e}")
+        print(f"❌ Failed to load topology: {e}")
+        return 2
+
+    report = runner.run()
+    report["topology"] = args.topology
+    print(f"🏷️ Run ID: {report.get('run_id')}")
+
+    protocol_stats = report.get("protocol_stats")
+    if protocol_stats:
+        print(f"📊 {protocol_stats['packets']} packets in {protocol_stats['duration_s']}s: "
+              f"{sum(entry['count'] for entry in protocol_stats['ngap'].values())} NGAP, "
+              f"{sum(entry['count'] for entry in protocol_stats['pfcp']['messages'].values())} PFCP, "
+              f"{protocol_stats['gtpu']['packets']} GTP-U, "
+              f"{sum(entry['requests'] for entry in protocol_stats['sbi'].values())} SBI requests")
+
+    if args.report:
+        with open(args.report, 'w') as file:
+            json.dump(report, file, indent=2, default=str)
+        print(f"📄 Report written to {args.report}")
+
+    if report.get("success"):
+        print(f"✅ Run completed in {report['timings'].get('total_s', 0)}s")
+        return 0
+
+    print(f"❌ Run failed: {report.get('error', 'Unknown error')}")
+    return 1
+
+
+def plan_command(args):
+    """Execute the 'plan' subcommand"""
+    from models.topology import Topology
+    from simulation.capacity_planner import CapacityPlanner, format_memory
+    from simulation.enhanced_container_manager import EnhancedContainerManager
+
+    try:
+        topology = Topology.load(args.topology)
+    except Exception as e:
+        print(f"❌ Failed to load topology: {e}")
+        return 2
+
+    manager = EnhancedContainerManager()
+    if not manager.client:
+        print("❌ Docker is not available")
+        return 1
+
+    requests = manager.resource_requests(topology.components)
+    plan = CapacityPlanner(manager.session).plan(requests, allow_densify=not args.no_densify)
+    print(f"📊 {len(requests)} containers, {format_memory(plan.requested_memory)} memory limits, "
+          f"{plan.requested_cpus:.2f} estimated CPUs")
+    print(f"📊 {plan.summary()}")
+    for reason in plan.reasons:
+        print(f"   {reason}")
+
+    manager.placement_profile = args.placement
+    manager.topology_settings = topology.settings
+    placement = manager.plan_placement(topology.components)
+    print(f"📌 CPU placement: {placement.summary()}")
+    for reason in placement.reasons:
+        print(f"   {reason}")
+    return 0 if plan.admitted else 1
+
+
+def bench_dataplane_command(args):
+    """Execute the 'bench-dataplane' subcommand: one multi-network deployment per driver"""
+    from simulation.headless import HeadlessRunner
+
+    reports = {}
+    for driver in args.drivers:
+        print(f"🚀 Deploying with the {driver} data plane...")
+        try:
+            runner = HeadlessRunner.from_file(args.topology, run_tests=False, run_id=bench_run_id(args, driver),
+                                              network_mode="multi", data_plane_driver=driver,
+                                              throughput_duration=args.duration, **deployment_options(args))
+        except Exception as e:
+            print(f"❌ Failed to load topology: {e}")
+            return 2
+        reports[driver] = runner.run()
+
+    if args.report:
+        with open(args.report, 'w') as file:
+            json.dump(reports, file, indent=2, default=str)
+        print(f"📄 Report written to {args.report}")
+
+    print(f"{'driver':<10} {'direction':<10} {'UEs':>4} {'Mbit/s (avg)':>13} {'Mbit/s (sum)':>13}")
+    failed = False
+    for driver, report in reports.items():
+        results = report.get("benchmark", {}).get("throughput", [])
+        if not report.get("success") or not results:
+            print(f"{driver:<10} ❌ {report.get('error', 'no throughput results')}")
+            failed = True
+            continue
+        for direction in ("uplink", "downlink"):
+            rates = [result["throughput_mbps"] for result in results
+                     if result.get("direction") == direction and result["success"]]
+            if not rates:
+                print(f"{driver:<10} {direction:<10} {0:>4} {'-':>13} {'-':>13}")
+                failed = True
+                continue
+            print(f"{driver:<10} {direction:<10} {len(rates):>4} {sum(rates) / len(rates):>13.1f} {sum(rates):>13.1f}")
+    return 1 if failed else 0
+
+
+def bench_scaleout_command(args):
+    """Execute the 'bench-scaleout' subcommand: one deployment per instance count"""
+    from models.topology import Topology
+    from simulation.benchmark import summarize_registration, summarize_throughput
+    from simulation.headless import HeadlessRunner
+
+    reports = {}
+    for instances in args.instances:
+        try:
+            topology = Topology.load(args.topology)
+        except Exception as e:
+            print(f"❌ Failed to load topology: {e}")
+            return 2
+        scaled = [component for component in topology.components if component.component_type in args.nf]
+        if not scaled:
+            print(f"❌ The topology has no {'/'.join(args.nf)} component")
+            return 2
+        for component in scaled:
+            component.set_properties({"replicas": instances})
+
+        print(f"🚀 Deploying with {instances} instance(s) of {', '.join(args.nf)}...")
+        reports[instances] = HeadlessRunner(topology, run_tests=False, run_id=bench_run_id(args, instances),
+                                            throughput_duration=args.duration, throughput_concurrent=True,
+                                            **deployment_options(args)).run()
+
+    if args.report:
+        with open(args.report, 'w') as file:
+            json.dump(reports, file, indent=2, default=str)
+        print(f"📄 Report written to {args.report}")
+
+    print(f"{'instances':>9} {'registered':>10} {'PDU':>5} {'reg p50 s':>10} {'reg max s':>10} "
+          f"{'UL Mbit/s':>10} {'DL Mbit/s':>10}")
+    failed = False
+    for instances, report in reports.items():
+        benchmark = report.get("benchmark") or {}
+        if not report.get("success") or not benchmark:
+            print(f"{instances:>9} ❌ {report.get('error', 'no benchmark results')}")
+            failed = True
+            continue
+        registration = summarize_registration(benchmark.get("registration", []))
+        throughput = summarize_throughput(benchmark.get("throughput", []))
+
+        def cell(value, width):
+            return f"{value:>{width}}" if value is not None else f"{'-':>{width}}"
+
+        print(f"{instances:>9} {registration['registrations']:>10} {registration['pdu_sessions']:>5} "
+              f"{cell(registration['registration_p50_s'], 10)} {cell(registration['registration_max_s'], 10)} "
+              f"{cell(throughput['uplink']['sum_mbps'], 10)} {cell(throughput['downlink']['sum_mbps'], 10)}")
+    return 1 if failed else 0
+
+
+def bench_slices_command(args):
+    """Execute the 'bench-slices' subcommand: slice isolation under load"""
+    from simulation.headless import HeadlessRunner
+
+    try:
+        runner = HeadlessRunner.from_file(args.topology, run_tests=False, run_id=args.run_id,
+                                          slice_isolation_duration=args.duration, **deployment_options(args))
+    except Exception as e:
+        print(f"❌ Failed to load topology: {e}")
+        return 2
+    report = runner.run()
+
+    if args.report:
+        with open(args.report, 'w') as file:
+            json.dump(report, file, indent=2, default=str)
+        print(f"📄 Report written to {args.report}")
+
+    isolation = (report.get("benchmark") or {}).get("slice_isolation")
+    if not report.get("success") or not isolation or isolation["error"]:
+        print(f"❌ {report.get('error') or (isolation or {}).get('error') or 'no slice isolation results'}")
+        return 1
+
+    def cell(value, width, suffix=""):
+        return f"{value:>{width - len(suffix)}}{suffix}" if value is not None else f"{'-':>{width}}"
+
+    print(f"{'saturated':<20} {'load Mbit/s':>11} {'slice':<20} {'Mbit/s':>8} {'change':>8} {'RTT ms':>8} {'change':>8}")
+    for name, result in isolation["baseline"].items():
+        print(f"{'(none)':<20} {'-':>11} {name:<20} {cell(result['throughput_mbps'], 8)} {'-':>8} "
+              f"{cell(result.get('rtt_avg_ms'), 8)} {'-':>8}")
+    for run in isolation["saturated"]:
+        for name, result in run["others"].items():
+            print(f"{run['slice']:<20} {run['load_mbps']:>11} {name:<20} {cell(result['throughput_mbps'], 8)} "
+                  f"{cell(result['throughput_change_pct'], 8, '%')} {cell(result.get('rtt_avg_ms'), 8)} "
+                  f"{cell(result['rtt_change_pct'], 8, '%')}")
+    return 0
+
+
+def capture_command(args):
+    """Execute the 'capture' subcommand on the containers of a running run"""
+    from simulation.enhanced_container_manager import EnhancedContainerManager
+    from simulation.namespace import RunNamespace
+
+    manager = EnhancedContainerManager(namespace=RunNamespace(args.run_id))
+    if not manager.client:
+        print("❌ Docker is not available")
+        return 1
+    manager.capture_dir = args.dir
+
+    if args.action == "start":
+        if not args.target:
+            print("❌ capture start needs a target container")
+            return 2
+        capture = manager.start_capture(args.target, reference_point=args.reference_point,
+                                        interface=args.interface, file_size_mb=args.size,
+                                        file_count=args.files, rotate_s=args.rotate, bpf_filter=args.filter)
+        return 0 if capture else 1
+
+    if args.action == "stop":
+        stopped = manager.stop_capture(args.target)
+        if not stopped:
+            print("No capture running")
+        return 0
+
+    captures = manager.list_captures()
+    if not captures:
+        print("No captures")
+    for capture in captures:
+        print(f"{capture['id']:<30} {capture['status']:<8} {len(capture['files']):>3} files "
+              f"{capture['bytes'] / 1e6:>8.1f} MB")
+        for file in capture['files']:
+            print(f"    {file}")
+    return 0
+
+
+def cleanup_command(args):
+    """Execute the 'cleanup' subcommand (label-based, never touches other resources)"""
+    from simulation.engine_session import get_session
+    from simulation.teardown import format_report, teardown_run
+
+    client = get_session().client
+    if client is None:
+        print("❌ Docker is not available")
+        return 1
+
+    if args.snapshots:
+        from simulation.core_snapshot import CoreSnapshotStore
+        removed = CoreSnapshotStore(client).remove_all()
+        print(f"🧹 Removed {len(removed)} core snapshots")
+        return 0
+
+    report = teardown_run(client, None if args.all else args.run_id,
+                          grace_period=args.grace_period, session=get_session())
+    print(f"🧹 Removed {format_report(report)}")
+    return 1 if report["failed"] else 0
+
+
+def build_images_command(args):
+    """Execute the 'build-images' subcommand"""
+    from simulation.enhanced_container_manager import EnhancedContainerManager
+
+    manager = EnhancedContainerManager()
+    if not manager.client:
+        print("❌ Docker is not available")
+        return 1
+
+    results = manager.prepare_helper_images(force=args.force)
+    for name, built in results.items():
+        print(f"{'✅' if built else '❌'} {manager.network_config[name]['image']}")
+    return 0 if all(results.values()) else 1
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        return run_command(args)
+    if args.command == "plan":
+        return plan_command(args)
+    if args.command == "cleanup":
+        return cleanup_command(args)
+    if args.command == "build-images":
+        return build_images_command(args)
+    if args.command == "bench-dataplane":
+        return bench_dataplane_command(args)
+    if args.command == "bench-scaleout":
+        return bench_scaleout_command(args)
+    if args.command == "bench-slices":
+        return bench_slices_command(args)
+    if args.command == "capture":
+        return capture_command(args)
+
+    parser.print_help()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
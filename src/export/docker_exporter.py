@@ -126,6 +126,14 @@ class DockerExporter:
                         f"DEFAULT_GW={component.properties.get('default_gw', '')}"
                     ]
 
+            elif component.component_type == "dn":
+                from simulation.data_network import DEFAULT_DOMAIN, render_service_script
+
+                # Image built by "netflux5g build-images"
+                service["image"] = "netflux5g/dn:latest"
+                service["command"] = ["sh", "-c", render_service_script(
+                    service_name, component.properties.get("dns_domain", DEFAULT_DOMAIN))]
+
             elif component.component_type == "controller":
                 controller_type = component.properties.get("controller_type", "ODL")
 
@@ -3,9 +3,9 @@ from PyQt5.QtWidgets import (QGraphicsView, QGraphicsScene, QGraphicsItem,
 from PyQt5.QtCore import Qt, QPointF, QRectF
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor
 
-import json
-import yaml
 from models.network_component import NetworkComponent
+from models.network_link import NetworkLink
+from utils.project_io import load_project_data, save_project_data
 
 class NetworkCanvas(QGraphicsView):
     def __init__(self, parent=None):
@@ -25,6 +25,9 @@ class NetworkCanvas(QGraphicsView):
         self.links = []
         self.connections = []  # Initialize the connections list
 
+        # Topology-wide options saved with the project (e.g. placement profile)
+        self.settings = {}
+
         # Selection mode
         self.current_mode = "select"  # "select", "add_component", "add_link"
         self.current_component_type = None
@@ -95,6 +98,7 @@ class NetworkCanvas(QGraphicsView):
         self.components.clear()
         self.links.clear()
         self.connections.clear()  # Clear connections
+        self.settings.clear()
         self.draw_grid()
 
     def add_connection(self, connection):
@@ -113,88 +117,94 @@ class NetworkCanvas(QGraphicsView):
         """Return all connections in the canvas"""
         return self.connections
 
-    def save_to_file(self, filename):
+    def save_to_file(self, filename, compact=False):
+        # Sections are generators so JSON projects are streamed to disk
+        # instead of building the whole document in memory
         data = {
-            "components": [],
-            "links": [],
-            "connections": []  # Include connections in the saved data
+            "components": (
+                {
+                    "id": component.component_id,
+                    "type": component.component_type,
+                    "x": component.pos().x(),
+                    "y": component.pos().y(),
+                    "properties": dict(component.get_properties())
+                }
+                for component in self.components
+            ),
+            "links": (
+                {
+                    "source_id": link.source.component_id,
+                    "target_id": link.target.component_id,
+                    "properties": link.get_properties()
+                }
+                for link in self.links
+            ),
+            # Include connections in the saved data
+            "connections": (
+                {
+                    "source_id": conn.source_component.id,
+                    "target_id": conn.target_component.id,
+                    "properties": conn.get_properties() if hasattr(conn, 'get_properties') else {}
+                }
+                for conn in self.connections
+            ),
+            "settings": dict(self.settings)
         }
 
-        # Save components
-        for component in self.components:
-            component_data = {
-                "id": component.component_id,
-                "type": component.component_type,
-                "x": component.pos().x(),
-                "y": component.pos().y(),
-                "properties": component.get_properties()
-            }
-            data["components"].append(component_data)
-
-        # Save links
-        for link in self.links:
-            link_data = {
-                "source_id": link.source.component_id,
-                "target_id": link.target.component_id,
-                "properties": link.get_properties()
-            }
-            data["links"].append(link_data)
-
-        # Save connections
-        for conn in self.connections:
-            conn_data = {
-                "source_id": conn.source_component.id,
-                "target_id": conn.target_component.id,
-                "properties": conn.get_properties() if hasattr(conn, 'get_properties') else {}
-            }
-            data["connections"].append(conn_data)
-
-        # Save to file
-        with open(filename, 'w') as file:
-            if filename.endswith('.json'):
-                json.dump(data, file, indent=2)
-            else:
-                yaml.dump(data, file)
+        # Save to file (compact: repeated component properties stored as shared
+        # profiles, which needs all components in memory instead of streaming them)
+        save_project_data(data, filename, compact=compact)
 
     def load_from_file(self, filename):
         # Clear existing network
         self.clear()
 
         # Load from file
-        with open(filename, 'r') as file:
-            if filename.endswith('.json'):
-                data = json.load(file)
-            else:
-                data = yaml.safe_load(file)
+        data = load_project_data(filename)
+        self.settings = dict(data.get("settings") or {})
 
         # Process components
         component_map = {}  # Map component_id to component object
         from models.component_factory import ComponentFactory
+        from models.network_link import NetworkLink
         factory = ComponentFactory()
 
-        for component_data in data.get("components", []):
-            component_type = component_data.get("type")
-            pos = QPointF(component_data.get("x", 0), component_data.get("y", 0))
-
-            component = factory.create_component(component_type, pos)
-            if component:
-                component.component_id = component_data.get("id")
-                component.set_properties(component_data.get("properties", {}))
-                self.scene.addItem(component)
-                self.components.append(component)
-                component_map[component.component_id] = component
-
-        # Process links
-        for link_data in data.get("links", []):
-            source_id = link_data.get("source_id")
-            target_id = link_data.get("target_id")
-
-            if source_id in component_map and target_id in component_map:
-                source = component_map[source_id]
-                target = component_map[target_id]
-
-                link = self.add_link(source, target)
-                link.set_properties(link_data.get("properties", {}))
+        # Bulk load: without a BSP index and repaints each addItem is cheap;
+        # the index is built once at the end
+        self.setUpdatesEnabled(False)
+        self.scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+        try:
+            for component_data in data.get("components", []):
+                component_type = component_data.get("type")
+                pos = QPointF(component_data.get("x", 0), component_data.get("y", 0))
+
+                component = factory.create_component(component_type, pos)
+                if component:
+                    component.component_id = component_data.get("id")
+                    component.set_properties(component_data.get("properties", {}))
+                    self.scene.addItem(component)
+                    self.components.append(component)
+                    component_map[component.component_id] = component
+
+            # Process links
+            for link_data in data.get("links", []):
+                source_id = link_data.get("source_id")
+                target_id = link_data.get("target_id")
+
+                if source_id in component_map and target_id in component_map:
+                    source = component_map[source_id]
+                    target = component_map[target_id]
+
+                    link = NetworkLink(source, target)
+                    link.set_properties(link_data.get("properties", {}))
+                    source.add_link(link)
+                    target.add_link(link)
+                    self.scene.addItem(link)
+                    self.links.append(link)
+        finally:
+            self.scene.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+            self.setUpdatesEnabled(True)
+            self.viewport().update()
 
         # Process connections
         for conn_data in data.get("connections", []):
@@ -276,10 +286,18 @@ class NetworkCanvas(QGraphicsView):
             menu.addAction("Edit Properties").triggered.connect(
                 lambda: self.parent().property_panel.edit_component(item)
             )
+            # tcpdump on the component's container while simulating
+            if getattr(self.parent(), 'current_simulator', None):
+                self.parent().add_capture_menu(menu, item)
             menu.addSeparator()
             menu.addAction("Delete").triggered.connect(
                 lambda: self.delete_component(item)
             )
+        elif item and isinstance(item, NetworkLink):
+            # Link bandwidth/delay/jitter/loss (applied live while simulating)
+            menu.addAction("Edit Link Properties").triggered.connect(
+                lambda: self.parent().property_panel.edit_link(item)
+            )
         else:
             # Canvas menu
             menu.addAction("Paste").triggered.connect(self.paste_component)
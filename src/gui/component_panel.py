@@ -81,6 +81,9 @@ class ComponentPanel(QWidget):
         host_item = QTreeWidgetItem(network_category, ["Host"])
         host_item.setData(0, Qt.UserRole, "host")
 
+        dn_item = QTreeWidgetItem(network_category, ["Data Network"])
+        dn_item.setData(0, Qt.UserRole, "dn")
+
         controller_item = QTreeWidgetItem(network_category, ["SDN Controller"])
         controller_item.setData(0, Qt.UserRole, "controller")
 
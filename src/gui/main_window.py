@@ -1,10 +1,11 @@
 from PyQt5.QtWidgets import (QMainWindow, QAction, QFileDialog, QDockWidget,
                             QToolBar, QMessageBox, QVBoxLayout, QWidget, QMenu,
                             QDialog, QTextEdit, QTabWidget, QLabel, QGridLayout,
-                            QPushButton)
+                            QPushButton, QActionGroup)
 from PyQt5.QtCore import Qt, QSettings, QUrl
 from PyQt5.QtGui import QIcon
 import logging
+import sys
 import traceback
 
 try:
@@ -12,14 +13,24 @@ try:
     from .component_panel import ComponentPanel
     from .property_panel import PropertyPanel
     from .toolbar import TemplateToolBar
-    from .terminal_dialog import TerminalDialog
-    from simulation.simulator import NetworkSimulator
-    from simulation.enhanced_container_manager import EnhancedContainerManager
     import logging
 except ImportError as e:
     logging.error(f"Import error in main_window: {e}")
     raise
 
+# CPU placement profiles offered in the Simulation menu (see simulation/placement.py)
+PLACEMENT_PROFILES = (("dense", "Dense (Shared Cores)"),
+                      ("performance", "Performance (Dedicated User-Plane Cores)"))
+
+# Project formats: YAML (.nfx), JSON, and gzip/zstd compressed variants
+PROJECT_FILE_FILTER = ("NetFlux5G Files (*.nfx *.json);;"
+                       "Compressed NetFlux5G Files (*.nfx.gz *.nfx.zst *.json.gz *.json.zst);;"
+                       "All Files (*)")
+
+# Save only: the compact format (shared property profiles, see project_profiles.py) is opt-in
+COMPACT_FILE_FILTER = "Compact NetFlux5G Files (*.nfx *.json *.nfx.gz *.nfx.zst *.json.gz *.json.zst)"
+PROJECT_SAVE_FILTER = PROJECT_FILE_FILTER.replace(";;All Files", f";;{COMPACT_FILE_FILTER};;All Files")
+
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -111,6 +122,33 @@ class MainWindow(QMainWindow):
         self.show_terminal_action.triggered.connect(self.show_container_terminals)
         self.show_terminal_action.setEnabled(False)
         
+        self.warm_pool_action = QAction("Use Warm Container Pool", self)
+        self.warm_pool_action.setCheckable(True)
+        self.warm_pool_action.setStatusTip("Keep idle NF containers ready so redeploys start almost instantly")
+        self.warm_pool_action.toggled.connect(self.toggle_warm_pool)
+        
+        # CPU placement profile, saved with the project
+        self.placement_group = QActionGroup(self)
+        self.placement_actions = {}
+        for profile, label in PLACEMENT_PROFILES:
+            action = QAction(label, self, checkable=True)
+            action.triggered.connect(lambda checked, profile=profile: self.set_placement_profile(profile))
+            self.placement_group.addAction(action)
+            self.placement_actions[profile] = action
+        self.placement_actions["dense"].setChecked(True)
+        
+        # One network per 5G reference point instead of a single bridge, saved with the project
+        self.multi_network_action = QAction("Separate Reference-Point Networks", self)
+        self.multi_network_action.setCheckable(True)
+        self.multi_network_action.setStatusTip("Put N2, N3, N4, N6, SBI and the radio link on their own Docker networks")
+        self.multi_network_action.triggered.connect(self.set_multi_network)
+        
+        # NGAP/PFCP/GTP-U/SBI statistics from tcpdump on the core NFs, saved with the project
+        self.protocol_stats_action = QAction("Protocol Statistics", self)
+        self.protocol_stats_action.setCheckable(True)
+        self.protocol_stats_action.setStatusTip("Count NGAP/PFCP/GTP-U/SBI messages per second and show them in the results")
+        self.protocol_stats_action.triggered.connect(self.set_protocol_stats)
+        
         # Template actions
         self.load_5g_core_template = QAction("5G Core Test", self)
         self.load_5g_core_template.triggered.connect(lambda: self.load_template("5g_core_test"))
@@ -151,6 +189,13 @@ class MainWindow(QMainWindow):
         self.simulation_menu.addAction(self.stop_simulation_action)
         self.simulation_menu.addSeparator()
         self.simulation_menu.addAction(self.show_terminal_action)
+        self.simulation_menu.addSeparator()
+        self.simulation_menu.addAction(self.warm_pool_action)
+        self.placement_menu = self.simulation_menu.addMenu("CPU &Placement")
+        for action in self.placement_actions.values():
+            self.placement_menu.addAction(action)
+        self.simulation_menu.addAction(self.multi_network_action)
+        self.simulation_menu.addAction(self.protocol_stats_action)
 
         # Help menu
         self.help_menu = self.menuBar().addMenu("&Help")
@@ -182,9 +227,23 @@ class MainWindow(QMainWindow):
         if state:
             self.restoreState(state)
 
+        self.warm_pool_action.setChecked(self.settings.value("simulation/warmPool", False, type=bool))
+
     def closeEvent(self, event):
         self.settings.setValue("geometry", self.saveGeometry())
         self.settings.setValue("windowState", self.saveState())
+        self.settings.setValue("simulation/warmPool", self.warm_pool_action.isChecked())
+
+        # Remove idle warm pool containers before the Docker connection goes away
+        warm_pool = sys.modules.get("simulation.warm_pool")
+        if warm_pool:
+            warm_pool.close_warm_pool()
+
+        # Close the shared Docker connection if a simulation ever opened one
+        engine_session = sys.modules.get("simulation.engine_session")
+        if engine_session:
+            engine_session.close_session()
+
         super().closeEvent(event)
 
     # Action handlers
@@ -194,24 +253,26 @@ class MainWindow(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.canvas.clear()
+            self.sync_placement_actions()
             self.statusBar().showMessage("New project created", 3000)
 
     def open_project(self):
         filename, _ = QFileDialog.getOpenFileName(self, "Open Project", "", 
-                                                 "NetFlux5G Files (*.nfx);;All Files (*)")
+                                                 PROJECT_FILE_FILTER)
         if filename:
             try:
                 self.canvas.load_from_file(filename)
+                self.sync_placement_actions()
                 self.statusBar().showMessage(f"Opened {filename}", 3000)
             except Exception as e:
                 QMessageBox.critical(self, "Open Error", f"Failed to open project: {str(e)}")
 
     def save_project(self):
-        filename, _ = QFileDialog.getSaveFileName(self, "Save Project", "", 
-                                                 "NetFlux5G Files (*.nfx);;All Files (*)")
+        filename, selected_filter = QFileDialog.getSaveFileName(self, "Save Project", "", 
+                                                                PROJECT_SAVE_FILTER)
         if filename:
             try:
-                self.canvas.save_to_file(filename)
+                self.canvas.save_to_file(filename, compact=selected_filter == COMPACT_FILE_FILTER)
                 self.statusBar().showMessage(f"Saved to {filename}", 3000)
             except Exception as e:
                 QMessageBox.critical(self, "Save Error", f"Failed to save project: {str(e)}")
@@ -250,6 +311,7 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.Yes:
             try:
+                from simulation.simulator import NetworkSimulator
                 simulator = NetworkSimulator(self.canvas)
                 result = simulator.load_template(template_name)
                 if result:
@@ -275,7 +337,13 @@ class MainWindow(QMainWindow):
                 else:
                     return
 
-            self.current_simulator = NetworkSimulator(self.canvas)
+            # The simulation stack (and docker) is only loaded on first use
+            from simulation.simulator import NetworkSimulator
+            warm_pool = None
+            if self.warm_pool_action.isChecked():
+                from simulation.warm_pool import get_warm_pool
+                warm_pool = get_warm_pool()
+            self.current_simulator = NetworkSimulator(self.canvas, warm_pool=warm_pool)
             
             # Update UI
             self.update_ui_for_simulation_state(running=True)
@@ -310,6 +378,38 @@ class MainWindow(QMainWindow):
             self.current_simulator = None
             QMessageBox.critical(self, "Simulation Error", f"Failed to run simulation: {str(e)}")
 
+    def toggle_warm_pool(self, enabled):
+        """Drain the warm pool when it is switched off (it fills on the next run when on)"""
+        if not enabled:
+            warm_pool = sys.modules.get("simulation.warm_pool")
+            if warm_pool:
+                warm_pool.close_warm_pool()
+                self.statusBar().showMessage("Warm container pool drained", 3000)
+
+    def set_placement_profile(self, profile):
+        """Store the CPU placement profile in the project settings"""
+        self.canvas.settings["placement"] = profile
+        self.statusBar().showMessage(f"CPU placement: {profile} (applies to the next simulation)", 3000)
+
+    def sync_placement_actions(self):
+        """Check the placement profile and network mode of the loaded project"""
+        profile = self.canvas.settings.get("placement", "dense")
+        self.placement_actions.get(profile, self.placement_actions["dense"]).setChecked(True)
+        self.multi_network_action.setChecked(self.canvas.settings.get("network_mode") == "multi")
+        self.protocol_stats_action.setChecked(bool(self.canvas.settings.get("protocol_stats")))
+
+    def set_multi_network(self, enabled):
+        """Store the network mode in the project settings"""
+        self.canvas.settings["network_mode"] = "multi" if enabled else "flat"
+        mode = "one network per reference point" if enabled else "one flat network"
+        self.statusBar().showMessage(f"Networks: {mode} (applies to the next simulation)", 3000)
+
+    def set_protocol_stats(self, enabled):
+        """Store whether protocol statistics are collected in the project settings"""
+        self.canvas.settings["protocol_stats"] = enabled
+        state = "on" if enabled else "off"
+        self.statusBar().showMessage(f"Protocol statistics: {state} (applies to the next simulation)", 3000)
+
     def stop_simulation(self):
         """Stop the current simulation"""
         if self.current_simulator:
@@ -437,6 +537,67 @@ class MainWindow(QMainWindow):
             perf_tab.setLayout(perf_layout)
             tabs.addTab(perf_tab, "Performance")
         
+        # Protocol statistics tab
+        if 'protocol_stats' in simulation_data:
+            proto_tab = QWidget()
+            proto_layout = QVBoxLayout()
+            proto_text = QTextEdit()
+            proto_text.setReadOnly(True)
+            
+            stats = simulation_data['protocol_stats']
+            proto_content = "<h2>Protocol Statistics</h2>"
+            proto_content += f"<p><b>Packets:</b> {stats['packets']} in {stats['duration_s']}s " \
+                             f"from {stats.get('vantage_points', 0)} core NFs</p>"
+            
+            proto_content += "<h3>SBI (HTTP/2) per Server</h3>"
+            proto_content += "<table border='1'><tr><th>Server</th><th>Requests</th><th>Rate/s</th><th>Peak/s</th>" \
+                             "<th>p50 ms</th><th>p95 ms</th><th>Status</th></tr>"
+            for server, sbi in stats['sbi'].items():
+                status = ", ".join(f"{code}: {count}" for code, count in sbi['status'].items())
+                proto_content += f"<tr><td>{server}</td><td>{sbi['requests']}</td><td>{sbi['rate_per_s']}</td>" \
+                                 f"<td>{sbi['peak_per_s']}</td><td>{sbi['p50_ms']}</td><td>{sbi['p95_ms']}</td>" \
+                                 f"<td>{status}</td></tr>"
+            proto_content += "</table>"
+            
+            proto_content += "<h3>NGAP Procedures</h3>"
+            proto_content += "<table border='1'><tr><th>Procedure</th><th>Messages</th><th>Peak/s</th></tr>"
+            for name, entry in stats['ngap'].items():
+                proto_content += f"<tr><td>{name}</td><td>{entry['count']}</td><td>{entry['peak_per_s']}</td></tr>"
+            proto_content += "</table>"
+            
+            proto_content += "<h3>PFCP Messages</h3>"
+            proto_content += "<table border='1'><tr><th>Message</th><th>Count</th><th>Peak/s</th></tr>"
+            for name, entry in stats['pfcp']['messages'].items():
+                proto_content += f"<tr><td>{name}</td><td>{entry['count']}</td><td>{entry['peak_per_s']}</td></tr>"
+            proto_content += "</table>"
+            proto_content += "<table border='1'><tr><th>Procedure</th><th>p50 ms</th><th>p95 ms</th><th>max ms</th></tr>"
+            for name, latency in stats['pfcp']['latency'].items():
+                proto_content += f"<tr><td>{name}</td><td>{latency['p50_ms']}</td><td>{latency['p95_ms']}</td>" \
+                                 f"<td>{latency['max_ms']}</td></tr>"
+            proto_content += "</table>"
+            
+            gtpu = stats['gtpu']
+            proto_content += "<h3>GTP-U</h3>"
+            proto_content += f"<p><b>Packets:</b> {gtpu['packets']} ({gtpu['bytes']} bytes, " \
+                             f"peak {gtpu['peak_packets_per_s']}/s) on {gtpu['teid_count']} TEIDs</p>"
+            proto_content += "<table border='1'><tr><th>TEID</th><th>Packets</th><th>Bytes</th></tr>"
+            for teid, entry in gtpu['teids'].items():
+                proto_content += f"<tr><td>{teid}</td><td>{entry['packets']}</td><td>{entry['bytes']}</td></tr>"
+            proto_content += "</table>"
+            
+            proto_content += "<h3>Messages per Second</h3>"
+            proto_content += "<table border='1'><tr><th>Second</th><th>NGAP</th><th>PFCP</th><th>SBI</th>" \
+                             "<th>GTP-U packets</th></tr>"
+            for second in stats['timeline']:
+                proto_content += f"<tr><td>{second['t']}</td><td>{second['ngap']}</td><td>{second['pfcp']}</td>" \
+                                 f"<td>{second['sbi']}</td><td>{second['gtpu_packets']}</td></tr>"
+            proto_content += "</table>"
+            
+            proto_text.setHtml(proto_content)
+            proto_layout.addWidget(proto_text)
+            proto_tab.setLayout(proto_layout)
+            tabs.addTab(proto_tab, "Protocols")
+        
         # Raw data tab
         raw_tab = QWidget()
         raw_layout = QVBoxLayout()
@@ -492,6 +653,46 @@ class MainWindow(QMainWindow):
             QMessageBox.information(self, "No Simulation", 
                                   "Please run a simulation first to access container terminals.")
 
+    def add_capture_menu(self, menu, component):
+        """Packet capture submenu of a deployed component (canvas context menu)"""
+        name, reference_points = self.current_simulator.container_manager.capture_targets(component)
+        capture_menu = menu.addMenu("Packet Capture")
+        capture_menu.addAction("Start on All Interfaces").triggered.connect(
+            lambda: self.start_packet_capture(name)
+        )
+        # One interface per reference-point network in multi-network mode
+        for reference_point in reference_points:
+            capture_menu.addAction(f"Start on {reference_point.upper()}").triggered.connect(
+                lambda checked=False, ref=reference_point: self.start_packet_capture(name, ref)
+            )
+        capture_menu.addSeparator()
+        capture_menu.addAction("Stop Capture").triggered.connect(
+            lambda: self.stop_packet_capture(name)
+        )
+
+    def start_packet_capture(self, name, reference_point=None):
+        """Start a ring-buffer capture on a container of the running simulation"""
+        if not self.current_simulator:
+            return
+        capture = self.current_simulator.container_manager.start_capture(name, reference_point=reference_point)
+        if capture:
+            self.statusBar().showMessage(
+                f"Capturing {name} ({capture['interface']}) to {capture['directory']}", 5000)
+        else:
+            QMessageBox.warning(self, "Capture Error", f"Failed to start a packet capture on {name}")
+
+    def stop_packet_capture(self, name):
+        """Stop the captures of a container and show where the pcaps are"""
+        if not self.current_simulator:
+            return
+        manager = self.current_simulator.container_manager
+        stopped = manager.stop_capture(name)
+        if stopped:
+            self.statusBar().showMessage(
+                f"Stopped {len(stopped)} capture(s) on {name}; pcaps in {manager.capture_directory}", 5000)
+        else:
+            self.statusBar().showMessage(f"No capture running on {name}", 3000)
+
     def update_ui_for_simulation_state(self, running=False):
         """Update UI elements based on simulation state"""
         self.simulate_action.setEnabled(not running)
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QFormLayout, QLineEdit,
                             QComboBox, QSpinBox, QPushButton, QLabel,
-                            QScrollArea, QGroupBox)
+                            QScrollArea, QGroupBox, QDoubleSpinBox)
 from PyQt5.QtCore import Qt
 
 class PropertyPanel(QWidget):
@@ -129,6 +129,14 @@ class PropertyPanel(QWidget):
             self.property_widgets["tac"] = tac
             specific_layout.addRow("TAC:", tac)
 
+            # 0 lets the deployment pick the next free gNB ID
+            gnb_id = QSpinBox()
+            gnb_id.setRange(0, 65535)
+            gnb_id.setSpecialValueText("Auto")
+            gnb_id.setValue(int(properties.get("gnb_id", 0) or 0))
+            self.property_widgets["gnb_id"] = gnb_id
+            specific_layout.addRow("gNB ID:", gnb_id)
+
             frequency = QComboBox()
             frequency.addItems(["FR1", "FR2"])
             frequency.setCurrentText(properties.get("frequency", "FR1"))
@@ -177,6 +185,12 @@ class PropertyPanel(QWidget):
             self.property_widgets["default_gw"] = default_gw
             specific_layout.addRow("Default Gateway:", default_gw)
 
+        elif component.component_type == "dn":
+            # Local data network: DNS zone answered with its address
+            dns_domain = QLineEdit(properties.get("dns_domain", "netflux5g.local"))
+            self.property_widgets["dns_domain"] = dns_domain
+            specific_layout.addRow("DNS Domain:", dns_domain)
+
         elif component.component_type == "controller":
             # Controller specific properties
             controller_type = QComboBox()
@@ -191,6 +205,31 @@ class PropertyPanel(QWidget):
             self.property_widgets["port"] = port
             specific_layout.addRow("Port:", port)
 
+        if component.component_type in ("smf", "upf", "ue"):
+            # Network slice (S-NSSAI and DNN) this component serves or uses
+            sst = QSpinBox()
+            sst.setRange(1, 255)
+            sst.setValue(int(properties.get("sst", 1)))
+            self.property_widgets["sst"] = sst
+            specific_layout.addRow("Slice SST:", sst)
+
+            sd = QLineEdit(str(properties.get("sd", "010203")))
+            sd.setPlaceholderText("none")
+            self.property_widgets["sd"] = sd
+            specific_layout.addRow("Slice SD (hex):", sd)
+
+            dnn = QLineEdit(properties.get("dnn", "internet"))
+            self.property_widgets["dnn"] = dnn
+            specific_layout.addRow("DNN:", dnn)
+
+        if component.component_type in ("amf", "smf", "upf"):
+            # Identical instances deployed for this component
+            replicas = QSpinBox()
+            replicas.setRange(1, 16)
+            replicas.setValue(int(properties.get("replicas", 1)))
+            self.property_widgets["replicas"] = replicas
+            specific_layout.addRow("Instances:", replicas)
+
         # Add the specific group to main layout if it has any rows
         if specific_layout.rowCount() > 0:
             specific_group.setLayout(specific_layout)
@@ -201,6 +240,49 @@ class PropertyPanel(QWidget):
         # Enable the apply button
         self.apply_button.setEnabled(True)
 
+    def edit_link(self, link):
+        self.current_component = link
+        source_name = link.source.get_properties().get("name", link.source.component_type)
+        target_name = link.target.get_properties().get("name", link.target.component_type)
+        self.title_label.setText(f"Link: {source_name} - {target_name}")
+
+        self.clear_properties()
+
+        properties = link.get_properties()
+
+        # Emulated with tc on the container interfaces (0 = unlimited / none)
+        link_group = QGroupBox("Link Emulation")
+        link_layout = QFormLayout(link_group)
+
+        bandwidth = QSpinBox()
+        bandwidth.setRange(0, 100000)
+        bandwidth.setSpecialValueText("Unlimited")
+        bandwidth.setValue(int(float(properties.get("bandwidth", 0) or 0)))
+        self.property_widgets["bandwidth"] = bandwidth
+        link_layout.addRow("Bandwidth (Mbit/s):", bandwidth)
+
+        delay = QDoubleSpinBox()
+        delay.setRange(0, 10000)
+        delay.setValue(float(properties.get("delay", 0) or 0))
+        self.property_widgets["delay"] = delay
+        link_layout.addRow("Delay (ms):", delay)
+
+        jitter = QDoubleSpinBox()
+        jitter.setRange(0, 10000)
+        jitter.setValue(float(properties.get("jitter", 0) or 0))
+        self.property_widgets["jitter"] = jitter
+        link_layout.addRow("Jitter (ms):", jitter)
+
+        loss = QDoubleSpinBox()
+        loss.setRange(0, 100)
+        loss.setDecimals(3)
+        loss.setValue(float(properties.get("loss", 0) or 0))
+        self.property_widgets["loss"] = loss
+        link_layout.addRow("Loss (%):", loss)
+
+        self.property_layout.addRow(link_group)
+        self.apply_button.setEnabled(True)
+
     def apply_properties(self):
         if not self.current_component:
             return
@@ -210,7 +292,7 @@ class PropertyPanel(QWidget):
         for key, widget in self.property_widgets.items():
             if isinstance(widget, QLineEdit):
                 properties[key] = widget.text()
-            elif isinstance(widget, QSpinBox):
+            elif isinstance(widget, (QSpinBox, QDoubleSpinBox)):
                 properties[key] = widget.value()
             elif isinstance(widget, QComboBox):
                 properties[key] = widget.currentText()
@@ -1,9 +1,14 @@
 #!/usr/bin/env python3
 import sys
+
+# --profile-startup: time every import from here on and each startup phase
+if "--profile-startup" in sys.argv:
+    sys.argv.remove("--profile-startup")
+    from utils.startup_profiler import start_profiler
+    start_profiler()
+
 import traceback
 import logging
-from PyQt5.QtWidgets import QApplication, QMessageBox
-from PyQt5.QtCore import Qt
 
 # Setup logging
 logging.basicConfig(
@@ -24,24 +29,43 @@ def handle_exception(exc_type, exc_value, exc_traceback):
     logging.critical("Uncaught exception", exc_info=(exc_type, exc_value, exc_traceback))
     
     # Show error dialog
+    from PyQt5.QtWidgets import QApplication, QMessageBox
     if QApplication.instance():
         QMessageBox.critical(None, "Critical Error", 
                            f"An unexpected error occurred:\n{exc_type.__name__}: {exc_value}")
 
 def main():
+    # Headless commands never import PyQt5
+    from cli import COMMANDS
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        from cli import main as cli_main
+        from utils.startup_profiler import get_profiler
+        profiler = get_profiler()
+        if profiler:
+            profiler.mark("CLI command start")
+            print(profiler.report())
+        return cli_main(sys.argv[1:])
+
+    from utils.startup_profiler import phase, report_on_first_paint
+
+    with phase("import PyQt5"):
+        from PyQt5.QtWidgets import QApplication, QMessageBox
+
     # Set exception handler
     sys.excepthook = handle_exception
     
     try:
         logging.info("Starting NetFlux5G application...")
         
-        app = QApplication(sys.argv)
-        app.setApplicationName("NetFlux5G")
-        app.setOrganizationName("NetFlux")
+        with phase("create QApplication"):
+            app = QApplication(sys.argv)
+            app.setApplicationName("NetFlux5G")
+            app.setOrganizationName("NetFlux")
         
         # Check for required modules
         try:
-            from gui.main_window import MainWindow
+            with phase("import gui.main_window"):
+                from gui.main_window import MainWindow
         except ImportError as e:
             logging.error(f"Failed to import MainWindow: {e}")
             QMessageBox.critical(None, "Import Error", 
@@ -49,8 +73,11 @@ def main():
             return 1
         
         logging.info("Creating main window...")
-        window = MainWindow()
-        window.show()
+        with phase("create MainWindow"):
+            window = MainWindow()
+        with phase("show MainWindow"):
+            window.show()
+        report_on_first_paint(window)
         
         logging.info("Application started successfully")
         return app.exec_()
@@ -0,0 +1,142 @@
+"""
+Qt-free component type definitions shared by the GUI and the headless engine
+"""
+
+import os
+from types import MappingProxyType
+
+# Component type to RGB colour mapping
+COMPONENT_COLORS = {
+    # 5G Core
+    "amf": (100, 200, 255),  # Light blue
+    "smf": (100, 230, 255),
+    "upf": (100, 255, 255),
+    "pcf": (150, 200, 255),
+    "udm": (150, 230, 255),
+    "ausf": (150, 255, 255),
+    "nrf": (200, 200, 255),
+
+    # RAN
+    "gnb": (100, 255, 100),  # Light green
+    "ue": (150, 255, 150),
+
+    # Network
+    "switch": (255, 200, 100),  # Light orange
+    "router": (255, 150, 100),
+    "host": (255, 255, 100),  # Light yellow
+    "dn": (255, 230, 150),
+    "controller": (255, 100, 100),  # Light red
+}
+
+# Component type to icon file mapping (relative to the icons directory)
+COMPONENT_ICON_FILES = {
+    # 5G Core
+    "amf": "5G core.png",
+    "smf": "5G core.png",
+    "upf": "5G core.png",
+    "pcf": "5G core.png",
+    "udm": "5G core.png",
+    "ausf": "5G core.png",
+    "nrf": "5G core.png",
+
+    # RAN
+    "gnb": "gNB.png",
+    "ue": "ue.png",
+
+    # Network
+    "switch": "switch.png",
+    "router": "Router.png",
+    "host": "host.png",
+    "dn": "host.png",
+    "controller": "controller.png",
+}
+
+# Type-specific default properties applied to every new component
+DEFAULT_PROPERTIES = {
+    "amf": {
+        "capacity": 100,
+        "region": "region1",
+        "replicas": 1
+    },
+    "smf": {
+        "upf_selection": "local",
+        "replicas": 1,
+        "sst": 1,
+        "sd": "010203",
+        "dnn": "internet"
+    },
+    "upf": {
+        "capacity": 1000,
+        "replicas": 1,
+        "sst": 1,
+        "sd": "010203",
+        "dnn": "internet"
+    },
+    "gnb": {
+        "tac": 1,
+        "frequency": "FR1",
+        "power": 20
+    },
+    "ue": {
+        "imsi": "001010000000001",
+        "k": "465B5CE8B199B49FAA5F0A2EE238A6BC",
+        "opc": "E8ED289DEBA952E4283B54E88E6183CA",
+        "sst": 1,
+        "sd": "010203",
+        "dnn": "internet"
+    },
+    "switch": {
+        "openflow": True
+    },
+    "router": {
+        "openflow": True
+    },
+    "dn": {
+        "dns_domain": "netflux5g.local"
+    },
+    "controller": {
+        "controller_type": "ODL",
+        "port": 6653
+    },
+}
+
+# NF types that can run several identical instances ("replicas" property)
+SCALABLE_TYPES = ("amf", "smf", "upf")
+
+# Read-only per-type defaults shared (flyweight) by every component of a type
+SHARED_DEFAULTS = {
+    component_type: MappingProxyType(DEFAULT_PROPERTIES.get(component_type, {}))
+    for component_type in COMPONENT_COLORS
+}
+_NO_DEFAULTS = MappingProxyType({})
+_CANONICAL_TYPES = {component_type: component_type for component_type in COMPONENT_COLORS}
+
+ICONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "icons")
+
+
+def is_known_type(component_type):
+    """Return True if the component type can be placed on a topology"""
+    return component_type in COMPONENT_COLORS
+
+
+def canonical_type(component_type):
+    """Return the shared (interned) type string so components don't each hold a copy"""
+    return _CANONICAL_TYPES.get(component_type, component_type)
+
+
+def get_shared_defaults(component_type):
+    """Get the shared read-only default properties for a component type"""
+    return SHARED_DEFAULTS.get(component_type, _NO_DEFAULTS)
+
+
+def get_icon_path(component_type):
+    """Get the absolute icon path for a component type, or None"""
+    icon_file = COMPONENT_ICON_FILES.get(component_type)
+    if not icon_file:
+        return None
+    return os.path.join(ICONS_DIR, icon_file)
+
+
+def get_default_properties(component_type):
+    """Get a fresh copy of the default properties for a component type"""
+    return dict(DEFAULT_PROPERTIES.get(component_type, {}))
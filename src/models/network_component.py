@@ -2,30 +2,46 @@ from PyQt5.QtWidgets import QGraphicsItem
 from PyQt5.QtCore import Qt, QRectF
 from PyQt5.QtGui import QPainter, QPen, QBrush, QColor, QFont, QPixmap
 
+from models.component_types import canonical_type, get_shared_defaults
+from models.property_map import PropertyMap
+
 import uuid
 import os
 
+# Pixmaps are shared by every component using the same icon file
+_pixmap_cache = {}
+
+
+def get_shared_pixmap(icon_path):
+    """Load an icon once and return the shared QPixmap (None if missing)"""
+    if icon_path not in _pixmap_cache:
+        _pixmap_cache[icon_path] = QPixmap(icon_path) if icon_path and os.path.exists(icon_path) else None
+    return _pixmap_cache[icon_path]
+
+
 class NetworkComponent(QGraphicsItem):
+    # Graphics settings shared by all components (class-level, not per instance)
+    width = 100
+    height = 80
+    color = QColor(200, 200, 255)
+    selected_color = QColor(0, 120, 215)  # Changed from yellow to a blue color
+    icon_size = 48  # Using the larger icon size we previously set
+
+    # Icon property
+    icon_path = None
+    icon_pixmap = None
+
+    # Transparency flag for hover and drag
+    is_dragging = False
+
     def __init__(self, component_type, position):
         super().__init__()
-        self.component_type = component_type
+        self.component_type = canonical_type(component_type)
         self.component_id = str(uuid.uuid4())[:8]
-        self.properties = {"name": f"{component_type}_{self.component_id}"}
-        self.links = []
-
-        # Graphics settings
-        self.width = 100
-        self.height = 80
-        self.color = QColor(200, 200, 255)
-        self.selected_color = QColor(0, 120, 215)  # Changed from yellow to a blue color
-        
-        # Icon property
-        self.icon_path = None
-        self.icon_pixmap = None
-        self.icon_size = 48  # Using the larger icon size we previously set
-        
-        # Transparency flag for hover and drag
-        self.is_dragging = False
+        # Only per-component overrides are stored; type defaults are shared
+        self.properties = PropertyMap(get_shared_defaults(self.component_type),
+                                      name=f"{component_type}_{self.component_id}")
+        self.links = ()  # list allocated on the first link
 
         # Set position and flags
         self.setPos(position)
@@ -39,10 +55,7 @@ class NetworkComponent(QGraphicsItem):
     def set_icon(self, icon_path):
         """Set the icon for this component"""
         self.icon_path = icon_path
-        if icon_path and os.path.exists(icon_path):
-            self.icon_pixmap = QPixmap(icon_path)
-        else:
-            self.icon_pixmap = None
+        self.icon_pixmap = get_shared_pixmap(icon_path)
         self.update()  # Redraw component with the icon
 
     def boundingRect(self):
@@ -106,7 +119,10 @@ class NetworkComponent(QGraphicsItem):
 
     def add_link(self, link):
         if link not in self.links:
-            self.links.append(link)
+            if self.links:
+                self.links.append(link)
+            else:
+                self.links = [link]
 
     def remove_link(self, link):
         if link in self.links:
@@ -118,13 +134,14 @@ class NetworkComponent(QGraphicsItem):
     def get_properties(self):
         # Ensure properties is always a dictionary (defensive programming)
         if not isinstance(self.properties, dict):
-            self.properties = {"name": f"{self.component_type}_{self.component_id}"}
+            self.properties = PropertyMap(get_shared_defaults(self.component_type),
+                                          name=f"{self.component_type}_{self.component_id}")
         return self.properties
 
     def set_properties(self, properties):
         # Ensure properties is always a dictionary
         if not isinstance(self.properties, dict):
-            self.properties = {}
+            self.properties = PropertyMap(get_shared_defaults(self.component_type))
         if isinstance(properties, dict):
             self.properties.update(properties)
         self.update()  # Redraw component with new properties
\ No newline at end of file
@@ -8,6 +8,7 @@ class NetworkLink(QGraphicsLineItem):
         self.source = source
         self.target = target
         self.properties = {}
+        self.listeners = []  # callables (link, changed properties), e.g. live link emulation
 
         # Set appearance
         self.setPen(QPen(QColor(0, 0, 0), 2, Qt.SolidLine))
@@ -26,7 +27,16 @@ class NetworkLink(QGraphicsLineItem):
     def get_properties(self):
         return self.properties
 
+    def add_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
     def set_properties(self, properties):
+        changed = {key: value for key, value in properties.items() if self.properties.get(key) != value}
         self.properties.update(properties)
 
         # Update appearance based on properties
@@ -35,4 +45,8 @@ class NetworkLink(QGraphicsLineItem):
             width = 1 + min(5, int(properties["bandwidth"]) // 100)
             pen = self.pen()
             pen.setWidth(width)
-            self.setPen(pen)
\ No newline at end of file
+            self.setPen(pen)
+
+        if changed:
+            for callback in list(self.listeners):
+                callback(self, changed)
\ No newline at end of file
@@ -0,0 +1,180 @@
+"""
+Flyweight property storage for network components
+
+Per-type default properties are stored once and shared by every component of
+that type. Each component's PropertyMap holds only its generated name and the
+values that differ from those defaults, while still behaving like a regular
+dict for readers and writers: deleting a default key hides it from that
+component only (a tombstone), and yaml dumps a PropertyMap as a plain mapping.
+"""
+
+import sys
+from collections.abc import ItemsView, KeysView, Mapping, ValuesView
+from types import MappingProxyType
+
+_NO_DEFAULTS = MappingProxyType({})
+
+
+class PropertyMap(dict):
+    """dict of per-component overrides layered over shared type defaults"""
+
+    # The generated "name" lives in a slot: a dict holding even a single key
+    # costs ~120 bytes more than an empty one
+    __slots__ = ('_defaults', '_name', '_deleted')
+
+    def __init__(self, defaults=None, overrides=None, name=None):
+        super().__init__()
+        self._defaults = defaults if defaults is not None else _NO_DEFAULTS
+        self._name = name
+        # Default keys deleted from this component (None until the first delete)
+        self._deleted = None
+        if overrides:
+            self.update(overrides)
+
+    def _has_default(self, key):
+        if self._deleted and key in self._deleted:
+            return False
+        return (key == "name" and self._name is not None) or key in self._defaults
+
+    def _default(self, key):
+        if key == "name" and self._name is not None:
+            return self._name
+        return self._defaults[key]
+
+    def _default_keys(self):
+        if not dict.__contains__(self, "name") and self._has_default("name"):
+            yield "name"
+        for key in self._defaults:
+            if not dict.__contains__(self, key) and self._has_default(key):
+                yield key
+
+    # Reads fall through to the defaults
+
+    def __missing__(self, key):
+        if not self._has_default(key):
+            raise KeyError(key)
+        return self._default(key)
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        if self._has_default(key):
+            return self._default(key)
+        return default
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or self._has_default(key)
+
+    def __iter__(self):
+        yield from self._default_keys()
+        yield from dict.__iter__(self)
+
+    def __len__(self):
+        return dict.__len__(self) + sum(1 for _ in self._default_keys())
+
+    def keys(self):
+        return KeysView(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    # Writes only store values that differ from the defaults
+
+    def __setitem__(self, key, value):
+        if self._deleted and key in self._deleted:
+            # Re-adding a deleted default: store it even if it equals the default
+            self._deleted.discard(key)
+        elif not dict.__contains__(self, key) and self._has_default(key) and self._default(key) == value:
+            return
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if dict.__contains__(self, key):
+            dict.__delitem__(self, key)
+        if self._has_default(key):
+            if self._deleted is None:
+                self._deleted = set()
+            self._deleted.add(key)
+
+    _MARKER = object()
+
+    def pop(self, key, default=_MARKER):
+        if key not in self:
+            if default is self._MARKER:
+                raise KeyError(key)
+            return default
+        value = self[key]
+        del self[key]
+        return value
+
+    def popitem(self):
+        """Remove and return the last (key, value) pair, overrides before defaults"""
+        for key in reversed(list(self)):
+            return key, self.pop(key)
+        raise KeyError("popitem(): dictionary is empty")
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+    def update(self, other=(), **kwargs):
+        items = other.items() if isinstance(other, Mapping) else other
+        for key, value in items:
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def overrides(self):
+        """Return only the values that differ from the type defaults (deleted defaults are not included)"""
+        return dict(dict.items(self))
+
+    def copy(self):
+        """Return a plain dict with defaults and overrides merged"""
+        return {key: self[key] for key in self}
+
+    def __eq__(self, other):
+        if isinstance(other, Mapping):
+            return self.copy() == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.copy())
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
+def _represent_property_map(dumper, data):
+    return dumper.represent_dict(data.copy())
+
+
+def register_yaml_representers(yaml=None):
+    """Dump PropertyMaps as plain mappings with every yaml dumper (safe and C ones included)"""
+    if yaml is None:
+        import yaml
+    for name in ("SafeDumper", "Dumper", "CSafeDumper", "CDumper"):
+        dumper = getattr(yaml, name, None)
+        if dumper is not None:
+            dumper.add_representer(PropertyMap, _represent_property_map)
+
+
+# yaml is imported lazily (see utils/project_io.py, which registers the
+# representers on first use); if it is already loaded, register them now
+if "yaml" in sys.modules:
+    register_yaml_representers(sys.modules["yaml"])
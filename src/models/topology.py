@@ -0,0 +1,174 @@
+"""
+Qt-free topology model for the headless engine and CLI runner
+
+TopologyComponent and TopologyLink expose the same attributes the simulation
+stack reads from the canvas items (component_type, component_id, properties,
+links, source/target), so a Topology can be handed to NetworkSimulator in
+place of a NetworkCanvas.
+"""
+
+import uuid
+
+from models.component_types import is_known_type, canonical_type, get_shared_defaults
+from models.property_map import PropertyMap
+
+
+class TopologyComponent:
+    """Plain-Python network component (slotted; type defaults are shared)"""
+
+    __slots__ = ('component_type', 'component_id', 'properties', 'x', 'y', 'links')
+
+    def __init__(self, component_type, x=0.0, y=0.0, component_id=None, properties=None):
+        self.component_type = canonical_type(component_type)
+        self.component_id = component_id or str(uuid.uuid4())[:8]
+        self.properties = PropertyMap(get_shared_defaults(self.component_type),
+                                      name=f"{component_type}_{self.component_id}")
+        if properties:
+            self.properties.update(properties)
+        self.x = float(x)
+        self.y = float(y)
+        self.links = ()  # list allocated on the first link
+
+    def pos(self):
+        return (self.x, self.y)
+
+    def add_link(self, link):
+        if link not in self.links:
+            if self.links:
+                self.links.append(link)
+            else:
+                self.links = [link]
+
+    def remove_link(self, link):
+        if link in self.links:
+            self.links.remove(link)
+
+    def get_links(self):
+        return self.links
+
+    def get_properties(self):
+        return self.properties
+
+    def set_properties(self, properties):
+        if isinstance(properties, dict):
+            self.properties.update(properties)
+
+
+class TopologyLink:
+    """Plain-Python link between two components"""
+
+    __slots__ = ('source', 'target', 'properties')
+
+    def __init__(self, source, target, properties=None):
+        self.source = source
+        self.target = target
+        self.properties = dict(properties or {})
+
+    def get_properties(self):
+        return self.properties
+
+    def set_properties(self, properties):
+        self.properties.update(properties)
+
+
+class Topology:
+    """Container for components and links, loadable from saved projects"""
+
+    def __init__(self):
+        self.components = []
+        self.links = []
+        self.connections = []
+        self.settings = {}  # topology-wide options, e.g. {"placement": "performance"}
+
+    def add_component(self, component_type, x=0.0, y=0.0, component_id=None, properties=None):
+        if not is_known_type(component_type):
+            return None
+
+        component = TopologyComponent(component_type, x, y, component_id, properties)
+        self.components.append(component)
+        return component
+
+    def add_link(self, source, target, properties=None):
+        link = TopologyLink(source, target, properties)
+        self.links.append(link)
+
+        source.add_link(link)
+        target.add_link(link)
+
+        return link
+
+    def clear(self):
+        self.components.clear()
+        self.links.clear()
+        self.connections.clear()
+        self.settings.clear()
+
+    def get_component(self, component_id):
+        for component in self.components:
+            if component.component_id == component_id:
+                return component
+        return None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a topology from the saved project structure"""
+        topology = cls()
+        topology.settings = dict(data.get("settings") or {})
+        component_map = {}
+
+        for component_data in data.get("components", []):
+            component = topology.add_component(
+                component_data.get("type"),
+                component_data.get("x", 0),
+                component_data.get("y", 0),
+                component_data.get("id"),
+                component_data.get("properties", {})
+            )
+            if component:
+                component_map[component.component_id] = component
+
+        for link_data in data.get("links", []):
+            source_id = link_data.get("source_id")
+            target_id = link_data.get("target_id")
+
+            if source_id in component_map and target_id in component_map:
+                topology.add_link(component_map[source_id], component_map[target_id],
+                                  link_data.get("properties", {}))
+
+        return topology
+
+    def to_dict(self):
+        """Convert the topology to the saved project structure"""
+        return {
+            "components": [
+                {
+                    "id": component.component_id,
+                    "type": component.component_type,
+                    "x": component.x,
+                    "y": component.y,
+                    "properties": dict(component.get_properties())
+                }
+                for component in self.components
+            ],
+            "links": [
+                {
+                    "source_id": link.source.component_id,
+                    "target_id": link.target.component_id,
+                    "properties": dict(link.get_properties())
+                }
+                for link in self.links
+            ],
+            "connections": [],
+            "settings": dict(self.settings)
+        }
+
+    @classmethod
+    def load(cls, filename):
+        """Load a topology from a saved project file"""
+        from utils.project_io import load_project_data
+        return cls.from_dict(load_project_data(filename))
+
+    def save(self, filename, compact=False):
+        """Save the topology to a project file"""
+        from utils.project_io import save_project_data
+        save_project_data(self.to_dict(), filename, compact=compact)
@@ -1 +1,6 @@
-from .simulator import NetworkSimulator
\ No newline at end of file
+def __getattr__(name):
+    # Imported on first use so the constant-only modules of the package load without docker
+    if name == "NetworkSimulator":
+        from .simulator import NetworkSimulator
+        return NetworkSimulator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
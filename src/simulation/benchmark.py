@@ -0,0 +1,456 @@
+"""
+Benchmarks run against a deployed 5G network
+"""
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+PING_RTT_PATTERN = re.compile(r"=\s*([\d.]+)/([\d.]+)/([\d.]+)")
+PING_LOSS_PATTERN = re.compile(r"([\d.]+)% packet loss")
+
+IPERF3_PORT = 5201
+
+# UERANSIM log lines marking the UE start and its procedures
+UERANSIM_BANNER = "UERANSIM v"
+REGISTRATION_SUCCESS = "Initial Registration is successful"
+PDU_SESSION_SUCCESS = "PDU Session establishment is successful"
+
+
+def parse_ping_output(output):
+    """
+    Parse the summary lines of ping output
+
+    Returns:
+        dict: rtt_min_ms, rtt_avg_ms, rtt_max_ms and packet_loss (None when missing)
+    """
+    result = {
+        "rtt_min_ms": None,
+        "rtt_avg_ms": None,
+        "rtt_max_ms": None,
+        "packet_loss": None
+    }
+
+    rtt_match = PING_RTT_PATTERN.search(output)
+    if rtt_match:
+        result["rtt_min_ms"] = float(rtt_match.group(1))
+        result["rtt_avg_ms"] = float(rtt_match.group(2))
+        result["rtt_max_ms"] = float(rtt_match.group(3))
+
+    loss_match = PING_LOSS_PATTERN.search(output)
+    if loss_match:
+        result["packet_loss"] = float(loss_match.group(1))
+
+    return result
+
+
+def run_latency_benchmark(container_manager, count=10, target=None):
+    """
+    Measure round-trip latency from every UE through its tunnel interface
+
+    Args:
+        container_manager: EnhancedContainerManager with a deployed network
+        count: Number of echo requests per UE
+        target: Component name of the container to ping (default: the local
+            data network if one is deployed, else the internet gateway)
+
+    Returns:
+        list: One result dictionary per UE
+    """
+    results = []
+    target = target or container_manager.data_network_target()
+    target_ip = container_manager.get_container_ip_by_name(target)
+    ue_containers = container_manager.get_containers_by_type('ue')
+
+    for ue_container in ue_containers:
+        result = {
+            "ue": ue_container.name,
+            "target": target,
+            "target_ip": target_ip,
+            "success": False,
+            "error": None
+        }
+
+        if target_ip == "unknown":
+            result["error"] = f"Target {target} not deployed"
+            results.append(result)
+            continue
+
+        try:
+            started = time.perf_counter()
+            exec_result = ue_container.exec_run(f"ping -c {count} -i 0.2 -I uesimtun0 {target_ip}")
+            output = exec_result.output.decode('utf-8', errors='replace') if exec_result.output else ""
+
+            result.update(parse_ping_output(output))
+            result["duration_s"] = round(time.perf_counter() - started, 3)
+            result["success"] = exec_result.exit_code == 0
+            if not result["success"]:
+                result["error"] = f"Ping failed (exit code: {exec_result.exit_code})"
+        except Exception as e:
+            result["error"] = str(e)
+
+        results.append(result)
+
+    return results
+
+
+def parse_iperf3_output(output):
+    """
+    Parse iperf3 JSON output (-J)
+
+    Returns:
+        dict: throughput_mbps (received), sent_mbps, retransmits and error (None when missing)
+    """
+    result = {
+        "throughput_mbps": None,
+        "sent_mbps": None,
+        "retransmits": None,
+        "error": None
+    }
+
+    start = output.find("{")
+    try:
+        data = json.loads(output[start:]) if start >= 0 else {}
+    except ValueError:
+        data = {}
+    if data.get("error"):
+        result["error"] = data["error"]
+
+    end = data.get("end", {})
+    received = end.get("sum_received", {})
+    sent = end.get("sum_sent", {})
+    if "bits_per_second" in received:
+        result["throughput_mbps"] = round(received["bits_per_second"] / 1e6, 2)
+    if "bits_per_second" in sent:
+        result["sent_mbps"] = round(sent["bits_per_second"] / 1e6, 2)
+    if "retransmits" in sent:
+        result["retransmits"] = sent["retransmits"]
+
+    return result
+
+
+def _iperf3_client_script(target_ip, port, duration, reverse=False):
+    """Shell script running an iperf3 client bound to uesimtun0, retrying while the server starts"""
+    return (
+        "ip=$(ip -o -4 addr show uesimtun0 | awk '{split($4, a, \"/\"); print a[1]}')\n"
+        '[ -n "$ip" ] || { echo \'{"error": "uesimtun0 has no address"}\'; exit 0; }\n'
+        "for attempt in 1 2 3 4 5; do\n"
+        f'  out=$(iperf3 -c {target_ip} -p {port} -B "$ip" -t {int(duration)}{" -R" if reverse else ""} -J) && break\n'
+        "  sleep 1\n"
+        "done\n"
+        'echo "$out"\n'
+    )
+
+
+def _measure_throughput(container_manager, ue_container, target, target_ip, port, duration, direction):
+    """One iperf3 run of a UE against a server port; returns a result dictionary"""
+    result = {
+        "ue": ue_container.name,
+        "target": target,
+        "target_ip": target_ip,
+        "direction": direction,
+        "success": False,
+        "error": None
+    }
+    try:
+        started = time.perf_counter()
+        script = _iperf3_client_script(target_ip, port, duration, reverse=direction == "downlink")
+        output = container_manager.run_nettools(script, network_mode=f"container:{ue_container.id}")
+        result.update(parse_iperf3_output(output))
+        result["duration_s"] = round(time.perf_counter() - started, 3)
+        result["success"] = result["throughput_mbps"] is not None and not result["error"]
+        if not result["success"] and not result["error"]:
+            result["error"] = "No iperf3 result"
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def _start_iperf3_servers(container_manager, target_container, ports):
+    """
+    Detached nettools helper running one iperf3 server per port in the target's namespace
+
+    Ports the target serves itself (a local data network) are skipped; returns
+    None if no helper is needed.
+    """
+    served = container_manager.served_iperf3_ports(target_container)
+    ports = [port for port in ports if port not in served]
+    if not ports:
+        return None
+    server_script = "".join(f"iperf3 -s -p {port} &\n" for port in ports) + "wait\n"
+    return container_manager.run_nettools(server_script, network_mode=f"container:{target_container.id}",
+                                          detach=True)
+
+
+def run_throughput_benchmark(container_manager, duration=10, target=None, concurrent=False):
+    """
+    Measure TCP throughput from every UE through its tunnel interface with iperf3
+
+    The iperf3 servers run in a nettools helper in the target's network
+    namespace (a local data network runs its own), the clients in helpers in
+    the UEs' namespaces bound to uesimtun0, so neither image needs iperf3.
+    Uplink is measured first, then downlink (-R).
+
+    Args:
+        container_manager: EnhancedContainerManager with a deployed network
+        duration: Seconds per direction
+        target: Component name of the container running the servers (default:
+            the local data network if one is deployed, else the internet gateway)
+        concurrent: Run all UEs at once (one server port each) to measure the
+            capacity of the user plane, instead of one UE after the other
+
+    Returns:
+        list: One result dictionary per UE and direction
+    """
+    results = []
+    target = target or container_manager.data_network_target()
+    target_container = container_manager.get_container_by_name(target)
+    target_ip = container_manager.get_container_ip_by_name(target)
+    ue_containers = container_manager.get_containers_by_type('ue')
+
+    if target_container is None or target_ip == "unknown":
+        return [{"ue": ue_container.name, "target": target, "success": False,
+                 "error": f"Target {target} not deployed"} for ue_container in ue_containers]
+
+    ports = [IPERF3_PORT + index for index in range(len(ue_containers) if concurrent else 1)]
+    server = _start_iperf3_servers(container_manager, target_container, ports)
+
+    def measure(ue_container, port, direction):
+        return _measure_throughput(container_manager, ue_container, target, target_ip, port, duration, direction)
+
+    try:
+        for direction in ("uplink", "downlink"):
+            if concurrent and ue_containers:
+                with ThreadPoolExecutor(max_workers=len(ue_containers)) as executor:
+                    futures = [executor.submit(measure, ue_container, port, direction)
+                               for ue_container, port in zip(ue_containers, ports)]
+                    results += [future.result() for future in futures]
+            else:
+                results += [measure(ue_container, ports[0], direction) for ue_container in ue_containers]
+    finally:
+        if server is not None:
+            try:
+                server.remove(force=True)
+            except Exception:
+                pass
+
+    return results
+
+
+def summarize_throughput(results):
+    """Per direction: UEs measured, sum and average of the received throughput"""
+    summary = {}
+    for direction in ("uplink", "downlink"):
+        rates = [result["throughput_mbps"] for result in results
+                 if result.get("direction") == direction and result.get("success")]
+        summary[direction] = {
+            "ues": len(rates),
+            "sum_mbps": round(sum(rates), 2) if rates else None,
+            "avg_mbps": round(sum(rates) / len(rates), 2) if rates else None,
+        }
+    return summary
+
+
+def _log_time(line):
+    """Timestamp of a docker log line (logs(timestamps=True)), None if it has none"""
+    try:
+        return datetime.fromisoformat(line.split(" ", 1)[0][:26])
+    except ValueError:
+        return None
+
+
+def run_registration_benchmark(container_manager):
+    """
+    Registration and PDU session times of every UE, from the UERANSIM logs
+
+    Times are measured from the UE process start (its version banner) to each
+    "Initial Registration is successful" and "PDU Session establishment is
+    successful" line, so multi-UE containers report one time per UE.
+
+    Returns:
+        list: One result dictionary per UE container
+    """
+    results = []
+    for ue_container in container_manager.get_containers_by_type('ue'):
+        result = {
+            "ue": ue_container.name,
+            "registrations": 0,
+            "pdu_sessions": 0,
+            "registration_s": [],
+            "pdu_session_s": [],
+            "error": None
+        }
+        try:
+            logs = ue_container.logs(timestamps=True)
+            logs = logs.decode('utf-8', errors='replace') if isinstance(logs, bytes) else str(logs)
+            started = None
+            for line in logs.splitlines():
+                if started is None and UERANSIM_BANNER in line:
+                    started = _log_time(line)
+                elif started is not None and REGISTRATION_SUCCESS in line:
+                    logged = _log_time(line)
+                    result["registrations"] += 1
+                    if logged:
+                        result["registration_s"].append(round((logged - started).total_seconds(), 3))
+                elif started is not None and PDU_SESSION_SUCCESS in line:
+                    logged = _log_time(line)
+                    result["pdu_sessions"] += 1
+                    if logged:
+                        result["pdu_session_s"].append(round((logged - started).total_seconds(), 3))
+            if started is None:
+                result["error"] = "UE process did not start"
+        except Exception as e:
+            result["error"] = str(e)
+        results.append(result)
+    return results
+
+
+def summarize_registration(results):
+    """Registered UEs, PDU sessions and registration time percentiles over all UE containers"""
+    times = sorted(time_s for result in results for time_s in result["registration_s"])
+    return {
+        "registrations": sum(result["registrations"] for result in results),
+        "pdu_sessions": sum(result["pdu_sessions"] for result in results),
+        "registration_p50_s": times[len(times) // 2] if times else None,
+        "registration_max_s": times[-1] if times else None,
+    }
+
+
+def run_cell_benchmark(container_manager, registration=None):
+    """
+    Registration results per cell (gNB) of a RAN scale-out run
+
+    Args:
+        container_manager: Manager of the run (its ran_plan maps UEs to gNBs)
+        registration: run_registration_benchmark() results, collected when None
+
+    Returns:
+        list: One result dictionary per cell (see ran_plan.cell_stats)
+    """
+    from simulation.ran_plan import NG_SETUP_SUCCESS, cell_stats
+
+    plan = getattr(container_manager, 'ran_plan', None)
+    if plan is None or not plan.cells:
+        return []
+    if registration is None:
+        registration = run_registration_benchmark(container_manager)
+
+    namespace = container_manager.namespace
+    ue_names = {container.name: namespace.logical_name(container)
+                for container in container_manager.get_containers_by_type('ue')}
+    by_ue = {ue_names.get(result["ue"], result["ue"]): result for result in registration}
+
+    ng_setup = {}
+    for gnb_container in container_manager.get_containers_by_type('gnb'):
+        try:
+            logs = gnb_container.logs()
+            logs = logs.decode('utf-8', errors='replace') if isinstance(logs, bytes) else str(logs)
+            ng_setup[namespace.logical_name(gnb_container)] = NG_SETUP_SUCCESS in logs
+        except Exception:
+            continue
+    return cell_stats(plan, by_ue, ng_setup)
+
+
+def _change_pct(value, baseline):
+    if value is None or not baseline:
+        return None
+    return round((value - baseline) / baseline * 100, 1)
+
+
+def run_slice_isolation_benchmark(container_manager, duration=10, target=None):
+    """
+    Throughput and latency of every slice while one slice is saturated
+
+    The first UE of each slice is its probe. The baseline measures each probe
+    on its own: iperf3 downlink for `duration` seconds and a ping over the same
+    time. Then, for each slice in turn, all UEs of that slice run iperf3
+    downlink at once while the probes of the other slices measure again.
+
+    Args:
+        container_manager: EnhancedContainerManager of a deployment with several slices
+        duration: Seconds of every measurement
+        target: Component name of the container running the iperf3 servers
+            (default: the local data network if deployed, else the internet gateway)
+
+    Returns:
+        dict: "baseline" {slice: probe result}, "saturated" [{"slice", "load_mbps",
+            "others": {slice: probe result with throughput/RTT change against the
+            baseline in percent}}] and "error"
+    """
+    target = target or container_manager.data_network_target()
+    report = {"target": target, "duration_s": duration, "baseline": {}, "saturated": [], "error": None}
+    plan = getattr(container_manager, 'slice_plan', None)
+    if plan is None or not plan.sliced:
+        report["error"] = "The deployment has a single slice"
+        return report
+
+    target_container = container_manager.get_container_by_name(target)
+    target_ip = container_manager.get_container_ip_by_name(target)
+    if target_container is None or target_ip == "unknown":
+        report["error"] = f"Target {target} not deployed"
+        return report
+
+    slice_ues = {}
+    for ue_container in container_manager.get_containers_by_type('ue'):
+        slice_name = plan.slice_name_of(container_manager.namespace.logical_name(ue_container))
+        slice_ues.setdefault(slice_name, []).append(ue_container)
+    if len(slice_ues) < 2:
+        report["error"] = "Fewer than two slices have UEs"
+        return report
+
+    ue_containers = [ue_container for containers in slice_ues.values() for ue_container in containers]
+    ports = {ue_container.name: IPERF3_PORT + index for index, ue_container in enumerate(ue_containers)}
+    ping_count = max(1, int(duration / 0.2))
+
+    def probe(ue_container):
+        """iperf3 downlink and ping of one UE at the same time"""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            throughput = executor.submit(_measure_throughput, container_manager, ue_container, target, target_ip,
+                                         ports[ue_container.name], duration, "downlink")
+            ping = executor.submit(ue_container.exec_run,
+                                   f"ping -c {ping_count} -i 0.2 -I uesimtun0 {target_ip}")
+            result = {"ue": ue_container.name, "throughput_mbps": throughput.result()["throughput_mbps"],
+                      "error": throughput.result()["error"]}
+            try:
+                output = ping.result().output
+                result.update({key: value for key, value in parse_ping_output(
+                    output.decode('utf-8', errors='replace') if output else "").items()
+                    if key in ("rtt_avg_ms", "packet_loss")})
+            except Exception as e:
+                result.update(rtt_avg_ms=None, packet_loss=None, error=result["error"] or str(e))
+        return result
+
+    server = _start_iperf3_servers(container_manager, target_container, list(ports.values()))
+    try:
+        for slice_name, containers in slice_ues.items():
+            report["baseline"][slice_name] = probe(containers[0])
+
+        for slice_name, containers in slice_ues.items():
+            others = {name: ues[0] for name, ues in slice_ues.items() if name != slice_name}
+            with ThreadPoolExecutor(max_workers=len(containers) + len(others)) as executor:
+                load = [executor.submit(_measure_throughput, container_manager, ue_container, target, target_ip,
+                                        ports[ue_container.name], duration, "downlink")
+                        for ue_container in containers]
+                probes = {name: executor.submit(probe, ue_container) for name, ue_container in others.items()}
+                load_rates = [future.result()["throughput_mbps"] for future in load]
+                measured = {name: future.result() for name, future in probes.items()}
+
+            for name, result in measured.items():
+                baseline = report["baseline"][name]
+                result["throughput_change_pct"] = _change_pct(result["throughput_mbps"], baseline["throughput_mbps"])
+                result["rtt_change_pct"] = _change_pct(result.get("rtt_avg_ms"), baseline.get("rtt_avg_ms"))
+            report["saturated"].append({
+                "slice": slice_name,
+                "load_mbps": round(sum(rate for rate in load_rates if rate), 2),
+                "others": measured
+            })
+    finally:
+        if server is not None:
+            try:
+                server.remove(force=True)
+            except Exception:
+                pass
+
+    return report
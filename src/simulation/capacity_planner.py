@@ -0,0 +1,351 @@
+"""
+Admission control for simulation runs
+
+Before anything is started, the memory limits and CPU estimates of the whole
+topology are summed and compared against what the Docker host can give:
+host memory (psutil or /proc/meminfo), the limits of the cgroup docker puts
+containers in (v1 or v2) and, for remote daemons, the engine's own totals.
+The run is then admitted, densified (several UEs per UERANSIM container),
+queued until other workloads release memory, or rejected.
+"""
+
+import logging
+import math
+import os
+import time
+from collections import Counter
+
+ADMIT = "admit"
+DENSIFY = "densify"
+QUEUE = "queue"
+REJECT = "reject"
+
+# Share of the available memory a run may reserve
+MEMORY_HEADROOM = 0.9
+
+# Estimated CPU demand per component type (cores); containers have no CPU limit
+DEFAULT_CPU_REQUEST = {
+    "upf": 0.5,
+    "gnb": 0.25,
+    "amf": 0.2,
+    "smf": 0.2,
+    "mongodb": 0.2,
+    "ue": 0.05,
+}
+DEFAULT_CPU = 0.1
+
+# nr-ue instances per container tried when densifying, and the extra memory
+# each additional UE needs inside one container
+UE_GROUP_SIZES = (2, 4, 8, 16, 32)
+EXTRA_UE_MEMORY = 16 * 1024 ** 2
+
+# Seconds between capacity checks while a run is queued
+QUEUE_POLL_INTERVAL = 5
+
+_UNITS = {"b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3}
+
+# cgroup v1 reports "no limit" as a huge page-aligned number
+_V1_UNLIMITED = 1 << 62
+
+
+def parse_memory(value):
+    """Docker-style memory size ("256m", "1g", 1048576) to bytes"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().lower().rstrip("b") or "0"
+    unit = text[-1]
+    if unit in _UNITS:
+        return int(float(text[:-1]) * _UNITS[unit])
+    return int(float(text))
+
+
+def format_memory(value):
+    return f"{value / 1024 ** 3:.2f} GiB" if value >= 1024 ** 3 else f"{value / 1024 ** 2:.0f} MiB"
+
+
+def multi_ue_memory(base_memory, ue_count):
+    """Memory limit of a UERANSIM container running ue_count UEs"""
+    return base_memory + max(0, ue_count - 1) * EXTRA_UE_MEMORY
+
+
+def _read(path):
+    try:
+        with open(path) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def _read_int(path):
+    value = _read(path)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def cgroup_limits(driver="cgroupfs", version="2", root="/sys/fs/cgroup"):
+    """
+    Memory and CPU limits of the cgroup docker places containers in
+
+    Returns:
+        dict: memory_limit, memory_usage (bytes) and cpus (cores), each None if unlimited/unknown
+    """
+    parent = "system.slice" if driver == "systemd" else "docker"
+    limits = {"memory_limit": None, "memory_usage": None, "cpus": None}
+
+    if str(version) == "2":
+        base = os.path.join(root, parent)
+        memory_max = _read(os.path.join(base, "memory.max"))
+        if memory_max and memory_max != "max":
+            limits["memory_limit"] = int(memory_max)
+        limits["memory_usage"] = _read_int(os.path.join(base, "memory.current"))
+        cpu_max = (_read(os.path.join(base, "cpu.max")) or "max").split()
+        if cpu_max[0] != "max" and len(cpu_max) == 2:
+            limits["cpus"] = int(cpu_max[0]) / int(cpu_max[1])
+    else:
+        memory_base = os.path.join(root, "memory", parent)
+        memory_limit = _read_int(os.path.join(memory_base, "memory.limit_in_bytes"))
+        if memory_limit and memory_limit < _V1_UNLIMITED:
+            limits["memory_limit"] = memory_limit
+        limits["memory_usage"] = _read_int(os.path.join(memory_base, "memory.usage_in_bytes"))
+        cpu_base = os.path.join(root, "cpu", parent)
+        quota = _read_int(os.path.join(cpu_base, "cpu.cfs_quota_us"))
+        period = _read_int(os.path.join(cpu_base, "cpu.cfs_period_us"))
+        if quota and quota > 0 and period:
+            limits["cpus"] = quota / period
+
+    return limits
+
+
+def host_memory_available():
+    """Available memory of this host in bytes (psutil, else /proc/meminfo)"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+
+    for line in (_read("/proc/meminfo") or "").splitlines():
+        if line.startswith("MemAvailable:"):
+            return int(line.split()[1]) * 1024
+    return None
+
+
+def host_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def resource_requests(component_types, configs, groups=None):
+    """
+    Memory limit and CPU estimate of every container a deployment starts
+
+    Args:
+        component_types: Type of every container, helpers included
+        configs: {component type: container config with "mem_limit"}; types
+            without a config start no container
+        groups: Optional UE group key of every container (see CapacityPlan.group_ues);
+            only UEs of the same group may share a container
+
+    Returns:
+        list: [{"type", "memory" (bytes), "cpus", "group"}] for CapacityPlanner.plan()
+    """
+    groups = groups or [None] * len(component_types)
+    return [{
+        "type": comp_type,
+        "memory": parse_memory(configs[comp_type].get("mem_limit", "256m")),
+        "cpus": DEFAULT_CPU_REQUEST.get(comp_type, DEFAULT_CPU),
+        "group": group
+    } for comp_type, group in zip(component_types, groups) if configs.get(comp_type)]
+
+
+class CapacityPlan:
+    """Outcome of admission control for one topology"""
+
+    def __init__(self, decision, requested_memory, requested_cpus, capacity, ues_per_container=1,
+                 planned_memory=None, planned_cpus=None, reasons=None):
+        self.decision = decision
+        self.requested_memory = requested_memory
+        self.requested_cpus = requested_cpus
+        self.capacity = capacity
+        self.ues_per_container = ues_per_container
+        self.planned_memory = requested_memory if planned_memory is None else planned_memory
+        self.planned_cpus = requested_cpus if planned_cpus is None else planned_cpus
+        self.reasons = reasons or []
+        self.ue_groups = {}     # id() of the first UE of a multi-UE container -> UEs in it
+
+    @property
+    def admitted(self):
+        return self.decision in (ADMIT, DENSIFY)
+
+    def summary(self):
+        text = (f"{self.decision}: {format_memory(self.planned_memory)} / "
+                f"{format_memory(self.capacity['memory_available'])} memory, "
+                f"{self.planned_cpus:.2f} / {self.capacity['cpus']:.2f} CPUs")
+        if self.ues_per_container > 1:
+            text += f", {self.ues_per_container} UEs per container"
+        return text
+
+    def group_ues(self, components, key=None):
+        """
+        Fold UEs into multi-UE containers of up to ues_per_container each
+
+        One container runs a single UE config, so only UEs with the same key
+        (e.g. slice and linked gNBs) share a container.
+
+        Args:
+            components: Components of the deployment
+            key: Function mapping a UE to its group key (default: all UEs alike)
+
+        Returns:
+            list: The components without the UEs run by the first UE of their group
+        """
+        self.ue_groups = {}
+        if self.ues_per_container <= 1:
+            return components
+        by_key = {}
+        for component in components:
+            if component.component_type == "ue":
+                by_key.setdefault(key(component) if key else None, []).append(component)
+        folded = set()
+        for ues in by_key.values():
+            for start in range(0, len(ues), self.ues_per_container):
+                group = ues[start:start + self.ues_per_container]
+                if len(group) > 1:
+                    self.ue_groups[id(group[0])] = len(group)
+                    folded.update(id(component) for component in group[1:])
+        return [component for component in components if id(component) not in folded]
+
+    def ue_count(self, component):
+        """UEs the container of a component runs (1 unless it heads a multi-UE group)"""
+        return self.ue_groups.get(id(component), 1)
+
+    def to_dict(self):
+        return {
+            "decision": self.decision,
+            "requested_memory_bytes": self.requested_memory,
+            "requested_cpus": round(self.requested_cpus, 2),
+            "planned_memory_bytes": self.planned_memory,
+            "planned_cpus": round(self.planned_cpus, 2),
+            "ues_per_container": self.ues_per_container,
+            "capacity": self.capacity,
+            "reasons": self.reasons,
+        }
+
+
+class CapacityPlanner:
+    """Compares the resources a topology reserves with what the Docker host has"""
+
+    def __init__(self, session, headroom=MEMORY_HEADROOM):
+        self.session = session
+        self.headroom = headroom
+
+    def capacity(self):
+        """Memory and CPUs available to new containers on the Docker host"""
+        info = {}
+        try:
+            info = self.session.info() or {}
+        except Exception as e:
+            logging.warning(f"Could not read Docker engine info: {e}")
+
+        memory_total = info.get("MemTotal")
+        cpus = float(info.get("NCPU") or host_cpus())
+        memory_available = memory_total
+        sources = ["engine"]
+
+        if self.session.is_local():
+            host_available = host_memory_available()
+            if host_available is not None:
+                memory_available = host_available
+                sources.append("host")
+
+            cgroup = cgroup_limits(info.get("CgroupDriver", "cgroupfs"), info.get("CgroupVersion", "2"))
+            if cgroup["memory_limit"] is not None:
+                cgroup_free = cgroup["memory_limit"] - (cgroup["memory_usage"] or 0)
+                memory_total = min(memory_total or cgroup["memory_limit"], cgroup["memory_limit"])
+                memory_available = min(memory_available or cgroup_free, cgroup_free)
+                sources.append("cgroup")
+            if cgroup["cpus"] is not None:
+                cpus = min(cpus, cgroup["cpus"])
+
+        return {
+            "memory_total": memory_total or 0,
+            "memory_available": max(0, memory_available or 0),
+            "cpus": cpus,
+            "sources": sources,
+        }
+
+    def plan(self, requests, allow_densify=True, capacity=None):
+        """
+        Decide whether a topology can run
+
+        Args:
+            requests: [{"type", "memory" (bytes), "cpus"}] for every container
+            allow_densify: Try several UEs per container before queueing/rejecting
+            capacity: Capacity to plan against (default: measured now)
+
+        Returns:
+            CapacityPlan
+        """
+        capacity = capacity or self.capacity()
+        budget = capacity["memory_available"] * self.headroom
+        memory = sum(request["memory"] for request in requests)
+        cpus = sum(request["cpus"] for request in requests)
+        reasons = []
+
+        if cpus > capacity["cpus"]:
+            # CPU is compressible: overcommit slows the run down but does not break it
+            reasons.append(f"CPU overcommitted: {cpus:.2f} estimated cores on {capacity['cpus']:.2f}")
+
+        if memory <= budget:
+            return CapacityPlan(ADMIT, memory, cpus, capacity, reasons=reasons)
+
+        reasons.append(f"Memory limits {format_memory(memory)} exceed the available "
+                       f"{format_memory(capacity['memory_available'])} (headroom {self.headroom:.0%})")
+
+        ues = [request for request in requests if request["type"] == "ue"]
+        if allow_densify and len(ues) > 1:
+            others = [request for request in requests if request["type"] != "ue"]
+            base_memory = max(request["memory"] for request in ues)
+            # UEs of different groups never share a container
+            group_counts = list(Counter(request.get("group") for request in ues).values())
+            for group_size in UE_GROUP_SIZES:
+                group_size = min(group_size, max(group_counts))
+                containers = sum(math.ceil(count / group_size) for count in group_counts)
+                ue_memory = sum(multi_ue_memory(base_memory, min(group_size, count - index * group_size))
+                                for count in group_counts for index in range(math.ceil(count / group_size)))
+                planned_memory = sum(request["memory"] for request in others) + ue_memory
+                planned_cpus = sum(request["cpus"] for request in others) + sum(request["cpus"] for request in ues)
+                if planned_memory <= budget:
+                    reasons.append(f"Densified to {group_size} UEs per container ({containers} UE containers)")
+                    return CapacityPlan(DENSIFY, memory, cpus, capacity, group_size,
+                                        planned_memory, planned_cpus, reasons)
+                if group_size >= max(group_counts):
+                    break
+
+        if memory <= capacity["memory_total"] * self.headroom:
+            reasons.append("The run fits the host once other workloads release memory")
+            return CapacityPlan(QUEUE, memory, cpus, capacity, reasons=reasons)
+
+        reasons.append(f"The run needs more than the host's total {format_memory(capacity['memory_total'])}")
+        return CapacityPlan(REJECT, memory, cpus, capacity, reasons=reasons)
+
+    def admit(self, requests, allow_densify=True, queue_timeout=0):
+        """
+        Plan a run and, if it has to queue, re-plan until it fits or the timeout expires
+
+        Returns:
+            CapacityPlan: The final plan (decision QUEUE or REJECT means not admitted)
+        """
+        plan = self.plan(requests, allow_densify)
+        deadline = time.monotonic() + queue_timeout
+        while plan.decision == QUEUE and time.monotonic() < deadline:
+            print(f"⏳ Waiting for capacity: {plan.summary()}")
+            time.sleep(QUEUE_POLL_INTERVAL)
+            plan = self.plan(requests, allow_densify)
+        return plan
@@ -0,0 +1,254 @@
+"""
+Packet capture on the containers of a run
+
+A capture runs tcpdump in a nettools helper that joins the target container's
+network namespace, on one interface: the one holding the target's address in
+a reference-point network (multi-network mode), a named interface (ogstun,
+uesimtun0, ...) or "any". The pcaps are written to a host directory that is
+bind-mounted into the helper, so they reach the host while they are written
+instead of being copied out through exec output (with a remote daemon the
+directory is on the daemon's host).
+
+Disk use is bounded: tcpdump starts a new file every file_size_mb megabytes
+(and every rotate_s seconds if set) and only the newest file_count files are
+kept, so a capture never holds more than file_size_mb * file_count MB however
+long a soak test runs. Helpers carry the run's labels, so captures can be
+listed and stopped from another process and are removed with the run.
+"""
+
+import glob
+import logging
+import os
+import shlex
+
+from simulation.link_emulation import render_interface_lookup
+from simulation.namespace import LABEL_COMPONENT, LABEL_RUN, sanitize_name
+
+LABEL_CAPTURE = "netflux5g.capture"
+LABEL_TARGET = "netflux5g.capture.target"
+LABEL_INTERFACE = "netflux5g.capture.interface"
+LABEL_DIRECTORY = "netflux5g.capture.dir"
+
+# Host directory of the pcaps (default: <config dir>/captures), one subdirectory per run
+CAPTURE_DIR_ENV = "NETFLUX5G_CAPTURE_DIR"
+CAPTURE_DIR = "captures"
+
+# Ring buffer: files of DEFAULT_FILE_SIZE_MB, the newest DEFAULT_FILE_COUNT are kept
+DEFAULT_FILE_SIZE_MB = 10
+DEFAULT_FILE_COUNT = 5
+
+# Directory of the pcaps inside the helper
+MOUNT_POINT = "/captures"
+
+# Seconds between removals of old files of time-rotated captures
+PRUNE_INTERVAL = 5
+
+# Seconds tcpdump gets to flush its last file on stop
+STOP_TIMEOUT = 10
+
+
+def default_capture_dir(config_dir):
+    return os.environ.get(CAPTURE_DIR_ENV) or os.path.join(config_dir, CAPTURE_DIR)
+
+
+def capture_id(target, interface):
+    """Name of a capture: target and interface (reference point, interface name or "any")"""
+    return sanitize_name(f"{target}-{interface}")
+
+
+def render_capture_script(name, interface=None, address=None, file_size_mb=DEFAULT_FILE_SIZE_MB,
+                          file_count=DEFAULT_FILE_COUNT, rotate_s=None, bpf_filter=None):
+    """
+    Shell script capturing into a ring buffer of pcaps under MOUNT_POINT until SIGTERM
+
+    Args:
+        name: Capture ID, the prefix of the pcap files
+        interface: Interface name ("any" when neither it nor address is set)
+        address: Capture on the interface holding this address instead
+        file_size_mb: Megabytes per file
+        file_count: Files kept
+        rotate_s: Also start a new file every rotate_s seconds
+        bpf_filter: Optional capture filter expression
+
+    Returns:
+        str: Script; tcpdump runs in the background so a stop flushes the current file
+    """
+    lines = ["set -e"]
+    if address:
+        lines += render_interface_lookup(address)
+    else:
+        lines.append(f"dev={shlex.quote(interface or 'any')}")
+    lines.append(f"cd {MOUNT_POINT}")
+
+    command = f'tcpdump -i "$dev" -n -U -Z root -C {int(file_size_mb)}'
+    if rotate_s:
+        # Time-rotated file names; old files are pruned below since -W would stop tcpdump
+        command += f" -G {int(rotate_s)} -w {shlex.quote(name)}-%Y%m%d-%H%M%S.pcap"
+        prune = (f"ls -1t {shlex.quote(name)}-*.pcap* 2>/dev/null | tail -n +{int(file_count) + 1} "
+                 "| xargs -r rm -f --")
+    else:
+        # tcpdump overwrites its own ring of numbered files
+        command += f" -W {int(file_count)} -w {shlex.quote(name)}.pcap"
+        prune = ":"
+    if bpf_filter:
+        command += f" {shlex.quote(bpf_filter)}"
+
+    lines += [
+        f"{command} &",
+        "pid=$!",
+        "trap 'kill -TERM $pid 2>/dev/null; wait $pid; exit 0' TERM INT",
+        'echo "capturing on $dev"',
+        "while kill -0 $pid 2>/dev/null; do",
+        f"    {prune}",
+        f"    sleep {PRUNE_INTERVAL} & wait $!",
+        "done",
+        "wait $pid",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def capture_files(directory, name):
+    """pcaps of a capture, oldest first"""
+    files = glob.glob(os.path.join(directory, f"{name}.pcap*")) + glob.glob(os.path.join(directory, f"{name}-*.pcap*"))
+    return sorted(files, key=os.path.getmtime)
+
+
+class PacketCapture:
+    """Starts, lists and stops the capture helpers of one run"""
+
+    def __init__(self, client, namespace, image, setup="", directory=None, mem_limit=None):
+        """
+        Args:
+            client: docker client
+            namespace: RunNamespace of the run (its run ID is enough)
+            image: nettools image with tcpdump, or a function returning (image, setup)
+                called when the first capture starts
+            setup: Shell prefix run before the script (e.g. installing tcpdump)
+            directory: Host directory of the pcaps; the run's files go to <directory>/<run ID>
+            mem_limit: Memory limit of the helpers
+        """
+        self.client = client
+        self.namespace = namespace
+        self.image = image
+        self.setup = setup
+        self.directory = os.path.abspath(os.path.join(directory or CAPTURE_DIR, namespace.run_id))
+        self.mem_limit = mem_limit
+
+    def _helper(self):
+        """(image, setup) of the capture helpers"""
+        if callable(self.image):
+            self.image, self.setup = self.image()
+        return self.image, self.setup
+
+    def _target(self, target):
+        """Container of a logical name (or container name) in this run"""
+        import docker
+
+        containers = self.client.containers.list(filters={"label": [
+            f"{LABEL_RUN}={self.namespace.run_id}", f"{LABEL_COMPONENT}={target}"]})
+        if containers:
+            return containers[0]
+        for name in (self.namespace.resolve(target), self.namespace.container_name(target)):
+            try:
+                return self.client.containers.get(name)
+            except docker.errors.NotFound:
+                continue
+        raise ValueError(f"No container {target} in run {self.namespace.run_id}")
+
+    def _helpers(self):
+        return self.client.containers.list(all=True, filters={"label": [
+            f"{LABEL_RUN}={self.namespace.run_id}", LABEL_CAPTURE]})
+
+    def start(self, target, reference_point=None, interface=None, file_size_mb=DEFAULT_FILE_SIZE_MB,
+              file_count=DEFAULT_FILE_COUNT, rotate_s=None, bpf_filter=None):
+        """
+        Start capturing on a container (restarting an earlier capture of the same interface)
+
+        Args:
+            target: Logical name of the container
+            reference_point: Capture on the container's interface in this network
+            interface: Capture on this interface (default: "any")
+
+        Returns:
+            dict: id, target, interface, directory, container and limit_mb of the capture
+        """
+        container = self._target(target)
+        target = self.namespace.logical_name(container)
+        address = None
+        if reference_point:
+            container.reload()
+            networks = container.attrs.get('NetworkSettings', {}).get('Networks', {})
+            address = (networks.get(self.namespace.network_name_for(reference_point)) or {}).get('IPAddress')
+            if not address:
+                raise ValueError(f"{target} is not attached to the {reference_point} network")
+        label = reference_point or interface or "any"
+        name = capture_id(target, label)
+        self.stop(capture=name)
+
+        os.makedirs(self.directory, exist_ok=True)
+        script = render_capture_script(name, interface=interface, address=address, file_size_mb=file_size_mb,
+                                       file_count=file_count, rotate_s=rotate_s, bpf_filter=bpf_filter)
+        image, setup = self._helper()
+        if setup:
+            script = f"{setup}\n{script}"
+        labels = self.namespace.labels(logical_name=f"capture-{name}", component_type="capture")
+        labels.update({LABEL_CAPTURE: name, LABEL_TARGET: str(target), LABEL_INTERFACE: label,
+                       LABEL_DIRECTORY: self.directory})
+        helper = self.client.containers.run(
+            image,
+            ["sh", "-c", script],
+            entrypoint="",
+            name=self.namespace.container_name(f"capture-{name}"),
+            network_mode=f"container:{container.id}",
+            cap_add=["NET_ADMIN", "NET_RAW"],
+            volumes={self.directory: {"bind": MOUNT_POINT, "mode": "rw"}},
+            labels=labels,
+            detach=True,
+            **({"mem_limit": self.mem_limit} if self.mem_limit else {})
+        )
+        logging.info(f"Capture {name} started in {helper.name}")
+        return {"id": name, "target": target, "interface": label, "directory": self.directory,
+                "container": helper.name, "limit_mb": int(file_size_mb) * int(file_count)}
+
+    def list(self):
+        """Captures of the run with their state and the pcaps currently kept"""
+        captures = []
+        for helper in self._helpers():
+            labels = helper.labels or {}
+            name = labels.get(LABEL_CAPTURE)
+            files = capture_files(labels.get(LABEL_DIRECTORY) or self.directory, name)
+            captures.append({
+                "id": name,
+                "target": labels.get(LABEL_TARGET),
+                "interface": labels.get(LABEL_INTERFACE),
+                "status": helper.status,
+                "files": files,
+                "bytes": sum(os.path.getsize(file) for file in files if os.path.exists(file)),
+            })
+        return sorted(captures, key=lambda capture: capture["id"] or "")
+
+    def stop(self, target=None, capture=None):
+        """
+        Stop captures, letting tcpdump flush its last file, and remove their helpers
+
+        Args:
+            target: Only the captures of this container
+            capture: Only the capture with this ID
+
+        Returns:
+            list: IDs of the stopped captures
+        """
+        stopped = []
+        for helper in self._helpers():
+            labels = helper.labels or {}
+            if target is not None and labels.get(LABEL_TARGET) != str(target):
+                continue
+            if capture is not None and labels.get(LABEL_CAPTURE) != capture:
+                continue
+            try:
+                helper.stop(timeout=STOP_TIMEOUT)
+                helper.remove(force=True)
+                stopped.append(labels.get(LABEL_CAPTURE))
+            except Exception as e:
+                logging.warning(f"Could not stop capture {labels.get(LABEL_CAPTURE)}: {e}")
+        return stopped
@@ -0,0 +1,159 @@
+"""
+Snapshots of a provisioned MongoDB for the 5G core
+
+After a run has provisioned its subscribers, the MongoDB data directory is
+copied into a docker volume named after a hash of the subscriber set (and the
+MongoDB image). Later runs with the same subscriber set copy the snapshot into
+a fresh data directory, optionally on tmpfs, before mongod starts and skip
+provisioning and its settle waits.
+"""
+
+import hashlib
+import logging
+import time
+
+SNAPSHOT_PREFIX = "nf5g-mongo"
+LABEL_SNAPSHOT = "netflux5g.snapshot"
+
+# Where the snapshot volume is mounted in the MongoDB and helper containers
+SNAPSHOT_MOUNT = "/snapshot"
+DATA_DIR = "/data/db"
+
+TMPFS_SIZE = "256m"
+
+# Seconds to wait for a restored mongod to answer
+READY_TIMEOUT = 30
+
+_COUNT_SUBSCRIBERS = "db.getSiblingDB('open5gs').subscribers.countDocuments({})"
+
+
+def subscriber_set_hash(image, provisioning_script):
+    """Key of a snapshot: the MongoDB image plus the exact provisioning script"""
+    digest = hashlib.sha256()
+    digest.update(image.encode())
+    digest.update(b"\0")
+    digest.update(provisioning_script.strip().encode())
+    return digest.hexdigest()
+
+
+def _mongo_eval(container, script):
+    """Run a script with mongosh or the legacy mongo shell; returns (exit code, output)"""
+    command = (f"mongosh --quiet --eval \"{script}\" 2>/dev/null || "
+               f"mongo --quiet --eval \"{script}\"")
+    result = container.exec_run(["sh", "-c", command])
+    output = result.output.decode(errors='replace').strip() if result.output else ""
+    return result.exit_code, output
+
+
+class CoreSnapshotStore:
+    """MongoDB data snapshots kept in docker volumes, keyed by subscriber-set hash"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def volume_name(key):
+        return f"{SNAPSHOT_PREFIX}-{key[:16]}"
+
+    def find(self, key):
+        """Return the snapshot volume for a key, or None"""
+        import docker
+        try:
+            return self.client.volumes.get(self.volume_name(key))
+        except docker.errors.NotFound:
+            return None
+
+    def list(self):
+        return self.client.volumes.list(filters={"label": LABEL_SNAPSHOT})
+
+    def remove_all(self):
+        """Remove every snapshot volume; returns their names"""
+        removed = []
+        for volume in self.list():
+            try:
+                volume.remove(force=True)
+                removed.append(volume.name)
+            except Exception as e:
+                logging.warning(f"Could not remove snapshot {volume.name}: {e}")
+        return removed
+
+    def restore_args(self, key, use_tmpfs=False):
+        """
+        Extra create arguments that start MongoDB from a snapshot
+
+        The snapshot is mounted read-only and copied into the (fresh) data
+        directory before the image's entrypoint starts mongod, so the
+        snapshot itself is never modified by the run.
+
+        Returns:
+            dict: Create arguments, empty if there is no snapshot for the key
+        """
+        volume = self.find(key)
+        if volume is None:
+            return {}
+
+        args = {
+            "command": ["sh", "-c",
+                        f"if [ -d {SNAPSHOT_MOUNT}/db ]; then cp -a {SNAPSHOT_MOUNT}/db/. {DATA_DIR}/; fi && "
+                        f"exec docker-entrypoint.sh mongod"],
+            "volumes": {volume.name: {"bind": SNAPSHOT_MOUNT, "mode": "ro"}},
+        }
+        if use_tmpfs:
+            args["tmpfs"] = {DATA_DIR: f"rw,size={TMPFS_SIZE}"}
+        return args
+
+    def wait_until_restored(self, container, timeout=READY_TIMEOUT):
+        """Wait for a restored mongod; True once it serves the snapshot's subscribers"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                exit_code, output = _mongo_eval(container, _COUNT_SUBSCRIBERS)
+                last_line = output.splitlines()[-1] if output else ""
+                if exit_code == 0 and last_line.isdigit():
+                    return int(last_line) > 0
+            except Exception as e:
+                logging.debug(f"MongoDB not ready yet: {e}")
+            time.sleep(1)
+        return False
+
+    def capture(self, container, key, image):
+        """
+        Copy the data directory of a running, provisioned MongoDB into the snapshot
+
+        Writes are blocked with fsyncLock while a helper container sharing the
+        MongoDB volumes copies the data; the copy is moved into place at the
+        end so a concurrent restore never sees a half-written snapshot.
+
+        Returns:
+            bool: True if the snapshot was written
+        """
+        volume = self.client.volumes.create(
+            name=self.volume_name(key),
+            labels={LABEL_SNAPSHOT: key}
+        )
+
+        exit_code, output = _mongo_eval(container, "db.fsyncLock()")
+        if exit_code != 0:
+            logging.warning(f"Could not lock MongoDB for the snapshot: {output}")
+            return False
+
+        staging = f"{SNAPSHOT_MOUNT}/.staging-{container.name}"
+        try:
+            self.client.containers.run(
+                image,
+                entrypoint="",
+                command=["sh", "-c",
+                         f"rm -rf {staging} && mkdir -p {staging} && "
+                         f"cp -a {DATA_DIR}/. {staging}/ && rm -f {staging}/mongod.lock && "
+                         f"rm -rf {SNAPSHOT_MOUNT}/db && mv {staging} {SNAPSHOT_MOUNT}/db"],
+                volumes_from=[container.id],
+                volumes={volume.name: {"bind": SNAPSHOT_MOUNT, "mode": "rw"}},
+                network_mode="none",
+                remove=True
+            )
+            return True
+        except Exception as e:
+            logging.warning(f"Could not write MongoDB snapshot {volume.name}: {e}")
+            return False
+        finally:
+            _mongo_eval(container, "db.fsyncUnlock()")
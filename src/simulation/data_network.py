@@ -0,0 +1,136 @@
+"""
+Local data network (DN) for air-gapped labs
+
+A "dn" component is a container on N6 serving what the UEs' end-to-end tests
+and benchmarks would otherwise fetch from the internet: an HTTP server with
+fixed-size downloads, a DNS server answering for the DN's names, iperf3
+servers and TCP/UDP echo plus a TCP discard sink. The SMF hands its address
+to the UEs as their DNS server and the UEs route it through their tunnel, so
+every measurement against it crosses the user plane and runs offline.
+"""
+
+import re
+import shlex
+
+from simulation.benchmark import IPERF3_PORT
+
+DEFAULT_DOMAIN = "netflux5g.local"
+
+# Environment variable of the DN container holding its DNS zone
+DOMAIN_ENV = "DNS_DOMAIN"
+
+HTTP_PORT = 80
+DNS_PORT = 53
+ECHO_PORT = 7
+DISCARD_PORT = 9
+
+# iperf3 servers on IPERF3_PORT and the following ports, one per concurrent client
+IPERF3_SERVERS = 16
+
+# Download files served over HTTP: /<size>M.bin
+DOWNLOAD_SIZES_MB = (1, 10)
+
+# Services checked from the UEs (see render_check_script)
+CHECKED_SERVICES = ("http", "dns", "echo")
+
+CHECK_PATTERN = re.compile(r"^(\w+) (ok|failed)$", re.MULTILINE)
+
+
+def iperf3_ports():
+    """Ports of the DN's own iperf3 servers"""
+    return range(IPERF3_PORT, IPERF3_PORT + IPERF3_SERVERS)
+
+
+def hostname(name, domain=DEFAULT_DOMAIN):
+    """Fully qualified name of a DN in its DNS zone"""
+    return f"{name}.{domain or DEFAULT_DOMAIN}"
+
+
+def container_domain(container):
+    """DNS zone a deployed DN container answers for (its DOMAIN_ENV variable)"""
+    try:
+        environment = container.attrs['Config']['Env'] or []
+    except (AttributeError, KeyError, TypeError):
+        environment = []
+    for variable in environment:
+        key, _, value = variable.partition("=")
+        if key == DOMAIN_ENV and value:
+            return value
+    return DEFAULT_DOMAIN
+
+
+def render_service_script(name, domain=DEFAULT_DOMAIN):
+    """
+    Shell script starting the DN services and waiting until SIGTERM
+
+    Args:
+        name: Logical name of the DN, resolvable as itself and as name.domain
+        domain: DNS zone answered with the DN's address (every name in it)
+
+    Returns:
+        str: Script for the netflux5g/dn image (busybox httpd, dnsmasq, iperf3, socat)
+    """
+    domain = domain or DEFAULT_DOMAIN
+    lines = [
+        "set -e",
+        "ip=$(hostname -i | awk '{print $1}')",
+        "mkdir -p /www",
+        f"echo {shlex.quote(f'NetFlux5G data network {name}')} > /www/index.html",
+    ]
+    lines += [f"dd if=/dev/zero of=/www/{size}M.bin bs=1M count={size} 2>/dev/null" for size in DOWNLOAD_SIZES_MB]
+    lines += [
+        f"httpd -p {HTTP_PORT} -h /www",
+        # No upstream servers: names outside the DN's zone fail fast instead of timing out
+        f"dnsmasq --port={DNS_PORT} --no-resolv --no-hosts "
+        f"--host-record={shlex.quote(name)},$ip --address=/{shlex.quote(domain)}/$ip",
+    ]
+    lines += [f"iperf3 -s -D -p {port}" for port in iperf3_ports()]
+    lines += [
+        f"socat TCP-LISTEN:{ECHO_PORT},fork,reuseaddr EXEC:cat &",
+        f"socat UDP4-RECVFROM:{ECHO_PORT},fork EXEC:cat &",
+        f"socat -u TCP-LISTEN:{DISCARD_PORT},fork,reuseaddr OPEN:/dev/null &",
+        'echo "data network ready on $ip"',
+        "trap 'exit 0' TERM INT",
+        "while true; do sleep 3600 & wait $!; done",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_check_script(address, name, domain=DEFAULT_DOMAIN):
+    """
+    Shell script checking a DN's HTTP, DNS and echo services from a UE's namespace
+
+    Runs in a nettools helper (busybox wget, nslookup and nc); prints one
+    "<service> ok|failed" line per service of CHECKED_SERVICES.
+    """
+    address = shlex.quote(address)
+    fqdn = shlex.quote(hostname(name, domain))
+    return (
+        f"wget -q -T 5 -O /dev/null http://{address}:{HTTP_PORT}/{DOWNLOAD_SIZES_MB[0]}M.bin "
+        "&& echo 'http ok' || echo 'http failed'\n"
+        f"nslookup {fqdn} {address} 2>/dev/null | tail -n +3 | grep -q {address} "
+        "&& echo 'dns ok' || echo 'dns failed'\n"
+        f"[ \"$(echo netflux5g | nc -w 2 {address} {ECHO_PORT})\" = netflux5g ] "
+        "&& echo 'echo ok' || echo 'echo failed'\n"
+    )
+
+
+def parse_check_output(output):
+    """{service: True/False} of render_check_script output (False for services without a line)"""
+    results = {service: False for service in CHECKED_SERVICES}
+    for service, status in CHECK_PATTERN.findall(output or ""):
+        if service in results:
+            results[service] = status == "ok"
+    return results
+
+
+def check_results(source, name, address, checks):
+    """Connectivity test results of parse_check_output() checks of a DN run from a UE's tunnel"""
+    return [{
+        "source": source,
+        "source_ip": "uesimtun0",
+        "target": f"{name} ({service})",
+        "target_ip": address,
+        "success": success,
+        "error": None if success else f"{service.upper()} service of {name} not reachable via tunnel"
+    } for service, success in checks.items()]
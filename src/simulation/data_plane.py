@@ -0,0 +1,59 @@
+"""
+High-throughput data-plane networks for the user plane
+
+In multi-network mode the user-plane networks (N3 and N6) are bridges by
+default, so every GTP-U packet crosses a veth pair and the bridge. With the
+"ipvlan" or "macvlan" driver they are created on a per-network dummy
+interface of the Docker host instead: the containers' interfaces sit directly
+on that parent, no physical NIC is needed and nothing leaves the host. The
+dummy interfaces are created and removed from a host-network nettools helper,
+so this works with local and remote daemons alike.
+
+A dummy parent has no uplink: with these drivers N6 is an isolated data
+network (the internet gateway is still reachable, the internet is not).
+"""
+
+import hashlib
+
+BRIDGE = "bridge"
+IPVLAN = "ipvlan"
+MACVLAN = "macvlan"
+DRIVERS = (BRIDGE, IPVLAN, MACVLAN)
+DEFAULT_DRIVER = BRIDGE
+
+# Topology setting ("settings" section of a project) selecting the driver
+SETTING_KEY = "data_plane_driver"
+
+# Networks that get the data-plane driver
+USER_PLANE_REFERENCE_POINTS = ("n3", "n6")
+
+# Driver options besides the parent interface
+DRIVER_OPTIONS = {
+    IPVLAN: {"ipvlan_mode": "l2"},
+    MACVLAN: {"macvlan_mode": "bridge"},
+}
+
+
+def parent_interface(run_id, reference_point):
+    """Dummy parent interface of a run's network (kernel names are limited to 15 characters)"""
+    digest = hashlib.sha1(str(run_id).encode('utf-8')).hexdigest()[:6]
+    return f"nf5g{digest}{reference_point}"
+
+
+def network_options(driver, parent):
+    """Docker driver options of a data-plane network on a parent interface"""
+    if driver == BRIDGE:
+        return {}
+    return {"parent": parent, **DRIVER_OPTIONS[driver]}
+
+
+def render_dummy_script(names, remove=False):
+    """Shell script creating (or removing) dummy interfaces in the host namespace"""
+    lines = []
+    for name in names:
+        if remove:
+            lines.append(f"ip link del {name} 2>/dev/null || true")
+        else:
+            lines.append(f"ip link show {name} >/dev/null 2>&1 || ip link add {name} type dummy")
+            lines.append(f"ip link set {name} up")
+    return "set -e\n" + "\n".join(lines) + "\n"
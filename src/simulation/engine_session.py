@@ -0,0 +1,215 @@
+"""
+Long-lived Docker engine session shared by all simulations
+
+A single docker client (with a pooled HTTP connection to the daemon) is
+created on first use and reused by every NetworkSimulator run, the terminal
+dialog (through the run's container manager) and cleanup. Daemon version/info,
+the run networks and the local images are cached so a second run does not pay
+the connect and lookup costs again. Containers are not cached: runs find
+theirs through their labels (see namespace.py).
+"""
+
+import logging
+import threading
+import time
+
+from utils.config_manager import ConfigManager
+
+# HTTP connections kept open to the daemon (parallel deploys/teardown share them)
+DEFAULT_POOL_SIZE = 16
+
+# Seconds a successful ping is trusted before the daemon is pinged again
+PING_TTL = 10.0
+
+# Seconds after a failed connect before the next access tries again
+RECONNECT_INTERVAL = 5.0
+
+
+class EngineSession:
+    """Shared docker client plus a cached view of the engine's resources"""
+
+    def __init__(self, max_pool_size=DEFAULT_POOL_SIZE, timeout=120, config_manager=None):
+        self.max_pool_size = max_pool_size
+        self.timeout = timeout
+        self.config_manager = config_manager or ConfigManager()
+
+        self._lock = threading.RLock()
+        self._client = None
+        self._connect_error = None
+        self._connect_failed_at = 0.0
+        self._last_ping = 0.0
+        self._version = None
+        self._info = None
+
+        # Resource cache, kept up to date by the container manager as it
+        # creates and removes resources
+        self._networks = {}         # name -> network
+        self._images = set()        # image references known to exist locally
+
+    # Connection
+
+    @property
+    def client(self):
+        """The shared docker client, or None if the daemon is unreachable (retried every RECONNECT_INTERVAL)"""
+        with self._lock:
+            if self._client is None and self._should_connect():
+                self._connect()
+            return self._client
+
+    def _should_connect(self):
+        if self._connect_error is None:
+            return True
+        if isinstance(self._connect_error, ImportError):
+            # Retrying cannot install the docker package
+            return False
+        return time.monotonic() - self._connect_failed_at >= RECONNECT_INTERVAL
+
+    @property
+    def connect_error(self):
+        return self._connect_error
+
+    def _connect(self):
+        try:
+            import docker
+            started = time.perf_counter()
+            self._client = docker.from_env(max_pool_size=self.max_pool_size, timeout=self.timeout)
+            self._connect_error = None
+            logging.info(f"Docker client connected in {time.perf_counter() - started:.2f}s "
+                         f"(API {self._client.api.api_version})")
+        except ImportError as e:
+            logging.error("Docker package not installed. Please install: pip install docker")
+            self._connect_error = e
+        except Exception as e:
+            logging.error(f"Error connecting to Docker: {e}")
+            self._connect_error = e
+            self._connect_failed_at = time.monotonic()
+
+    def reconnect(self):
+        """Drop the client and all cached state and connect again"""
+        with self._lock:
+            self.close()
+            return self.client
+
+    def close(self):
+        """Close the pooled connection and forget cached state"""
+        with self._lock:
+            if self._client is not None:
+                try:
+                    self._client.close()
+                except Exception as e:
+                    logging.warning(f"Error closing Docker client: {e}")
+            self._client = None
+            self._connect_error = None
+            self._connect_failed_at = 0.0
+            self._last_ping = 0.0
+            self._version = None
+            self._info = None
+            self._networks = {}
+            self._images = set()
+
+    def ping(self, force=False):
+        """Check that the daemon answers; successful pings are cached for PING_TTL"""
+        client = self.client
+        if client is None:
+            return False
+
+        if not force and time.monotonic() - self._last_ping < PING_TTL:
+            return True
+
+        try:
+            client.ping()
+            self._last_ping = time.monotonic()
+            return True
+        except Exception as e:
+            logging.error(f"Docker ping failed: {e}")
+            self._last_ping = 0.0
+            return False
+
+    def version(self):
+        """Daemon version information (cached)"""
+        with self._lock:
+            if self._version is None and self.client is not None:
+                self._version = self.client.version()
+            return self._version
+
+    def info(self):
+        """Daemon system information (cached)"""
+        with self._lock:
+            if self._info is None and self.client is not None:
+                self._info = self.client.info()
+            return self._info
+
+    def is_local(self):
+        """True if the daemon runs on this host (unix socket), so /proc and /sys describe it"""
+        base_url = getattr(getattr(self.client, 'api', None), 'base_url', '') or ''
+        return base_url.startswith("http+docker://")
+
+    # Networks
+
+    def get_network(self, name):
+        """Return a network by name (cached), or None if it does not exist"""
+        with self._lock:
+            if name in self._networks:
+                return self._networks[name]
+            if self.client is None:
+                return None
+
+            import docker
+            try:
+                network = self.client.networks.get(name)
+            except docker.errors.NotFound:
+                return None
+            self._networks[name] = network
+            return network
+
+    def track_network(self, network):
+        with self._lock:
+            self._networks[network.name] = network
+
+    def forget_network(self, name):
+        with self._lock:
+            self._networks.pop(name, None)
+
+    # Images
+
+    def has_image(self, image):
+        """Return True if the image exists locally (positive results are cached)"""
+        with self._lock:
+            if image in self._images:
+                return True
+            if self.client is None:
+                return False
+
+            import docker
+            try:
+                self.client.images.get(image)
+            except docker.errors.ImageNotFound:
+                return False
+            self._images.add(image)
+            return True
+
+    def mark_image_present(self, image):
+        with self._lock:
+            self._images.add(image)
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide engine session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = EngineSession()
+        return _session
+
+
+def close_session():
+    """Close the process-wide engine session (e.g. on application exit)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -1,15 +1,92 @@
+import io
 import logging
 from datetime import datetime
 import subprocess
 import os
 import time
 import json
+import re
+import shutil
 import sys
-import docker
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the src directory to the path to import our modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.config_manager import ConfigManager
+from models.component_types import SCALABLE_TYPES
+from simulation.capacity_planner import CapacityPlanner, multi_ue_memory, parse_memory, resource_requests
+from simulation.capture import PacketCapture, default_capture_dir
+from simulation.core_snapshot import CoreSnapshotStore, subscriber_set_hash
+from simulation.data_network import (DEFAULT_DOMAIN as DEFAULT_DN_DOMAIN, DOMAIN_ENV as DN_DOMAIN_ENV, check_results,
+                                     container_domain, iperf3_ports as dn_iperf3_ports, parse_check_output,
+                                     render_check_script, render_service_script)
+from simulation.data_plane import (BRIDGE, DEFAULT_DRIVER as DEFAULT_DATA_PLANE_DRIVER,
+                                   SETTING_KEY as DATA_PLANE_SETTING, USER_PLANE_REFERENCE_POINTS,
+                                   network_options, parent_interface, render_dummy_script)
+from simulation.engine_session import get_session
+from simulation.helper_images import ensure_helper_image
+from simulation.image_pipeline import ImagePipeline
+from simulation.ipam import UE_POOL, SubnetAllocator, plan_run_addresses, static_address
+from simulation.namespace import RunNamespace
+from simulation.link_emulation import LinkEmulator, link_shaping
+from simulation.placement import (DEFAULT_PROFILE, SETTING_KEY as PLACEMENT_SETTING, PlacementPlanner, engine_nodes,
+                                  learned_dedicated_cores)
+from simulation.protocol_stats import SETTING_KEY as PROTOCOL_STATS_SETTING, ProtocolStatsCollector, vantage_points
+from simulation.reference_points import (DEFAULT_MODE as DEFAULT_NETWORK_MODE, EGRESS_REFERENCE_POINTS, MULTI,
+                                         REFERENCE_POINTS, SETTING_KEY as NETWORK_MODE_SETTING,
+                                         reference_points_for)
+from simulation.ran_plan import linked_gnbs, plan_ran
+from simulation.slicing import (dedicated_instances, plan_slices, provisioned_count, render_subscriber_script,
+                                slice_key, slice_name)
+from simulation.resource_history import ResourceHistory, ResourceSampler
+from simulation.teardown import DEFAULT_GRACE_PERIOD, format_report, teardown_run
+
+# Order in which component types are deployed (and their fixed addresses assigned)
+DEPLOYMENT_ORDER = ['mongodb', 'nrf', 'amf', 'smf', 'upf', 'ausf', 'udm', 'pcf', 'dn', 'gnb', 'ue']
+
+# Most instances of a scalable NF type (models.component_types.SCALABLE_TYPES)
+MAX_REPLICAS = 16
+
+# Component types deployed in parallel (they only depend on the core), and the parallel deploys at a time
+PARALLEL_TYPES = ('gnb',)
+MAX_PARALLEL_DEPLOYS = 16
+
+# Hostnames used in the Open5GS config templates -> component type they refer to
+TEMPLATE_HOSTNAMES = {
+    "mongodb": "mongodb",
+    **{f"{comp_type}-test": comp_type for comp_type in ('nrf', 'amf', 'smf', 'upf', 'ausf', 'udm', 'pcf')}
+}
+
+_URI_HOST = re.compile(r"(?<=://)([A-Za-z0-9_.-]+)")
+
+# Subscriber provisioning script, copied to /tmp in the MongoDB container
+SUBSCRIBER_SCRIPT = "netflux5g-subscribers.js"
+
+
+def _substitute_hostnames(value, resolve):
+    """Replace hostnames (plain values and URI hosts) in a loaded config with resolve(hostname) addresses"""
+    if isinstance(value, dict):
+        return {key: _substitute_hostnames(item, resolve) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_substitute_hostnames(item, resolve) for item in value]
+    if isinstance(value, str):
+        address = resolve(value)
+        if address:
+            return address
+        return _URI_HOST.sub(lambda match: resolve(match.group(1)) or match.group(1), value)
+    return value
+
+
+def _file_archive(name, content):
+    """tar archive (bytes) holding one text file, for put_archive"""
+    data = content.encode()
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mode = 0o644
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as archive:
+        archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
 
 class EnhancedContainerManager:
     """
@@ -17,31 +94,106 @@ class EnhancedContainerManager:
     Similar to how MiniEdit works with Mininet
     """
     
-    def __init__(self):
+    def __init__(self, session=None, namespace=None, warm_pool=None):
+        # The docker client, daemon info and resource cache are shared by
+        # every run through the engine session
+        self.session = session or get_session()
+        # Names, labels and network of this run (parallel runs never collide)
+        self.namespace = namespace or RunNamespace()
         try:
             logging.info("Initializing Enhanced ContainerManager...")
-            try:
-                import docker
-                self.client = docker.from_env()
+            if self.client:
                 logging.info("Docker client connected successfully")
-            except ImportError:
-                logging.error("Docker package not installed. Please install: pip install docker")
-                self.client = None
-            except Exception as e:
-                logging.error(f"Error connecting to Docker: {e}")
-                self.client = None
         except Exception as e:
             logging.error(f"Error initializing ContainerManager: {e}")
-            self.client = None
         
         self.deployed_containers = []
-        self.network_name = "netflux5g_network"
+        self.network_name = self.namespace.network_name
         self.open5gs_containers = {}
         self.ueransim_containers = {}
+        self.nf_instances = {}      # component type -> all its containers
         self.terminal_processes = {}
+        self.gnb_addresses = []
+        
+        # Seconds the whole run gets to shut down on teardown before containers are killed
+        self.stop_grace_period = DEFAULT_GRACE_PERIOD
+        self.last_teardown = None
+        
+        # Optional pool of idle NF containers claimed instead of creating new ones
+        self.warm_pool = warm_pool
+        
+        # Local helper images known to be built and up to date
+        self.helper_images = set()
+        
+        # Background pulls/builds of the current deployment
+        self.image_pipeline = None
+        
+        # Admission control: densify UEs into multi-UE containers when memory
+        # is short, optionally wait up to admission_queue_timeout seconds
+        self.allow_densify = True
+        self.admission_queue_timeout = 0
+        self.capacity_plan = None
+        
+        # Memory limits learned from peaks observed in earlier runs
+        self.adaptive_limits = True
+        self.resource_sampler = None
+        self.multi_ue_containers = set()
+        
+        # CPU placement profile ("performance" or "dense"); None uses the
+        # topology's "placement" setting
+        self.placement_profile = None
+        self.topology_settings = {}
+        self.placement = None
+        
+        # Fixed address of every container, assigned once the run networks exist
+        self.address_plan = None
+        
+        # Cell identity (gNB ID, NCI, TAC) of every gNB and the gNBs each UE searches,
+        # and the registration results per cell once the UEs are up
+        self.ran_plan = None
+        
+        # Slices (S-NSSAI, DNN, UE pool) from the SMF/UPF/UE slice properties,
+        # with the slice of every SMF, UPF and UE and the UE subscribers
+        self.slice_plan = None
+        
+        # "flat" (one run network) or "multi" (one network per 5G reference
+        # point); None uses the topology's "network_mode" setting
+        self.network_mode = None
         
-        # Initialize configuration manager
-        self.config_manager = ConfigManager()
+        # Driver of the N3/N6 networks in multi-network mode ("bridge", or
+        # "ipvlan"/"macvlan" on host dummy interfaces); None uses the topology's
+        # "data_plane_driver" setting
+        self.data_plane_driver = None
+        self.dummy_interfaces = []
+        
+        # Canvas link bandwidth/delay/jitter/loss applied with tc in the containers
+        self.link_emulation = True
+        self.link_emulator = None
+        
+        # tcpdump ring buffers on container interfaces (default directory:
+        # <config dir>/captures, or $NETFLUX5G_CAPTURE_DIR)
+        self.capture_dir = None
+        self.packet_capture = None
+        
+        # NGAP/PFCP/GTP-U/SBI statistics streamed from tcpdump (None: the
+        # topology's "protocol_stats" setting)
+        self.protocol_stats = None
+        self.protocol_stats_collector = None
+        
+        # NFs talk over the run network(s); with publish_ports their "ports"
+        # are also published on host ports chosen by the daemon (None), never
+        # on fixed ones, so parallel runs and NF replicas do not collide
+        self.publish_ports = False
+        
+        # Start MongoDB from a snapshot of an already provisioned core when the
+        # subscriber set matches (optionally with the data directory on tmpfs)
+        self.core_snapshots = True
+        self.mongodb_on_tmpfs = False
+        self.restored_from_snapshot = False
+        self.subscribers_provisioned = False
+        
+        # Configuration manager shared through the session
+        self.config_manager = self.session.config_manager
         
         # 5G Core component configurations
         self.open5gs_config = {
@@ -65,7 +217,7 @@ class EnhancedContainerManager:
             "amf": {
                 "image": "openverso/open5gs:latest",
                 "command": ["open5gs-amfd", "-c", "/etc/open5gs/amf.yaml"],
-                "ports": {"38412": "38412"},
+                "ports": {"38412/sctp": None},  # NGAP; published only with publish_ports
                 "depends_on": ["nrf"],
                 "volumes": {},
                 "mem_limit": "128m",
@@ -82,7 +234,7 @@ class EnhancedContainerManager:
             "upf": {
                 "image": "openverso/open5gs:latest",
                 "command": ["open5gs-upfd", "-c", "/etc/open5gs/upf.yaml"],
-                "ports": {"8805": "8805"},
+                "ports": {"8805/udp": None},  # PFCP; published only with publish_ports
                 "cap_add": ["NET_ADMIN", "SYS_ADMIN"],
                 "privileged": True,
                 "depends_on": ["smf"],
@@ -147,10 +299,15 @@ class EnhancedContainerManager:
         }
         
         # Network infrastructure components
+        # Router and internet gateway run prebuilt local images (see
+        # helper_images.py); the apk install command is only a fallback
         self.network_config = {
             "router": {
-                "image": "alpine:latest",
-                "command": ["sh", "-c", "echo 'nameserver 8.8.8.8' > /etc/resolv.conf && echo 'nameserver 8.8.4.4' >> /etc/resolv.conf && apk update && apk add --no-cache iptables || sleep infinity"],
+                "image": "netflux5g/router:latest",
+                "base_image": "alpine:latest",
+                "packages": ["iptables"],
+                "command": ["sh", "-c", "echo 'nameserver 8.8.8.8' > /etc/resolv.conf && echo 'nameserver 8.8.4.4' >> /etc/resolv.conf && exec sleep infinity"],
+                "fallback_command": ["sh", "-c", "echo 'nameserver 8.8.8.8' > /etc/resolv.conf && echo 'nameserver 8.8.4.4' >> /etc/resolv.conf && apk update && apk add --no-cache iptables || sleep infinity"],
                 "cap_add": ["NET_ADMIN"],
                 "privileged": True,
                 "volumes": {},
@@ -158,76 +315,164 @@ class EnhancedContainerManager:
                 "memswap_limit": "64m"
             },
             "internet-gw": {
-                "image": "alpine:latest",
-                "command": ["sh", "-c", "echo 'nameserver 8.8.8.8' > /etc/resolv.conf && echo 'nameserver 8.8.4.4' >> /etc/resolv.conf && apk update && apk add --no-cache iptables curl nmap-ncat || sleep infinity"],
+                "image": "netflux5g/internet-gw:latest",
+                "base_image": "alpine:latest",
+                "packages": ["iptables", "curl", "nmap-ncat"],
+                "command": ["sh", "-c", "echo 'nameserver 8.8.8.8' > /etc/resolv.conf && echo 'nameserver 8.8.4.4' >> /etc/resolv.conf && exec sleep infinity"],
+                "fallback_command": ["sh", "-c", "echo 'nameserver 8.8.8.8' > /etc/resolv.conf && echo 'nameserver 8.8.4.4' >> /etc/resolv.conf && apk update && apk add --no-cache iptables curl nmap-ncat || sleep infinity"],
                 "cap_add": ["NET_ADMIN"],
                 "privileged": True,
                 "volumes": {},
                 "mem_limit": "128m",
                 "memswap_limit": "128m"
+            },
+            # Local data network: HTTP, DNS, iperf3 and echo servers on N6 (see data_network.py);
+            # the deploy appends the service script to the command
+            "dn": {
+                "image": "netflux5g/dn:latest",
+                "base_image": "alpine:latest",
+                "packages": ["busybox-extras", "dnsmasq", "iperf3", "socat"],
+                "command": ["sh", "-c", ":"],
+                "fallback_command": ["sh", "-c", "apk update && apk add --no-cache busybox-extras dnsmasq iperf3 socat"],
+                "cap_add": [],
+                "privileged": False,
+                "volumes": {},
+                "mem_limit": "128m",
+                "memswap_limit": "128m"
+            },
+            # Helper joining a container's network namespace (link emulation, benchmarks, captures)
+            "nettools": {
+                "image": "netflux5g/nettools:latest",
+                "base_image": "alpine:latest",
+                "packages": ["iproute2", "iperf3", "tcpdump"],
+                "setup": "apk add --no-cache iproute2 iperf3 tcpdump >/dev/null",
+                "mem_limit": "32m",
+                "memswap_limit": "32m"
             }
         }
         
+        # Start warming NF containers right away (in the background)
+        if self.warm_pool and self.client:
+            self.warm_pool.configure({**self.open5gs_config, **self.ueransim_config})
+            self.warm_pool.refill_async()
+        
+    @property
+    def client(self):
+        """The session's docker client, None while the daemon is unreachable (the session retries)"""
+        return self.session.client
+    
     def cleanup_existing_containers(self):
-        """Clean up any existing containers with our naming pattern"""
-        try:
-            # Get all containers (including stopped ones)
-            all_containers = self.client.containers.list(all=True)
-            
-            # Names to look for
-            container_patterns = [
-                'nrf-test', 'amf-test', 'smf-test', 'upf-test', 
-                'ausf-test', 'udm-test', 'pcf-test', 'gnb-test', 
-                'ue-test', 'internet-gw', 'router'
-            ]
+        """Clean up leftover containers of this run (e.g. a re-run with a pinned run ID)"""
+        if not self.client:
+            return
             
-            for container in all_containers:
-                container_name = container.name
-                if any(pattern in container_name for pattern in container_patterns):
-                    try:
-                        logging.info(f"Cleaning up existing container: {container_name}")
-                        if container.status == 'running':
-                            container.stop(timeout=5)
-                        container.remove()
-                        print(f"✅ Removed existing container: {container_name}")
-                    except Exception as e:
-                        logging.warning(f"Could not remove container {container_name}: {e}")
+        try:
+            # Only containers labelled with this run are touched; other
+            # users' and other runs' containers are never removed. Leftovers
+            # are killed right away, there is nothing to shut down gracefully.
+            report = teardown_run(self.client, self.namespace.run_id, grace_period=0,
+                                  remove_networks=False, session=self.session)
+            for container_name in report["containers"]:
+                if container_name not in report["failed"]:
+                    print(f"✅ Removed existing container: {container_name}")
                         
         except Exception as e:
             logging.error(f"Error during cleanup of existing containers: {e}")
         
     def create_5g_network(self):
-        """Create a Docker network for 5G components"""
+        """Create the Docker network(s) for 5G components"""
         if not self.client:
             return None
             
         try:
-            # Remove existing network if it exists
+            self.namespace.networks.clear()
+            self.namespace.subnets.clear()
+            driver = self._data_plane_driver()
+            if not self._multi_network():
+                if driver != BRIDGE:
+                    print(f"⚠️ The {driver} data plane needs multi-network mode, using the bridge")
+                return self._create_run_network()
+            
+            # User-plane networks on host dummy interfaces instead of bridges
+            if driver != BRIDGE and not self._create_dummy_interfaces():
+                print(f"⚠️ Could not create dummy interfaces for the {driver} data plane, using bridges")
+                driver = BRIDGE
+            
+            # One network per reference point; only N6 routes out of the host
+            networks = [self._create_run_network(reference_point,
+                                                 driver if reference_point in USER_PLANE_REFERENCE_POINTS else BRIDGE)
+                        for reference_point in REFERENCE_POINTS]
+            return networks[0]
+        except Exception as e:
+            print(f"Error creating network: {e}")
+            return None
+    
+    def _create_run_network(self, reference_point=None, driver=BRIDGE):
+        """Create the run network, or one reference-point network in multi-network mode"""
+        import docker
+        
+        name = self.namespace.network_name_for(reference_point)
+        
+        # Remove existing network if it exists
+        existing_network = self.session.get_network(name)
+        if existing_network:
+            self.session.forget_network(name)
             try:
-                import docker
-                existing_network = self.client.networks.get(self.network_name)
                 existing_network.remove()
-                print(f"Removed existing network: {self.network_name}")
+                print(f"Removed existing network: {name}")
             except docker.errors.NotFound:
                 pass
-            
-            # Create new network with specific subnet for 5G components
-            import docker
-            network = self.client.networks.create(
-                self.network_name,
-                driver="bridge",
-                ipam=docker.types.IPAMConfig(
-                    pool_configs=[docker.types.IPAMPool(subnet="10.45.0.0/16")]
-                ),
-                options={
-                    "com.docker.network.bridge.enable_ip_masquerade": "true"
-                }
-            )
-            print(f"Created network: {self.network_name}")
-            return network
+        
+        # Create the network on a subnet no other network uses
+        egress = reference_point is None or reference_point in EGRESS_REFERENCE_POINTS
+        if driver == BRIDGE:
+            options = {"com.docker.network.bridge.enable_ip_masquerade": "true" if egress else "false"}
+        else:
+            options = network_options(driver, parent_interface(self.namespace.run_id, reference_point))
+        allocator = SubnetAllocator(self.client)
+        network, subnet = allocator.create_network(
+            name,
+            labels=self.namespace.labels(),
+            options=options,
+            internal=not egress,
+            driver=driver
+        )
+        self.namespace.attach_network(network, subnet, reference_point)
+        self.session.track_network(network)
+        print(f"Created network: {name} ({subnet}{', ' + driver if driver != BRIDGE else ''})")
+        return network
+    
+    def _data_plane_driver(self):
+        return self.data_plane_driver or self.topology_settings.get(DATA_PLANE_SETTING) or DEFAULT_DATA_PLANE_DRIVER
+    
+    def _create_dummy_interfaces(self):
+        """Create the parent interfaces of the user-plane networks on the Docker host"""
+        names = [parent_interface(self.namespace.run_id, ref) for ref in USER_PLANE_REFERENCE_POINTS]
+        try:
+            self.run_nettools(render_dummy_script(names), network_mode="host")
         except Exception as e:
-            print(f"Error creating network: {e}")
-            return None
+            logging.warning(f"Could not create dummy interfaces {', '.join(names)}: {e}")
+            return False
+        self.dummy_interfaces = names
+        return True
+    
+    def _remove_dummy_interfaces(self):
+        if not self.dummy_interfaces:
+            return
+        try:
+            self.run_nettools(render_dummy_script(self.dummy_interfaces, remove=True), network_mode="host")
+        except Exception as e:
+            logging.warning(f"Could not remove dummy interfaces {', '.join(self.dummy_interfaces)}: {e}")
+        self.dummy_interfaces = []
+    
+    def _multi_network(self):
+        """True if this run uses one network per reference point"""
+        mode = self.network_mode or self.topology_settings.get(NETWORK_MODE_SETTING) or DEFAULT_NETWORK_MODE
+        return mode == MULTI
+    
+    def _reference_points(self, comp_type):
+        """Networks a component joins (None: the flat run network)"""
+        return list(reference_points_for(comp_type)) if self._multi_network() else None
     
     def deploy_5g_core(self, components):
         """Deploy 5G core components as Docker containers using Open5GS and UERANSIM"""
@@ -237,8 +482,9 @@ class EnhancedContainerManager:
 
         print("Checking Docker connection...")
         try:
-            # Test Docker connection
-            self.client.ping()
+            # Test Docker connection (recent pings are cached by the session)
+            if not self.session.ping():
+                raise ConnectionError("Docker daemon did not respond to ping")
             print("✅ Docker is running and accessible")
             
             # Clean up any existing containers first
@@ -248,20 +494,66 @@ class EnhancedContainerManager:
             print(f"❌ Docker connection failed: {e}")
             return False, f"Docker connection failed: {e}"
 
-        # Pre-pull required images with better error handling
-        print("Preparing Docker images...")
-        try:
-            if not self.pull_required_images():
-                print("⚠️ Image pulling was interrupted")
-                return False, "Image pulling was interrupted by user"
-        except Exception as e:
-            print(f"⚠️ Error during image pulling: {e}")
-            print("Continuing with deployment - Docker will attempt to pull images as needed...")
+        # Every slice gets its own SMF and UPF, then AMF/SMF/UPF components
+        # with replicas > 1 become several instances
+        components = self.expand_slices(components)
+        components = self.expand_replicas(components)
+
+        # Right-size memory limits from earlier runs before anything is planned
+        if self.adaptive_limits:
+            self.apply_learned_limits()
+
+        # Admission control: reserve the whole topology up front (or densify/queue/reject)
+        self.capacity_plan = self.plan_capacity(components)
+        if not self.capacity_plan.admitted:
+            print(f"❌ Not enough capacity for this topology: {self.capacity_plan.summary()}")
+            for reason in self.capacity_plan.reasons:
+                print(f"   {reason}")
+            return False, f"Not enough capacity ({self.capacity_plan.decision}): {'; '.join(self.capacity_plan.reasons)}"
+        print(f"📊 Capacity plan: {self.capacity_plan.summary()}")
+        # Cells and slices are planned on the grouped UEs: every container has its UEs' slice and gNBs
+        components = self.capacity_plan.group_ues(components, key=self._ue_group_key)
+        if self.capacity_plan.ue_groups:
+            print(f"📦 Running {sum(self.capacity_plan.ue_groups.values())} UEs in "
+                  f"{len(self.capacity_plan.ue_groups)} containers "
+                  f"(up to {self.capacity_plan.ues_per_container} UEs per container)")
+        
+        # Dedicated cores for the user plane, shared cores for everything else
+        self.placement = self.plan_placement(components)
+        print(f"📌 CPU placement: {self.placement.summary()}")
+        for reason in self.placement.reasons:
+            print(f"   {reason}")
+
+        # Pull images and build the router/internet-gw helper images in the
+        # background; each component only waits for its own image
+        print("Preparing Docker images in the background...")
+        self.start_image_pipeline(components)
 
         # Create network first
         network = self.create_5g_network()
         if not network:
-            return False, "Failed to create network"
+            return self._abort_deploy("Failed to create network")
+        
+        # Every container gets its address now: configs, /etc/hosts and lookups use these
+        try:
+            self.address_plan = self.plan_addresses(components)
+            print(f"🧭 Static addresses planned for {len(self.address_plan.addresses)} containers")
+        except Exception as e:
+            print(f"❌ Address planning failed: {e}")
+            return self._abort_deploy(f"Address planning failed: {e}")
+        
+        # Own gNB ID/NCI/TAC per gNB, and the gNBs each UE searches
+        self.ran_plan = plan_ran(self._sorted_components(components), self._component_name,
+                                 ue_count=self.capacity_plan.ue_count)
+        if self.ran_plan.cells:
+            print(f"📶 {len(self.ran_plan.cells)} cells planned (TAC {', '.join(map(str, self.ran_plan.tacs()))})")
+        
+        # Slices with their UE pools, SMF/UPF and subscribers (IMSIs follow the UE containers)
+        self.slice_plan = plan_slices(self._sorted_components(components), self._component_name,
+                                      self.capacity_plan.ue_count)
+        if self.slice_plan.sliced:
+            print(f"🍰 {len(self.slice_plan.slices)} slices: " + ", ".join(
+                f"{name} ({slice_['subnet']})" for name, slice_ in self.slice_plan.slices.items()))
 
         deployed = []
 
@@ -278,79 +570,72 @@ class EnhancedContainerManager:
             mongodb_container = self.deploy_mongodb_standalone()
             if mongodb_container:
                 deployed.append(mongodb_container)
-                self.deployed_containers.append(mongodb_container)
+                self._register_container(mongodb_container)
         
         # Deploy internet gateway for external connectivity
         print("🌐 Deploying internet gateway for external connectivity...")
         internet_gw_container = self.deploy_internet_gateway()
         if internet_gw_container:
             deployed.append(internet_gw_container)
-            self.deployed_containers.append(internet_gw_container)
+            self._register_container(internet_gw_container)
 
-        # Sort components by deployment order (mongodb, nrf, then others)
-        deployment_order = ['mongodb', 'nrf', 'amf', 'smf', 'upf', 'ausf', 'udm', 'pcf', 'gnb', 'ue']
-        sorted_components = sorted(components, key=lambda c: 
-                                 deployment_order.index(c.component_type) 
-                                 if c.component_type in deployment_order else 999)
-        
-        for component in sorted_components:
-            # Check memory before deploying each component
-            try:
-                import psutil
-                available_memory = psutil.virtual_memory().available / (1024**3)
-                print(f"Available memory before deploying {component.component_type}: {available_memory:.1f}GB")
-                
-                if available_memory < 1.0:  # Less than 1GB available
-                    print(f"⚠️ Low memory warning: {available_memory:.1f}GB available")
-                    print("Stopping deployment to prevent system instability")
-                    return False, f"Insufficient memory to continue deployment. Available: {available_memory:.1f}GB"
-            except ImportError:
-                pass  # psutil not available, continue anyway
-            
-            container = None
-            comp_type = component.component_type
+        # Deploy in order (mongodb, nrf, then others); consecutive gNBs go in parallel batches
+        for batch in self._deployment_batches(self._sorted_components(components)):
+            if batch[0].component_type in ('gnb', 'ue') and self._protocol_stats_enabled():
+                # Before the RAN attaches, so NG Setup and the registration storm are counted
+                self.start_protocol_stats()
+            if len(batch) > 1:
+                print(f"Deploying {len(batch)} {batch[0].component_type} components in parallel...")
+                with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_DEPLOYS, len(batch))) as executor:
+                    containers = list(executor.map(self._deploy_component, batch))
+            else:
+                containers = [self._deploy_component(batch[0])]
+            
+            for component, container in zip(batch, containers):
+                comp_type = component.component_type
+                if container:
+                    deployed.append(container)
+                    # Store container reference for terminal access
+                    self._register_container(container)
+                    
+                    # The first instance of a type stays the reference one
+                    if comp_type in self.open5gs_config:
+                        self.open5gs_containers.setdefault(comp_type, container)
+                    elif comp_type in ['gnb', 'ue']:
+                        self.ueransim_containers.setdefault(comp_type, container)
+                    self.nf_instances.setdefault(comp_type, []).append(container)
+                else:
+                    print(f"❌ Failed to deploy {comp_type}")
+                    # Continue with other components even if one fails
             
-            print(f"Deploying {comp_type}: {getattr(component, 'properties', {}).get('name', 'unnamed')}")
-            
-            if comp_type == 'mongodb':
-                container = self.deploy_mongodb_component(component)
-            elif comp_type in ['amf', 'smf', 'upf', 'pcf', 'udm', 'ausf', 'nrf']:
-                container = self.deploy_open5gs_component(component)
-            elif comp_type == 'gnb':
-                container = self.deploy_gnb_component(component)
-            elif comp_type == 'ue':
-                container = self.deploy_ue_component(component)
-            elif comp_type == 'router':
-                container = self.deploy_router_component(component)
-                
-            if container:
-                deployed.append(container)
-                # Store container reference for terminal access
-                self.deployed_containers.append(container)
-                
-                if comp_type in self.open5gs_config:
-                    self.open5gs_containers[comp_type] = container
-                elif comp_type in ['gnb', 'ue']:
-                    self.ueransim_containers[comp_type] = container
-                
-                # Wait for container to stabilize before deploying next
-                import time
+            if any(containers):
+                # Wait for the batch to stabilize before deploying the next one
                 time.sleep(3)
-                print(f"✅ {comp_type} deployed and stabilizing...")
-            
-            else:
-                print(f"❌ Failed to deploy {comp_type}")
-                # Continue with other components even if one fails
+                print(f"✅ {batch[0].component_type} deployed and stabilizing...")
+        
+        if self._protocol_stats_enabled():
+            self.start_protocol_stats()
         
         # Post-deployment setup
         if deployed:
             print("🔧 Starting post-deployment configuration...")
             
+            # A restored snapshot already holds the subscribers: no provisioning, no settle waits
+            if self.restored_from_snapshot and self._verify_snapshot_restore():
+                print("📸 Subscribers restored from the core snapshot, skipping provisioning")
+                self.wait_for_5g_registration()
+                self.setup_post_deployment_networking()
+                self._start_resource_sampler()
+                return True, f"Deployed {len(deployed)} containers"
+            
             # Setup subscribers in Open5GS database
             print("📱 Setting up UE subscribers in Open5GS database...")
             time.sleep(10)  # Wait for MongoDB to be fully ready
             subscriber_success = self.setup_open5gs_subscribers()
             
+            if subscriber_success and self.subscribers_provisioned:
+                self._capture_core_snapshot()
+            
             if subscriber_success:
                 print("✅ Subscriber setup completed, waiting for services to stabilize...")
                 time.sleep(15)  # Allow services to process subscriber data
@@ -362,8 +647,78 @@ class EnhancedContainerManager:
                 self.wait_for_5g_registration()
                 self.setup_post_deployment_networking()
         
+        self._start_resource_sampler()
         return True, f"Deployed {len(deployed)} containers"
     
+    def _abort_deploy(self, message):
+        """Undo what a deploy set up before its first container: image pipeline, networks, dummy interfaces"""
+        if self.image_pipeline:
+            self.image_pipeline.shutdown()
+            self.image_pipeline = None
+        if self.dummy_interfaces:
+            # The networks sit on the dummy interfaces: remove them first
+            try:
+                teardown_run(self.client, self.namespace.run_id, grace_period=0, session=self.session)
+            except Exception as e:
+                logging.warning(f"Could not remove the networks of run {self.namespace.run_id}: {e}")
+            self._remove_dummy_interfaces()
+        return False, message
+    
+    def _deployment_batches(self, sorted_components):
+        """Split sorted components into batches; consecutive PARALLEL_TYPES components share one"""
+        batches = []
+        for component in sorted_components:
+            previous = batches[-1] if batches else None
+            if (previous and component.component_type in PARALLEL_TYPES
+                    and previous[0].component_type == component.component_type):
+                previous.append(component)
+            else:
+                batches.append([component])
+        return batches
+    
+    def _deploy_component(self, component):
+        """Deploy one component with the deploy method of its type; returns the container or None"""
+        comp_type = component.component_type
+        print(f"Deploying {comp_type}: {getattr(component, 'properties', {}).get('name', 'unnamed')}")
+        
+        if comp_type == 'mongodb':
+            return self.deploy_mongodb_component(component)
+        elif comp_type in ['amf', 'smf', 'upf', 'pcf', 'udm', 'ausf', 'nrf']:
+            return self.deploy_open5gs_component(component)
+        elif comp_type == 'gnb':
+            return self.deploy_gnb_component(component)
+        elif comp_type == 'ue':
+            return self.deploy_ue_component(component)
+        elif comp_type == 'router':
+            return self.deploy_router_component(component)
+        elif comp_type == 'dn':
+            return self.deploy_dn_component(component)
+        return None
+    
+    def _register_container(self, container):
+        """Keep a deployed container for terminal access, tests and cleanup"""
+        self.deployed_containers.append(container)
+
+    def _claim_warm_container(self, comp_type, name, command, environment, files, ipv4_address=None):
+        """Start a component in an idle warm pool container (None if the pool has none)"""
+        if not self.warm_pool:
+            return None
+        if ipv4_address is None and self.address_plan is not None:
+            ipv4_address = self.address_plan.ipv4_address(name)
+        container = self.warm_pool.claim(comp_type, self.namespace, name, command,
+                                         environment=environment, files=files, ipv4_address=ipv4_address,
+                                         reference_points=self._reference_points(comp_type),
+                                         extra_hosts=self._static_hosts(name))
+        if container:
+            print(f"⚡ Using warm container for {comp_type}: {name}")
+            placement_args = self._placement_args(name, comp_type)
+            if placement_args:
+                try:
+                    container.update(**placement_args)
+                except Exception as e:
+                    logging.warning(f"Could not apply CPU placement to {name}: {e}")
+        return container
+
     def deploy_open5gs_component(self, component):
         """Deploy Open5GS component"""
         try:
@@ -406,14 +761,6 @@ class EnhancedContainerManager:
             if volumes_config:
                 for host_path, container_path in volumes_config.items():
                     volumes_list.append(f"{host_path}:{container_path}")
-            
-            # Prepare ports correctly for Docker
-            ports_config = config.get("ports", {})
-            ports_dict = {}
-            if ports_config:
-                for container_port, host_port in ports_config.items():
-                    if host_port:
-                        ports_dict[f"{container_port}"] = host_port
 
             # Create proper startup command with dependencies
             if comp_type == "nrf":
@@ -426,16 +773,19 @@ class EnhancedContainerManager:
                     f"exec open5gs-nrfd -c /etc/open5gs/{comp_type}.yaml"
                 ]
             elif comp_type == "upf":
-                # UPF needs special setup for tunnel interface
+                # UPF needs special setup for tunnel interface (UE pool of its slice)
+                slice_ = self.slice_plan.slice_of(name) if self.slice_plan else None
+                ue_pool = slice_['subnet'] if slice_ else UE_POOL
+                ue_gateway = f"{slice_['gateway'] if slice_ else '10.45.0.1'}/{ue_pool.split('/')[1]}"
                 startup_command = [
                     "sh", "-c", 
                     f"echo 'Setting up UPF with tunnel interface...' && "
                     f"ip tuntap add name ogstun mode tun && "
-                    f"ip addr add 10.45.0.1/16 dev ogstun && "
+                    f"ip addr add {ue_gateway} dev ogstun && "
                     f"ip link set ogstun up && "
                     f"echo 'Tunnel interface ogstun created and configured' && "
                     f"echo 'Setting up routing for internet access...' && "
-                    f"iptables -t nat -A POSTROUTING -s 10.45.0.0/16 ! -d 10.45.0.0/16 -j MASQUERADE && "
+                    f"iptables -t nat -A POSTROUTING -s {ue_pool} ! -d {ue_pool} -j MASQUERADE && "
                     f"echo 'NAT rules configured for UE internet access' && "
                     f"echo 'Waiting for dependencies...' && "
                     f"sleep 20 && "  # Wait for MongoDB and NRF
@@ -452,27 +802,36 @@ class EnhancedContainerManager:
                     f"exec open5gs-{comp_type}d -c /etc/open5gs/{comp_type}.yaml"
                 ]
             
-            container = self.client.containers.run(
-                config.get("image", "openverso/open5gs:latest"),
-                command=startup_command,
-                entrypoint="",  # Bypass the image's entrypoint
-                name=name,
-                network=self.network_name,
-                detach=True,
-                remove=False,
-                cap_add=config.get("cap_add", []),
-                privileged=config.get("privileged", False),
-                environment={
-                    'COMPONENT_TYPE': comp_type,
-                    'COMPONENT_NAME': name,
-                    **config.get("environment", {})
-                },
-                ports=ports_dict if ports_dict else None,
-                volumes=volumes_list if volumes_list else None,
-                restart_policy={"Name": "no"},
-                mem_limit=config.get("mem_limit", "256m"),
-                memswap_limit=config.get("memswap_limit", "256m")
-            )
+            environment = {
+                'COMPONENT_TYPE': comp_type,
+                'COMPONENT_NAME': name,
+                **config.get("environment", {})
+            }
+            
+            # Template hostnames replaced by the planned addresses of this run
+            rendered_dir = self._render_open5gs_config(name, comp_type, config_dir)
+            if rendered_dir:
+                config_dir = rendered_dir
+                volumes_list[0] = f"{config_dir}:/etc/open5gs:ro"
+            
+            container = self._claim_warm_container(comp_type, name, startup_command, environment,
+                                                   {"/etc/open5gs": config_dir})
+            if container is None:
+                container = self._run_container(
+                    config.get("image", "openverso/open5gs:latest"),
+                    command=startup_command,
+                    entrypoint="",  # Bypass the image's entrypoint
+                    logical_name=name,
+                    component_type=comp_type,
+                    cap_add=config.get("cap_add", []),
+                    privileged=config.get("privileged", False),
+                    environment=environment,
+                    ports=self._published_ports(config),
+                    volumes=volumes_list if volumes_list else None,
+                    restart_policy={"Name": "no"},
+                    mem_limit=config.get("mem_limit", "256m"),
+                    memswap_limit=config.get("memswap_limit", "256m")
+                )
             
             print(f"Deployed Open5GS {comp_type}: {name}")
             return container
@@ -504,8 +863,19 @@ class EnhancedContainerManager:
                 logging.warning(f"gNB config is not a dictionary: {type(config)}")
                 config = {"image": "towards5gs/ueransim-gnb:v3.2.3"}
             
+            # Fixed gNB address from the run subnet, rendered into its config
+            # together with the AMF address so the UERANSIM IPs match this run
+            # (one address per reference point in multi-network mode)
+            if self._multi_network():
+                gnb_ip = {reference_point: static_address(self.address_plan, self.namespace, name, reference_point)
+                          for reference_point in reference_points_for('gnb')}
+            else:
+                gnb_ip = static_address(self.address_plan, self.namespace, name)
+            rendered_dir = self._render_gnb_config(name, gnb_ip, props_copy)
+            cell = self.ran_plan.cell(name) if self.ran_plan else None
+            
             # Use base configuration files directly instead of ConfigManager
-            config_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "config", "ueransim"))
+            config_dir = rendered_dir or os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "config", "ueransim"))
             
             # Prepare volumes correctly for Docker
             volumes_config = config.get("volumes", {})
@@ -518,33 +888,38 @@ class EnhancedContainerManager:
                 for host_path, container_path in volumes_config.items():
                     volumes_list.append(f"{host_path}:{container_path}")
             
-            container = self.client.containers.run(
-                config.get("image", "towards5gs/ueransim-gnb:v3.2.3"),
-                command=[
-                    "sh", "-c", 
-                    f"echo 'Waiting for AMF...' && "
-                    f"sleep 30 && "  # Wait for AMF to be ready
-                    f"echo 'AMF should be ready, starting gNB...' && "
-                    f"echo 'Setting up network interfaces for gNB...' && "
-                    f"exec /ueransim/build/nr-gnb -c /etc/ueransim/gnb.yaml"
-                ],
-                name=name,
-                network=self.network_name,
-                detach=True,
-                remove=False,
-                cap_add=config.get("cap_add", []),
-                privileged=config.get("privileged", False),
-                environment={
-                    'COMPONENT_TYPE': 'gnb',
-                    'COMPONENT_NAME': name,
-                    'TAC': str(props_copy.get('tac', 1)),
-                    'POWER': str(props_copy.get('power', 20))
-                },
-                volumes=volumes_list if volumes_list else None,
-                restart_policy={"Name": "no"},
-                mem_limit=config.get("mem_limit", "256m"),
-                memswap_limit=config.get("memswap_limit", "256m")
-            )
+            startup_command = [
+                "sh", "-c", 
+                f"echo 'Waiting for AMF...' && "
+                f"sleep 30 && "  # Wait for AMF to be ready
+                f"echo 'AMF should be ready, starting gNB...' && "
+                f"echo 'Setting up network interfaces for gNB...' && "
+                f"exec /ueransim/build/nr-gnb -c /etc/ueransim/gnb.yaml"
+            ]
+            environment = {
+                'COMPONENT_TYPE': 'gnb',
+                'COMPONENT_NAME': name,
+                'TAC': str(cell['tac'] if cell else props_copy.get('tac', 1)),
+                'POWER': str(props_copy.get('power', 20))
+            }
+            
+            container = self._claim_warm_container('gnb', name, startup_command, environment,
+                                                   {"/etc/ueransim": config_dir}, ipv4_address=gnb_ip)
+            if container is None:
+                container = self._run_container(
+                    config.get("image", "towards5gs/ueransim-gnb:v3.2.3"),
+                    ipv4_address=gnb_ip,
+                    command=startup_command,
+                    logical_name=name,
+                    component_type='gnb',
+                    cap_add=config.get("cap_add", []),
+                    privileged=config.get("privileged", False),
+                    environment=environment,
+                    volumes=volumes_list if volumes_list else None,
+                    restart_policy={"Name": "no"},
+                    mem_limit=config.get("mem_limit", "256m"),
+                    memswap_limit=config.get("memswap_limit", "256m")
+                )
             
             print(f"Deployed UERANSIM gNB: {name}")
             return container
@@ -553,6 +928,190 @@ class EnhancedContainerManager:
             print(f"Error deploying gNB: {e}")
             return None
     
+    def _render_gnb_config(self, name, gnb_ip, properties=None):
+        """
+        Write the gNB config with this run's gNB and AMF addresses and the gNB's
+        own cell identity (gNB ID/NCI, TAC); returns its directory
+        
+        Args:
+            name: gNB name
+            gnb_ip: gNB address, or {reference point: address} in multi-network mode
+            properties: gNB component properties (mcc, mnc, tac, power, gnb_id)
+        """
+        try:
+            properties = self.ran_plan.gnb_properties(name, properties) if self.ran_plan else dict(properties or {})
+            instance_name = self.namespace.container_name(name)
+            config = self.config_manager.customize_config('gnb', instance_name, properties)
+            if not config or not gnb_ip or (isinstance(gnb_ip, dict) and not all(gnb_ip.values())):
+                return None
+            
+            if isinstance(gnb_ip, dict):
+                # Radio link, NGAP and GTP-U each on their own network
+                config['linkIp'], config['ngapIp'], config['gtpIp'] = gnb_ip['ran'], gnb_ip['n2'], gnb_ip['n3']
+            else:
+                config['linkIp'] = config['ngapIp'] = config['gtpIp'] = gnb_ip
+            
+            # The planned address of every AMF instance in the network it shares with the gNB (N2)
+            amf_names = self.address_plan.of_type('amf') if self.address_plan else []
+            amf_ips = [ip for ip in (self.address_plan.reachable_address(amf, name) for amf in amf_names) if ip]
+            if not amf_ips:
+                amf_container = self.open5gs_containers.get('amf')
+                amf_ip = self.get_container_ip(amf_container, 'n2' if isinstance(gnb_ip, dict) else None) \
+                    if amf_container else "unknown"
+                amf_ips = [amf_ip] if amf_ip != "unknown" else []
+            if amf_ips:
+                template = (config.get('amfConfigs') or [{'port': 38412}])[0]
+                config['amfConfigs'] = [dict(template, address=amf_ip) for amf_ip in amf_ips]
+            
+            # Every slice of the run
+            if self.slice_plan:
+                config['slices'] = [dict(snssai, **({'sd': int(snssai['sd'], 16)} if 'sd' in snssai else {}))
+                                    for snssai in self.slice_plan.nssai()]
+            
+            self.gnb_addresses.append(config['linkIp'])
+            return os.path.dirname(self.config_manager.save_instance_config('gnb', instance_name, config))
+        except Exception as e:
+            print(f"⚠️ Could not render gNB config for {name}, using the template: {e}")
+            return None
+    
+    def _render_open5gs_config(self, name, comp_type, config_dir):
+        """
+        Copy the Open5GS configs with this NF's config rendered for the run; returns their directory
+        
+        Template hostnames (nrf-test, mongodb, ...) become the planned address of
+        the first component of that type, as reachable from this NF. With
+        separate networks the UPF also advertises its N3 address to the gNBs.
+        """
+        if self.address_plan is None or name not in self.address_plan.addresses:
+            return None
+        try:
+            config = self.config_manager.load_template_config(comp_type)
+            if not config:
+                return None
+            
+            config = _substitute_hostnames(
+                config, lambda hostname: self.address_plan.resolve(hostname, name, TEMPLATE_HOSTNAMES))
+            self._render_instances(config, name, comp_type)
+            if self.slice_plan is not None:
+                self.slice_plan.render_config(config, name, comp_type, self.address_plan)
+            
+            if comp_type == 'smf' and self.address_plan.of_type('dn'):
+                # UEs resolve through the local data network instead of public DNS
+                config.setdefault('smf', {})['dns'] = [self.address_plan.address(self.address_plan.of_type('dn')[0])]
+            
+            if comp_type == 'upf' and self._multi_network():
+                n3_ip = self.address_plan.address(name, 'n3')
+                gtpu = config.setdefault('upf', {}).get('gtpu') or [{'addr': '0.0.0.0', 'port': 2152}]
+                config['upf']['gtpu'] = [dict(server, advertise=n3_ip) for server in gtpu]
+            
+            instance_name = self.namespace.container_name(name)
+            instance_dir = self.config_manager.get_instance_config_dir(instance_name)
+            shutil.copytree(config_dir, instance_dir, dirs_exist_ok=True)
+            self.config_manager.save_instance_config(comp_type, instance_name, config)
+            return instance_dir
+        except Exception as e:
+            print(f"⚠️ Could not render {comp_type} config for {name}, using the template: {e}")
+            return None
+    
+    def _render_instances(self, config, name, comp_type):
+        """Point an NF config at every instance of its peers (several UPFs, SMFs or AMFs) and the AMF at every cell's TAC"""
+        plan = self.address_plan
+        section = config.get(comp_type)
+        if not isinstance(section, dict):
+            return
+        
+        def peers(peer_type, port):
+            addresses = [plan.reachable_address(peer, name) for peer in plan.of_type(peer_type)]
+            return [{'addr': address, 'port': port} for address in addresses if address]
+        
+        if comp_type == 'smf' and len(plan.of_type('upf')) > 1:
+            # PFCP association with every UPF; sessions are spread over them
+            section['upf'] = peers('upf', 8805)
+        elif comp_type == 'upf' and len(plan.of_type('smf')) > 1:
+            config.setdefault('smf', {})['pfcp'] = peers('smf', 8805)
+        elif comp_type == 'amf' and len(plan.of_type('amf')) > 1:
+            # Instances of one AMF set, told apart by the AMF pointer
+            index = plan.of_type('amf').index(name)
+            for guami in section.get('guami') or []:
+                guami.setdefault('amf_id', {})['pointer'] = index
+            section['amf_name'] = f"{section.get('amf_name', 'AMF')}-{index + 1}"
+        
+        if comp_type == 'amf' and self.ran_plan and self.ran_plan.tacs():
+            # Every tracking area of the run's cells, so each gNB's NG Setup is accepted
+            section['tai'] = self.ran_plan.amf_tais((section.get('tai') or [{}])[0])
+    
+    def expand_replicas(self, components):
+        """
+        Components with a "replicas" property as that many instances
+        
+        The first instance keeps the component's name; the others are named
+        <name>-2, <name>-3, ... and share its links.
+        """
+        from models.topology import TopologyComponent
+        
+        expanded = []
+        for component in components:
+            expanded.append(component)
+            properties = getattr(component, 'properties', {})
+            try:
+                replicas = int(properties.get("replicas", 1) or 1)
+            except (TypeError, ValueError):
+                replicas = 1
+            if component.component_type not in SCALABLE_TYPES or replicas <= 1:
+                continue
+            
+            replicas = min(replicas, MAX_REPLICAS)
+            name = self._component_name(component)
+            for index in range(2, replicas + 1):
+                replica = TopologyComponent(
+                    component.component_type,
+                    component_id=f"{getattr(component, 'component_id', id(component))}-{index}",
+                    properties=dict(properties, name=f"{name}-{index}", replicas=1)
+                )
+                replica.links = list(getattr(component, 'links', None) or ())
+                expanded.append(replica)
+            print(f"📈 {name}: {replicas} instances")
+        return expanded
+    
+    def expand_slices(self, components):
+        """
+        Components with a dedicated SMF and UPF added for every slice that lacks one
+        
+        The added instances copy the first SMF/UPF of the topology (properties
+        and links) with the slice's properties and are named <type>-<slice>.
+        """
+        added = dedicated_instances(components)
+        for component in added:
+            print(f"🍰 Slice {slice_name(slice_key(component.properties))}: adding a dedicated "
+                  f"{component.component_type.upper()}")
+        return list(components) + added
+    
+    def _render_ue_config(self, name):
+        """Write the UE config pointing at the gNBs it is linked to (all of this run's if none); returns its directory"""
+        try:
+            config = self.config_manager.load_template_config('ue')
+            if not config:
+                return None
+            
+            # Radio link address of each gNB the UE searches
+            gnb_ips = []
+            if self.ran_plan and self.address_plan:
+                gnb_ips = self.ran_plan.gnb_addresses(name, self.address_plan)
+            gnb_ips = gnb_ips or list(self.gnb_addresses)
+            if not gnb_ips:
+                return None
+            config['gnbSearchList'] = gnb_ips
+            
+            # PDU session on the UE's slice; with several slices every UE has its own IMSI
+            if self.slice_plan:
+                self.slice_plan.render_ue_config(config, name)
+            
+            instance_name = self.namespace.container_name(name)
+            return os.path.dirname(self.config_manager.save_instance_config('ue', instance_name, config))
+        except Exception as e:
+            print(f"⚠️ Could not render UE config for {name}, using the template: {e}")
+            return None
+    
     def deploy_ue_component(self, component):
         """Deploy UERANSIM UE component"""
         try:
@@ -576,8 +1135,19 @@ class EnhancedContainerManager:
                 logging.warning(f"UE config is not a dictionary: {type(config)}")
                 config = {"image": "towards5gs/ueransim-ue:v3.2.3"}
             
+            # Point the UE at the gNBs of this run
+            rendered_dir = self._render_ue_config(name)
+            
+            # Several UEs in one container when the capacity plan densified the run
+            ue_count = self.capacity_plan.ue_count(component) if self.capacity_plan else 1
+            ue_args = f" -n {ue_count}" if ue_count > 1 else ""
+            mem_limit = config.get("mem_limit", "128m")
+            memswap_limit = config.get("memswap_limit", "128m")
+            if ue_count > 1:
+                mem_limit = memswap_limit = multi_ue_memory(parse_memory(mem_limit), ue_count)
+            
             # Use base configuration files directly instead of ConfigManager
-            config_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "config", "ueransim"))
+            config_dir = rendered_dir or os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "config", "ueransim"))
             
             # Prepare volumes correctly for Docker
             volumes_config = config.get("volumes", {})
@@ -590,46 +1160,56 @@ class EnhancedContainerManager:
                 for host_path, container_path in volumes_config.items():
                     volumes_list.append(f"{host_path}:{container_path}")
             
-            container = self.client.containers.run(
-                config.get("image", "towards5gs/ueransim-ue:v3.2.3"),
-                command=[
-                    "sh", "-c", 
-                    f"echo 'Waiting for gNB...' && "
-                    f"sleep 40 && "  # Wait for gNB to be ready
-                    f"echo 'gNB should be ready, starting UE...' && "
-                    f"echo 'Starting UE registration process...' && "
-                    f"/ueransim/build/nr-ue -c /etc/ueransim/ue.yaml &"
-                    f"UE_PID=$! && "
-                    f"echo 'UE process started, waiting for registration...' && "
-                    f"sleep 20 && "  # Wait for PDU session establishment
-                    f"echo 'Checking for tunnel interface...' && "
-                    f"if ip addr show uesimtun0 >/dev/null 2>&1; then "
-                    f"  echo 'Tunnel interface found, setting up routing...' && "
-                    f"  ip route add default dev uesimtun0 metric 1 2>/dev/null || true; "
-                    f"else "
-                    f"  echo 'No tunnel interface found yet'; "
-                    f"fi && "
-                    f"echo 'UE setup complete' && "
-                    f"wait $UE_PID"
-                ],
-                name=name,
-                network=self.network_name,
-                detach=True,
-                remove=False,
-                cap_add=config.get("cap_add", []),
-                privileged=config.get("privileged", False),
-                environment={
-                    'COMPONENT_TYPE': 'ue',
-                    'COMPONENT_NAME': name,
-                    'IMSI': props_copy.get('imsi', '001010000000001')
-                },
-                volumes=volumes_list if volumes_list else None,
-                restart_policy={"Name": "no"},
-                mem_limit=config.get("mem_limit", "128m"),
-                memswap_limit=config.get("memswap_limit", "128m")
-            )
+            startup_command = [
+                "sh", "-c", 
+                f"echo 'Waiting for gNB...' && "
+                f"sleep 40 && "  # Wait for gNB to be ready
+                f"echo 'gNB should be ready, starting UE...' && "
+                f"echo 'Starting UE registration process...' && "
+                f"/ueransim/build/nr-ue -c /etc/ueransim/ue.yaml{ue_args} &"
+                f"UE_PID=$! && "
+                f"echo 'UE process started, waiting for registration...' && "
+                f"sleep 20 && "  # Wait for PDU session establishment
+                f"echo 'Checking for tunnel interface...' && "
+                f"if ip addr show uesimtun0 >/dev/null 2>&1; then "
+                f"  echo 'Tunnel interface found, setting up routing...' && "
+                f"  ip route add default dev uesimtun0 metric 1 2>/dev/null || true; "
+                f"else "
+                f"  echo 'No tunnel interface found yet'; "
+                f"fi && "
+                f"echo 'UE setup complete' && "
+                f"wait $UE_PID"
+            ]
+            environment = {
+                'COMPONENT_TYPE': 'ue',
+                'COMPONENT_NAME': name,
+                'IMSI': props_copy.get('imsi', '001010000000001'),
+                'UE_COUNT': str(ue_count)
+            }
             
-            print(f"Deployed UERANSIM UE: {name}")
+            # Pool containers have single-UE memory limits
+            container = None
+            if ue_count == 1:
+                container = self._claim_warm_container('ue', name, startup_command, environment,
+                                                       {"/etc/ueransim": config_dir})
+            if container is None:
+                container = self._run_container(
+                    config.get("image", "towards5gs/ueransim-ue:v3.2.3"),
+                    command=startup_command,
+                    logical_name=name,
+                    component_type='ue',
+                    cap_add=config.get("cap_add", []),
+                    privileged=config.get("privileged", False),
+                    environment=environment,
+                    volumes=volumes_list if volumes_list else None,
+                    restart_policy={"Name": "no"},
+                    mem_limit=mem_limit,
+                    memswap_limit=memswap_limit
+                )
+            
+            if ue_count > 1:
+                self.multi_ue_containers.add(container.name)
+            print(f"Deployed UERANSIM UE: {name}" + (f" ({ue_count} UEs)" if ue_count > 1 else ""))
             return container
             
         except Exception as e:
@@ -650,9 +1230,11 @@ class EnhancedContainerManager:
             
             # Check if container with this name already exists
             try:
-                existing_container = self.client.containers.get(name)
+                import docker
+                existing_container = self.client.containers.get(self.namespace.container_name(name))
                 if existing_container.status == 'running':
                     print(f"Router {name} already exists and is running")
+                    self.namespace.register(name, existing_container, 'router')
                     return existing_container
                 else:
                     print(f"Removing stopped router container: {name}")
@@ -661,14 +1243,13 @@ class EnhancedContainerManager:
                 pass  # Container doesn't exist, proceed with deployment
             
             config = self.network_config["router"]
+            image, command = self._helper_image_args("router")
             
-            container = self.client.containers.run(
-                config.get("image", "alpine:latest"),
-                command=config.get("command"),
-                name=name,
-                network=self.network_name,
-                detach=True,
-                remove=False,
+            container = self._run_container(
+                image,
+                command=command,
+                logical_name=name,
+                component_type='router',
                 cap_add=config.get("cap_add", []),
                 privileged=config.get("privileged", False),
                 environment={
@@ -686,6 +1267,44 @@ class EnhancedContainerManager:
             print(f"Error deploying router: {e}")
             return None
     
+    def deploy_dn_component(self, component):
+        """Deploy a local data network: HTTP, DNS, iperf3 and echo servers on N6"""
+        try:
+            properties = getattr(component, 'properties', {})
+            if not isinstance(properties, dict):
+                properties = {}
+            
+            name = properties.get("name", f"dn_{getattr(component, 'component_id', id(component))}")
+            domain = properties.get("dns_domain") or DEFAULT_DN_DOMAIN
+            
+            config = self.network_config["dn"]
+            image, command = self._helper_image_args("dn")
+            # The fallback command installs the packages before the services start
+            script = f"{command[-1]} && {render_service_script(name, domain)}"
+            
+            container = self._run_container(
+                image,
+                command=["sh", "-c", script],
+                logical_name=name,
+                component_type='dn',
+                cap_add=config.get("cap_add", []),
+                privileged=config.get("privileged", False),
+                environment={
+                    'COMPONENT_TYPE': 'dn',
+                    'COMPONENT_NAME': name,
+                    DN_DOMAIN_ENV: domain,
+                },
+                mem_limit=config.get("mem_limit", "128m"),
+                memswap_limit=config.get("memswap_limit", "128m")
+            )
+            
+            print(f"🌐 Deployed data network: {name} (DNS zone {domain})")
+            return container
+            
+        except Exception as e:
+            print(f"Error deploying data network: {e}")
+            return None
+    
     def deploy_mongodb_component(self, component):
         """Deploy MongoDB component for Open5GS"""
         try:
@@ -709,27 +1328,22 @@ class EnhancedContainerManager:
                 logging.warning(f"MongoDB config is not a dictionary: {type(config)}")
                 config = {"image": "mongo:4.4"}
             
-            # Prepare ports correctly for Docker
-            ports_config = config.get("ports", {})
-            ports_dict = {}
-            if ports_config:
-                for container_port, host_port in ports_config.items():
-                    if host_port:
-                        ports_dict[f"{container_port}"] = host_port
-            
-            container = self.client.containers.run(
-                config.get("image", "mongo:4.4"),
+            create_args = dict(
                 command=config.get("command", None),
-                name=name,
-                network=self.network_name,
-                detach=True,
-                remove=False,
                 environment=config.get("environment", {}),
-                ports=ports_dict if ports_dict else None,
+                ports=self._published_ports(config),
                 restart_policy={"Name": "no"},
                 mem_limit=config.get("mem_limit", "256m"),
                 memswap_limit=config.get("memswap_limit", "256m")
             )
+            create_args.update(self._mongodb_snapshot_args())
+            
+            container = self._run_container(
+                config.get("image", "mongo:4.4"),
+                logical_name=name,
+                component_type='mongodb',
+                **create_args
+            )
             
             print(f"Deployed MongoDB: {name}")
             return container
@@ -742,14 +1356,13 @@ class EnhancedContainerManager:
         """Deploy internet gateway container for external connectivity"""
         try:
             config = self.network_config["internet-gw"]
+            image, command = self._helper_image_args("internet-gw")
             
-            container = self.client.containers.run(
-                config.get("image", "alpine:latest"),
-                command=config.get("command"),
-                name="internet-gw",
-                network=self.network_name,
-                detach=True,
-                remove=False,
+            container = self._run_container(
+                image,
+                command=command,
+                logical_name="internet-gw",
+                component_type='internet-gw',
                 cap_add=config.get("cap_add", []),
                 privileged=config.get("privileged", False),
                 environment={
@@ -772,12 +1385,7 @@ class EnhancedContainerManager:
         try:
             config = self.open5gs_config["mongodb"]
             
-            container = self.client.containers.run(
-                config.get("image", "mongo:4.4"),
-                name="mongodb",
-                network=self.network_name,
-                detach=True,
-                remove=False,
+            create_args = dict(
                 environment={
                     'COMPONENT_TYPE': 'mongodb',
                     'COMPONENT_NAME': 'mongodb',
@@ -786,6 +1394,14 @@ class EnhancedContainerManager:
                 mem_limit=config.get("mem_limit", "256m"),
                 memswap_limit=config.get("memswap_limit", "256m")
             )
+            create_args.update(self._mongodb_snapshot_args())
+            
+            container = self._run_container(
+                config.get("image", "mongo:4.4"),
+                logical_name="mongodb",
+                component_type='mongodb',
+                **create_args
+            )
             
             print(f"Deployed MongoDB: mongodb")
             return container
@@ -794,6 +1410,57 @@ class EnhancedContainerManager:
             print(f"Error deploying MongoDB: {e}")
             return None
 
+    def _core_snapshot_key(self):
+        """Snapshot key of this deployment's subscriber set"""
+        image = self.open5gs_config["mongodb"].get("image", "mongo:4.4")
+        return subscriber_set_hash(image, self.subscriber_provisioning_script())
+    
+    def _mongodb_snapshot_args(self):
+        """Create arguments that start MongoDB from a matching core snapshot (empty if none)"""
+        self.restored_from_snapshot = False
+        if not self.core_snapshots:
+            return {}
+        
+        try:
+            args = CoreSnapshotStore(self.client).restore_args(self._core_snapshot_key(), self.mongodb_on_tmpfs)
+        except Exception as e:
+            logging.warning(f"Could not look up core snapshot: {e}")
+            return {}
+        
+        if args:
+            self.restored_from_snapshot = True
+            print(f"📸 Starting MongoDB from core snapshot{' on tmpfs' if 'tmpfs' in args else ''}")
+            if 'tmpfs' in args:
+                # tmpfs pages count against the container's memory limit
+                args['mem_limit'] = args['memswap_limit'] = "512m"
+        return args
+    
+    def _verify_snapshot_restore(self):
+        """Check that the restored MongoDB serves the snapshot's subscribers"""
+        mongodb_containers = self.get_containers_by_type('mongodb')
+        if not mongodb_containers:
+            return False
+        if CoreSnapshotStore(self.client).wait_until_restored(mongodb_containers[0]):
+            return True
+        print("⚠️ Core snapshot did not restore any subscribers, provisioning them instead")
+        return False
+    
+    def _capture_core_snapshot(self):
+        """Snapshot the freshly provisioned MongoDB for later runs"""
+        if not self.core_snapshots:
+            return
+        
+        mongodb_containers = self.get_containers_by_type('mongodb')
+        if not mongodb_containers:
+            return
+        
+        try:
+            image = self.open5gs_config["mongodb"].get("image", "mongo:4.4")
+            if CoreSnapshotStore(self.client).capture(mongodb_containers[0], self._core_snapshot_key(), image):
+                print("📸 Saved core snapshot for this subscriber set")
+        except Exception as e:
+            logging.warning(f"Could not capture core snapshot: {e}")
+
     def create_open5gs_config(self, comp_type, name, properties=None):
         """Create Open5GS configuration files using ConfigManager"""
         try:
@@ -874,16 +1541,48 @@ class EnhancedContainerManager:
         
         return status_list
     
-    def get_container_ip(self, container):
-        """Get IP address of a container in the 5G network"""
+    def get_container_ip(self, container, reference_point=None):
+        """
+        Get IP address of a container in the 5G network
+        
+        Args:
+            container: Deployed container
+            reference_point: Reference-point network (multi-network mode); by
+                default the run network, or the first run network the container is in
+        """
+        # Planned addresses need no inspect round-trip
+        if self.address_plan is not None:
+            address = self.address_plan.address(self.namespace.logical_name(container), reference_point)
+            if address:
+                return address
         try:
             networks = container.attrs['NetworkSettings']['Networks']
+            if reference_point is not None:
+                name = self.namespace.network_name_for(reference_point)
+                return networks[name]['IPAddress'] if name in networks else "unknown"
             if self.network_name in networks:
                 return networks[self.network_name]['IPAddress']
+            for reference_point in REFERENCE_POINTS:
+                name = self.namespace.network_name_for(reference_point)
+                if name in networks:
+                    return networks[name]['IPAddress']
             return "unknown"
         except:
             return "unknown"
     
+    def get_shared_ip(self, container, peer):
+        """
+        Address of peer in a network it shares with container
+        
+        Returns:
+            tuple: (network name, address), or (None, None) if they share no run network
+        """
+        own = self.namespace.run_addresses(container)
+        for name, address in self.namespace.run_addresses(peer).items():
+            if name in own:
+                return name, address
+        return None, None
+    
     def test_connectivity(self):
         """Test connectivity between containers and end-to-end UE connectivity"""
         results = []
@@ -894,8 +1593,9 @@ class EnhancedContainerManager:
                 # Test ping to other containers
                 for target_container in self.deployed_containers:
                     if container != target_container:
-                        target_ip = self.get_container_ip(target_container)
-                        if target_ip != "unknown":
+                        # Only containers that share a network can reach each other directly
+                        _, target_ip = self.get_shared_ip(container, target_container)
+                        if target_ip:
                             exec_result = container.exec_run(f"ping -c 1 {target_ip}")
                             success = exec_result.exit_code == 0
                             
@@ -923,9 +1623,10 @@ class EnhancedContainerManager:
         return results
     
     def test_ue_end_to_end_connectivity(self, results):
-        """Test end-to-end connectivity from UE to external services"""
+        """Test end-to-end connectivity from UE to external services (the local data networks if deployed)"""
         # Find UE containers
-        ue_containers = [c for c in self.deployed_containers if 'ue' in c.name.lower()]
+        ue_containers = self.get_containers_by_type('ue')
+        data_networks = self.get_containers_by_type('dn')
         
         for ue_container in ue_containers:
             try:
@@ -960,18 +1661,23 @@ class EnhancedContainerManager:
                             "error": None if gw_ping_success else f"Ping to internet gateway failed via tunnel"
                         })
                     
-                    # Test 3: Ping external DNS (8.8.8.8)
-                    exec_result = ue_container.exec_run("ping -c 2 -I uesimtun0 8.8.8.8")
-                    external_ping_success = exec_result.exit_code == 0
-                    
-                    results.append({
-                        "source": ue_container.name,
-                        "source_ip": "uesimtun0",
-                        "target": "external_dns",
-                        "target_ip": "8.8.8.8",
-                        "success": external_ping_success,
-                        "error": None if external_ping_success else "External internet connectivity failed"
-                    })
+                    if data_networks:
+                        # Test 3: Ping and services of the local data networks (works offline)
+                        external_ping_success = all(
+                            [self._test_data_network(ue_container, dn, results) for dn in data_networks])
+                    else:
+                        # Test 3: Ping external DNS (8.8.8.8)
+                        exec_result = ue_container.exec_run("ping -c 2 -I uesimtun0 8.8.8.8")
+                        external_ping_success = exec_result.exit_code == 0
+                        
+                        results.append({
+                            "source": ue_container.name,
+                            "source_ip": "uesimtun0",
+                            "target": "external_dns",
+                            "target_ip": "8.8.8.8",
+                            "success": external_ping_success,
+                            "error": None if external_ping_success else "External internet connectivity failed"
+                        })
                     
                     if external_ping_success:
                         print(f"✅ End-to-end connectivity SUCCESS for {ue_container.name}")
@@ -988,52 +1694,116 @@ class EnhancedContainerManager:
                     "error": f"End-to-end test error: {str(e)}"
                 })
     
+    def _test_data_network(self, ue_container, dn_container, results):
+        """Ping a data network through the UE's tunnel and check its HTTP, DNS and echo services"""
+        dn_name = self.namespace.logical_name(dn_container)
+        dn_ip = self.get_container_ip(dn_container)
+        exec_result = ue_container.exec_run(f"ping -c 2 -I uesimtun0 {dn_ip}")
+        ping_success = exec_result.exit_code == 0
+        results.append({
+            "source": ue_container.name,
+            "source_ip": "uesimtun0",
+            "target": dn_name,
+            "target_ip": dn_ip,
+            "success": ping_success,
+            "error": None if ping_success else "Ping to data network failed via tunnel"
+        })
+        if not ping_success:
+            return False
+        
+        script = render_check_script(dn_ip, dn_name, container_domain(dn_container))
+        try:
+            checks = parse_check_output(self.run_nettools(script, network_mode=f"container:{ue_container.id}"))
+        except Exception as e:
+            logging.warning(f"Could not check the services of {dn_name} from {ue_container.name}: {e}")
+            checks = parse_check_output("")
+        results += check_results(ue_container.name, dn_name, dn_ip, checks)
+        return all(checks.values())
+    
     def get_container_ip_by_name(self, container_name):
-        """Get container IP address by name"""
+        """Get container IP address by logical component name or container name"""
         try:
-            for container in self.deployed_containers:
-                if container.name == container_name:
-                    return self.get_container_ip(container)
+            container = self.get_container_by_name(container_name)
+            if container:
+                return self.get_container_ip(container)
             return "unknown"
         except Exception:
             return "unknown"
+
+    def get_container_by_name(self, name):
+        """Find a deployed container by logical component name or container name"""
+        container_name = self.namespace.resolve(name)
+        for container in self.deployed_containers:
+            if container.name == container_name:
+                return container
+        return None
+
+    def get_containers_by_type(self, component_type):
+        """Deployed containers of one component type (from the run labels)"""
+        return [c for c in self.deployed_containers if self.namespace.component_type(c) == component_type]
+    
+    def data_network_target(self):
+        """Logical name of the first local data network, else the internet gateway (default benchmark target)"""
+        for container in self.get_containers_by_type('dn'):
+            return self.namespace.logical_name(container)
+        return "internet-gw"
+    
+    def served_iperf3_ports(self, container):
+        """iperf3 server ports a container runs itself (a data network's), so benchmarks start no helper for them"""
+        if self.namespace.component_type(container) == 'dn':
+            return set(dn_iperf3_ports())
+        return set()
     
     def cleanup(self):
-        """Clean up deployed containers and network"""
+        """Tear down everything labelled with this run and clean up configurations"""
+        if not self.client:
+            return
+            
         try:
             print("🧹 Cleaning up containers and configurations...")
             
-            # Stop and remove containers and clean up their configurations
-            for container in self.deployed_containers:
-                try:
-                    container_name = getattr(container, 'name', 'unknown')
-                    
-                    # Clean up configuration for this instance
-                    self.config_manager.cleanup_instance_config(container_name)
-                    
-                    # Stop and remove container
-                    container.stop(timeout=10)
-                    container.remove()
-                    print(f"Cleaned up container: {container_name}")
-                except Exception as e:
-                    print(f"Error cleaning up container {container.name}: {e}")
+            # Remember how much memory/CPU each NF type really used
+            self._record_resource_usage()
+            
+            # Let tcpdump flush its last file before the captured containers go away
+            if self.packet_capture:
+                self.packet_capture.stop()
+                self.packet_capture = None
+            if self.protocol_stats_collector:
+                self.protocol_stats_collector.stop()
+                self.protocol_stats_collector = None
+            
+            # Stop, remove and drop the network of the whole run in parallel
+            report = teardown_run(self.client, self.namespace.run_id,
+                                  grace_period=self.stop_grace_period, session=self.session)
+            self.last_teardown = report
+            
+            for container_name in report["containers"]:
+                self.config_manager.cleanup_instance_config(container_name)
+            for name, error in report["failed"].items():
+                print(f"Error cleaning up {name}: {error}")
             
-            # Remove network
-            try:
-                import docker
-                network = self.client.networks.get(self.network_name)
-                network.remove()
-                print(f"Removed network: {self.network_name}")
-            except docker.errors.NotFound:
-                pass
-            except Exception as e:
-                print(f"Error removing network: {e}")
-                
             self.deployed_containers = []
             self.open5gs_containers = {}
             self.ueransim_containers = {}
-            
-            print("✅ Cleanup completed")
+            self.nf_instances = {}
+            self.gnb_addresses = []
+            self.restored_from_snapshot = False
+            self.subscribers_provisioned = False
+            self.multi_ue_containers = set()
+            self.capacity_plan = None
+            self.placement = None
+            self.address_plan = None
+            self.ran_plan = None
+            self.slice_plan = None
+            self.link_emulator = None
+            # Only after the networks using them are gone
+            self._remove_dummy_interfaces()
+            if self.image_pipeline:
+                self.image_pipeline.shutdown()
+                self.image_pipeline = None
+            
+            print(f"✅ Cleanup completed: {format_report(report)}")
             
         except Exception as e:
             print(f"Error during cleanup: {e}")
@@ -1089,81 +1859,422 @@ class EnhancedContainerManager:
             print(f"Error executing command in container {container_name}: {e}")
             return False, f"Error executing command: {e}"
     
-    def pull_required_images(self):
-        """Pre-pull all required Docker images to avoid timeout during deployment"""
-        required_images = [
-            "mongo:4.4",
-            "openverso/open5gs:latest", 
-            "towards5gs/ueransim-gnb:v3.2.3",
-            "towards5gs/ueransim-ue:v3.2.3"
-        ]
+    def apply_learned_limits(self):
+        """Size memory limits from the peaks recorded in earlier runs (peak x headroom)"""
+        try:
+            history = ResourceHistory.for_config_dir(self.config_manager.config_base_dir)
+        except Exception as e:
+            logging.warning(f"Could not load resource history: {e}")
+            return {}
+        
+        learned = {}
+        for configs in (self.open5gs_config, self.ueransim_config, self.network_config):
+            for comp_type, config in configs.items():
+                default = parse_memory(config.get("mem_limit", "256m"))
+                limit = history.memory_limit(comp_type, default)
+                if limit != default:
+                    config["mem_limit"] = config["memswap_limit"] = limit
+                    learned[comp_type] = limit
         
+        if learned:
+            print("📏 Learned memory limits: " + ", ".join(
+                f"{comp_type} {limit // 1024 ** 2}m" for comp_type, limit in sorted(learned.items())))
+        
+        # Pool containers created from now on use the learned limits
+        if self.warm_pool:
+            self.warm_pool.configure({**self.open5gs_config, **self.ueransim_config})
+        return learned
+    
+    def _start_resource_sampler(self):
+        """Sample memory/CPU of the deployed containers until teardown"""
+        if not self.adaptive_limits or self.resource_sampler:
+            return
+        self.resource_sampler = ResourceSampler(
+            self.deployed_containers,
+            lambda container: None if container.name in self.multi_ue_containers
+            else self.namespace.component_type(container)
+        ).start()
+    
+    def _record_resource_usage(self):
+        """Stop sampling and add this run's peaks to the resource history"""
+        if not self.resource_sampler:
+            return
+        sampler, self.resource_sampler = self.resource_sampler, None
+        try:
+            peaks = sampler.stop()
+            ResourceHistory.for_config_dir(self.config_manager.config_base_dir).record(peaks)
+        except Exception as e:
+            logging.warning(f"Could not record resource usage: {e}")
+    
+    def _published_ports(self, config):
+        """docker ports argument of a container config: None unless publish_ports is set"""
+        if not self.publish_ports or not config.get("ports"):
+            return None
+        # Fixed host ports of older configs would collide between runs and replicas
+        return {str(container_port): None for container_port in config["ports"]}
+    
+    def resource_requests(self, components):
+        """Memory limit and CPU estimate of every container a deployment starts (see capacity_planner.py)"""
+        types = [component.component_type for component in components]
+        helpers = (['mongodb'] if 'mongodb' not in types else []) + ['internet-gw']
+        groups = [None] * len(helpers) + [self._ue_group_key(component) if component.component_type == 'ue'
+                                          else None for component in components]
+        return resource_requests(helpers + types, {**self.network_config, **self.ueransim_config,
+                                                   **self.open5gs_config}, groups)
+    
+    def _ue_group_key(self, component):
+        """UEs with the same key may share a multi-UE container: they run one config (same slice and gNBs)"""
+        return slice_key(getattr(component, 'properties', {})), linked_gnbs(component, self._component_name)
+    
+    def plan_capacity(self, components):
+        """Admission decision for a topology (see capacity_planner.py)"""
+        planner = CapacityPlanner(self.session)
+        return planner.admit(self.resource_requests(components), allow_densify=self.allow_densify,
+                             queue_timeout=self.admission_queue_timeout)
+    
+    def required_images(self, components):
+        """Images needed by a deployment, in deployment order"""
+        images = [self.open5gs_config["mongodb"]["image"]]
+        for component in components:
+            comp_type = component.component_type
+            config = self.open5gs_config.get(comp_type) or self.ueransim_config.get(comp_type)
+            if config and config.get("image") and config["image"] not in images:
+                images.append(config["image"])
+        return images
+    
+    def start_image_pipeline(self, components):
+        """Start pulling/building everything the deployment needs, without waiting"""
+        if self.image_pipeline is None:
+            self.image_pipeline = ImagePipeline(self.client, session=self.session)
+        
+        for image in self.required_images(components):
+            self.image_pipeline.pull(image)
+        
+        # Build the router/internet-gw/dn images once instead of installing packages at every start
+        helper_names = ['internet-gw']
+        for comp_type in ('router', 'dn'):
+            if any(component.component_type == comp_type for component in components):
+                helper_names.append(comp_type)
+        for name in helper_names:
+            self.image_pipeline.submit(self.network_config[name]["image"],
+                                       lambda name=name: self.prepare_helper_images([name])[name])
+        return self.image_pipeline
+    
+    def _wait_for_image(self, image):
+        """Block until the pipeline has the image ready (no-op for images it does not handle)"""
+        if self.image_pipeline is None:
+            return True
+        started = time.perf_counter()
+        ready = self.image_pipeline.wait(image)
+        waited = time.perf_counter() - started
+        if waited >= 1:
+            print(f"⏳ Waited {waited:.1f}s for image {image}")
+        return ready
+    
+    def _run_container(self, image, **kwargs):
+        """Create and start a run container once its image is ready"""
+        self._wait_for_image(image)
+        kwargs.update(self._placement_args(kwargs.get("logical_name"), kwargs.get("component_type")))
+        kwargs.setdefault("reference_points", self._reference_points(kwargs.get("component_type")))
+        if self.address_plan is not None:
+            if kwargs.get("ipv4_address") is None:
+                kwargs["ipv4_address"] = self.address_plan.ipv4_address(kwargs.get("logical_name"))
+            kwargs.setdefault("extra_hosts", self._static_hosts(kwargs.get("logical_name")))
+        return self.namespace.run_container(self.client, image, **kwargs)
+    
+    def _sorted_components(self, components):
+        """Components in deployment order"""
+        return sorted(components, key=lambda c:
+                      DEPLOYMENT_ORDER.index(c.component_type)
+                      if c.component_type in DEPLOYMENT_ORDER else 999)
+    
+    def _component_name(self, component):
+        """Logical name of a canvas component (its container's alias)"""
+        properties = getattr(component, 'properties', {})
+        return properties.get("name", f"{component.component_type}_{getattr(component, 'component_id', id(component))}")
+    
+    def plan_addresses(self, components):
+        """Fixed addresses of every container of a deployment, helpers included (see ipam.py)"""
+        return plan_run_addresses(self.namespace, self._sorted_components(components), self._component_name,
+                                  reference_points_for if self._multi_network() else None)
+    
+    def _static_hosts(self, logical_name):
+        """/etc/hosts entries of a container (planned containers and template hostnames)"""
+        if self.address_plan is None:
+            return None
+        return self.address_plan.hosts(logical_name, self.address_plan.type_aliases(TEMPLATE_HOSTNAMES)) or None
+    
+    def plan_placement(self, components):
+        """CPU placement of a deployment according to the placement profile (see placement.py)"""
+        profile = self.placement_profile or self.topology_settings.get(PLACEMENT_SETTING) or DEFAULT_PROFILE
+        # The UPF gets as many dedicated cores as it was seen to use
+        dedicated_cores = learned_dedicated_cores(ResourceHistory.for_config_dir(self.config_manager.config_base_dir))
+        containers = [(self._component_name(component), component.component_type) for component in components]
+        return PlacementPlanner(profile, engine_nodes(self.session), dedicated_cores).plan(containers)
+    
+    def _placement_args(self, logical_name, comp_type):
+        """cpuset/cpu_shares create arguments of a container under the current placement"""
+        if self.placement is None:
+            return {}
+        return self.placement.args(logical_name, comp_type)
+    
+    def pull_required_images(self, components=()):
+        """Pull all required Docker images and wait for them (the pipeline without overlap)"""
         print("Pre-pulling required Docker images...")
+        try:
+            self.start_image_pipeline(components)
+            results = self.image_pipeline.wait_all()
+        except KeyboardInterrupt:
+            print(f"\n⚠️ Image pulling interrupted by user")
+            self.image_pipeline.shutdown()
+            return False
         
-        # First check which images already exist locally
-        for image in required_images:
-            try:
-                # Check if image already exists locally
-                try:
-                    self.client.images.get(image)
-                    print(f"✅ {image} already exists locally")
-                    continue
-                except:
-                    pass  # Image doesn't exist, need to pull it
-                
-                print(f"Pulling {image}... (this may take several minutes)")
-                
-                # Pull with streaming to show progress
-                response = self.client.api.pull(image, stream=True, decode=True)
-                layers_downloaded = set()
-                
-                for line in response:
-                    if 'status' in line:
-                        status = line['status']
-                        layer_id = line.get('id', '')
-                        
-                        if status == 'Downloading' and layer_id:
-                            if layer_id not in layers_downloaded:
-                                print(f"  📥 Downloading layer {layer_id[:12]}")
-                                layers_downloaded.add(layer_id)
-                        elif status == 'Pull complete' and layer_id:
-                            print(f"  ✅ Layer {layer_id[:12]} complete")
-                        elif 'downloaded' in status.lower():
-                            print(f"  📦 {status}")
-                
-                print(f"✅ Successfully pulled {image}")
-                
-            except KeyboardInterrupt:
-                print(f"\n⚠️ Image pulling interrupted by user")
-                return False
-            except Exception as e:
-                print(f"⚠️ Warning: Failed to pull {image}: {e}")
+        for image, ready in results.items():
+            if not ready:
                 print(f"   💡 Tip: You can manually pull this image with: docker pull {image}")
-                # Continue anyway - Docker will try to pull during container creation
-        
         print("Image pre-pull completed.")
         return True
 
+    def prepare_helper_images(self, names=None, force=False):
+        """Build (or reuse) the local helper images; returns {name: usable}"""
+        results = {}
+        for name in names or list(self.network_config):
+            config = self.network_config[name]
+            tag = config["image"]
+            if not force and tag in self.helper_images:
+                results[name] = True
+                continue
+            try:
+                image = ensure_helper_image(self.client, name, config, force=force)
+            except Exception as e:
+                logging.warning(f"Could not prepare helper image for {name}: {e}")
+                image = None
+            if image:
+                self.helper_images.add(image)
+                self.session.mark_image_present(image)
+            results[name] = bool(image)
+        return results
+    
+    def apply_link_emulation(self, links):
+        """Shape the deployed containers according to the canvas link properties"""
+        if not self.link_emulation or not self.client:
+            return None
+        links = list(links or [])
+        if not any(link_shaping(link.get_properties()) for link in links):
+            # Nothing to shape; links edited later are applied live
+            self._get_link_emulator().links = links
+            return None
+        
+        print("🔗 Applying link bandwidth/delay/loss to the containers...")
+        report = self._get_link_emulator().apply(links)
+        print(f"🔗 Link emulation: {report['applied']} containers shaped, {report['failed']} failed "
+              f"({report['elapsed_s']}s)")
+        for link in report["skipped_links"]:
+            print(f"   Link {link} not emulated: an endpoint has no container or they share no network")
+        return report
+    
+    def update_link_emulation(self, link):
+        """Re-apply a link whose properties changed while the simulation runs"""
+        if not self.link_emulation or not self.deployed_containers:
+            return None
+        report = self._get_link_emulator().update(link)
+        for name, result in report["containers"].items():
+            if result["error"]:
+                print(f"❌ Link update on {name} failed: {result['error']}")
+            else:
+                print(f"🔗 Link update applied on {name} ({result['interface']})")
+        return report
+    
+    def _get_link_emulator(self):
+        """Link emulator using the nettools image (or plain alpine installing iproute2), prepared on first use"""
+        if self.link_emulator is None:
+            self.link_emulator = LinkEmulator(self.client, self._link_endpoint, self._nettools_image,
+                                              labels=self.namespace.labels(component_type="nettools"))
+        return self.link_emulator
+    
+    def _nettools_image(self):
+        """(image, setup prefix) of the nettools helper; plain alpine installs the tools first"""
+        config = self.network_config["nettools"]
+        if self.prepare_helper_images(["nettools"])["nettools"]:
+            return config["image"], ""
+        return config["base_image"], config["setup"]
+    
+    def capture_targets(self, component):
+        """
+        Where a canvas component can be captured
+        
+        Returns:
+            tuple: (logical name of its container, reference points with an
+                interface of their own; empty with the flat run network)
+        """
+        return self._component_name(component), self._reference_points(component.component_type) or []
+    
+    @property
+    def capture_directory(self):
+        """Host directory the pcaps of this run are written to"""
+        return self._get_packet_capture().directory
+    
+    def start_capture(self, name, reference_point=None, interface=None, **limits):
+        """
+        Capture the traffic of a container into a rotating ring buffer of pcaps
+        
+        Args:
+            name: Logical name of the container
+            reference_point: Capture on its interface in this reference-point network
+            interface: Capture on this interface (default: all interfaces)
+            **limits: file_size_mb, file_count, rotate_s and bpf_filter of PacketCapture.start()
+        
+        Returns:
+            dict: The capture, or None if it could not be started
+        """
+        if not self.client:
+            return None
+        try:
+            capture = self._get_packet_capture().start(name, reference_point=reference_point,
+                                                       interface=interface, **limits)
+        except Exception as e:
+            print(f"❌ Capture on {name} failed: {e}")
+            return None
+        print(f"🦈 Capturing {capture['target']} ({capture['interface']}) to {capture['directory']} "
+              f"(at most {capture['limit_mb']} MB)")
+        return capture
+    
+    def stop_capture(self, name=None):
+        """Stop the captures of a container (all captures of the run if name is None)"""
+        if not self.client:
+            return []
+        stopped = self._get_packet_capture().stop(target=name)
+        for capture in stopped:
+            print(f"🦈 Capture {capture} stopped")
+        return stopped
+    
+    def list_captures(self):
+        """Captures of this run with their state and pcap files"""
+        if not self.client:
+            return []
+        return self._get_packet_capture().list()
+    
+    def _protocol_stats_enabled(self):
+        if self.protocol_stats is not None:
+            return self.protocol_stats
+        return bool(self.topology_settings.get(PROTOCOL_STATS_SETTING))
+    
+    def start_protocol_stats(self):
+        """Stream NGAP/PFCP/GTP-U/SBI statistics from the deployed core NFs (see protocol_stats.py)"""
+        if self.protocol_stats_collector or not self.client:
+            return self.protocol_stats_collector
+        
+        names, points = vantage_points(self.deployed_containers, self.namespace)
+        if not points:
+            return None
+        
+        image, setup = self._nettools_image()
+        collector = ProtocolStatsCollector(self.client, image, setup=setup,
+                                           labels=self.namespace.labels(component_type="nettools"), names=names,
+                                           mem_limit=self.network_config["nettools"].get("mem_limit"))
+        for container, bpf_filter, snaplen in points:
+            try:
+                collector.start(container, bpf_filter, snaplen)
+            except Exception as e:
+                print(f"⚠️ Protocol statistics on {container.name} not available: {e}")
+        self.protocol_stats_collector = collector
+        print(f"📊 Protocol statistics streaming from {len(collector.vantage_points)} core NFs")
+        return collector
+    
+    def protocol_stats_report(self):
+        """Current protocol statistics, None if they are not collected"""
+        if not self.protocol_stats_collector:
+            return None
+        return self.protocol_stats_collector.snapshot()
+    
+    def _get_packet_capture(self):
+        """Packet capture using the nettools image (or plain alpine installing tcpdump), prepared on first capture"""
+        if self.packet_capture is None:
+            self.packet_capture = PacketCapture(
+                self.client, self.namespace, self._nettools_image,
+                directory=self.capture_dir or default_capture_dir(self.config_manager.config_base_dir),
+                mem_limit=self.network_config["nettools"].get("mem_limit"))
+        return self.packet_capture
+    
+    def run_nettools(self, script, network_mode, detach=False, **kwargs):
+        """
+        Run a shell script in a short-lived nettools helper (iproute2, iperf3)
+        
+        Args:
+            script: Shell script
+            network_mode: "host" or "container:<id>" (the namespace the script works in)
+            detach: Return the running container instead of waiting for the output
+            **kwargs: Further containers.run() arguments
+        
+        Returns:
+            str or Container: The script output, or the container when detached
+        """
+        image, setup = self._nettools_image()
+        if setup:
+            script = f"{setup}\n{script}"
+        output = self.client.containers.run(
+            image,
+            ["sh", "-c", script],
+            entrypoint="",
+            network_mode=network_mode,
+            cap_add=["NET_ADMIN"],
+            labels=self.namespace.labels(component_type="nettools"),
+            remove=not detach,
+            detach=detach,
+            stdout=True,
+            stderr=True,
+            **kwargs
+        )
+        if detach:
+            return output
+        return output.decode('utf-8', errors='replace') if isinstance(output, bytes) else str(output)
+    
+    def _link_endpoint(self, component):
+        """(container, {run network: address}) of a canvas component, None if it was not deployed"""
+        container = self.get_container_by_name(self._component_name(component))
+        if container is None:
+            return None
+        addresses = self.namespace.run_addresses(container)
+        if not addresses:
+            container.reload()
+            addresses = self.namespace.run_addresses(container)
+        return (container, addresses) if addresses else None
+    
+    def _helper_image_args(self, name):
+        """Image and command for a helper container (prebuilt image, or apk install fallback)"""
+        config = self.network_config[name]
+        self._wait_for_image(config["image"])
+        if config["image"] in self.helper_images:
+            return config["image"], config["command"]
+        
+        print(f"⚠️ No {config['image']} image available: installing {', '.join(config['packages'])} "
+              f"at container start (needs network access; tools may be missing)")
+        return config.get("base_image", "alpine:latest"), config["fallback_command"]
+    
     def setup_post_deployment_networking(self):
         """Setup networking after all containers are deployed"""
         try:
             print("🔧 Setting up post-deployment networking...")
             
             # Setup routing in internet gateway
-            internet_gw = None
-            for container in self.deployed_containers:
-                if container.name == "internet-gw":
-                    internet_gw = container
-                    break
+            internet_gw = self.get_container_by_name("internet-gw")
             
             if internet_gw:
                 # Enable IP forwarding and set up NAT
-                commands = [
-                    "echo '1' > /proc/sys/net/ipv4/ip_forward",
-                    "iptables -t nat -A POSTROUTING -s 10.45.0.0/16 -j MASQUERADE",
-                    "iptables -A FORWARD -s 10.45.0.0/16 -j ACCEPT",
-                    "iptables -A FORWARD -d 10.45.0.0/16 -j ACCEPT"
-                ]
+                commands = ["echo '1' > /proc/sys/net/ipv4/ip_forward"]
+                for ue_pool in (self.slice_plan.pools() if self.slice_plan else [UE_POOL]):
+                    commands += [
+                        f"iptables -t nat -A POSTROUTING -s {ue_pool} -j MASQUERADE",
+                        f"iptables -A FORWARD -s {ue_pool} -j ACCEPT",
+                        f"iptables -A FORWARD -d {ue_pool} -j ACCEPT"
+                    ]
+                # UE traffic arrives masqueraded by the UPF from the run subnet(s)
+                for run_subnet in self.namespace.all_subnets():
+                    commands += [
+                        f"iptables -t nat -A POSTROUTING -s {run_subnet} ! -d {run_subnet} -j MASQUERADE",
+                        f"iptables -A FORWARD -s {run_subnet} -j ACCEPT",
+                        f"iptables -A FORWARD -d {run_subnet} -j ACCEPT"
+                    ]
                 
                 for cmd in commands:
                     try:
@@ -1181,7 +2292,12 @@ class EnhancedContainerManager:
             time.sleep(30)  # Give UE time to establish session
             
             # Setup routing in UE containers
-            ue_containers = [c for c in self.deployed_containers if 'ue' in c.name.lower()]
+            ue_containers = self.get_containers_by_type('ue')
+            # Local data networks: reached through the tunnel even when they share a network
+            # with the UEs, and the first one is the UEs' DNS server
+            dn_ips = [self.get_container_ip(dn) for dn in self.get_containers_by_type('dn')]
+            dn_ips = [dn_ip for dn_ip in dn_ips if dn_ip != "unknown"]
+            nameserver = dn_ips[0] if dn_ips else "8.8.8.8"
             for ue_container in ue_containers:
                 try:
                     # Check if tunnel interface exists and set up routing
@@ -1189,7 +2305,8 @@ class EnhancedContainerManager:
                         "ip addr show uesimtun0",  # Check tunnel exists
                         "ip route del default 2>/dev/null || true",  # Remove default route
                         "ip route add default dev uesimtun0 metric 1",  # Add tunnel route
-                        "echo 'nameserver 8.8.8.8' > /etc/resolv.conf"  # Set DNS
+                    ] + [f"ip route replace {dn_ip}/32 dev uesimtun0" for dn_ip in dn_ips] + [
+                        f"sh -c \"echo 'nameserver {nameserver}' > /etc/resolv.conf\""  # Set DNS
                     ]
                     
                     for cmd in commands:
@@ -1220,7 +2337,7 @@ class EnhancedContainerManager:
             time.sleep(15)
             
             # Check UE containers for registration
-            ue_containers = [c for c in self.deployed_containers if 'ue' in c.name.lower()]
+            ue_containers = self.get_containers_by_type('ue')
             
             for ue_container in ue_containers:
                 max_attempts = 20
@@ -1246,9 +2363,24 @@ class EnhancedContainerManager:
                 
                 if not registered:
                     print(f"❌ UE {ue_container.name} failed to register within timeout")
+            
+            self.report_cells()
                     
         except Exception as e:
             print(f"❌ Error waiting for 5G registration: {e}")
+    
+    def report_cells(self):
+        """Collect and print the registration results per cell of a run with several gNBs"""
+        from simulation.benchmark import run_cell_benchmark
+        
+        if not self.ran_plan or len(self.ran_plan.cells) < 2:
+            return []
+        self.ran_plan.stats = run_cell_benchmark(self)
+        for cell in self.ran_plan.stats:
+            print(f"📶 {cell['gnb']} (gNB ID {cell['gnb_id']}, NCI {cell['nci']:#011x}, TAC {cell['tac']}): "
+                  f"NG Setup {'✅' if cell['ng_setup'] else '❌'}, {cell['ues']} UE containers, "
+                  f"{cell['registrations']} registrations, {cell['pdu_sessions']} PDU sessions")
+        return self.ran_plan.stats
 
     def setup_open5gs_subscribers(self):
         """Add UE subscribers to Open5GS database like the WebUI does"""
@@ -1256,124 +2388,43 @@ class EnhancedContainerManager:
             print("📱 Setting up Open5GS subscriber data...")
             
             # Find MongoDB container
-            mongodb_container = None
-            for container in self.deployed_containers:
-                if 'mongodb' in container.name.lower():
-                    mongodb_container = container
-                    break
+            mongodb_containers = self.get_containers_by_type('mongodb')
+            mongodb_container = mongodb_containers[0] if mongodb_containers else None
             
             if not mongodb_container:
                 print("❌ MongoDB container not found")
                 return False
             
-            # First, let's try a simple approach using mongo shell directly
-            print("   Adding subscriber with IMSI: 999700000000001")
-            
-            # Create subscriber document with proper JSON syntax
-            mongo_script = """
-use open5gs
-db.subscribers.deleteMany({"imsi": "999700000000001"})
-db.subscribers.insertOne({
-    "imsi": "999700000000001",
-    "msisdn": [],
-    "imeisv": "4370816125816151",
-    "mme_host": "",
-    "mme_realm": "",
-    "purge_flag": [],
-    "security": {
-        "k": "465B5CE8B199B49FAA5F0A2EE238A6BC",
-        "amf": "8000",
-        "op": null,
-        "opc": "E8ED289DEBA952E4283B54E88E6183CA"
-    },
-    "ambr": {
-        "downlink": {"value": NumberLong(1000000000), "unit": NumberInt(0)},
-        "uplink": {"value": NumberLong(1000000000), "unit": NumberInt(0)}
-    },
-    "slice": [
-        {
-            "sst": NumberInt(1),
-            "sd": "010203",
-            "default_indicator": true,
-            "session": [
-                {
-                    "name": "internet",
-                    "type": NumberInt(3),
-                    "pcc_rule": [],
-                    "ambr": {
-                        "downlink": {"value": NumberLong(1000000000), "unit": NumberInt(0)},
-                        "uplink": {"value": NumberLong(1000000000), "unit": NumberInt(0)}
-                    },
-                    "qos": {
-                        "index": NumberInt(9),
-                        "arp": {
-                            "priority_level": NumberInt(8),
-                            "pre_emption_capability": NumberInt(1),
-                            "pre_emption_vulnerability": NumberInt(1)
-                        }
-                    }
-                }
-            ]
-        }
-    ]
-})
-var count = db.subscribers.countDocuments({"imsi": "999700000000001"})
-print("Subscribers in database: " + count)
-"""
-            
-            # Try multiple MongoDB client commands for compatibility  
-            # First try a simple insertion command
-            simple_script = """
-use open5gs
-db.subscribers.deleteMany({"imsi": "999700000000001"})
-db.subscribers.insertOne({
-    "imsi": "999700000000001",
-    "security": {
-        "k": "465B5CE8B199B49FAA5F0A2EE238A6BC",
-        "amf": "8000",
-        "opc": "E8ED289DEBA952E4283B54E88E6183CA"
-    },
-    "slice": [{
-        "sst": 1,
-        "default_indicator": true,
-        "session": [{
-            "name": "internet",
-            "type": 3
-        }]
-    }]
-})
-db.subscribers.countDocuments({"imsi": "999700000000001"})
-"""
-            
-            commands_to_try = [
-                ["mongosh", "--quiet", "--eval", simple_script],
-                ["mongo", "--quiet", "--eval", simple_script],
-                ["sh", "-c", f"echo '{simple_script}' | mongosh --quiet"],
-                ["sh", "-c", f"echo '{simple_script}' | mongo --quiet"]
-            ]
+            subscribers = (self.slice_plan or self._default_slice_plan()).subscribers()
+            print(f"   Adding {len(subscribers)} subscriber(s) from IMSI {subscribers[0][0]}")
+            
+            # The script grows with the UEs (one document each): it is copied into the
+            # container and fed on stdin, as a command-line argument would hit ARG_MAX
+            script = self.subscriber_provisioning_script()
+            mongodb_container.put_archive("/tmp", _file_archive(SUBSCRIBER_SCRIPT, script))
+            script_path = f"/tmp/{SUBSCRIBER_SCRIPT}"
             
             success = False
-            for cmd in commands_to_try:
+            for client in ("mongosh", "mongo"):
                 try:
-                    if isinstance(cmd, list):
-                        print(f"   Trying MongoDB command: {cmd[0]}")
-                        exec_result = mongodb_container.exec_run(cmd)
-                    else:
-                        print(f"   Trying MongoDB command: {cmd.split()[0]}")
-                        exec_result = mongodb_container.exec_run(["sh", "-c", cmd])
-                    
-                    output = exec_result.output.decode() if exec_result.output else ""
+                    print(f"   Trying MongoDB command: {client}")
+                    exec_result = mongodb_container.exec_run(["sh", "-c", f"{client} --quiet < {script_path}"])
+                    output = exec_result.output.decode(errors='replace') if exec_result.output else ""
                     
-                    if exec_result.exit_code == 0 and ("Subscribers in database: 1" in output or "inserted" in output.lower()):
+                    count = provisioned_count(output)
+                    if exec_result.exit_code == 0 and count == len(subscribers):
                         print("✅ Subscriber data added to Open5GS database")
-                        print("   IMSI: 999700000000001")
+                        print(f"   IMSI: {subscribers[0][0]}" + (f" ... {subscribers[-1][0]}" if len(subscribers) > 1 else ""))
                         print("   K: 465B5CE8B199B49FAA5F0A2EE238A6BC")
                         print("   OPc: E8ED289DEBA952E4283B54E88E6183CA")
-                        print("   DNN/APN: internet")
+                        dnns = sorted({slice_['dnn'] for _, slices in subscribers for slice_ in slices}) or ["internet"]
+                        print(f"   DNN/APN: {', '.join(dnns)}")
+                        self.subscribers_provisioned = True
                         success = True
                         break
                     else:
-                        print(f"   Command failed or no confirmation: {output[:200]}...")
+                        print(f"   {client} exited with {exec_result.exit_code}, {count} of {len(subscribers)} "
+                              f"subscribers provisioned: {output[-200:]}")
                         
                 except Exception as e:
                     print(f"   Command failed with error: {e}")
@@ -1390,6 +2441,14 @@ db.subscribers.countDocuments({"imsi": "999700000000001"})
             print(f"❌ Error setting up subscribers: {e}")
             return False
     
+    def subscriber_provisioning_script(self):
+        """Mongo shell script that provisions the UE subscribers (also keys core snapshots)"""
+        return render_subscriber_script(self.slice_plan or self._default_slice_plan())
+    
+    def _default_slice_plan(self):
+        """Plan of a topology without slice properties: one slice, the shared default subscriber"""
+        return plan_slices([], self._component_name)
+    
     def setup_subscribers_alternative(self, mongodb_container):
         """Alternative method to set up subscribers"""
         try:
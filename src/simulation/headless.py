@@ -0,0 +1,151 @@
+"""
+Headless simulation runner
+Deploys, tests, benchmarks and tears down a saved topology without PyQt5
+"""
+
+import logging
+import time
+import traceback
+from datetime import datetime
+
+from models.topology import Topology
+from simulation.placement import PERFORMANCE
+
+
+class HeadlessRunner:
+    """Runs the full simulation lifecycle for a topology outside the GUI"""
+
+    def __init__(self, topology, run_tests=True, run_benchmark=True, teardown=True, run_id=None,
+                 core_snapshots=True, mongodb_tmpfs=False, allow_densify=True, queue_timeout=0,
+                 adaptive_limits=True, upf_cpu_pinning=False, placement=None,
+                 link_emulation=True, network_mode=None, data_plane_driver=None, throughput_duration=0,
+                 throughput_concurrent=False, slice_isolation_duration=0, protocol_stats=None,
+                 publish_ports=False):
+        self.topology = topology
+        self.run_id = run_id
+        self.core_snapshots = core_snapshots
+        self.mongodb_tmpfs = mongodb_tmpfs
+        self.allow_densify = allow_densify
+        self.queue_timeout = queue_timeout
+        self.adaptive_limits = adaptive_limits
+        # UPF pinning is the performance placement profile (UPF cores sized from its observed peak)
+        self.placement = placement or (PERFORMANCE if upf_cpu_pinning else None)
+        self.link_emulation = link_emulation
+        self.network_mode = network_mode
+        self.data_plane_driver = data_plane_driver
+        self.throughput_duration = throughput_duration
+        self.throughput_concurrent = throughput_concurrent
+        self.slice_isolation_duration = slice_isolation_duration
+        self.protocol_stats = protocol_stats
+        self.publish_ports = publish_ports
+        self.run_tests = run_tests
+        self.run_benchmark = run_benchmark
+        self.teardown = teardown
+        self.simulator = None
+
+    @classmethod
+    def from_file(cls, filename, **kwargs):
+        """Create a runner for a saved project file"""
+        return cls(Topology.load(filename), **kwargs)
+
+    def run(self):
+        """
+        Run the simulation lifecycle
+
+        Returns:
+            dict: Report with per-phase timings and results
+        """
+        from simulation.simulator import NetworkSimulator
+        from simulation.benchmark import (run_cell_benchmark, run_latency_benchmark, run_registration_benchmark,
+                                          run_slice_isolation_benchmark, run_throughput_benchmark)
+        from simulation.namespace import RunNamespace
+
+        namespace = RunNamespace(self.run_id)
+
+        report = {
+            "run_id": namespace.run_id,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "success": False,
+            "components": len(self.topology.components),
+            "links": len(self.topology.links),
+            "timings": {},
+        }
+        started = time.perf_counter()
+
+        try:
+            phase_start = time.perf_counter()
+            self.simulator = NetworkSimulator(self.topology, headless=True, namespace=namespace)
+            self.simulator.container_manager.core_snapshots = self.core_snapshots
+            self.simulator.container_manager.mongodb_on_tmpfs = self.mongodb_tmpfs
+            self.simulator.container_manager.allow_densify = self.allow_densify
+            self.simulator.container_manager.admission_queue_timeout = self.queue_timeout
+            self.simulator.container_manager.adaptive_limits = self.adaptive_limits
+            self.simulator.container_manager.placement_profile = self.placement
+            self.simulator.container_manager.link_emulation = self.link_emulation
+            self.simulator.container_manager.network_mode = self.network_mode
+            self.simulator.container_manager.data_plane_driver = self.data_plane_driver
+            self.simulator.container_manager.protocol_stats = self.protocol_stats
+            self.simulator.container_manager.publish_ports = self.publish_ports
+            report["timings"]["init_s"] = round(time.perf_counter() - phase_start, 3)
+
+            phase_start = time.perf_counter()
+            success, simulation_data = self.simulator.run(run_tests=self.run_tests)
+            report["timings"]["deploy_and_test_s"] = round(time.perf_counter() - phase_start, 3)
+            report["core_snapshot_restored"] = self.simulator.container_manager.restored_from_snapshot
+            pipeline = self.simulator.container_manager.image_pipeline
+            if pipeline:
+                report["timings"]["images_s"] = dict(pipeline.timings)
+            report["simulation"] = simulation_data
+
+            if "capacity_plan" in simulation_data:
+                report["capacity_plan"] = simulation_data["capacity_plan"]
+            if "placement" in simulation_data:
+                report["placement"] = simulation_data["placement"]
+            if "link_emulation" in simulation_data:
+                report["link_emulation"] = simulation_data["link_emulation"]
+
+            if not success:
+                report["error"] = simulation_data.get("error", "Unknown error")
+                return report
+
+            if self.run_benchmark:
+                phase_start = time.perf_counter()
+                registration = run_registration_benchmark(self.simulator.container_manager)
+                report["benchmark"] = {
+                    "registration": registration,
+                    "cells": run_cell_benchmark(self.simulator.container_manager, registration),
+                    "latency": run_latency_benchmark(self.simulator.container_manager)
+                }
+                if self.throughput_duration:
+                    report["benchmark"]["throughput"] = run_throughput_benchmark(
+                        self.simulator.container_manager, duration=self.throughput_duration,
+                        concurrent=self.throughput_concurrent)
+                if self.slice_isolation_duration:
+                    report["benchmark"]["slice_isolation"] = run_slice_isolation_benchmark(
+                        self.simulator.container_manager, duration=self.slice_isolation_duration)
+                report["timings"]["benchmark_s"] = round(time.perf_counter() - phase_start, 3)
+
+            # Statistics up to the end of the benchmarks
+            protocol_stats = self.simulator.container_manager.protocol_stats_report()
+            if protocol_stats:
+                report["protocol_stats"] = protocol_stats
+
+            report["success"] = True
+
+        except Exception as e:
+            logging.error(f"Headless run failed: {e}")
+            logging.error(traceback.format_exc())
+            report["error"] = str(e)
+
+        finally:
+            if self.teardown and self.simulator:
+                phase_start = time.perf_counter()
+                self.simulator.stop_simulation()
+                report["timings"]["teardown_s"] = round(time.perf_counter() - phase_start, 3)
+                teardown = getattr(self.simulator.container_manager, 'last_teardown', None)
+                if teardown:
+                    report["teardown"] = teardown
+
+            report["timings"]["total_s"] = round(time.perf_counter() - started, 3)
+
+        return report
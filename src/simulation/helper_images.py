@@ -0,0 +1,92 @@
+"""
+Local helper images for the router and internet gateway containers
+
+Instead of installing iptables & co. with apk at every container start (slow,
+and impossible on air-gapped hosts), small images are built once from a
+Dockerfile generated from the component's network_config entry. The image is
+labelled with a hash of the Dockerfile, so it is rebuilt only when the base
+image, the package list or the apk repository change.
+"""
+
+import hashlib
+import io
+import logging
+import os
+
+LABEL_CONTENT_HASH = "netflux5g.content-hash"
+
+# Optional apk repository (e.g. a local mirror on air-gapped lab hosts)
+APK_REPOSITORY_ENV = "NETFLUX5G_APK_REPOSITORY"
+
+
+def render_dockerfile(config):
+    """Dockerfile for a helper image described by a network_config entry"""
+    lines = [f"FROM {config.get('base_image', 'alpine:latest')}"]
+
+    repository = os.environ.get(APK_REPOSITORY_ENV)
+    if repository:
+        lines.append(f"RUN echo '{repository}' > /etc/apk/repositories")
+
+    packages = sorted(config.get("packages", []))
+    if packages:
+        lines.append(f"RUN apk add --no-cache {' '.join(packages)}")
+
+    lines.append('CMD ["sleep", "infinity"]')
+    return "\n".join(lines) + "\n"
+
+
+def content_hash(dockerfile):
+    return hashlib.sha256(dockerfile.encode()).hexdigest()
+
+
+def _image_hash(client, tag):
+    """Content hash label of a local image (None if missing or unlabelled)"""
+    import docker
+    try:
+        image = client.images.get(tag)
+    except docker.errors.ImageNotFound:
+        return None
+    return (image.labels or {}).get(LABEL_CONTENT_HASH)
+
+
+def ensure_helper_image(client, name, config, force=False):
+    """
+    Build a helper image unless an up-to-date one exists
+
+    Args:
+        client: docker client
+        name: Component name (for messages)
+        config: network_config entry with image, base_image and packages
+        force: Rebuild even if the content hash matches
+
+    Returns:
+        str: Image tag to deploy, or None if no usable image could be built
+    """
+    tag = config["image"]
+    dockerfile = render_dockerfile(config)
+    digest = content_hash(dockerfile)
+
+    existing = _image_hash(client, tag)
+    if existing == digest and not force:
+        logging.info(f"Helper image {tag} is up to date")
+        return tag
+
+    print(f"🔨 Building helper image {tag} for {name}...")
+    try:
+        client.images.build(
+            fileobj=io.BytesIO(dockerfile.encode()),
+            tag=tag,
+            labels={LABEL_CONTENT_HASH: digest},
+            rm=True,
+            forcerm=True
+        )
+        print(f"✅ Built helper image {tag}")
+        return tag
+    except Exception as e:
+        logging.warning(f"Building helper image {tag} failed: {e}")
+        if existing:
+            # An older build is better than installing packages at every start
+            print(f"⚠️ Could not rebuild {tag}, using the existing (outdated) image")
+            return tag
+        print(f"⚠️ Could not build {tag}: {e}")
+        return None
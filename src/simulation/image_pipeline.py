@@ -0,0 +1,100 @@
+"""
+Pipelined image preparation for deployments
+
+Instead of pulling every image before the first container is created, all
+pulls (and helper image builds) start in the background at once and each
+component only waits for its own image. First-time deploys are then bounded
+by the slowest image rather than the sum of all of them.
+"""
+
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Parallel pulls/builds (the engine session pools 16 connections)
+DEFAULT_MAX_WORKERS = 4
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+class ImagePipeline:
+    """Background pulls and builds, awaited per image"""
+
+    def __init__(self, client, session=None, max_workers=DEFAULT_MAX_WORKERS):
+        self.client = client
+        self.session = session
+        self.timings = {}       # image -> seconds spent pulling/building
+        self._futures = {}      # image -> Future[bool]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-pipeline")
+
+    def pull(self, image):
+        """Start pulling an image unless it is local or already queued"""
+        if image in self._futures:
+            return self._futures[image]
+        if self.session is not None and self.session.has_image(image):
+            self._futures[image] = _done(True)
+        else:
+            self._futures[image] = self._executor.submit(self._timed, image, self._pull, image)
+        return self._futures[image]
+
+    def submit(self, image, function, *args):
+        """Prepare an image with a custom job (e.g. a local build); the job returns success"""
+        if image not in self._futures:
+            self._futures[image] = self._executor.submit(self._timed, image, function, *args)
+        return self._futures[image]
+
+    def _timed(self, image, function, *args):
+        started = time.perf_counter()
+        try:
+            return bool(function(*args))
+        finally:
+            self.timings[image] = round(time.perf_counter() - started, 2)
+
+    def _pull(self, image):
+        print(f"📥 Pulling {image} in the background...")
+        layers = set()
+        for line in self.client.api.pull(image, stream=True, decode=True):
+            status = line.get('status', '')
+            layer_id = line.get('id', '')
+            if status == 'Pull complete' and layer_id and layer_id not in layers:
+                layers.add(layer_id)
+            elif 'error' in line:
+                raise RuntimeError(line['error'])
+
+        if self.session is not None:
+            self.session.mark_image_present(image)
+        print(f"✅ Pulled {image} ({len(layers)} layers)")
+        return True
+
+    def wait(self, image, timeout=None):
+        """
+        Block until an image is ready
+
+        Returns:
+            bool: True if the image is ready (or was never queued), False if
+                preparing it failed; creating the container may still pull it
+        """
+        future = self._futures.get(image)
+        if future is None:
+            return True
+        try:
+            return future.result(timeout=timeout)
+        except Exception as e:
+            logging.warning(f"Preparing image {image} failed: {e}")
+            print(f"⚠️ Could not prepare {image}: {e}")
+            return False
+
+    def wait_all(self, timeout=None):
+        """Wait for every queued image; returns {image: ready}"""
+        return {image: self.wait(image, timeout) for image in list(self._futures)}
+
+    def shutdown(self):
+        """Cancel pulls that have not started yet"""
+        # cancel_futures= needs Python 3.9; cancel() is a no-op on running or finished jobs
+        for future in self._futures.values():
+            future.cancel()
+        self._executor.shutdown(wait=False)
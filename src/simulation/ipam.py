@@ -0,0 +1,292 @@
+"""
+Subnet allocation for per-run simulation networks
+
+Each run gets its own bridge network carved out of a private pool, so several
+simulations can share one Docker host without overlapping address space.
+Allocation is race-tolerant: if another process grabs the same subnet first,
+the daemon rejects the network and the next free subnet is tried. Inside a
+run, every container gets a fixed address from the static half of its
+subnet(s) before anything is deployed (plan_addresses).
+"""
+
+import ipaddress
+import logging
+import re
+
+# Pool carved into per-run subnets (10.96.0.0 - 10.127.255.255)
+DEFAULT_POOL = "10.96.0.0/11"
+DEFAULT_PREFIX_LENGTH = 20
+
+# UE address pool served by the UPF (ogstun); never handed to a docker network
+UE_POOL = "10.45.0.0/16"
+
+MAX_CREATE_ATTEMPTS = 16
+
+# Names usable as /etc/hosts entries
+_HOSTNAME = re.compile(r"^[A-Za-z0-9]([A-Za-z0-9_.-]*[A-Za-z0-9])?$")
+
+
+def network_subnets(network):
+    """Return the IPv4 subnets configured on a docker network"""
+    subnets = []
+    try:
+        for config in (network.attrs.get('IPAM') or {}).get('Config') or []:
+            subnet = config.get('Subnet')
+            if subnet:
+                parsed = ipaddress.ip_network(subnet, strict=False)
+                if parsed.version == 4:
+                    subnets.append(parsed)
+    except (AttributeError, ValueError) as e:
+        logging.warning(f"Could not read subnets of network {getattr(network, 'name', network)}: {e}")
+    return subnets
+
+
+def split_subnet(subnet):
+    """
+    Split a run subnet into the dynamic and static halves
+
+    Docker assigns addresses to containers from the lower half (ip_range);
+    the upper half is reserved for addresses chosen by NetFlux5G.
+
+    Returns:
+        tuple: (dynamic ip_range, static range) as IPv4Network objects
+    """
+    lower, upper = subnet.subnets(prefixlen_diff=1)
+    return lower, upper
+
+
+def static_hosts(subnet):
+    """Iterate over the addresses NetFlux5G may assign statically in a run subnet"""
+    _, upper = split_subnet(subnet)
+    return upper.hosts()
+
+
+class SubnetAllocator:
+    """Hands out non-overlapping subnets from a pool for new docker networks"""
+
+    def __init__(self, client, pool=DEFAULT_POOL, prefix_length=DEFAULT_PREFIX_LENGTH,
+                 reserved=(UE_POOL,)):
+        self.client = client
+        self.pool = ipaddress.ip_network(pool)
+        self.prefix_length = prefix_length
+        self.reserved = [ipaddress.ip_network(subnet) for subnet in reserved]
+
+    def used_subnets(self):
+        """Subnets already taken by existing docker networks"""
+        used = list(self.reserved)
+        for network in self.client.networks.list():
+            used.extend(network_subnets(network))
+        return used
+
+    def candidates(self, used=None):
+        """Free subnets in the pool, in address order"""
+        used = self.used_subnets() if used is None else used
+        for subnet in self.pool.subnets(new_prefix=self.prefix_length):
+            if not any(subnet.overlaps(other) for other in used):
+                yield subnet
+
+    def create_network(self, name, labels=None, options=None, internal=False, driver="bridge"):
+        """
+        Create a network (a bridge by default) on the first free subnet
+
+        Args:
+            name: Network name
+            labels: Network labels
+            options: Driver options
+            internal: No route (and NAT) to the outside world
+            driver: Network driver (bridge, ipvlan or macvlan)
+
+        Returns:
+            tuple: (network, subnet)
+        """
+        import docker
+
+        used = self.used_subnets()
+        for _ in range(MAX_CREATE_ATTEMPTS):
+            subnet = next(self.candidates(used), None)
+            if subnet is None:
+                break
+
+            dynamic_range, _ = split_subnet(subnet)
+            gateway = next(subnet.hosts())
+            try:
+                network = self.client.networks.create(
+                    name,
+                    driver=driver,
+                    ipam=docker.types.IPAMConfig(
+                        pool_configs=[docker.types.IPAMPool(
+                            subnet=str(subnet),
+                            iprange=str(dynamic_range),
+                            gateway=str(gateway)
+                        )]
+                    ),
+                    labels=labels or {},
+                    options=options or {},
+                    internal=internal,
+                    check_duplicate=True
+                )
+                return network, subnet
+            except docker.errors.APIError as e:
+                # Another run took this subnet between listing and creating
+                if "overlap" in str(e).lower():
+                    logging.info(f"Subnet {subnet} was taken concurrently, trying the next one")
+                    used.append(subnet)
+                    continue
+                raise
+
+        raise RuntimeError(f"No free /{self.prefix_length} subnet left in {self.pool}")
+
+
+class AddressPlan:
+    """
+    Fixed addresses of every container of a run, decided before deployment
+
+    Addresses are kept per network: None is the flat run network, otherwise
+    the reference point in multi-network mode.
+    """
+
+    def __init__(self):
+        self.addresses = {}     # logical name -> {network: address}
+        self.types = {}         # logical name -> component type
+
+    def add(self, logical_name, comp_type, addresses):
+        self.addresses[logical_name] = dict(addresses)
+        self.types[logical_name] = comp_type
+
+    def address(self, logical_name, network=None):
+        """Address of a container in one network (by default its first), or None"""
+        addresses = self.addresses.get(logical_name) or {}
+        if network is None and None not in addresses:
+            return next(iter(addresses.values()), None)
+        return addresses.get(network)
+
+    def ipv4_address(self, logical_name):
+        """namespace.connect() address argument of a container (None if it was not planned)"""
+        addresses = self.addresses.get(logical_name)
+        if not addresses:
+            return None
+        return addresses[None] if None in addresses else dict(addresses)
+
+    def reachable_address(self, logical_name, peer):
+        """Address of a container in the first of peer's networks it is also in (None if none)"""
+        addresses = self.addresses.get(logical_name) or {}
+        for network in self.addresses.get(peer) or ():
+            if network in addresses:
+                return addresses[network]
+        return None
+
+    def first_of_type(self, comp_type):
+        return next((name for name, name_type in self.types.items() if name_type == comp_type), None)
+
+    def of_type(self, comp_type):
+        """Logical names of all containers of a type, in planning order"""
+        return [name for name, name_type in self.types.items() if name_type == comp_type]
+
+    def hosts(self, peer, aliases=None):
+        """
+        /etc/hosts entries of a container: every planned container it shares a network with
+
+        Args:
+            peer: Logical name of the container the entries are for
+            aliases: {hostname: logical name} additionally resolved (e.g. template hostnames)
+
+        Returns:
+            dict: {hostname: address}
+        """
+        entries = {}
+        for logical_name in self.addresses:
+            address = self.reachable_address(logical_name, peer)
+            if address and _HOSTNAME.match(logical_name):
+                entries[logical_name] = address
+        for hostname, logical_name in (aliases or {}).items():
+            address = self.reachable_address(logical_name, peer) if logical_name else None
+            if address:
+                entries[hostname] = address
+        return entries
+
+    def type_aliases(self, hostnames):
+        """{hostname: logical name of the first container of the type} of {hostname: component type}"""
+        return {hostname: self.first_of_type(comp_type) for hostname, comp_type in hostnames.items()}
+
+    def resolve(self, hostname, peer, hostnames):
+        """
+        Address a type hostname (e.g. "nrf-test") stands for, as reachable from peer
+
+        Args:
+            hostname: Hostname to resolve
+            peer: Logical name of the container asking; a hostname of its own type is itself
+            hostnames: {hostname: component type}
+
+        Returns:
+            str: Address, or None if the hostname is not one of hostnames or has no container
+        """
+        target_type = hostnames.get(hostname)
+        if target_type is None:
+            return None
+        target = peer if self.types.get(peer) == target_type else self.first_of_type(target_type)
+        return self.reachable_address(target, peer) if target else None
+
+    def to_dict(self):
+        return {
+            name: {("run" if network is None else network): address for network, address in addresses.items()}
+            for name, addresses in self.addresses.items()
+        }
+
+
+def plan_addresses(namespace, containers, networks_for=None):
+    """
+    Assign every container fixed addresses from the static halves of the run subnets
+
+    Addresses depend only on the containers, so the same topology always gets
+    the same host offsets.
+
+    Args:
+        namespace: RunNamespace whose networks exist
+        containers: [(logical name, component type)] in deployment order
+        networks_for: Function mapping a component type to its reference points
+            (multi-network mode); None puts everything in the flat run network
+
+    Returns:
+        AddressPlan
+    """
+    plan = AddressPlan()
+    for logical_name, comp_type in containers:
+        if logical_name in plan.addresses:
+            continue
+        networks = list(networks_for(comp_type)) if networks_for else [None]
+        addresses = {network: namespace.allocate_static_ip(network) for network in networks}
+        if not all(addresses.values()):
+            raise RuntimeError(f"Static address range exhausted while planning {logical_name}")
+        plan.add(logical_name, comp_type, addresses)
+    return plan
+
+
+def plan_run_addresses(namespace, components, name_of, networks_for=None):
+    """
+    plan_addresses for a deployment: its components plus the helpers every run
+    starts (MongoDB when the topology has none, and the internet gateway)
+
+    Args:
+        namespace: RunNamespace whose networks exist
+        components: Canvas components in deployment order
+        name_of: Function mapping a component to its logical name
+        networks_for: See plan_addresses
+
+    Returns:
+        AddressPlan
+    """
+    containers = []
+    if not any(component.component_type == 'mongodb' for component in components):
+        containers.append(("mongodb", "mongodb"))
+    containers.append(("internet-gw", "internet-gw"))
+    containers += [(name_of(component), component.component_type) for component in components]
+    return plan_addresses(namespace, containers, networks_for)
+
+
+def static_address(plan, namespace, logical_name, network=None):
+    """Planned address of a container, or a fresh static one of the namespace if it was not planned"""
+    if plan is not None:
+        address = plan.address(logical_name, network)
+        if address:
+            return address
+    return namespace.allocate_static_ip(network)
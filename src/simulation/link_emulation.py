@@ -0,0 +1,318 @@
+"""
+Canvas link properties applied as real traffic shaping
+
+Containers share bridge networks, so a canvas link A-B cannot be mapped to a
+dedicated cable. Instead each endpoint gets an htb root qdisc on its interface
+in the network it shares with the peer (the run network, or a reference-point
+network in multi-network mode), with one class per linked peer selected by a
+u32 filter on the peer's address: the class rate is the link bandwidth and a
+netem child adds delay, jitter and loss. Traffic to containers without a
+link is not touched. tc runs in a short-lived nettools helper container that
+joins the target's network namespace, so the NF images need no iproute2 and
+no extra capabilities. After applying, the installed classes and qdiscs are
+read back to verify them.
+"""
+
+import logging
+import re
+import shlex
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Link properties (canvas units) that are emulated
+LINK_PROPERTIES = ("bandwidth", "delay", "jitter", "loss")
+# bandwidth: Mbit/s, delay/jitter: ms, loss: percent
+
+# Rate of traffic that is not shaped (and of classes without a bandwidth)
+UNLIMITED_RATE = "10gbit"
+
+# Parallel helper containers
+DEFAULT_MAX_WORKERS = 8
+
+# First htb class/netem handle of the per-peer rules (tc minors are hex)
+FIRST_CLASS = 0x10
+
+_NUMBER = re.compile(r"^\s*([0-9]*\.?[0-9]+)")
+
+
+def _number(value):
+    """Leading number of a property value ("10", 10, "10ms" -> 10.0), None if unset"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.match(str(value))
+    return float(match.group(1)) if match else None
+
+
+def link_shaping(properties):
+    """
+    Impairments of a link from its properties
+
+    Returns:
+        dict: rate_mbit, delay_ms, jitter_ms, loss_pct (None when unset), or
+            None if the link is not impaired at all
+    """
+    properties = properties or {}
+    shaping = {
+        "rate_mbit": _number(properties.get("bandwidth")),
+        "delay_ms": _number(properties.get("delay")),
+        "jitter_ms": _number(properties.get("jitter")),
+        "loss_pct": _number(properties.get("loss")),
+    }
+    shaping = {key: (value if value else None) for key, value in shaping.items()}
+    return shaping if any(value is not None for value in shaping.values()) else None
+
+
+def _netem_args(shaping):
+    args = []
+    if shaping["delay_ms"] or shaping["jitter_ms"]:
+        args.append(f"delay {shaping['delay_ms'] or 0:g}ms")
+        if shaping["jitter_ms"]:
+            args.append(f"{shaping['jitter_ms']:g}ms distribution normal")
+    if shaping["loss_pct"]:
+        args.append(f"loss {shaping['loss_pct']:g}%")
+    if args and shaping["rate_mbit"] and shaping["delay_ms"]:
+        # The default 1000 packet queue drops before the rate is reached on long delays
+        in_flight = shaping["rate_mbit"] * 1e6 * shaping["delay_ms"] / 1e3 / (1500 * 8)
+        if in_flight * 1.5 > 1000:
+            args.append(f"limit {int(in_flight * 1.5)}")
+    return " ".join(args)
+
+
+def render_interface_lookup(address):
+    """Shell lines setting $dev to the interface holding an address (failing if there is none)"""
+    return [
+        f"dev=$(ip -o -4 addr show | awk -v ip={shlex.quote(address)} "
+        "'{split($4, a, \"/\"); if (a[1] == ip) print $2}' | head -n 1)",
+        'dev="${dev%%@*}"',
+        f'[ -n "$dev" ] || {{ echo "no interface with address {address}" >&2; exit 1; }}',
+    ]
+
+
+def render_tc_script(address, rules):
+    """
+    Shell script (re)installing the shaping rules of one container
+
+    Args:
+        address: The container's address in the shaped network (selects the interface)
+        rules: [(peer address, shaping)]; empty removes any shaping
+
+    Returns:
+        str: Script printing the interface and the installed qdiscs/classes
+    """
+    lines = ["set -e", *render_interface_lookup(address),
+             'tc qdisc del dev "$dev" root 2>/dev/null || true']
+
+    if rules:
+        lines.append('tc qdisc add dev "$dev" root handle 1: htb default 1')
+        lines.append(f'tc class add dev "$dev" parent 1: classid 1:1 htb rate {UNLIMITED_RATE}')
+        for index, (peer, shaping) in enumerate(rules):
+            minor = f"{FIRST_CLASS + index:x}"
+            rate = f"{shaping['rate_mbit']:g}mbit" if shaping["rate_mbit"] else UNLIMITED_RATE
+            lines.append(f'tc class add dev "$dev" parent 1: classid 1:{minor} htb rate {rate} ceil {rate}')
+            netem = _netem_args(shaping)
+            if netem:
+                lines.append(f'tc qdisc add dev "$dev" parent 1:{minor} handle {minor}: netem {netem}')
+            lines.append(f'tc filter add dev "$dev" parent 1: protocol ip prio 1 u32 '
+                         f'match ip dst {peer}/32 flowid 1:{minor}')
+
+    lines += [
+        'echo "interface $dev"',
+        'tc qdisc show dev "$dev"',
+        'tc class show dev "$dev"',
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def split_tc_output(output):
+    """Output of several render_tc_script() runs as [(interface, output)]"""
+    sections = []
+    for line in output.splitlines():
+        match = re.match(r"^interface (\S+)", line)
+        if match:
+            sections.append((match.group(1), []))
+        elif sections:
+            sections[-1][1].append(line)
+    return [(interface, "\n".join(lines)) for interface, lines in sections]
+
+
+def verify_tc_output(output, rules):
+    """
+    Check that every rule's class (and netem qdisc) shows up in the tc output
+
+    Returns:
+        list: Problems found (empty when the settings are in place)
+    """
+    problems = []
+    for index, (peer, shaping) in enumerate(rules):
+        minor = f"{FIRST_CLASS + index:x}"
+        if not re.search(rf"class htb 1:{minor}\b", output):
+            problems.append(f"htb class 1:{minor} for {peer} is missing")
+        if _netem_args(shaping) and not re.search(rf"qdisc netem {minor}:", output):
+            problems.append(f"netem qdisc {minor}: for {peer} is missing")
+    return problems
+
+
+class LinkEmulator:
+    """Applies canvas link properties to the containers of a run"""
+
+    def __init__(self, client, endpoint, image, setup="", labels=None, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            client: docker client
+            endpoint: Function mapping a canvas component to (container, {network: address}),
+                or None if it has no deployed container
+            image: nettools image with iproute2, or a function returning (image, setup)
+                called when the first helper runs (links without impairments need none)
+            setup: Shell prefix run before the script (e.g. installing iproute2)
+            labels: Labels of the helper containers (the run's, so teardown finds leftovers)
+            max_workers: Parallel helper containers
+        """
+        self.client = client
+        self.endpoint = endpoint
+        self.image = image
+        self.setup = setup
+        self.labels = labels or {}
+        self.max_workers = max_workers
+        self.links = []         # links of the topology, unimpaired ones included
+        self.state = {}         # container name -> last result
+
+    def _helper(self):
+        """(image, setup) of the helper containers"""
+        if callable(self.image):
+            self.image, self.setup = self.image()
+        return self.image, self.setup
+
+    def _rules(self, links):
+        """
+        Shaping rules per endpoint container
+
+        Returns:
+            tuple: ({name: (container, [(own address, [(peer, shaping)])])}, skipped links)
+        """
+        targets = {}
+        skipped = []
+        for link in links:
+            shaping = link_shaping(link.get_properties())
+            source = self.endpoint(link.source)
+            target = self.endpoint(link.target)
+            shared = sorted(set(source[1]) & set(target[1])) if source and target else []
+            if not shared:
+                if shaping:
+                    skipped.append(link)
+                continue
+            for (container, addresses), (_, peer_addresses) in ((source, target), (target, source)):
+                interfaces = targets.setdefault(container.name, (container, {}))[1]
+                for network in shared:
+                    peers = interfaces.setdefault(addresses[network], {})
+                    if shaping:
+                        # Traffic towards the peer leaves through the interface in the shared network
+                        peers[peer_addresses[network]] = shaping
+                    else:
+                        peers.pop(peer_addresses[network], None)
+        rules = {name: (container, [(address, sorted(peers.items())) for address, peers in sorted(interfaces.items())])
+                 for name, (container, interfaces) in targets.items()}
+        return rules, skipped
+
+    def _run(self, container, interfaces):
+        """Install rules in a container's namespace through a helper; returns a result dict"""
+        import docker
+
+        script = "".join(render_tc_script(address, rules) for address, rules in interfaces)
+        result = {"interface": None,
+                  "rules": [{"peer": peer, **shaping} for _, rules in interfaces for peer, shaping in rules],
+                  "verified": False, "error": None}
+        image, setup = self._helper()
+        if setup:
+            script = f"{setup}\n{script}"
+        try:
+            output = self.client.containers.run(
+                image,
+                ["sh", "-c", script],
+                entrypoint="",
+                network_mode=f"container:{container.id}",
+                cap_add=["NET_ADMIN"],
+                labels=self.labels,
+                remove=True,
+                stdout=True,
+                stderr=True
+            )
+            output = output.decode('utf-8', errors='replace') if isinstance(output, bytes) else str(output)
+        except docker.errors.ContainerError as e:
+            stderr = e.stderr.decode('utf-8', errors='replace') if isinstance(e.stderr, bytes) else e.stderr
+            result["error"] = (stderr or str(e)).strip()
+            return result
+        except Exception as e:
+            result["error"] = str(e)
+            return result
+
+        sections = split_tc_output(output)
+        result["interface"] = ", ".join(interface for interface, _ in sections) or None
+        problems = []
+        for index, (_, rules) in enumerate(interfaces):
+            if index < len(sections):
+                problems += verify_tc_output(sections[index][1], rules)
+            else:
+                problems.append(f"no tc output for interface {index + 1}")
+        result["verified"] = not problems
+        if problems:
+            result["error"] = "; ".join(problems)
+        return result
+
+    def _apply(self, rules, names):
+        results = {}
+        if not names:
+            return results
+        # Once, before the helpers run in parallel
+        self._helper()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(names))) as executor:
+            futures = {name: executor.submit(self._run, *rules[name]) for name in names}
+            for name, future in futures.items():
+                results[name] = future.result()
+                if results[name]["error"]:
+                    logging.warning(f"Link emulation on {name} failed: {results[name]['error']}")
+        self.state.update(results)
+        return results
+
+    def apply(self, links):
+        """
+        Shape every impaired link of the topology
+
+        Returns:
+            dict: Report with per-container results, skipped links and elapsed time
+        """
+        started = time.perf_counter()
+        self.links = list(links)
+        rules, skipped = self._rules(self.links)
+        # Containers whose links are all unimpaired keep the default qdisc
+        names = [name for name, (_, interfaces) in rules.items() if any(peers for _, peers in interfaces)]
+        results = self._apply(rules, names)
+        return self._report(results, skipped, started)
+
+    def update(self, link):
+        """Re-apply the two endpoints of a link after its properties changed"""
+        started = time.perf_counter()
+        if link not in self.links:
+            self.links.append(link)
+        rules, skipped = self._rules(self.links)
+        names = []
+        for component in (link.source, link.target):
+            endpoint = self.endpoint(component)
+            if endpoint and endpoint[0].name in rules:
+                names.append(endpoint[0].name)
+        results = self._apply(rules, names)
+        return self._report(results, [item for item in skipped if item is link], started)
+
+    def _report(self, results, skipped, started):
+        return {
+            "containers": results,
+            "applied": sum(1 for result in results.values() if result["verified"]),
+            "failed": sum(1 for result in results.values() if result["error"]),
+            "skipped_links": [
+                f"{getattr(link.source, 'component_id', '?')}-{getattr(link.target, 'component_id', '?')}"
+                for link in skipped
+            ],
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        }
+
@@ -0,0 +1,252 @@
+"""
+Per-run resource namespacing
+
+Every simulation run gets a short run ID. Its containers and network are
+named "nf5g-<run>-<name>" and labelled with the run, component name and type,
+so parallel runs on one host never collide and cleanup only ever touches the
+run's own resources. Inside the run network each container is reachable by
+its logical name (a network alias), so configs keep using plain hostnames
+such as "mongodb" or "nrf-test".
+"""
+
+import logging
+import os
+import re
+import uuid
+
+from simulation.ipam import static_hosts
+from simulation.reference_points import REFERENCE_POINTS
+
+NAME_PREFIX = "nf5g"
+
+LABEL_RUN = "netflux5g.run"
+LABEL_COMPONENT = "netflux5g.component"
+LABEL_TYPE = "netflux5g.type"
+# Idle warm pool containers (value: pool ID); kept when a run is torn down
+LABEL_POOL = "netflux5g.pool"
+
+# Environment variable to pin the run ID (e.g. to the CI job ID)
+RUN_ID_ENV = "NETFLUX5G_RUN_ID"
+
+_INVALID_NAME_CHARS = re.compile(r'[^a-zA-Z0-9_.-]')
+
+
+def new_run_id():
+    """Generate a short random run ID"""
+    return uuid.uuid4().hex[:6]
+
+
+def sanitize_name(name):
+    """Make a string safe to use in docker container and network names"""
+    return _INVALID_NAME_CHARS.sub('-', str(name)).strip('-.') or "unnamed"
+
+
+def run_label_filter(run_id=None):
+    """Docker list filter selecting one run's resources (or all runs)"""
+    return {"label": f"{LABEL_RUN}={run_id}" if run_id else LABEL_RUN}
+
+
+class RunNamespace:
+    """Names, labels, network and address book of one simulation run"""
+
+    def __init__(self, run_id=None):
+        self.run_id = sanitize_name(run_id or os.environ.get(RUN_ID_ENV) or new_run_id())
+        self.network_name = f"{NAME_PREFIX}-{self.run_id}-net"
+        self.network = None
+        self.subnet = None
+
+        # Reference-point networks in multi-network mode: name -> network/subnet
+        self.networks = {}
+        self.subnets = {}
+        self._reference_static_hosts = {}
+
+        # logical name -> (container name, component type)
+        self._members = {}
+        self._static_hosts = None
+
+    def container_name(self, logical_name):
+        """Docker container name for a component of this run"""
+        return f"{NAME_PREFIX}-{self.run_id}-{sanitize_name(logical_name)}"
+
+    def labels(self, logical_name=None, component_type=None):
+        """Labels identifying a resource of this run"""
+        labels = {LABEL_RUN: self.run_id}
+        if logical_name:
+            labels[LABEL_COMPONENT] = str(logical_name)
+        if component_type:
+            labels[LABEL_TYPE] = str(component_type)
+        return labels
+
+    def label_filter(self):
+        return run_label_filter(self.run_id)
+
+    def owns(self, container):
+        """True if the container belongs to this run (by label)"""
+        return (getattr(container, 'labels', None) or {}).get(LABEL_RUN) == self.run_id
+
+    # Network
+
+    def network_name_for(self, reference_point=None):
+        """Docker network name of a reference point (None: the flat run network)"""
+        if reference_point is None:
+            return self.network_name
+        return f"{NAME_PREFIX}-{self.run_id}-{sanitize_name(reference_point)}"
+
+    def attach_network(self, network, subnet, reference_point=None):
+        """Record the run network (or one reference-point network) once it has been created"""
+        if reference_point is not None:
+            self.networks[reference_point] = network
+            self.subnets[reference_point] = subnet
+            self._reference_static_hosts[reference_point] = static_hosts(subnet)
+            return
+        self.network = network
+        self.subnet = subnet
+        self._static_hosts = static_hosts(subnet)
+
+    def run_addresses(self, container):
+        """Addresses of a container in each run network it is attached to ({network name: address})"""
+        try:
+            networks = container.attrs['NetworkSettings']['Networks']
+        except Exception:
+            return {}
+        names = [self.network_name] + [self.network_name_for(ref) for ref in REFERENCE_POINTS]
+        return {name: networks[name]['IPAddress'] for name in names
+                if name in networks and networks[name].get('IPAddress')}
+
+    def get_network(self, reference_point=None):
+        if reference_point is None:
+            return self.network
+        return self.networks.get(reference_point)
+
+    def all_subnets(self):
+        """Subnets of every network of the run"""
+        subnets = [self.subnet] if self.subnet else []
+        return subnets + list(self.subnets.values())
+
+    def allocate_static_ip(self, reference_point=None):
+        """Next free address from a run subnet's static range, or None"""
+        if reference_point is not None:
+            hosts = self._reference_static_hosts.get(reference_point)
+        else:
+            hosts = self._static_hosts
+        if hosts is None:
+            return None
+        address = next(hosts, None)
+        return str(address) if address else None
+
+    def connect(self, container, logical_name, reference_points=None, ipv4_address=None):
+        """
+        Attach a container to the run network(s) with its logical name as alias
+
+        Args:
+            container: Container to attach
+            logical_name: DNS alias on every network
+            reference_points: Reference-point networks (default: the flat run network)
+            ipv4_address: Fixed address on the first network, or {reference point: address}
+        """
+        reference_points = list(reference_points or [None])
+        for index, reference_point in enumerate(reference_points):
+            network = self.get_network(reference_point)
+            if network is None:
+                raise RuntimeError(f"Run network {self.network_name_for(reference_point)} does not exist")
+            if isinstance(ipv4_address, dict):
+                address = ipv4_address.get(reference_point)
+            else:
+                address = ipv4_address if index == 0 else None
+            network.connect(container, aliases=[str(logical_name)], ipv4_address=address)
+
+    # Logical name lookup
+
+    def register(self, logical_name, container, component_type=None):
+        self._members[logical_name] = (container.name, component_type)
+
+    def forget(self, logical_name):
+        self._members.pop(logical_name, None)
+
+    def resolve(self, name):
+        """Map a logical component name to its container name (others unchanged)"""
+        member = self._members.get(name)
+        return member[0] if member else name
+
+    def logical_name(self, container):
+        """Logical component name of a container of this run"""
+        labels = getattr(container, 'labels', None) or {}
+        if labels.get(LABEL_COMPONENT):
+            return labels[LABEL_COMPONENT]
+        for logical_name, (container_name, _) in self._members.items():
+            if container_name == container.name:
+                return logical_name
+        return container.name
+
+    def component_type(self, container):
+        """Component type of a container of this run (None if unknown)"""
+        labels = getattr(container, 'labels', None) or {}
+        if labels.get(LABEL_TYPE):
+            return labels[LABEL_TYPE]
+        for container_name, component_type in self._members.values():
+            if container_name == container.name:
+                return component_type
+        return None
+
+    # Containers
+
+    def run_container(self, client, image, logical_name, component_type, ipv4_address=None,
+                      reference_points=None, **kwargs):
+        """
+        Create and start a container in the run network
+
+        docker-py's containers.run() cannot set network aliases, so the
+        container is created, reconnected to the run network with its logical
+        name as alias (and an optional fixed address), then started.
+
+        Args:
+            client: docker client
+            image: Image to run
+            logical_name: Component name used as DNS alias inside the run
+            component_type: Component type recorded in the labels
+            ipv4_address: Optional fixed address from allocate_static_ip(), or
+                {reference point: address}
+            reference_points: Reference-point networks to attach to (multi-network
+                mode); the container is created on the first one
+            **kwargs: Further containers.create() arguments
+
+        Returns:
+            Container: The started container
+        """
+        import docker
+
+        kwargs.pop('detach', None)
+        kwargs.pop('remove', None)
+        kwargs.pop('network', None)
+
+        labels = dict(kwargs.pop('labels', None) or {})
+        labels.update(self.labels(logical_name, component_type))
+
+        create_args = dict(
+            name=self.container_name(logical_name),
+            network=self.network_name_for(reference_points[0] if reference_points else None),
+            labels=labels,
+            **kwargs
+        )
+
+        try:
+            container = client.containers.create(image, **create_args)
+        except docker.errors.ImageNotFound:
+            logging.info(f"Image {image} not found locally, pulling...")
+            client.images.pull(image)
+            container = client.containers.create(image, **create_args)
+
+        try:
+            primary = self.get_network(reference_points[0] if reference_points else None)
+            if primary is not None:
+                primary.disconnect(container)
+                self.connect(container, logical_name, reference_points, ipv4_address)
+            container.start()
+            container.reload()
+        except Exception:
+            container.remove(force=True)
+            raise
+
+        self.register(logical_name, container, component_type)
+        return container
+
@@ -0,0 +1,220 @@
+"""
+CPU placement profiles for simulation containers
+
+"dense" (the default) lets every container float over all cores and only
+weights the CPU scheduler towards the user plane. "performance" gives the
+user-plane containers (UPF, gNB) dedicated cores on one NUMA node, with their
+memory on that node, and keeps control-plane NFs, MongoDB and UEs on the
+remaining shared cores, so throughput tests are not disturbed by the rest of
+the run. The NUMA layout is read from /sys.
+"""
+
+import logging
+import math
+import os
+
+PERFORMANCE = "performance"
+DENSE = "dense"
+PROFILES = (PERFORMANCE, DENSE)
+DEFAULT_PROFILE = DENSE
+
+# Topology setting ("settings" section of a project) selecting the profile
+SETTING_KEY = "placement"
+
+NODE_ROOT = "/sys/devices/system/node"
+
+USER_PLANE_TYPES = ("upf", "gnb")
+
+# Dedicated cores per user-plane container in the performance profile
+DEDICATED_CORES = {"upf": 2, "gnb": 1}
+
+# Cores always left to the shared set (control plane, MongoDB, UEs)
+MIN_SHARED_CORES = 1
+
+# CPU weights (docker default 1024)
+CPU_SHARES = {"upf": 2048, "gnb": 2048, "ue": 512}
+
+
+def parse_cpulist(text):
+    """Kernel CPU list ("0-3,8,10-11") to a sorted list of CPU numbers"""
+    cpus = set()
+    for part in (text or "").strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def format_cpulist(cpus):
+    """CPU numbers to a docker cpuset string, ranges collapsed ("0-3,8")"""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(first) if first == last else f"{first}-{last}" for first, last in ranges)
+
+
+def allowed_cpus():
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def numa_nodes(root=NODE_ROOT, cpus=None):
+    """
+    CPUs per NUMA node, limited to the CPUs this process may use
+
+    Returns:
+        dict: {node id: [cpu, ...]}; a single node 0 when /sys has no NUMA information
+    """
+    cpus = set(allowed_cpus() if cpus is None else cpus)
+    nodes = {}
+    try:
+        entries = os.listdir(root)
+    except OSError:
+        entries = []
+
+    for entry in entries:
+        if not entry.startswith("node") or not entry[4:].isdigit():
+            continue
+        try:
+            with open(os.path.join(root, entry, "cpulist")) as file:
+                node_cpus = [cpu for cpu in parse_cpulist(file.read()) if cpu in cpus]
+        except (OSError, ValueError) as e:
+            logging.debug(f"Could not read {entry} cpulist: {e}")
+            continue
+        if node_cpus:
+            nodes[int(entry[4:])] = node_cpus
+
+    return nodes or {0: sorted(cpus)}
+
+
+def engine_nodes(session):
+    """numa_nodes() of the Docker host; /sys describes a local daemon only, a remote one is a single node"""
+    if session.is_local():
+        return numa_nodes()
+    cpus = int((session.info() or {}).get("NCPU") or 1)
+    return {0: list(range(cpus))}
+
+
+def learned_dedicated_cores(history):
+    """Dedicated cores of the UPF sized from its peak CPU use in a ResourceHistory (empty without one)"""
+    try:
+        peak = history.peak_cpus("upf")
+    except Exception as e:
+        logging.warning(f"Could not load resource history: {e}")
+        return {}
+    return {"upf": max(1, int(math.ceil(peak)))} if peak else {}
+
+
+class PlacementPlan:
+    """CPU placement of every container of a run"""
+
+    def __init__(self, profile, nodes, assignments=None, shared=None, reasons=None):
+        self.profile = profile
+        self.nodes = nodes
+        self.assignments = assignments or {}   # logical name -> create arguments
+        self.shared = shared or {}             # create arguments of all other containers
+        self.reasons = reasons or []
+
+    def args(self, logical_name, comp_type=None):
+        """containers.create() arguments for a container ({} if it floats)"""
+        if logical_name in self.assignments:
+            return dict(self.assignments[logical_name])
+        args = dict(self.shared)
+        if comp_type in CPU_SHARES:
+            args["cpu_shares"] = CPU_SHARES[comp_type]
+        return args
+
+    def summary(self):
+        text = f"{self.profile} ({len(self.nodes)} NUMA node{'s' if len(self.nodes) != 1 else ''})"
+        if self.assignments:
+            text += ": " + ", ".join(f"{name} {args['cpuset_cpus']}" for name, args in self.assignments.items())
+        if self.shared.get("cpuset_cpus"):
+            text += f"; shared {self.shared['cpuset_cpus']}"
+        return text
+
+    def to_dict(self):
+        return {
+            "profile": self.profile,
+            "numa_nodes": {str(node): format_cpulist(cpus) for node, cpus in self.nodes.items()},
+            "containers": self.assignments,
+            "shared": self.shared,
+            "reasons": self.reasons,
+        }
+
+
+class PlacementPlanner:
+    """Assigns cores to the containers of a run according to a profile"""
+
+    def __init__(self, profile=DEFAULT_PROFILE, nodes=None, dedicated_cores=None):
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown placement profile '{profile}' (expected one of: {', '.join(PROFILES)})")
+        self.profile = profile
+        self.nodes = nodes if nodes is not None else numa_nodes()
+        self.dedicated_cores = dict(DEDICATED_CORES, **(dedicated_cores or {}))
+
+    def plan(self, containers):
+        """
+        Place the containers of a run
+
+        Args:
+            containers: [(logical name, component type)] in deployment order
+
+        Returns:
+            PlacementPlan
+        """
+        if self.profile == DENSE:
+            return PlacementPlan(DENSE, self.nodes)
+
+        # User plane on the node with the most cores, highest cores first:
+        # core 0 takes most host interrupts and stays in the shared set
+        node = max(self.nodes, key=lambda node_id: (len(self.nodes[node_id]), -node_id))
+        free = list(reversed(self.nodes[node]))
+        all_cpus = sorted(cpu for cpus in self.nodes.values() for cpu in cpus)
+        multi_node = len(self.nodes) > 1
+
+        assignments = {}
+        reasons = []
+        user_plane = [(name, comp_type) for name, comp_type in containers if comp_type in USER_PLANE_TYPES]
+        # The UPF carries all user traffic: it gets its cores before the gNBs
+        user_plane.sort(key=lambda item: USER_PLANE_TYPES.index(item[1]))
+
+        for name, comp_type in user_plane:
+            wanted = max(1, int(self.dedicated_cores.get(comp_type, 1)))
+            spare = len(free) - MIN_SHARED_CORES
+            if spare <= 0:
+                reasons.append(f"No dedicated core left for {name}, it shares the user-plane cores")
+                continue
+            cores = [free.pop(0) for _ in range(min(wanted, spare))]
+            if len(cores) < wanted:
+                reasons.append(f"{name} got {len(cores)} of {wanted} dedicated cores")
+            args = {"cpuset_cpus": format_cpulist(cores), "cpu_shares": CPU_SHARES[comp_type]}
+            if multi_node:
+                args["cpuset_mems"] = str(node)
+            assignments[name] = args
+
+        dedicated = {cpu for args in assignments.values() for cpu in parse_cpulist(args["cpuset_cpus"])}
+        shared = {}
+        if dedicated:
+            shared["cpuset_cpus"] = format_cpulist(cpu for cpu in all_cpus if cpu not in dedicated)
+
+        # User-plane containers without their own cores share the user-plane node
+        for name, comp_type in user_plane:
+            if name not in assignments:
+                node_shared = [cpu for cpu in self.nodes[node] if cpu not in dedicated]
+                args = {"cpuset_cpus": format_cpulist(node_shared), "cpu_shares": CPU_SHARES[comp_type]}
+                if multi_node:
+                    args["cpuset_mems"] = str(node)
+                assignments[name] = args
+
+        if not dedicated:
+            reasons.append(f"Only {len(all_cpus)} CPU(s) available, nothing could be dedicated")
+        return PlacementPlan(PERFORMANCE, self.nodes, assignments, shared, reasons)
@@ -0,0 +1,598 @@
+"""
+Streaming protocol statistics of a run
+
+tcpdump runs in a nettools helper in the network namespace of each core NF
+and writes pcap to its stdout, which is attached to (never logged) and decoded
+packet by packet here; packets are counted and dropped, never stored. Every
+message is seen at exactly one vantage point:
+
+- NGAP (SCTP port 38412) at the AMFs: messages per procedure and outcome
+- PFCP (UDP port 8805) at the UPFs: messages per type, request/response latency
+- GTP-U (UDP port 2152) at the UPFs: packets and bytes per TEID (headers only)
+- SBI (HTTP/2 cleartext) at the server NF: requests per second and response
+  latency per server, matched by connection and stream ID
+
+Counts are kept per second for a rolling window, so the results show where
+control-plane time goes during registration storms. HPACK header blocks are
+not decoded, so SBI requests are grouped by server NF rather than by path.
+"""
+
+import logging
+import shlex
+import struct
+import threading
+from collections import Counter, OrderedDict, deque
+
+# Topology setting ("settings" section of a project) enabling the statistics
+SETTING_KEY = "protocol_stats"
+
+NGAP_PORT = 38412
+NGAP_PPID = 60
+PFCP_PORT = 8805
+GTPU_PORT = 2152
+# SBI server ports of the Open5GS config templates (NRF 7777, AMF 7778, ... SMF 7782)
+SBI_PORTS = (7777, 7782)
+
+# Per-second counts kept, latency samples kept per key, TEIDs, open requests and
+# HTTP/2 connection directions tracked
+WINDOW_S = 300
+MAX_SAMPLES = 10000
+MAX_TEIDS = 10000
+MAX_PENDING = 10000
+MAX_STREAMS = 10000
+
+# NFs tcpdump runs next to
+VANTAGE_TYPES = ("nrf", "amf", "smf", "upf", "ausf", "udm", "pcf")
+
+# Bytes captured per packet at the UPFs (GTP-U/PFCP headers; user data is not needed)
+UPF_SNAPLEN = 128
+
+# NGAP procedure codes (TS 38.413)
+NGAP_PROCEDURES = {
+    0: "AMFConfigurationUpdate", 1: "AMFStatusIndication", 2: "CellTrafficTrace", 3: "DeactivateTrace",
+    4: "DownlinkNASTransport", 5: "DownlinkNonUEAssociatedNRPPaTransport",
+    6: "DownlinkRANConfigurationTransfer", 7: "DownlinkRANStatusTransfer",
+    8: "DownlinkUEAssociatedNRPPaTransport", 9: "ErrorIndication", 10: "HandoverCancel",
+    11: "HandoverNotification", 12: "HandoverPreparation", 13: "HandoverResourceAllocation",
+    14: "InitialContextSetup", 15: "InitialUEMessage", 16: "LocationReportingControl",
+    17: "LocationReportingFailureIndication", 18: "LocationReport", 19: "NASNonDeliveryIndication",
+    20: "NGReset", 21: "NGSetup", 22: "OverloadStart", 23: "OverloadStop", 24: "Paging",
+    25: "PathSwitchRequest", 26: "PDUSessionResourceModify", 27: "PDUSessionResourceModifyIndication",
+    28: "PDUSessionResourceRelease", 29: "PDUSessionResourceSetup", 30: "PDUSessionResourceNotify",
+    31: "PrivateMessage", 32: "PWSCancel", 33: "PWSFailureIndication", 34: "PWSRestartIndication",
+    35: "RANConfigurationUpdate", 36: "RerouteNASRequest", 37: "RRCInactiveTransitionReport",
+    38: "TraceFailureIndication", 39: "TraceStart", 40: "UEContextModification", 41: "UEContextRelease",
+    42: "UEContextReleaseRequest", 43: "UERadioCapabilityCheck", 44: "UERadioCapabilityInfoIndication",
+    45: "UETNLABindingRelease", 46: "UplinkNASTransport", 47: "UplinkNonUEAssociatedNRPPaTransport",
+    48: "UplinkRANConfigurationTransfer", 49: "UplinkRANStatusTransfer",
+    50: "UplinkUEAssociatedNRPPaTransport", 51: "WriteReplaceWarning", 52: "SecondaryRATDataUsageReport",
+}
+# First octet of an NGAP-PDU (APER CHOICE index)
+NGAP_OUTCOMES = {0x00: "", 0x20: " (success)", 0x40: " (failure)"}
+
+# PFCP message types (TS 29.244); a response is its request type + 1
+PFCP_MESSAGES = {
+    1: "Heartbeat Request", 2: "Heartbeat Response", 3: "PFD Management Request", 4: "PFD Management Response",
+    5: "Association Setup Request", 6: "Association Setup Response",
+    7: "Association Update Request", 8: "Association Update Response",
+    9: "Association Release Request", 10: "Association Release Response", 11: "Version Not Supported Response",
+    12: "Node Report Request", 13: "Node Report Response",
+    14: "Session Set Deletion Request", 15: "Session Set Deletion Response",
+    50: "Session Establishment Request", 51: "Session Establishment Response",
+    52: "Session Modification Request", 53: "Session Modification Response",
+    54: "Session Deletion Request", 55: "Session Deletion Response",
+    56: "Session Report Request", 57: "Session Report Response",
+}
+
+# HTTP/2
+H2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+H2_HEADERS = 1
+H2_MAX_TYPE = 9
+H2_PADDED = 0x08
+H2_PRIORITY = 0x20
+# :status of the HPACK static table (indexed header field 8..14)
+HPACK_STATUS = {0x88: "200", 0x89: "204", 0x8a: "206", 0x8b: "304", 0x8c: "400", 0x8d: "404", 0x8e: "500"}
+
+# pcap link types: Ethernet, raw IP, Linux cooked v1/v2 (tcpdump -i any)
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = (101, 228)
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+
+def render_stats_script(bpf_filter, snaplen=0):
+    """Shell script streaming pcap of all interfaces to stdout until SIGTERM"""
+    snaplen = f" -s {int(snaplen)}" if snaplen else ""
+    return f"exec tcpdump -i any -n -U{snaplen} -w - {shlex.quote(bpf_filter)}\n"
+
+
+def sbi_filter(addresses):
+    """BPF matching the SBI traffic a container serves (not the requests it sends)"""
+    low, high = SBI_PORTS
+    hosts = " or ".join(f"{{side}} host {address}" for address in addresses)
+    sides = [f"({side} portrange {low}-{high} and ({hosts.format(side=side)}))" for side in ("dst", "src")]
+    return f"(tcp and ({' or '.join(sides)}))"
+
+
+def vantage_filter(comp_type, addresses):
+    """
+    BPF of the packets counted in a container's namespace, None if it counts nothing
+
+    NGAP at the AMFs, PFCP and GTP-U at the UPFs, SBI at every server NF.
+    """
+    if comp_type not in VANTAGE_TYPES:
+        return None
+    parts = [sbi_filter(addresses)] if addresses and comp_type != 'upf' else []
+    if comp_type == 'amf':
+        parts.append(f"sctp port {NGAP_PORT}")
+    elif comp_type == 'upf':
+        parts.append(f"udp port {PFCP_PORT} or udp port {GTPU_PORT}")
+    return " or ".join(parts) or None
+
+
+def vantage_points(containers, namespace):
+    """
+    Where the statistics of a run are streamed from
+
+    Args:
+        containers: Deployed containers of the run
+        namespace: RunNamespace of the run (logical names, types and run addresses)
+
+    Returns:
+        tuple: ({address: logical name} of every container,
+            [(container, BPF, snaplen)] of the containers counting something)
+    """
+    names = {}
+    points = []
+    for container in containers:
+        addresses = namespace.run_addresses(container)
+        if not addresses:
+            container.reload()
+            addresses = namespace.run_addresses(container)
+        logical_name = namespace.logical_name(container)
+        names.update({address: logical_name for address in addresses.values()})
+        comp_type = namespace.component_type(container)
+        bpf_filter = vantage_filter(comp_type, sorted(set(addresses.values())))
+        if bpf_filter:
+            points.append((container, bpf_filter, UPF_SNAPLEN if comp_type == 'upf' else 0))
+    return names, points
+
+
+class PcapStream:
+    """Incremental pcap reader: feed() byte chunks, get whole packets back"""
+
+    def __init__(self):
+        self.buffer = b""
+        self.header = None      # (endian, nanosecond timestamps, link type)
+
+    def feed(self, chunk):
+        """
+        Returns:
+            list: (timestamp, original length, link type, captured bytes) of the complete packets
+        """
+        self.buffer += chunk
+        packets = []
+        if self.header is None:
+            if len(self.buffer) < 24:
+                return packets
+            magic = self.buffer[:4]
+            formats = {b"\xd4\xc3\xb2\xa1": ("<", False), b"\xa1\xb2\xc3\xd4": (">", False),
+                       b"\x4d\x3c\xb2\xa1": ("<", True), b"\xa1\xb2\x3c\x4d": (">", True)}
+            if magic not in formats:
+                raise ValueError(f"not a pcap stream (magic {magic.hex()})")
+            endian, nanoseconds = formats[magic]
+            linktype = struct.unpack(f"{endian}I", self.buffer[20:24])[0] & 0x0fffffff
+            self.header = (endian, nanoseconds, linktype)
+            self.buffer = self.buffer[24:]
+
+        endian, nanoseconds, linktype = self.header
+        offset = 0
+        while len(self.buffer) - offset >= 16:
+            seconds, fraction, caplen, length = struct.unpack(f"{endian}IIII", self.buffer[offset:offset + 16])
+            if len(self.buffer) - offset - 16 < caplen:
+                break
+            data = self.buffer[offset + 16:offset + 16 + caplen]
+            packets.append((seconds + fraction / (1e9 if nanoseconds else 1e6), length, linktype, data))
+            offset += 16 + caplen
+        self.buffer = self.buffer[offset:]
+        return packets
+
+
+def decode_ip(linktype, data):
+    """
+    IPv4 header fields of a captured frame
+
+    Returns:
+        tuple: (source, destination, protocol, payload), None for other frames
+    """
+    if linktype == LINKTYPE_ETHERNET:
+        offset, ethertype = 14, data[12:14]
+        while ethertype in (b"\x81\x00", b"\x88\xa8") and len(data) >= offset + 4:
+            ethertype, offset = data[offset + 2:offset + 4], offset + 4
+    elif linktype == LINKTYPE_LINUX_SLL:
+        offset, ethertype = 16, data[14:16]
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        offset, ethertype = 20, data[0:2]
+    elif linktype in LINKTYPE_RAW:
+        offset, ethertype = 0, b"\x08\x00"
+    else:
+        return None
+    if ethertype != b"\x08\x00" or len(data) < offset + 20 or data[offset] >> 4 != 4:
+        return None
+    header_length = (data[offset] & 0x0f) * 4
+    total_length = struct.unpack("!H", data[offset + 2:offset + 4])[0]
+    if struct.unpack("!H", data[offset + 6:offset + 8])[0] & 0x1fff:
+        # Non-first fragment
+        return None
+    source = ".".join(str(octet) for octet in data[offset + 12:offset + 16])
+    destination = ".".join(str(octet) for octet in data[offset + 16:offset + 20])
+    payload = data[offset + header_length:offset + max(total_length, header_length)]
+    return source, destination, data[offset + 9], payload
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+    return {"p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+            "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+class ProtocolStats:
+    """Rolling per-second counters of NGAP, PFCP, GTP-U and SBI messages"""
+
+    def __init__(self, names=None, window=WINDOW_S):
+        """
+        Args:
+            names: {address: logical name} used to label SBI servers
+            window: Seconds of per-second counts kept
+        """
+        self.names = names or {}
+        self.window = window
+        self.lock = threading.Lock()
+        self.first = None
+        self.last = None
+        self.packets = 0
+        self.totals = {"ngap": Counter(), "pfcp": Counter(), "sbi": Counter(), "sbi_responses": Counter()}
+        self.status = {}                    # SBI server -> Counter of status codes
+        self.latency = {"pfcp": {}, "sbi": {}}
+        self.teids = OrderedDict()          # TEID -> [packets, bytes]
+        self.gtpu = Counter()               # "packets", "bytes", other message types
+        self.seconds = deque()              # (second, Counter of "<protocol>:<key>")
+        self._pfcp_pending = OrderedDict()  # (requester, responder, type, sequence) -> timestamp
+        self._sbi_pending = OrderedDict()   # (client, client port, server, server port, stream) -> timestamp
+        self._streams = OrderedDict()       # TCP direction -> [next sequence number, buffer], least recent first
+
+    # Accounting
+
+    def _tick(self, timestamp, key, amount=1):
+        second = int(timestamp)
+        if not self.seconds or second > self.seconds[-1][0]:
+            self.seconds.append((second, Counter()))
+            while self.seconds[0][0] <= second - self.window:
+                self.seconds.popleft()
+        elif second < self.seconds[-1][0]:
+            # Out-of-order packet of another vantage point: count it in its own
+            # second, keeping the buckets sorted (dropped if already out of the window)
+            if second <= self.seconds[-1][0] - self.window:
+                return
+            index = len(self.seconds)
+            while index and self.seconds[index - 1][0] > second:
+                index -= 1
+            if not index or self.seconds[index - 1][0] != second:
+                self.seconds.insert(index, (second, Counter()))
+                index += 1
+            self.seconds[index - 1][1][key] += amount
+            return
+        self.seconds[-1][1][key] += amount
+
+    @staticmethod
+    def _sample(samples, key, value):
+        values = samples.setdefault(key, deque(maxlen=MAX_SAMPLES))
+        values.append(value)
+
+    @staticmethod
+    def _remember(pending, key, value):
+        pending[key] = value
+        while len(pending) > MAX_PENDING:
+            pending.popitem(last=False)
+
+    def add(self, timestamp, length, linktype, data):
+        """Count one captured packet"""
+        decoded = decode_ip(linktype, data)
+        if decoded is None:
+            return
+        source, destination, protocol, payload = decoded
+        with self.lock:
+            self.packets += 1
+            self.first = timestamp if self.first is None else min(self.first, timestamp)
+            self.last = timestamp if self.last is None else max(self.last, timestamp)
+            if protocol == 132 and len(payload) >= 12:
+                self._sctp(timestamp, payload)
+            elif protocol == 17 and len(payload) >= 8:
+                source_port, destination_port = struct.unpack("!HH", payload[:4])
+                if PFCP_PORT in (source_port, destination_port):
+                    self._pfcp(timestamp, source, destination, payload[8:])
+                elif GTPU_PORT in (source_port, destination_port):
+                    self._gtpu(timestamp, payload[8:])
+            elif protocol == 6 and len(payload) >= 20:
+                self._tcp(timestamp, source, destination, payload)
+
+    # NGAP
+
+    def _sctp(self, timestamp, payload):
+        if NGAP_PORT not in struct.unpack("!HH", payload[:4]):
+            return
+        offset = 12
+        while offset + 4 <= len(payload):
+            chunk_type = payload[offset]
+            chunk_length = struct.unpack("!H", payload[offset + 2:offset + 4])[0]
+            if chunk_length < 4:
+                break
+            if chunk_type == 0 and chunk_length >= 18:
+                ppid = struct.unpack("!I", payload[offset + 12:offset + 16])[0]
+                data = payload[offset + 16:offset + chunk_length]
+                if ppid == NGAP_PPID and len(data) >= 2 and data[0] in NGAP_OUTCOMES:
+                    name = NGAP_PROCEDURES.get(data[1], f"procedure {data[1]}") + NGAP_OUTCOMES[data[0]]
+                    self.totals["ngap"][name] += 1
+                    self._tick(timestamp, f"ngap:{name}")
+            offset += (chunk_length + 3) & ~3
+
+    # PFCP
+
+    def _pfcp(self, timestamp, source, destination, payload):
+        if len(payload) < 8:
+            return
+        message_type = payload[1]
+        name = PFCP_MESSAGES.get(message_type, f"type {message_type}")
+        self.totals["pfcp"][name] += 1
+        self._tick(timestamp, f"pfcp:{name}")
+
+        offset = 12 if payload[0] & 0x01 else 4
+        if len(payload) < offset + 3:
+            return
+        sequence = int.from_bytes(payload[offset:offset + 3], "big")
+        if name.endswith(" Request"):
+            self._remember(self._pfcp_pending, (source, destination, message_type, sequence), timestamp)
+        elif name.endswith(" Response"):
+            started = self._pfcp_pending.pop((destination, source, message_type - 1, sequence), None)
+            if started is not None:
+                self._sample(self.latency["pfcp"], name[:-len(" Response")], timestamp - started)
+
+    # GTP-U
+
+    def _gtpu(self, timestamp, payload):
+        if len(payload) < 8:
+            return
+        message_type = payload[1]
+        if message_type != 0xff:
+            self.gtpu[f"type {message_type}"] += 1
+            return
+        length, teid = struct.unpack("!HI", payload[2:8])
+        self.gtpu["packets"] += 1
+        self.gtpu["bytes"] += length
+        counters = self.teids.get(teid)
+        if counters is None:
+            if len(self.teids) >= MAX_TEIDS:
+                self.teids.popitem(last=False)
+            counters = self.teids[teid] = [0, 0]
+        counters[0] += 1
+        counters[1] += length
+        self._tick(timestamp, "gtpu:packets")
+        self._tick(timestamp, "gtpu:bytes", length)
+
+    # SBI (HTTP/2)
+
+    def _tcp(self, timestamp, source, destination, segment):
+        source_port, destination_port, sequence = struct.unpack("!HHI", segment[:8])
+        low, high = SBI_PORTS
+        to_server = low <= destination_port <= high
+        if not to_server and not low <= source_port <= high:
+            return
+        flags = segment[13]
+        direction = (source, source_port, destination, destination_port)
+        if flags & 0x05:
+            # FIN or RST
+            self._streams.pop(direction, None)
+            return
+        data = segment[(segment[12] >> 4) * 4:]
+        if not data:
+            return
+
+        stream = self._streams.get(direction)
+        if stream is None or stream[0] != sequence:
+            # First segment seen or a gap: assume it starts with a frame (nghttp2 writes whole frames)
+            stream = [sequence, b""]
+        # Connections that are never closed are forgotten, least recently active first
+        self._streams[direction] = stream
+        self._streams.move_to_end(direction)
+        while len(self._streams) > MAX_STREAMS:
+            self._streams.popitem(last=False)
+        stream[0] = (sequence + len(data)) & 0xffffffff
+        buffer = stream[1] + data
+        if buffer.startswith(H2_PREFACE):
+            buffer = buffer[len(H2_PREFACE):]
+        elif H2_PREFACE.startswith(buffer):
+            # Preface split over segments
+            stream[1] = buffer
+            return
+
+        connection = (source, source_port, destination, destination_port) if to_server \
+            else (destination, destination_port, source, source_port)
+        while len(buffer) >= 9:
+            length = int.from_bytes(buffer[:3], "big")
+            frame_type, frame_flags = buffer[3], buffer[4]
+            stream_id = struct.unpack("!I", buffer[5:9])[0] & 0x7fffffff
+            if frame_type > H2_MAX_TYPE:
+                # Not at a frame boundary: resynchronize on the next segment
+                buffer = b""
+                break
+            if len(buffer) < 9 + length:
+                break
+            if frame_type == H2_HEADERS and stream_id:
+                self._sbi_headers(timestamp, connection, stream_id, to_server,
+                                  buffer[9:9 + length], frame_flags)
+            buffer = buffer[9 + length:]
+        stream[1] = buffer
+
+    def _sbi_headers(self, timestamp, connection, stream_id, to_server, block, flags):
+        server = self.names.get(connection[2], connection[2])
+        key = connection + (stream_id,)
+        if to_server:
+            if key not in self._sbi_pending:
+                self.totals["sbi"][server] += 1
+                self._tick(timestamp, f"sbi:{server}")
+                self._remember(self._sbi_pending, key, timestamp)
+            return
+        started = self._sbi_pending.pop(key, None)
+        if started is None:
+            return
+        self.totals["sbi_responses"][server] += 1
+        self._sample(self.latency["sbi"], server, timestamp - started)
+        offset = (1 if flags & H2_PADDED else 0) + (5 if flags & H2_PRIORITY else 0)
+        status = HPACK_STATUS.get(block[offset]) if len(block) > offset else None
+        self.status.setdefault(server, Counter())[status or "other"] += 1
+
+    # Report
+
+    def _peaks(self):
+        peaks = Counter()
+        for _, bucket in self.seconds:
+            for key, count in bucket.items():
+                peaks[key] = max(peaks[key], count)
+        return peaks
+
+    def to_dict(self, timeline=60):
+        """
+        Totals, peak rates and latencies, and the per-second counts of the last `timeline` seconds
+
+        Returns:
+            dict: duration_s, packets, ngap, pfcp, gtpu, sbi and timeline
+        """
+        with self.lock:
+            duration = round(self.last - self.first, 3) if self.first is not None else 0
+            peaks = self._peaks()
+            rate = (lambda count: round(count / duration, 2) if duration else None)
+            pfcp_latency = {procedure: dict(_percentiles(samples), count=len(samples)) for procedure, samples in self.latency["pfcp"].items()}
+            teids = sorted(self.teids.items(), key=lambda item: item[1][1], reverse=True)
+            return {
+                "duration_s": duration,
+                "packets": self.packets,
+                "ngap": {name: {"count": count, "peak_per_s": peaks[f"ngap:{name}"]}
+                         for name, count in self.totals["ngap"].most_common()},
+                "pfcp": {
+                    "messages": {name: {"count": count, "peak_per_s": peaks[f"pfcp:{name}"]}
+                                 for name, count in self.totals["pfcp"].most_common()},
+                    "latency": pfcp_latency,
+                },
+                "gtpu": {
+                    "packets": self.gtpu["packets"],
+                    "bytes": self.gtpu["bytes"],
+                    "peak_packets_per_s": peaks["gtpu:packets"],
+                    "peak_bytes_per_s": peaks["gtpu:bytes"],
+                    "other_messages": {key: count for key, count in self.gtpu.items()
+                                       if key not in ("packets", "bytes")},
+                    "teids": {f"{teid:#010x}": {"packets": packets, "bytes": size}
+                              for teid, (packets, size) in teids[:20]},
+                    "teid_count": len(self.teids),
+                },
+                "sbi": {server: dict(_percentiles(list(self.latency["sbi"].get(server, ()))),
+                                     requests=count, responses=self.totals["sbi_responses"][server],
+                                     rate_per_s=rate(count), peak_per_s=peaks[f"sbi:{server}"],
+                                     status=dict(self.status.get(server, {})))
+                        for server, count in self.totals["sbi"].most_common()},
+                "timeline": [
+                    {"t": second - int(self.first),
+                     "ngap": sum(count for key, count in bucket.items() if key.startswith("ngap:")),
+                     "pfcp": sum(count for key, count in bucket.items() if key.startswith("pfcp:")),
+                     "sbi": sum(count for key, count in bucket.items() if key.startswith("sbi:")),
+                     "gtpu_packets": bucket["gtpu:packets"], "gtpu_bytes": bucket["gtpu:bytes"]}
+                    for second, bucket in list(self.seconds)[-timeline:]
+                ],
+            }
+
+
+class ProtocolStatsCollector:
+    """Streams pcap from one tcpdump helper per vantage container into a ProtocolStats"""
+
+    def __init__(self, client, image, setup="", labels=None, names=None, mem_limit=None):
+        """
+        Args:
+            client: docker client
+            image: nettools image with tcpdump
+            setup: Shell prefix run before tcpdump (e.g. installing it)
+            labels: Labels of the helper containers (the run's, so teardown removes them)
+            names: {address: logical name} of the run's containers
+            mem_limit: Memory limit of the helpers
+        """
+        self.client = client
+        self.image = image
+        self.setup = setup
+        self.labels = labels or {}
+        self.mem_limit = mem_limit
+        self.stats = ProtocolStats(names)
+        self.helpers = []
+        self.threads = []
+        self.errors = {}
+        self.vantage_points = []
+
+    def start(self, container, bpf_filter, snaplen=0):
+        """Start streaming the matching packets of a container's namespace"""
+        script = render_stats_script(bpf_filter, snaplen)
+        if self.setup:
+            script = f"{self.setup} 2>/dev/null\n{script}"
+        helper = self.client.containers.create(
+            self.image,
+            ["sh", "-c", script],
+            entrypoint="",
+            network_mode=f"container:{container.id}",
+            cap_add=["NET_ADMIN", "NET_RAW"],
+            labels=self.labels,
+            # Binary pcap must not end up in the container log
+            log_config={"type": "none"},
+            **({"mem_limit": self.mem_limit} if self.mem_limit else {})
+        )
+        # Attached before the start so the pcap header is not missed
+        output = helper.attach(stdout=True, stderr=False, stream=True, logs=False)
+        helper.start()
+        self.helpers.append(helper)
+        self.vantage_points.append(container.name)
+        thread = threading.Thread(target=self._read, args=(container.name, output),
+                                  name=f"protocol-stats-{container.name}", daemon=True)
+        thread.start()
+        self.threads.append(thread)
+
+    def _read(self, name, output):
+        reader = PcapStream()
+        try:
+            for chunk in output:
+                for packet in reader.feed(chunk):
+                    self.stats.add(*packet)
+        except Exception as e:
+            self.errors[name] = str(e)
+            logging.warning(f"Protocol statistics of {name} stopped: {e}")
+
+    def snapshot(self):
+        report = self.stats.to_dict()
+        report["vantage_points"] = len(self.vantage_points)
+        if self.errors:
+            report["errors"] = dict(self.errors)
+        return report
+
+    def stop(self, timeout=5):
+        """Stop tcpdump (flushing the stream), wait for the readers and remove the helpers"""
+        for helper in self.helpers:
+            try:
+                helper.stop(timeout=timeout)
+            except Exception as e:
+                logging.warning(f"Could not stop protocol statistics helper {helper.name}: {e}")
+        for thread in self.threads:
+            thread.join(timeout)
+        for helper in self.helpers:
+            try:
+                helper.remove(force=True)
+            except Exception:
+                pass
+        self.helpers = []
+        self.threads = []
@@ -0,0 +1,177 @@
+"""
+RAN scale-out: cell identities and UE attachment
+
+Every gNB of a run gets its own gNB ID (its "gnb_id" property, otherwise the
+next free one in deployment order), NR Cell Identity and TAC, rendered into
+its own config, so any number of gNBs can set up NGAP with the same AMFs. A
+UE searches only the gNBs it is linked to on the canvas; a UE without such a
+link searches all gNBs of the run. The AMF serves the TACs of all cells.
+"""
+
+import copy
+import logging
+
+# NR Cell Identity: gNB ID (idLength bits) followed by the cell ID within the gNB
+NCI_BITS = 36
+DEFAULT_ID_LENGTH = 32
+DEFAULT_TAC = 1
+
+# gNB log line of a successful NG Setup with an AMF
+NG_SETUP_SUCCESS = "NG Setup procedure is successful"
+
+
+def nci_for(gnb_id, id_length=DEFAULT_ID_LENGTH):
+    """NR Cell Identity of the first cell of a gNB"""
+    return gnb_id << (NCI_BITS - id_length)
+
+
+def _linked(component, comp_type):
+    """Components of a type directly linked to a component"""
+    linked = []
+    for link in getattr(component, 'links', None) or ():
+        other = link.target if link.source is component else link.source
+        if getattr(other, 'component_type', None) == comp_type:
+            linked.append(other)
+    return linked
+
+
+def linked_gnbs(component, name_of):
+    """Names of the gNBs a UE is linked to, sorted (UEs sharing a container must search the same)"""
+    return tuple(sorted(name_of(gnb) for gnb in _linked(component, 'gnb')))
+
+
+def _int_property(properties, key):
+    try:
+        value = properties.get(key)
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RanPlan:
+    """Cells (gNB ID, NCI, TAC) per gNB and the gNBs each UE searches"""
+
+    def __init__(self):
+        self.cells = {}         # gNB name -> {"gnb_id", "nci", "tac"}
+        self.ue_gnbs = {}       # UE name -> [gNB name]
+        self.ue_counts = {}     # UE name -> UEs its container runs (multi-UE containers only)
+        self.stats = []         # cell_stats() once the UEs are up
+
+    def cell(self, gnb_name):
+        return self.cells.get(gnb_name)
+
+    def gnbs_for(self, ue_name):
+        """gNBs a UE searches (every gNB if it is not linked to one)"""
+        return self.ue_gnbs.get(ue_name) or list(self.cells)
+
+    def tacs(self):
+        """Tracking areas of all cells, in order of first use"""
+        return list(dict.fromkeys(cell["tac"] for cell in self.cells.values()))
+
+    def gnb_properties(self, gnb_name, properties):
+        """gNB properties with the planned cell identity (gnb_id, tac) of the gNB"""
+        properties = dict(properties or {})
+        cell = self.cell(gnb_name)
+        if cell:
+            properties.update(gnb_id=cell["gnb_id"], tac=cell["tac"])
+        return properties
+
+    def gnb_addresses(self, ue_name, address_plan):
+        """Radio link addresses of the gNBs a UE searches, as reachable from the UE (planned gNBs only)"""
+        addresses = [address_plan.reachable_address(gnb, ue_name) for gnb in self.gnbs_for(ue_name)]
+        return [address for address in addresses if address]
+
+    def amf_tais(self, template):
+        """AMF "tai" entries serving every cell's TAC (copies of a template entry), empty without cells"""
+        return [dict(copy.deepcopy(template), tac=tac) for tac in self.tacs()]
+
+    def to_dict(self):
+        """Cells with the UEs counted for them (the first gNB a UE searches)"""
+        ues = {}
+        for ue in self.ue_gnbs:
+            gnbs = self.gnbs_for(ue)
+            if gnbs:
+                ues.setdefault(gnbs[0], []).append(ue)
+        return {name: dict(cell, ues=sorted(ues.get(name, []))) for name, cell in self.cells.items()}
+
+
+def plan_ran(components, name_of, id_length=DEFAULT_ID_LENGTH, ue_count=None):
+    """
+    Cell identities of the gNBs and gNB lists of the UEs of a deployment
+
+    Args:
+        components: Components in deployment order
+        name_of: Function returning a component's logical name
+        id_length: gNB ID length in bits of the gNB config
+        ue_count: Function returning the UEs of a UE component's container (default 1)
+
+    Returns:
+        RanPlan: The plan
+    """
+    plan = RanPlan()
+    gnbs = [component for component in components if component.component_type == 'gnb']
+    max_id = (1 << id_length) - 1
+
+    # Explicit IDs first, the others get the lowest free ones
+    used = set()
+    requested = {}
+    for component in gnbs:
+        gnb_id = _int_property(getattr(component, 'properties', {}), 'gnb_id')
+        if not gnb_id:
+            # Unset or 0: automatic
+            continue
+        if not 0 < gnb_id <= max_id or gnb_id in used:
+            logging.warning(f"gNB {name_of(component)}: gnb_id {gnb_id} is out of range or taken, assigning another")
+            continue
+        used.add(gnb_id)
+        requested[id(component)] = gnb_id
+
+    next_id = 1
+    for component in gnbs:
+        gnb_id = requested.get(id(component))
+        if gnb_id is None:
+            while next_id in used:
+                next_id += 1
+            gnb_id = next_id
+            used.add(gnb_id)
+        tac = _int_property(getattr(component, 'properties', {}), 'tac') or DEFAULT_TAC
+        plan.cells[name_of(component)] = {"gnb_id": gnb_id, "nci": nci_for(gnb_id, id_length), "tac": tac}
+
+    for component in components:
+        if component.component_type == 'ue':
+            plan.ue_gnbs[name_of(component)] = [name_of(gnb) for gnb in _linked(component, 'gnb')]
+            count = ue_count(component) if ue_count else 1
+            if count > 1:
+                plan.ue_counts[name_of(component)] = count
+    return plan
+
+
+def cell_stats(plan, registration, ng_setup):
+    """
+    Registration results per cell
+
+    Args:
+        plan: RanPlan of the run
+        registration: {UE name: run_registration_benchmark() result}
+        ng_setup: {gNB name: True if its NG Setup succeeded}
+
+    Returns:
+        list: One dictionary per cell; a UE counts for the first gNB it searches
+    """
+    stats = {name: dict(cell, gnb=name, ng_setup=bool(ng_setup.get(name)), ues=0,
+                        registrations=0, pdu_sessions=0, registration_s=[])
+             for name, cell in plan.cells.items()}
+    for ue_name, result in registration.items():
+        gnbs = plan.gnbs_for(ue_name)
+        if not gnbs or gnbs[0] not in stats:
+            continue
+        cell = stats[gnbs[0]]
+        cell["ues"] += plan.ue_counts.get(ue_name, 1)
+        cell["registrations"] += result["registrations"]
+        cell["pdu_sessions"] += result["pdu_sessions"]
+        cell["registration_s"] += result["registration_s"]
+
+    for cell in stats.values():
+        times = sorted(cell.pop("registration_s"))
+        cell["registration_p50_s"] = times[len(times) // 2] if times else None
+    return list(stats.values())
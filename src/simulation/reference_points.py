@@ -0,0 +1,53 @@
+"""
+5G reference-point networks
+
+In the default "flat" mode every container of a run shares one bridge. In
+"multi" mode each reference point gets its own Docker network and a
+component is attached only to the networks its interfaces use, so control-
+and user-plane traffic never share a broadcast domain. Only N6 has a route
+out of the host; the others are internal networks.
+"""
+
+FLAT = "flat"
+MULTI = "multi"
+NETWORK_MODES = (FLAT, MULTI)
+DEFAULT_MODE = FLAT
+
+# Topology setting ("settings" section of a project) selecting the mode
+SETTING_KEY = "network_mode"
+
+# Reference point -> description
+REFERENCE_POINTS = {
+    "sbi": "Service-based interface (NRF, AMF, SMF, AUSF, UDM, PCF, MongoDB)",
+    "n2": "NGAP between gNBs and the AMF",
+    "n3": "GTP-U between gNBs and the UPF",
+    "n4": "PFCP between the SMF and the UPF",
+    "n6": "Data network behind the UPF (internet gateway)",
+    "ran": "Simulated radio link between UEs and gNBs",
+}
+
+# Networks with a default route (and NAT) to the outside world
+EGRESS_REFERENCE_POINTS = ("n6",)
+
+# Networks per component type; the first one is the network the container is created on
+MEMBERSHIP = {
+    "mongodb": ("sbi",),
+    "nrf": ("sbi",),
+    "ausf": ("sbi",),
+    "udm": ("sbi",),
+    "pcf": ("sbi",),
+    "amf": ("sbi", "n2"),
+    "smf": ("sbi", "n4"),
+    "upf": ("n6", "n4", "n3"),
+    "gnb": ("ran", "n2", "n3"),
+    "ue": ("ran",),
+    "internet-gw": ("n6",),
+    "router": ("n6",),
+    "dn": ("n6",),
+}
+DEFAULT_MEMBERSHIP = ("sbi",)
+
+
+def reference_points_for(comp_type):
+    """Reference-point networks a component type attaches to"""
+    return MEMBERSHIP.get(comp_type, DEFAULT_MEMBERSHIP)
@@ -0,0 +1,194 @@
+"""
+Observed resource usage per NF type, and limits learned from it
+
+While a simulation runs, a background sampler records the peak memory
+(working set) and CPU use of every container. At teardown the peaks are
+appended to a small JSON history per component type. Later deployments
+size mem_limit from the recent peaks times a headroom factor instead of
+the hardcoded guesses, and double it for types that were OOM-killed.
+"""
+
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+
+HISTORY_ENV = "NETFLUX5G_RESOURCE_HISTORY"
+HISTORY_FILE = "resource_history.json"
+
+# Runs kept per type, and runs needed before limits are learned
+MAX_RUNS = 20
+MIN_RUNS = 3
+
+HEADROOM = 1.5
+MIN_MEMORY = 32 * 1024 ** 2
+MEMORY_STEP = 16 * 1024 ** 2
+
+SAMPLE_INTERVAL = 5.0
+
+
+def _round_up(value, step=MEMORY_STEP):
+    return int(math.ceil(value / step) * step)
+
+
+def _working_set(memory_stats):
+    """Memory in use without reclaimable page cache (like `docker stats`)"""
+    usage = memory_stats.get("usage") or 0
+    stats = memory_stats.get("stats") or {}
+    cache = stats.get("inactive_file", stats.get("total_inactive_file", 0))
+    return max(0, usage - cache)
+
+
+class ResourceHistory:
+    """Peak memory/CPU per component type across runs, stored as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self.data = self._load()
+
+    @classmethod
+    def for_config_dir(cls, config_dir):
+        return cls(os.environ.get(HISTORY_ENV) or os.path.join(config_dir, HISTORY_FILE))
+
+    def _load(self):
+        try:
+            with open(self.path) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable resource history {self.path}: {e}")
+            return {}
+
+    def runs(self, comp_type):
+        return self.data.get(comp_type, [])
+
+    def record(self, peaks):
+        """
+        Append one run's peaks and save
+
+        Args:
+            peaks: {type: {"memory": bytes, "cpus": cores, "oom_killed": bool}}
+        """
+        if not peaks:
+            return
+        # Merge with what other processes saved since we loaded
+        self.data = self._load()
+        now = int(time.time())
+        for comp_type, peak in peaks.items():
+            runs = self.data.setdefault(comp_type, [])
+            runs.append(dict(peak, at=now))
+            del runs[:-MAX_RUNS]
+        self.save()
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".resource_history-")
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(self.data, file, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def memory_limit(self, comp_type, default, headroom=HEADROOM):
+        """Learned memory limit in bytes, or default until MIN_RUNS runs were seen"""
+        runs = self.runs(comp_type)
+        if len(runs) < MIN_RUNS:
+            return default
+        peak = max(run.get("memory", 0) for run in runs)
+        limit = max(MIN_MEMORY, _round_up(peak * headroom))
+        if any(run.get("oom_killed") for run in runs[-MIN_RUNS:]):
+            limit = max(limit, _round_up(max(run.get("limit", default) for run in runs) * 2))
+        return limit
+
+    def peak_cpus(self, comp_type):
+        runs = self.runs(comp_type)
+        return max((run.get("cpus", 0.0) for run in runs), default=0.0)
+
+
+class ResourceSampler:
+    """Background sampling of container memory and CPU during a run"""
+
+    def __init__(self, containers, type_of, interval=SAMPLE_INTERVAL):
+        """
+        Args:
+            containers: Containers to sample
+            type_of: Function returning a container's component type (None to skip it)
+            interval: Seconds between samples
+        """
+        self.containers = list(containers)
+        self.type_of = type_of
+        self.interval = interval
+        self.peaks = {}         # container name -> {"memory", "cpus", "limit"}
+        self._last_cpu = {}     # container name -> (total usage ns, monotonic time)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name="resource-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def sample(self):
+        for container in self.containers:
+            try:
+                try:
+                    stats = container.stats(stream=False, one_shot=True)
+                except TypeError:
+                    stats = container.stats(stream=False)
+                self._update(container.name, stats)
+            except Exception as e:
+                logging.debug(f"Could not sample {container.name}: {e}")
+
+    def _update(self, name, stats):
+        peak = self.peaks.setdefault(name, {"memory": 0, "cpus": 0.0, "limit": 0})
+        memory_stats = stats.get("memory_stats") or {}
+        peak["memory"] = max(peak["memory"], memory_stats.get("max_usage") or 0, _working_set(memory_stats))
+        peak["limit"] = memory_stats.get("limit") or peak["limit"]
+
+        total = ((stats.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage")
+        if total is None:
+            return
+        now = time.monotonic()
+        previous = self._last_cpu.get(name)
+        self._last_cpu[name] = (total, now)
+        if previous and now > previous[1]:
+            cores = (total - previous[0]) / ((now - previous[1]) * 1e9)
+            peak["cpus"] = max(peak["cpus"], round(cores, 3))
+
+    def stop(self):
+        """Stop sampling after a final sample; returns peaks per component type"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+        self.sample()
+
+        by_type = {}
+        for container in self.containers:
+            comp_type = self.type_of(container)
+            peak = self.peaks.get(container.name)
+            if not comp_type or not peak or not peak["memory"]:
+                continue
+            oom_killed = False
+            try:
+                container.reload()
+                oom_killed = bool(container.attrs.get("State", {}).get("OOMKilled"))
+            except Exception:
+                pass
+            merged = by_type.setdefault(comp_type, {"memory": 0, "cpus": 0.0, "limit": 0, "oom_killed": False})
+            merged["memory"] = max(merged["memory"], peak["memory"])
+            merged["cpus"] = max(merged["cpus"], peak["cpus"])
+            merged["limit"] = max(merged["limit"], peak["limit"])
+            merged["oom_killed"] = merged["oom_killed"] or oom_killed
+        return by_type
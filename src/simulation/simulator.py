@@ -1,27 +1,32 @@
-from PyQt5.QtCore import QPointF
-from models.component_factory import ComponentFactory
 from utils import calculate_latency, calculate_throughput, calculate_resource_utilization
 from .enhanced_container_manager import EnhancedContainerManager
-from gui.terminal_dialog import TerminalDialog
+from .link_emulation import LINK_PROPERTIES
 import logging
 import traceback
 
 class NetworkSimulator:
-    def __init__(self, canvas):
+    def __init__(self, canvas, headless=False, session=None, namespace=None, warm_pool=None):
         try:
             self.canvas = canvas
-            self.component_factory = ComponentFactory()
-            self.container_manager = EnhancedContainerManager()
+            self.headless = headless
+            # Successive simulators share the process-wide engine session;
+            # each gets its own run namespace unless one is given
+            self.container_manager = EnhancedContainerManager(session=session, namespace=namespace,
+                                                              warm_pool=warm_pool)
             self.terminal_dialog = None
+            self.watched_links = []
             logging.info("NetworkSimulator initialized")
         except Exception as e:
             logging.error(f"Error initializing NetworkSimulator: {e}")
             raise
 
-    def run(self):
+    def run(self, run_tests=True):
         """
         Run the network simulation and return the results
         
+        Args:
+            run_tests: Run connectivity tests after deployment
+
         Returns:
             tuple: (success_status, simulation_data)
         """
@@ -44,29 +49,44 @@ class NetworkSimulator:
             
             print("Starting 5G network simulation...")
             
+            # Topology-wide settings (e.g. the CPU placement profile)
+            self.container_manager.topology_settings = dict(getattr(self.canvas, 'settings', None) or {})
+            
             # Deploy containers for 5G components
             success, message = self.container_manager.deploy_5g_core(components)
             
+            capacity_plan = self.container_manager.capacity_plan
             if not success:
                 logging.error(f"Container deployment failed: {message}")
-                return False, {"error": message}
+                failure = {"error": message}
+                if capacity_plan:
+                    failure["capacity_plan"] = capacity_plan.to_dict()
+                return False, failure
             
             print(f"Container deployment: {message}")
             
+            # Canvas link bandwidth/delay/loss as tc rules; edits are re-applied live
+            links = list(getattr(self.canvas, 'links', []))
+            link_report = self.container_manager.apply_link_emulation(links)
+            self._watch_links(links)
+            
             # Wait a moment for containers to start
             import time
             time.sleep(5)
             
             # Test connectivity
-            print("Testing network connectivity...")
-            connectivity_results = self.container_manager.test_connectivity()
+            connectivity_results = []
+            if run_tests:
+                print("Testing network connectivity...")
+                connectivity_results = self.container_manager.test_connectivity()
             
             # Get container status
             container_status = self.container_manager.get_container_status()
             
             # Automatically show terminal dialog for monitoring
-            print("Opening container management terminal...")
-            self.show_terminal_dialog()
+            if not self.headless:
+                print("Opening container management terminal...")
+                self.show_terminal_dialog()
             
             # Simulate network traffic and performance (existing logic)
             simulation_data = self._simulate_network(components, connections)
@@ -78,6 +98,25 @@ class NetworkSimulator:
                 "containers": container_status
             }
             
+            if capacity_plan:
+                simulation_data["capacity_plan"] = capacity_plan.to_dict()
+            if self.container_manager.placement:
+                simulation_data["placement"] = self.container_manager.placement.to_dict()
+            if link_report:
+                simulation_data["link_emulation"] = link_report
+            if self.container_manager.address_plan:
+                simulation_data["addresses"] = self.container_manager.address_plan.to_dict()
+            if self.container_manager.ran_plan and self.container_manager.ran_plan.cells:
+                simulation_data["cells"] = self.container_manager.ran_plan.to_dict()
+            if self.container_manager.slice_plan and self.container_manager.slice_plan.sliced:
+                simulation_data["slices"] = self.container_manager.slice_plan.to_dict()
+            protocol_stats = self.container_manager.protocol_stats_report()
+            if protocol_stats:
+                simulation_data["protocol_stats"] = protocol_stats
+            if self.container_manager.namespace.subnets:
+                simulation_data["networks"] = {reference_point: str(subnet) for reference_point, subnet
+                                               in self.container_manager.namespace.subnets.items()}
+            
             simulation_data["connectivity_tests"] = connectivity_results
             
             # Calculate connectivity statistics
@@ -224,6 +263,7 @@ class NetworkSimulator:
         try:
             logging.info("Stopping simulation...")
             
+            self._watch_links([])
             if self.container_manager:
                 self.container_manager.cleanup_containers()
                 
@@ -239,6 +279,22 @@ class NetworkSimulator:
             logging.error(f"Error stopping simulation: {e}")
             return False
     
+    def _watch_links(self, links):
+        """Follow property changes of the given canvas links (replacing earlier ones)"""
+        for link in self.watched_links:
+            link.remove_listener(self._on_link_changed)
+        self.watched_links = [link for link in links if hasattr(link, 'add_listener')]
+        for link in self.watched_links:
+            link.add_listener(self._on_link_changed)
+    
+    def _on_link_changed(self, link, changed):
+        """Re-apply tc rules when a link's bandwidth/delay/jitter/loss was edited"""
+        if any(key in changed for key in LINK_PROPERTIES):
+            try:
+                self.container_manager.update_link_emulation(link)
+            except Exception as e:
+                logging.error(f"Could not update link emulation: {e}")
+    
     def open_container_terminal(self, container_name):
         """Open terminal to specific container - similar to MiniEdit functionality"""
         try:
@@ -249,12 +305,14 @@ class NetworkSimulator:
                 return False
                 
             # Open terminal dialog if not already open
-            if not self.terminal_dialog:
-                self.terminal_dialog = TerminalDialog(self.container_manager)
-                
-            self.terminal_dialog.show()
-            self.terminal_dialog.raise_()
-            self.terminal_dialog.activateWindow()
+            if not self.headless:
+                if not self.terminal_dialog:
+                    from gui.terminal_dialog import TerminalDialog
+                    self.terminal_dialog = TerminalDialog(self.container_manager)
+
+                self.terminal_dialog.show()
+                self.terminal_dialog.raise_()
+                self.terminal_dialog.activateWindow()
             
             # Request terminal access to specific container
             return self.container_manager.open_terminal(container_name)
@@ -265,8 +323,12 @@ class NetworkSimulator:
     
     def show_terminal_dialog(self):
         """Show the terminal dialog for container management"""
+        if self.headless:
+            return
+
         try:
             if not self.terminal_dialog:
+                from gui.terminal_dialog import TerminalDialog
                 self.terminal_dialog = TerminalDialog(self.container_manager)
             
             self.terminal_dialog.show()
@@ -295,6 +357,8 @@ class NetworkSimulator:
         Create a 5G core network topology for testing all core functions
         This includes all NFs (AMF, SMF, UPF, PCF, UDM, AUSF, NRF)
         """
+        from PyQt5.QtCore import QPointF
+
         # Clear existing network
         self.canvas.clear()
         
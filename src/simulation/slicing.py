@@ -0,0 +1,302 @@
+"""
+Network slices of a topology
+
+A slice is the S-NSSAI (SST and optional SD) and DNN set in the "sst", "sd"
+and "dnn" properties of the SMF, UPF and UE components on the canvas. Every
+slice gets its own UE address pool and its own SMF and UPF: the SMF
+announces its slice to the NRF and associates only with the UPFs of that
+slice, so the AMF selects the slice's SMF for each PDU session and slices
+never share a user plane. The AMF and the gNBs support all slices.
+
+With several slices each UE container becomes its own subscriber (consecutive
+IMSIs, one per UE of multi-UE containers) subscribed to its slice only; a
+single-slice topology keeps the shared default subscriber.
+"""
+
+import ipaddress
+import json
+import logging
+import re
+
+from simulation.ipam import UE_POOL
+
+# Component types carrying slice properties
+SLICED_TYPES = ("smf", "upf", "ue")
+
+# Types every slice needs its own instance of
+DEDICATED_TYPES = ("smf", "upf")
+
+DEFAULT_SST = 1
+DEFAULT_SD = "010203"
+DEFAULT_DNN = "internet"
+
+# First subscriber (the IMSI of the UE config template)
+FIRST_IMSI = 999700000000001
+
+# Subscribed AMBR of every subscriber and session (bit/s)
+SUBSCRIBED_AMBR = 1000000000
+
+# Line printed by the subscriber script with the number of provisioned subscribers
+PROVISIONED_PATTERN = re.compile(r"Subscribers in database: (\d+)")
+
+
+def slice_key(properties):
+    """(sst, sd, dnn) of a component's properties; sd is 6 lower-case hex digits or None"""
+    properties = properties or {}
+    try:
+        sst = int(properties.get("sst", DEFAULT_SST) or DEFAULT_SST)
+    except (TypeError, ValueError):
+        sst = DEFAULT_SST
+    sd = properties.get("sd", DEFAULT_SD)
+    sd = str(sd).strip().lower() if sd not in (None, "") else None
+    if sd:
+        try:
+            sd = f"{int(sd[2:] if sd.startswith('0x') else sd, 16) & 0xffffff:06x}"
+        except ValueError:
+            logging.warning(f"Invalid slice differentiator {sd!r}, using none")
+            sd = None
+    dnn = str(properties.get("dnn") or DEFAULT_DNN)
+    return sst, sd, dnn
+
+
+def slice_name(key):
+    """Name of a slice, used for cloned SMF/UPF names and in reports"""
+    sst, sd, dnn = key
+    return f"{dnn}-{sst}" + (f"-{sd}" if sd else "")
+
+
+class SlicePlan:
+    """Slices, their UE pools and members, and the subscribers of a deployment"""
+
+    def __init__(self):
+        self.slices = {}        # slice name -> {"sst", "sd", "dnn", "subnet", "gateway"}
+        self.members = {}       # component name -> slice name
+        self.imsis = {}         # UE name -> (first IMSI, UE count)
+
+    @property
+    def sliced(self):
+        """True if the topology has more than one slice"""
+        return len(self.slices) > 1
+
+    def slice_of(self, name):
+        """Slice of a component (the first slice for unknown names)"""
+        slice_name = self.members.get(name) or next(iter(self.slices), None)
+        return self.slices.get(slice_name)
+
+    def slice_name_of(self, name):
+        return self.members.get(name) or next(iter(self.slices), None)
+
+    def in_slice(self, names, slice_name):
+        """The names that belong to a slice"""
+        return [name for name in names if self.slice_name_of(name) == slice_name]
+
+    def nssai(self):
+        """Distinct S-NSSAIs of all slices: [{"sst", "sd"}] (no "sd" when unset)"""
+        result = []
+        for slice_ in self.slices.values():
+            snssai = {"sst": slice_["sst"], **({"sd": slice_["sd"]} if slice_["sd"] else {})}
+            if snssai not in result:
+                result.append(snssai)
+        return result
+
+    def pools(self):
+        """UE address pools of all slices"""
+        return [slice_["subnet"] for slice_ in self.slices.values()]
+
+    def subscribers(self):
+        """[(IMSI, [slice])]: one per UE with several slices, else the shared default subscriber"""
+        if not self.sliced:
+            return [(str(FIRST_IMSI), list(self.slices.values()))]
+        subscribers = []
+        for ue_name, (first, count) in self.imsis.items():
+            for imsi in range(first, first + count):
+                subscribers.append((str(imsi), [self.slice_of(ue_name)]))
+        return subscribers
+
+    def render_config(self, config, name, comp_type, address_plan):
+        """
+        Put an NF config on its slice: supported S-NSSAIs (AMF), DNN and UE pool (SMF/UPF), slice peers
+
+        Args:
+            config: Loaded Open5GS config of the NF, changed in place
+            name: Logical name of the NF
+            comp_type: Its component type
+            address_plan: AddressPlan of the run (addresses of the slice's peers)
+        """
+        section = config.get(comp_type)
+        if not isinstance(section, dict):
+            return
+        slice_ = self.slice_of(name)
+        pool = f"{slice_['gateway']}/{slice_['subnet'].split('/')[1]}"
+
+        def peers(peer_type):
+            members = self.in_slice(address_plan.of_type(peer_type), self.slice_name_of(name))
+            addresses = [address_plan.reachable_address(peer, name) for peer in members]
+            return [{'addr': address, 'port': 8805} for address in addresses if address]
+
+        if comp_type == 'amf':
+            # Open5GS reads the SD as a hex string
+            for plmn in section.get('plmn_support') or []:
+                plmn['s_nssai'] = [dict(snssai) for snssai in self.nssai()]
+        elif comp_type == 'smf':
+            snssai = {'sst': slice_['sst'], **({'sd': slice_['sd']} if slice_['sd'] else {})}
+            section['info'] = [{'s_nssai': [dict(snssai, dnn=[slice_['dnn']])]}]
+            section['subnet'] = [{'addr': pool, 'dnn': slice_['dnn']}]
+            section['session'] = [{'subnet': slice_['subnet'], 'gateway': slice_['gateway'], 'dnn': slice_['dnn']}]
+            if self.sliced:
+                # PFCP only with the UPFs of its own slice
+                section['upf'] = peers('upf') or section.get('upf')
+        elif comp_type == 'upf':
+            section['subnet'] = [{'addr': pool, 'dnn': slice_['dnn'], 'dev': 'ogstun'}]
+            if self.sliced:
+                config.setdefault('smf', {})['pfcp'] = peers('smf') or config['smf'].get('pfcp')
+
+    def render_ue_config(self, config, name):
+        """Put a UE config on its slice: PDU session and NSSAI, and its own IMSI with several slices"""
+        slice_ = self.slice_of(name)
+        snssai = {'sst': slice_['sst'], **({'sd': int(slice_['sd'], 16)} if slice_['sd'] else {})}
+        session = (config.get('sessions') or [{'type': 'IPv4'}])[0]
+        config['sessions'] = [dict(session, apn=slice_['dnn'], slice=dict(snssai))]
+        config['configured-nssai'] = [dict(snssai)]
+        config['default-nssai'] = [dict(snssai)]
+        if self.sliced and name in self.imsis:
+            config['supi'] = f"imsi-{self.imsis[name][0]}"
+
+    def to_dict(self):
+        return {name: dict(slice_, members=sorted(member for member, member_slice in self.members.items()
+                                                  if member_slice == name))
+                for name, slice_ in self.slices.items()}
+
+
+def _ue_pool(index):
+    """UE pool of the index-th slice: the default pool, then the following /16s"""
+    pool = ipaddress.ip_network(UE_POOL)
+    return ipaddress.ip_network((int(pool.network_address) + index * pool.num_addresses, pool.prefixlen))
+
+
+def plan_slices(components, name_of, ue_count=None):
+    """
+    Slices, UE pools and subscribers of a deployment
+
+    Args:
+        components: Components in deployment order (slices are numbered by first use)
+        name_of: Function returning a component's logical name
+        ue_count: Function returning the UEs of a UE component's container (default 1)
+
+    Returns:
+        SlicePlan: The plan (one default slice if no component sets slice properties)
+    """
+    plan = SlicePlan()
+    for component in components:
+        if component.component_type not in SLICED_TYPES:
+            continue
+        key = slice_key(getattr(component, 'properties', {}))
+        name = slice_name(key)
+        if name not in plan.slices:
+            subnet = _ue_pool(len(plan.slices))
+            plan.slices[name] = {"sst": key[0], "sd": key[1], "dnn": key[2],
+                                 "subnet": str(subnet), "gateway": str(subnet.network_address + 1)}
+        plan.members[name_of(component)] = name
+
+    if not plan.slices:
+        key = (DEFAULT_SST, DEFAULT_SD, DEFAULT_DNN)
+        plan.slices[slice_name(key)] = {"sst": key[0], "sd": key[1], "dnn": key[2],
+                                        "subnet": UE_POOL, "gateway": str(_ue_pool(0).network_address + 1)}
+
+    imsi = FIRST_IMSI
+    for component in components:
+        if component.component_type == 'ue':
+            count = ue_count(component) if ue_count else 1
+            plan.imsis[name_of(component)] = (imsi, count)
+            imsi += count
+    return plan
+
+
+def missing_dedicated(components):
+    """
+    [(component type, slice key)] of the SMFs/UPFs a topology lacks for its slices
+
+    A slice used by any SMF, UPF or UE needs at least one SMF and one UPF of its own.
+    """
+    keys = []
+    present = set()
+    for component in components:
+        if component.component_type in SLICED_TYPES:
+            key = slice_key(getattr(component, 'properties', {}))
+            if key not in keys:
+                keys.append(key)
+            if component.component_type in DEDICATED_TYPES:
+                present.add((component.component_type, key))
+    if len(keys) < 2:
+        return []
+    return [(comp_type, key) for key in keys for comp_type in DEDICATED_TYPES if (comp_type, key) not in present]
+
+
+def dedicated_instances(components):
+    """
+    The SMFs and UPFs to add so that every slice has its own (see missing_dedicated)
+
+    The added instances copy the first SMF/UPF of the topology (properties
+    and links) with the slice's properties and are named <type>-<slice>.
+    """
+    from models.topology import TopologyComponent
+
+    added = []
+    for comp_type, key in missing_dedicated(components):
+        template = next((component for component in components if component.component_type == comp_type), None)
+        properties = dict(getattr(template, 'properties', None) or {})
+        properties.update(name=f"{comp_type}-{slice_name(key)}", sst=key[0], sd=key[1] or "", dnn=key[2],
+                          replicas=1)
+        component = TopologyComponent(comp_type, component_id=f"{comp_type}-{slice_name(key)}",
+                                      properties=properties)
+        component.links = list(getattr(template, 'links', None) or ())
+        added.append(component)
+    return added
+
+
+def _int32(value):
+    return f"NumberInt({int(value)})"
+
+
+def _mongo_ambr():
+    value = {"value": f"NumberLong({SUBSCRIBED_AMBR})", "unit": _int32(0)}
+    return {"downlink": dict(value), "uplink": dict(value)}
+
+
+def render_subscriber_script(plan, key="465B5CE8B199B49FAA5F0A2EE238A6BC", opc="E8ED289DEBA952E4283B54E88E6183CA"):
+    """Mongo shell script (re)provisioning the subscribers of a slice plan"""
+    documents = []
+    for imsi, slices in plan.subscribers():
+        documents.append({
+            "imsi": imsi,
+            "security": {"k": key, "amf": "8000", "opc": opc},
+            "ambr": _mongo_ambr(),
+            "slice": [{
+                "sst": _int32(slice_["sst"]),
+                **({"sd": slice_["sd"]} if slice_["sd"] else {}),
+                "default_indicator": index == 0,
+                "session": [{
+                    "name": slice_["dnn"],
+                    "type": _int32(3),
+                    "ambr": _mongo_ambr(),
+                    "qos": {"index": _int32(9), "arp": {"priority_level": _int32(8),
+                                                        "pre_emption_capability": _int32(1),
+                                                        "pre_emption_vulnerability": _int32(1)}}
+                }]
+            } for index, slice_ in enumerate(slices)]
+        })
+    imsis = json.dumps([document["imsi"] for document in documents])
+    # BSON integer types, as the Open5GS WebUI writes them
+    documents = re.sub(r'"(Number(?:Int|Long)\(\d+\))"', r"\1", json.dumps(documents, indent=4))
+    return (
+        "\nuse open5gs\n"
+        f'db.subscribers.deleteMany({{"imsi": {{"$in": {imsis}}}}})\n'
+        f"db.subscribers.insertMany({documents})\n"
+        f'print("Subscribers in database: " + db.subscribers.countDocuments({{"imsi": {{"$in": {imsis}}}}}))\n'
+    )
+
+
+def provisioned_count(output):
+    """Subscribers the subscriber script reported as provisioned (None if it printed no count)"""
+    match = PROVISIONED_PATTERN.search(output or "")
+    return int(match.group(1)) if match else None
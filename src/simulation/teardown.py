@@ -0,0 +1,175 @@
+"""
+Concurrent label-based teardown of a simulation run
+
+Everything labelled with the run is torn down in parallel: SIGTERM is sent to
+all running containers at once, a single shared deadline bounds the graceful
+stop of the whole run (instead of a stop timeout per container), stragglers
+are force-removed, and finally the run's networks are removed.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from simulation.namespace import LABEL_POOL, NAME_PREFIX, run_label_filter
+
+# Seconds the whole run gets to exit after SIGTERM before containers are killed
+DEFAULT_GRACE_PERIOD = 10.0
+
+# Parallel requests to the daemon (matches the engine session's connection pool)
+DEFAULT_MAX_WORKERS = 16
+
+
+def _signal(container):
+    """Send SIGTERM; returns True if the container was running"""
+    if container.status not in ('running', 'restarting'):
+        return False
+    try:
+        container.kill(signal='SIGTERM')
+        return True
+    except Exception as e:
+        # Already exited between listing and signalling
+        logging.debug(f"Could not signal {container.name}: {e}")
+        return False
+
+
+def _wait(container, deadline):
+    """Wait for the container to exit until the shared deadline; True if it did"""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return False
+    try:
+        container.wait(timeout=remaining, condition='not-running')
+        return True
+    except Exception:
+        return False
+
+
+def _remove(container):
+    """Force-remove the container (kills it if still running); returns the error or None"""
+    try:
+        container.remove(force=True, v=True)
+        return None
+    except Exception as e:
+        if getattr(e, 'status_code', None) == 404:
+            return None
+        return e
+
+
+def _network_names(container):
+    attrs = getattr(container, 'attrs', None) or {}
+    return set((attrs.get('NetworkSettings') or {}).get('Networks') or {})
+
+
+def _claimed_pool_containers(client, run_id, filters, known):
+    """
+    Warm pool containers claimed by a run
+
+    They keep their pool label (labels cannot change) but are renamed into the
+    run and attached to its networks. Docker's name filter is a substring match
+    and "nf5g-a-b-ue" may belong to run "a" or "a-b", so a candidate only
+    belongs to the run if it is attached to one of the run's labelled networks.
+    """
+    prefix = f"{NAME_PREFIX}-{run_id}-"
+    candidates = [container for container in
+                  client.containers.list(all=True, filters={"label": LABEL_POOL, "name": prefix})
+                  if container.id not in known and container.name.startswith(prefix)]
+    if not candidates:
+        return []
+    run_networks = {network.name for network in client.networks.list(filters=filters)}
+    return [container for container in candidates if _network_names(container) & run_networks]
+
+
+def teardown_run(client, run_id=None, grace_period=DEFAULT_GRACE_PERIOD,
+                 max_workers=DEFAULT_MAX_WORKERS, remove_networks=True, session=None):
+    """
+    Tear down every container and network labelled with a run
+
+    Args:
+        client: docker client
+        run_id: Run to tear down (None tears down every NetFlux5G run and warm pool)
+        grace_period: Seconds shared by all containers to exit after SIGTERM
+            (0 kills immediately)
+        max_workers: Parallel requests to the daemon
+        remove_networks: Also remove the run's networks
+        session: Optional EngineSession whose caches are updated
+
+    Returns:
+        dict: Teardown report with removed resources and timings
+    """
+    started = time.perf_counter()
+    filters = run_label_filter(run_id)
+    report = {
+        "run_id": run_id,
+        "containers": [],
+        "graceful": [],
+        "forced": [],
+        "failed": {},
+        "networks": [],
+        "timings": {},
+    }
+
+    containers = client.containers.list(all=True, filters=filters)
+    known = {container.id for container in containers}
+    if run_id:
+        containers += _claimed_pool_containers(client, run_id, filters, known)
+    else:
+        # Tearing down every run also drains idle pools
+        containers += [container for container in client.containers.list(all=True, filters={"label": LABEL_POOL})
+                       if container.id not in known]
+    report["containers"] = [container.name for container in containers]
+    report["timings"]["list_s"] = round(time.perf_counter() - started, 3)
+
+    if containers:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(containers)))) as pool:
+            # SIGTERM everything at once
+            phase_start = time.perf_counter()
+            signalled = [container for container, running in zip(containers, pool.map(_signal, containers))
+                         if running]
+            report["timings"]["signal_s"] = round(time.perf_counter() - phase_start, 3)
+
+            # One deadline for the whole run, not one timeout per container
+            phase_start = time.perf_counter()
+            if signalled and grace_period > 0:
+                deadline = time.monotonic() + grace_period
+                exited = list(pool.map(lambda container: _wait(container, deadline), signalled))
+            else:
+                exited = [False] * len(signalled)
+            for container, stopped in zip(signalled, exited):
+                (report["graceful"] if stopped else report["forced"]).append(container.name)
+            report["timings"]["grace_s"] = round(time.perf_counter() - phase_start, 3)
+
+            # Remove all containers; stragglers are killed by the forced removal
+            phase_start = time.perf_counter()
+            for container, error in zip(containers, pool.map(_remove, containers)):
+                if error is not None:
+                    logging.warning(f"Could not remove container {container.name}: {error}")
+                    report["failed"][container.name] = str(error)
+            report["timings"]["remove_s"] = round(time.perf_counter() - phase_start, 3)
+
+    if remove_networks:
+        phase_start = time.perf_counter()
+        networks = client.networks.list(filters=filters)
+        if not run_id:
+            networks += client.networks.list(filters={"label": LABEL_POOL})
+        for network in networks:
+            try:
+                network.remove()
+                report["networks"].append(network.name)
+                if session is not None:
+                    session.forget_network(network.name)
+            except Exception as e:
+                logging.warning(f"Could not remove network {network.name}: {e}")
+                report["failed"][network.name] = str(e)
+        report["timings"]["networks_s"] = round(time.perf_counter() - phase_start, 3)
+
+    report["timings"]["total_s"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def format_report(report):
+    """One-line summary of a teardown report"""
+    removed = sum(1 for name in report['containers'] if name not in report['failed'])
+    return (f"{removed} containers "
+            f"({len(report['graceful'])} stopped gracefully, {len(report['forced'])} killed) "
+            f"and {len(report['networks'])} networks removed in {report['timings']['total_s']}s")
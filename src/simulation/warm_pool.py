@@ -0,0 +1,272 @@
+"""
+Warm container pool for instant redeploys
+
+Idle NF containers (nrf, amf, smf, upf, gnb, ue) are created ahead of time on
+a small pool network, running only a placeholder entrypoint. On deploy a pool
+container is renamed into the run, moved to the run network with its logical
+name as alias, receives its configuration through put_archive and the NF is
+exec'd into it. Claimed containers belong to the run and are torn down with
+it; the pool refills itself in the background.
+"""
+
+import io
+import logging
+import os
+import shlex
+import tarfile
+import threading
+import uuid
+
+from simulation.ipam import SubnetAllocator
+from simulation.namespace import LABEL_POOL, LABEL_TYPE, NAME_PREFIX
+
+DEFAULT_POOL_TYPES = ("nrf", "amf", "smf", "upf", "gnb", "ue")
+DEFAULT_POOL_SIZE = 1
+
+# Idle entrypoint; exits on SIGTERM (a bare sleep as PID 1 would ignore it)
+PLACEHOLDER_COMMAND = ["sh", "-c", "trap 'exit 0' TERM INT; while true; do sleep 3600 & wait $!; done"]
+
+# Create arguments taken over from the component configuration
+SPEC_KEYS = ("image", "cap_add", "privileged", "mem_limit", "memswap_limit", "cpu_shares", "cpuset_cpus")
+
+
+def _detached_script(command):
+    """Shell command running an NF in the background with output on the container log"""
+    if isinstance(command, (list, tuple)):
+        if len(command) == 3 and tuple(command[:2]) == ("sh", "-c"):
+            script = command[2]
+        else:
+            script = shlex.join(command)
+    else:
+        script = command
+    return ["sh", "-c", f"exec >/proc/1/fd/1 2>&1; {script}"]
+
+
+def _directory_archive(source_dir):
+    """tar archive (bytes) with the contents of a host directory"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w') as archive:
+        for entry in sorted(os.listdir(source_dir)):
+            archive.add(os.path.join(source_dir, entry), arcname=entry)
+    return buffer.getvalue()
+
+
+class WarmPool:
+    """Pre-created idle NF containers handed out to deployments"""
+
+    def __init__(self, session, types=DEFAULT_POOL_TYPES, size=DEFAULT_POOL_SIZE):
+        self.session = session
+        self.types = tuple(types)
+        self.size = size
+        self.pool_id = uuid.uuid4().hex[:6]
+        self.network_name = f"{NAME_PREFIX}-pool-{self.pool_id}-net"
+        self.network = None
+        self.stats = {"hits": 0, "misses": 0, "created": 0}
+
+        self._specs = {}                    # type -> create arguments
+        self._idle = {comp_type: [] for comp_type in self.types}
+        self._lock = threading.Lock()
+        self._refill_thread = None
+        self._refill_again = False
+        self._closed = False
+
+    def configure(self, specs):
+        """Set the create arguments (image, capabilities, limits) per component type"""
+        with self._lock:
+            for comp_type, config in specs.items():
+                if comp_type in self._idle:
+                    self._specs[comp_type] = {key: config[key] for key in SPEC_KEYS if key in config}
+
+    def idle_count(self, comp_type=None):
+        with self._lock:
+            if comp_type:
+                return len(self._idle.get(comp_type, []))
+            return sum(len(containers) for containers in self._idle.values())
+
+    # Refill
+
+    def refill_async(self):
+        """Top the pool up in a background thread"""
+        with self._lock:
+            if self._closed:
+                return
+            if self._refill_thread and self._refill_thread.is_alive():
+                self._refill_again = True
+                return
+            self._refill_thread = threading.Thread(target=self._refill_loop, name="warm-pool-refill", daemon=True)
+            self._refill_thread.start()
+
+    def _refill_loop(self):
+        while True:
+            try:
+                self.refill()
+            except Exception as e:
+                logging.warning(f"Warm pool refill failed: {e}")
+            with self._lock:
+                if not self._refill_again or self._closed:
+                    self._refill_thread = None
+                    return
+                self._refill_again = False
+
+    def refill(self):
+        """Create idle containers until every configured type has `size` of them"""
+        client = self.session.client
+        if client is None:
+            return
+
+        for comp_type in self.types:
+            while True:
+                with self._lock:
+                    if self._closed or comp_type not in self._specs or len(self._idle[comp_type]) >= self.size:
+                        break
+                    spec = dict(self._specs[comp_type])
+                container = self._create(client, comp_type, spec)
+                with self._lock:
+                    if self._closed:
+                        container.remove(force=True)
+                        return
+                    self._idle[comp_type].append(container)
+
+    def _ensure_network(self, client):
+        if self.network is None:
+            self.network = self.session.get_network(self.network_name)
+        if self.network is None:
+            self.network, _ = SubnetAllocator(client).create_network(
+                self.network_name, labels={LABEL_POOL: self.pool_id})
+            self.session.track_network(self.network)
+        return self.network
+
+    def _create(self, client, comp_type, spec):
+        import docker
+
+        network = self._ensure_network(client)
+        image = spec.pop("image")
+        create_args = dict(
+            command=PLACEHOLDER_COMMAND,
+            entrypoint="",
+            name=f"{NAME_PREFIX}-pool-{self.pool_id}-{comp_type}-{uuid.uuid4().hex[:4]}",
+            network=network.name,
+            labels={LABEL_POOL: self.pool_id, LABEL_TYPE: comp_type},
+            restart_policy={"Name": "no"},
+            **spec
+        )
+        try:
+            container = client.containers.create(image, **create_args)
+        except docker.errors.ImageNotFound:
+            client.images.pull(image)
+            self.session.mark_image_present(image)
+            container = client.containers.create(image, **create_args)
+
+        try:
+            container.start()
+        except Exception:
+            container.remove(force=True)
+            raise
+        self.stats["created"] += 1
+        logging.info(f"Warm pool: created idle {comp_type} container {container.name}")
+        return container
+
+    # Claim
+
+    def claim(self, comp_type, namespace, logical_name, command, environment=None, files=None,
+              ipv4_address=None, reference_points=None, extra_hosts=None):
+        """
+        Hand an idle container over to a run and start the NF in it
+
+        Args:
+            comp_type: Component type to claim
+            namespace: RunNamespace of the deploying run (its network must exist)
+            logical_name: Component name, used for the container name and alias
+            command: NF command, exec'd in the background
+            environment: Environment of the NF process
+            files: {container directory: host directory} copied in before the NF starts
+            ipv4_address: Optional fixed address in the run network (or {reference point: address})
+            reference_points: Reference-point networks to attach to (multi-network mode)
+            extra_hosts: {hostname: address} appended to /etc/hosts before the NF starts
+
+        Returns:
+            Container: The claimed container, or None if none was available
+        """
+        with self._lock:
+            idle = self._idle.get(comp_type)
+            primary = namespace.get_network(reference_points[0] if reference_points else None)
+            if self._closed or not idle or primary is None:
+                self.stats["misses"] += 1
+                return None
+            container = idle.pop()
+
+        try:
+            container.rename(namespace.container_name(logical_name))
+            self.network.disconnect(container)
+            namespace.connect(container, logical_name, reference_points, ipv4_address)
+
+            if extra_hosts:
+                entries = "".join(f"{address} {hostname}\n" for hostname, address in extra_hosts.items())
+                container.exec_run(["sh", "-c", f"printf %s {shlex.quote(entries)} >> /etc/hosts"])
+
+            for target_dir, source_dir in (files or {}).items():
+                container.exec_run(["mkdir", "-p", target_dir])
+                container.put_archive(target_dir, _directory_archive(source_dir))
+
+            container.exec_run(_detached_script(command), detach=True, environment=environment or {})
+            container.reload()
+        except Exception as e:
+            logging.warning(f"Warm pool: could not hand over {container.name}, creating a fresh one: {e}")
+            try:
+                container.remove(force=True)
+            except Exception:
+                pass
+            self.stats["misses"] += 1
+            self.refill_async()
+            return None
+
+        namespace.register(logical_name, container, comp_type)
+        self.stats["hits"] += 1
+        self.refill_async()
+        return container
+
+    # Shutdown
+
+    def drain(self):
+        """Remove all idle containers and the pool network"""
+        with self._lock:
+            self._closed = True
+            idle = [container for containers in self._idle.values() for container in containers]
+            self._idle = {comp_type: [] for comp_type in self.types}
+
+        for container in idle:
+            try:
+                container.remove(force=True)
+            except Exception as e:
+                logging.warning(f"Could not remove pool container {container.name}: {e}")
+
+        if self.network is not None:
+            try:
+                self.network.remove()
+            except Exception as e:
+                logging.warning(f"Could not remove pool network {self.network_name}: {e}")
+            self.session.forget_network(self.network_name)
+            self.network = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_warm_pool():
+    """Return the process-wide warm pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from simulation.engine_session import get_session
+            _pool = WarmPool(get_session())
+        return _pool
+
+
+def close_warm_pool():
+    """Drain and drop the process-wide warm pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.drain()
+            _pool = None
@@ -5,22 +5,23 @@ Loads and customizes YAML configuration files for 5G components
 """
 
 import os
-import yaml
 import shutil
 from typing import Dict, Any, Optional
 
+# Repository config directory, independent of the current working directory
+DEFAULT_CONFIG_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "config"))
+
 class ConfigManager:
     """Manages configuration files for NetFlux5G 5G components"""
     
-    def __init__(self, config_base_dir: str = "./config"):
+    def __init__(self, config_base_dir: Optional[str] = None):
+        config_base_dir = os.path.abspath(config_base_dir or DEFAULT_CONFIG_DIR)
         self.config_base_dir = config_base_dir
         self.open5gs_templates_dir = os.path.join(config_base_dir, "open5gs")
         self.ueransim_templates_dir = os.path.join(config_base_dir, "ueransim")
+        # Created on first use by create_instance_config
         self.instance_configs_dir = os.path.join(config_base_dir, "instances")
         
-        # Ensure instance configurations directory exists
-        os.makedirs(self.instance_configs_dir, exist_ok=True)
-        
         # Supported component types
         self.open5gs_components = ['nrf', 'amf', 'smf', 'upf', 'ausf', 'udm', 'pcf']
         self.ueransim_components = ['gnb', 'ue']
@@ -38,6 +39,7 @@ class ConfigManager:
             if not os.path.exists(config_file):
                 raise FileNotFoundError(f"Template config file not found: {config_file}")
                 
+            import yaml
             with open(config_file, 'r') as f:
                 config = yaml.safe_load(f)
                 
@@ -136,9 +138,11 @@ class ConfigManager:
         
         # Update gNB ID and TAC
         if 'gnb_id' in properties:
-            config['nci'] = hex(properties['gnb_id'])
+            # NCI = gNB ID (idLength bits) followed by the cell ID (cell 0)
+            id_length = int(config.get('idLength', 32))
+            config['nci'] = int(properties['gnb_id']) << (36 - id_length)
         if 'tac' in properties:
-            config['tac'] = properties['tac']
+            config['tac'] = int(properties['tac'])
             
         # Update power settings
         if 'power' in properties:
@@ -173,25 +177,31 @@ class ConfigManager:
                              properties: Optional[Dict[str, Any]] = None) -> str:
         """Create and save a configuration file for a specific component instance"""
         try:
-            # Create instance-specific directory
-            instance_dir = os.path.join(self.instance_configs_dir, instance_name)
-            os.makedirs(instance_dir, exist_ok=True)
-            
             # Customize configuration
             config = self.customize_config(component_type, instance_name, properties)
             
             # Save to instance-specific file
-            config_file = os.path.join(instance_dir, f"{component_type}.yaml")
-            with open(config_file, 'w') as f:
-                yaml.dump(config, f, default_flow_style=False, sort_keys=False)
-                
-            print(f"Created instance config: {config_file}")
-            return config_file
+            return self.save_instance_config(component_type, instance_name, config)
             
         except Exception as e:
             print(f"Error creating instance config for {instance_name}: {e}")
             return ""
     
+    def save_instance_config(self, component_type: str, instance_name: str, config: Dict[str, Any]) -> str:
+        """Write a configuration dictionary to an instance's configuration directory"""
+        import yaml
+        
+        # Create instance-specific directory
+        instance_dir = os.path.join(self.instance_configs_dir, instance_name)
+        os.makedirs(instance_dir, exist_ok=True)
+        
+        config_file = os.path.join(instance_dir, f"{component_type}.yaml")
+        with open(config_file, 'w') as f:
+            yaml.dump(config, f, default_flow_style=False, sort_keys=False)
+            
+        print(f"Created instance config: {config_file}")
+        return config_file
+    
     def get_instance_config_dir(self, instance_name: str) -> str:
         """Get the absolute path to an instance's configuration directory"""
         instance_dir = os.path.join(self.instance_configs_dir, instance_name)
@@ -231,6 +241,7 @@ class ConfigManager:
     def validate_config(self, config_file: str) -> bool:
         """Validate a YAML configuration file"""
         try:
+            import yaml
             with open(config_file, 'r') as f:
                 yaml.safe_load(f)
             print(f"Configuration file is valid: {config_file}")
@@ -0,0 +1,175 @@
+"""
+NetFlux5G project file reading and writing
+Shared by the canvas and the headless topology engine
+
+Supported formats (by file extension):
+    .json                 JSON (orjson when installed, streamed on save)
+    .nfx / .yaml / .yml   YAML (libyaml C loader/dumper when available)
+    + .gz                 gzip-compressed variant of any of the above
+    + .zst                zstd-compressed variant (requires the zstandard package)
+
+Projects may use the compact profile-based structure (see project_profiles);
+they are expanded transparently on load.
+"""
+
+import gzip
+import io
+import json
+from collections.abc import Mapping
+
+from utils.project_profiles import expand_project, compact_project
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_SUFFIXES = ('.gz', '.zst')
+
+# Top-level project keys holding long lists that are streamed item by item
+STREAMED_SECTIONS = ("components", "links", "connections")
+
+
+def _yaml():
+    import yaml
+    from models.property_map import register_yaml_representers
+
+    register_yaml_representers(yaml)
+    return yaml
+
+
+def _yaml_loader():
+    yaml = _yaml()
+    return getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def _yaml_dumper():
+    yaml = _yaml()
+    return getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+def split_compression(filename):
+    """Split a filename into (base filename, compression suffix or '')"""
+    lower = filename.lower()
+    for suffix in COMPRESSION_SUFFIXES:
+        if lower.endswith(suffix):
+            return filename[:-len(suffix)], suffix
+    return filename, ''
+
+
+def is_json_file(filename):
+    base, _ = split_compression(filename)
+    return base.lower().endswith('.json')
+
+
+def _open_binary(filename, mode):
+    """Open a project file for binary reading or writing, handling compression"""
+    _, compression = split_compression(filename)
+
+    if compression == '.gz':
+        # Level 6 is much faster than the default 9 for almost the same size
+        return gzip.open(filename, mode + 'b', compresslevel=6)
+
+    if compression == '.zst':
+        if zstandard is None:
+            raise RuntimeError("zstd-compressed projects require the 'zstandard' package (pip install zstandard)")
+        raw = open(filename, mode + 'b')
+        if mode == 'r':
+            return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+
+    return open(filename, mode + 'b')
+
+
+def load_project_data(filename):
+    """Load a saved project file into its dictionary structure"""
+    with _open_binary(filename, 'r') as file:
+        if is_json_file(filename):
+            if orjson is not None:
+                data = orjson.loads(file.read())
+            else:
+                data = json.load(file)
+        else:
+            data = _yaml().load(file, Loader=_yaml_loader())
+
+    if data and data.get("profiles"):
+        data = expand_project(data)
+
+    return data or {}
+
+
+def save_project_data(data, filename, compact=False):
+    """
+    Save a project dictionary to a file (format and compression by extension)
+
+    For JSON files the component, link and connection sections may be any
+    iterable; they are written item by item without building the whole
+    document in memory. With compact=True components of the same type are
+    stored as shared property profiles plus per-component overrides; finding
+    the profiles needs every component at once, so compact saves are not
+    streamed.
+    """
+    if compact:
+        data = compact_project(data)
+
+    with _open_binary(filename, 'w') as file:
+        if is_json_file(filename):
+            _write_json_streaming(data, file)
+        else:
+            materialized = {
+                key: list(value) if key in STREAMED_SECTIONS else value
+                for key, value in data.items()
+            }
+            text = io.TextIOWrapper(file, encoding='utf-8')
+            _yaml().dump(materialized, text, Dumper=_yaml_dumper())
+            text.flush()
+            text.detach()
+
+
+def _orjson_default(value):
+    """Serialize the subclasses orjson passes through (e.g. PropertyMap) as their base type"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    for base in (str, int, float, list):
+        if isinstance(value, base):
+            return base(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _dumps_json(value):
+    if orjson is not None:
+        # orjson reads dict subclasses' storage directly, which holds only a
+        # PropertyMap's overrides; pass subclasses through to the default hook
+        return orjson.dumps(value, default=_orjson_default, option=orjson.OPT_PASSTHROUGH_SUBCLASS)
+    return json.dumps(value).encode('utf-8')
+
+
+def _write_json_streaming(data, file):
+    """Write a project dictionary as JSON, streaming the large sections"""
+    file.write(b'{')
+    first_key = True
+
+    for key, value in data.items():
+        if not first_key:
+            file.write(b',')
+        first_key = False
+
+        file.write(b'\n  ' + _dumps_json(key) + b': ')
+
+        if key in STREAMED_SECTIONS:
+            file.write(b'[')
+            first_item = True
+            for item in value:
+                file.write(b'\n    ' if first_item else b',\n    ')
+                file.write(_dumps_json(item))
+                first_item = False
+            file.write(b']' if first_item else b'\n  ]')
+        else:
+            file.write(_dumps_json(value))
+
+    file.write(b'\n}\n')
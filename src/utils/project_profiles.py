@@ -0,0 +1,209 @@
+"""
+Property profiles for compact project files
+
+A compact project stores shared properties once per profile. Each component
+references a profile and carries only a small override dict. Per-component
+values such as IMSIs and names come from generators evaluated with the
+component's index within its profile:
+
+    format_version: 2
+    profiles:
+      ue:
+        type: ue
+        properties: {k: 465B..., opc: E8ED...}
+        generators:
+          imsi: {start: "999700000000001", step: 1}
+          name: {format: "{type}_{id}"}
+    components:
+      - {id: 1a2b3c4d, profile: ue, x: 100.0, y: 200.0}
+      - {id: 5e6f7a8b, profile: ue, x: 150.0, y: 200.0, overrides: {imsi: "999700000000042"}}
+"""
+
+import re
+
+COMPACT_FORMAT_VERSION = 2
+
+# Groups smaller than this are saved in the regular (expanded) format
+MIN_PROFILE_GROUP_SIZE = 2
+
+NUMERIC_SUFFIX_PATTERN = re.compile(r"^(.*?)(\d+)$")
+
+
+def generate_value(generator, index, component_id, component_type):
+    """Evaluate a generator for the component at the given profile index"""
+    if "format" in generator:
+        return generator["format"].format(index=index, id=component_id, type=component_type)
+
+    start = str(generator.get("start", "0"))
+    step = int(generator.get("step", 1))
+    number = str(int(start) + index * step).zfill(len(start))
+    return f"{generator.get('prefix', '')}{number}"
+
+
+def expand_project(data):
+    """
+    Convert a compact project into the regular project structure
+
+    Projects without profiles are returned unchanged.
+    """
+    profiles = data.get("profiles")
+    if not profiles:
+        return data
+
+    indices = {}
+    components = []
+
+    for component_data in data.get("components", []):
+        profile_name = component_data.get("profile")
+        if profile_name is None:
+            components.append(component_data)
+            continue
+
+        profile = profiles.get(profile_name)
+        if profile is None:
+            raise ValueError(f"Component {component_data.get('id')} references unknown profile '{profile_name}'")
+
+        index = component_data.get("index", indices.get(profile_name, 0))
+        indices[profile_name] = index + 1
+
+        component_id = component_data.get("id")
+        component_type = profile.get("type")
+
+        properties = dict(profile.get("properties", {}))
+        for key, generator in profile.get("generators", {}).items():
+            properties[key] = generate_value(generator, index, component_id, component_type)
+        properties.update(component_data.get("overrides", {}))
+
+        components.append({
+            "id": component_id,
+            "type": component_type,
+            "x": component_data.get("x", 0),
+            "y": component_data.get("y", 0),
+            "properties": properties
+        })
+
+    expanded = {key: value for key, value in data.items() if key not in ("profiles", "format_version")}
+    expanded["components"] = components
+    return expanded
+
+
+def _detect_generator(key, values, component_ids, component_type):
+    """Find a generator reproducing most of the values, or None"""
+    if not all(isinstance(value, str) for value in values):
+        return None
+
+    if key == "name":
+        generator = {"format": "{type}_{id}"}
+        if all(value == f"{component_type}_{component_id}" for value, component_id in zip(values, component_ids)):
+            return generator
+
+    first = NUMERIC_SUFFIX_PATTERN.match(values[0])
+    second = NUMERIC_SUFFIX_PATTERN.match(values[1])
+    if not first or not second or first.group(1) != second.group(1):
+        return None
+
+    start = first.group(2)
+    step = int(second.group(2)) - int(start)
+    if step <= 0 or len(second.group(2)) != len(start):
+        return None
+
+    generator = {"start": start, "step": step}
+    if first.group(1):
+        generator["prefix"] = first.group(1)
+
+    # Only worth it when the sequence covers most of the group
+    matches = sum(1 for index, value in enumerate(values)
+                  if value == generate_value(generator, index, None, component_type))
+    if matches * 2 <= len(values):
+        return None
+
+    return generator
+
+
+def _most_common(values):
+    counts = {}
+    for value in values:
+        marker = repr(value)
+        count, _ = counts.get(marker, (0, value))
+        counts[marker] = (count + 1, value)
+    return max(counts.values(), key=lambda item: item[0])
+
+
+def compact_project(data):
+    """
+    Convert a regular project into the compact profile-based structure
+
+    Components are grouped by type. Properties shared by every component of a
+    group move to the group's profile, sequential values become generators,
+    and only the differences are stored per component.
+    """
+    components = list(data.get("components", []))
+
+    groups = {}
+    for component_data in components:
+        groups.setdefault(component_data.get("type"), []).append(component_data)
+
+    profiles = {}
+    for component_type, group in groups.items():
+        if len(group) < MIN_PROFILE_GROUP_SIZE:
+            continue
+
+        property_sets = [component_data.get("properties", {}) or {} for component_data in group]
+        component_ids = [component_data.get("id") for component_data in group]
+        shared_keys = set(property_sets[0]).intersection(*property_sets[1:])
+
+        profile_properties = {}
+        generators = {}
+        for key in sorted(shared_keys):
+            values = [properties[key] for properties in property_sets]
+            generator = _detect_generator(key, values, component_ids, component_type)
+            if generator:
+                generators[key] = generator
+                continue
+
+            count, value = _most_common(values)
+            if count * 2 > len(values):
+                profile_properties[key] = value
+
+        profile = {"type": component_type, "properties": profile_properties}
+        if generators:
+            profile["generators"] = generators
+        profiles[component_type] = profile
+
+    # Generator indices follow file order within each profile
+    indices = {}
+    compact_components = []
+    for component_data in components:
+        component_type = component_data.get("type")
+        profile = profiles.get(component_type)
+        if profile is None:
+            compact_components.append(component_data)
+            continue
+
+        component_id = component_data.get("id")
+        index = indices.get(component_type, 0)
+        indices[component_type] = index + 1
+
+        expected = dict(profile["properties"])
+        for key, generator in profile.get("generators", {}).items():
+            expected[key] = generate_value(generator, index, component_id, component_type)
+
+        overrides = {
+            key: value for key, value in (component_data.get("properties", {}) or {}).items()
+            if key not in expected or expected[key] != value
+        }
+
+        compact = {
+            "id": component_id,
+            "profile": component_type,
+            "x": component_data.get("x", 0),
+            "y": component_data.get("y", 0)
+        }
+        if overrides:
+            compact["overrides"] = overrides
+        compact_components.append(compact)
+
+    compacted = {"format_version": COMPACT_FORMAT_VERSION, "profiles": profiles}
+    compacted.update({key: value for key, value in data.items() if key != "components"})
+    compacted["components"] = compact_components
+    return compacted
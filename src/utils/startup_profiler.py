@@ -0,0 +1,177 @@
+"""
+Startup timing for NetFlux5G (enabled with --profile-startup)
+
+Records how long each module takes to import (via a meta path finder that
+wraps module loaders) and how long each named startup phase takes, up to the
+first paint of the main window.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+
+_profiler = None
+
+
+class _TimedLoader:
+    """Loader proxy that times exec_module of the wrapped loader"""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter_module(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit_module()
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimingFinder(MetaPathFinder):
+    """Meta path finder that wraps the loader found by the remaining finders"""
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, self._profiler)
+            return spec
+        return None
+
+
+class StartupProfiler:
+    """Collects per-module import times and startup phase times"""
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.imports = {}       # module -> (inclusive seconds, self seconds)
+        self.phases = []        # (phase name, seconds)
+        self.marks = []         # (mark name, seconds since start)
+        self._stack = []        # [module, start time, child seconds]
+        self.import_total = 0.0  # wall time spent in outermost imports
+        self._finder = None
+
+    def install(self):
+        """Start timing imports"""
+        if self._finder is None:
+            self._finder = _ImportTimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        """Stop timing imports"""
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    def _enter_module(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit_module(self):
+        name, started, children = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.imports[name] = (elapsed, elapsed - children)
+        if self._stack:
+            self._stack[-1][2] += elapsed
+        else:
+            self.import_total += elapsed
+
+    @contextmanager
+    def phase(self, name):
+        """Time a named startup phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark(self, name):
+        """Record a point in time relative to profiler start"""
+        self.marks.append((name, time.perf_counter() - self.start_time))
+
+    def report(self, top=25):
+        """Return the startup timing report as text"""
+        lines = ["", "NetFlux5G startup profile", "=" * 60]
+
+        lines.append("Phases:")
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<40} {seconds * 1000:9.1f} ms")
+
+        if self.marks:
+            lines.append("Milestones (since profiling started):")
+            for name, seconds in self.marks:
+                lines.append(f"  {name:<40} {seconds * 1000:9.1f} ms")
+
+        lines.append(f"Imports: {len(self.imports)} modules, {self.import_total * 1000:.1f} ms total")
+        lines.append(f"  {'module':<40} {'self ms':>9} {'total ms':>9}")
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)[:top]
+        for module, (inclusive, own) in slowest:
+            lines.append(f"  {module:<40} {own * 1000:9.1f} {inclusive * 1000:9.1f}")
+
+        lines.append("=" * 60)
+        return "\n".join(lines)
+
+
+def start_profiler():
+    """Create the global profiler and start timing imports"""
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler()
+        _profiler.install()
+    return _profiler
+
+
+def get_profiler():
+    """Return the active profiler, or None when profiling is disabled"""
+    return _profiler
+
+
+@contextmanager
+def phase(name):
+    """Time a startup phase if profiling is enabled (no-op otherwise)"""
+    if _profiler is None:
+        yield
+    else:
+        with _profiler.phase(name):
+            yield
+
+
+def report_on_first_paint(window, callback=None):
+    """Mark the first paint of any widget in window, then print the report (Qt only)"""
+    profiler = _profiler
+    if profiler is None:
+        return
+
+    from PyQt5.QtCore import QObject, QEvent
+    from PyQt5.QtWidgets import QApplication, QWidget
+
+    app = QApplication.instance()
+
+    class _FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and isinstance(obj, QWidget) and obj.window() is window:
+                app.removeEventFilter(self)
+                profiler.mark("first window paint")
+                profiler.uninstall()
+                print(profiler.report())
+                if callback:
+                    callback()
+            return False
+
+    # Keep a reference on the window so the filter is not garbage collected
+    window._first_paint_filter = _FirstPaintFilter(window)
+    app.installEventFilter(window._first_paint_filter)
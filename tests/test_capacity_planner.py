@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+
+from simulation.capacity_planner import (ADMIT, DENSIFY, QUEUE, REJECT, CapacityPlan, CapacityPlanner,
+                                         cgroup_limits, multi_ue_memory, parse_memory, resource_requests)
+
+MIB = 1024 ** 2
+GIB = 1024 ** 3
+
+
+def _requests(ue_count=4):
+    return resource_requests(["amf"] + ["ue"] * ue_count + ["webui"],
+                             {"amf": {"mem_limit": "256m"}, "ue": {"mem_limit": "256m"}})
+
+
+def _capacity(available, total=None, cpus=4.0):
+    return {"memory_total": total or available, "memory_available": available, "cpus": cpus, "sources": []}
+
+
+def test_parse_memory_accepts_docker_sizes():
+    assert parse_memory("256m") == 256 * MIB
+    assert parse_memory("1g") == GIB
+    assert parse_memory("512MB") == 512 * MIB
+    assert parse_memory(1048576) == MIB
+    assert parse_memory(None) == 0
+
+
+def test_resource_requests_skip_types_without_a_container():
+    requests = _requests(2)
+    assert [request["type"] for request in requests] == ["amf", "ue", "ue"]
+    assert requests[0] == {"type": "amf", "memory": 256 * MIB, "cpus": 0.2, "group": None}
+
+
+def test_plan_admits_a_run_that_fits():
+    plan = CapacityPlanner(None).plan(_requests(), capacity=_capacity(2 * GIB, cpus=0.25))
+    assert plan.decision == ADMIT and plan.admitted
+    assert plan.planned_memory == 5 * 256 * MIB
+    assert plan.reasons[0].startswith("CPU overcommitted")
+
+
+def test_plan_densifies_ues_before_queueing():
+    plan = CapacityPlanner(None).plan(_requests(), capacity=_capacity(GIB))
+    assert plan.decision == DENSIFY and plan.admitted
+    assert plan.ues_per_container == 2
+    assert plan.planned_memory == 256 * MIB + 2 * multi_ue_memory(256 * MIB, 2)
+    assert plan.requested_memory == 5 * 256 * MIB
+
+
+def test_plan_queues_when_the_host_could_fit_the_run():
+    plan = CapacityPlanner(None).plan(_requests(), allow_densify=False, capacity=_capacity(GIB, 2 * GIB))
+    assert plan.decision == QUEUE and not plan.admitted
+
+
+def test_plan_rejects_a_run_larger_than_the_host():
+    plan = CapacityPlanner(None).plan(_requests(), allow_densify=False, capacity=_capacity(GIB))
+    assert plan.decision == REJECT
+    assert "total" in plan.reasons[-1]
+
+
+def test_group_ues_folds_ues_into_their_first_member():
+    ues = [SimpleNamespace(component_type="ue") for _ in range(5)]
+    amf = SimpleNamespace(component_type="amf")
+    plan = CapacityPlan(DENSIFY, 0, 0, _capacity(GIB), ues_per_container=2)
+
+    kept = plan.group_ues([amf] + ues)
+
+    assert kept == [amf, ues[0], ues[2], ues[4]]
+    assert [plan.ue_count(component) for component in kept] == [1, 2, 2, 1]
+
+
+def test_group_ues_only_groups_ues_with_the_same_key():
+    def ue(sst, gnb):
+        return SimpleNamespace(component_type="ue", sst=sst, gnb=gnb)
+
+    ues = [ue(1, "gnb1"), ue(2, "gnb1"), ue(1, "gnb1"), ue(1, "gnb2"), ue(2, "gnb1"), ue(1, "gnb1")]
+    plan = CapacityPlan(DENSIFY, 0, 0, _capacity(GIB), ues_per_container=2)
+
+    kept = plan.group_ues(ues, key=lambda component: (component.sst, component.gnb))
+
+    assert kept == [ues[0], ues[1], ues[3], ues[5]]
+    assert [plan.ue_count(component) for component in kept] == [2, 2, 1, 1]
+
+
+def test_densified_memory_counts_the_containers_of_every_group():
+    requests = resource_requests(["ue"] * 4, {"ue": {"mem_limit": "256m"}}, groups=["a", "b", "a", "b"])
+    capacity = _capacity(900 * MIB)
+
+    plan = CapacityPlanner(None).plan(requests, capacity=capacity)
+    assert plan.decision == DENSIFY and plan.ues_per_container == 2
+    assert plan.planned_memory == 2 * multi_ue_memory(256 * MIB, 2)
+
+    # Single-UE groups cannot be densified
+    requests = resource_requests(["ue"] * 4, {"ue": {"mem_limit": "256m"}}, groups=["a", "b", "c", "d"])
+    assert CapacityPlanner(None).plan(requests, capacity=capacity).decision == REJECT
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_cgroup_v2_limits(tmp_path):
+    _write(tmp_path / "docker" / "memory.max", "1073741824\n")
+    _write(tmp_path / "docker" / "memory.current", "1048576\n")
+    _write(tmp_path / "docker" / "cpu.max", "150000 100000\n")
+
+    assert cgroup_limits(root=str(tmp_path)) == {"memory_limit": GIB, "memory_usage": MIB, "cpus": 1.5}
+
+
+def test_cgroup_v2_unlimited_under_systemd(tmp_path):
+    _write(tmp_path / "system.slice" / "memory.max", "max\n")
+    _write(tmp_path / "system.slice" / "cpu.max", "max 100000\n")
+
+    limits = cgroup_limits("systemd", "2", root=str(tmp_path))
+    assert limits == {"memory_limit": None, "memory_usage": None, "cpus": None}
+
+
+@pytest.mark.parametrize("memory_limit, expected", [("536870912", 512 * MIB), (str(1 << 63), None)])
+def test_cgroup_v1_limits(tmp_path, memory_limit, expected):
+    _write(tmp_path / "memory" / "docker" / "memory.limit_in_bytes", memory_limit)
+    _write(tmp_path / "cpu" / "docker" / "cpu.cfs_quota_us", "200000")
+    _write(tmp_path / "cpu" / "docker" / "cpu.cfs_period_us", "100000")
+
+    limits = cgroup_limits(version="1", root=str(tmp_path))
+    assert limits["memory_limit"] == expected
+    assert limits["cpus"] == 2.0
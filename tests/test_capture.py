@@ -0,0 +1,56 @@
+import os
+import subprocess
+
+from simulation.capture import MOUNT_POINT, capture_files, capture_id, render_capture_script
+
+
+def _syntax_ok(script):
+    return subprocess.run(["sh", "-n"], input=script, text=True).returncode == 0
+
+
+def test_capture_id_is_a_valid_name():
+    assert capture_id("upf", "n3") == "upf-n3"
+    assert capture_id("ue 1", "any") == "ue-1-any"
+
+
+def test_ring_buffer_capture_on_a_named_interface():
+    script = render_capture_script("upf-ogstun", interface="ogstun", file_size_mb=20, file_count=3,
+                                   bpf_filter="udp port 2152")
+    lines = script.splitlines()
+
+    assert lines[:3] == ["set -e", "dev=ogstun", f"cd {MOUNT_POINT}"]
+    assert ("tcpdump -i \"$dev\" -n -U -Z root -C 20 -W 3 -w upf-ogstun.pcap 'udp port 2152' &") in lines
+    assert "    :" in lines
+    assert "trap 'kill -TERM $pid 2>/dev/null; wait $pid; exit 0' TERM INT" in lines
+    assert _syntax_ok(script)
+
+
+def test_capture_defaults_to_any_interface():
+    assert "dev=any" in render_capture_script("amf-any").splitlines()
+
+
+def test_capture_on_the_interface_of_an_address():
+    script = render_capture_script("amf-n2", address="10.96.24.1")
+    assert "ip=10.96.24.1" in script
+    assert "dev=any" not in script
+    assert _syntax_ok(script)
+
+
+def test_time_rotated_capture_prunes_old_files():
+    script = render_capture_script("gnb-n3", rotate_s=60, file_count=4)
+
+    assert "-G 60 -w gnb-n3-%Y%m%d-%H%M%S.pcap" in script
+    assert "-W" not in script
+    assert "ls -1t gnb-n3-*.pcap* 2>/dev/null | tail -n +5 | xargs -r rm -f --" in script
+    assert _syntax_ok(script)
+
+
+def test_capture_files_oldest_first(tmp_path):
+    names = ["upf-n3.pcap1", "upf-n3.pcap0", "upf-n3-20260101-000000.pcap", "upf-n4.pcap0", "upf-n3x.pcap"]
+    for index, name in enumerate(names):
+        path = tmp_path / name
+        path.write_bytes(b"")
+        os.utime(path, (index, index))
+
+    files = [os.path.basename(path) for path in capture_files(str(tmp_path), "upf-n3")]
+    assert files == names[:3]
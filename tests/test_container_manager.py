@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+
+from models.topology import TopologyComponent
+from simulation.enhanced_container_manager import MAX_REPLICAS, EnhancedContainerManager
+
+
+@pytest.fixture
+def manager():
+    return EnhancedContainerManager(session=SimpleNamespace(client=None, config_manager=None))
+
+
+def test_no_host_ports_are_published_by_default(manager):
+    for config in manager.open5gs_config.values():
+        assert manager._published_ports(config) is None
+
+
+def test_published_ports_use_host_ports_chosen_by_docker(manager):
+    manager.publish_ports = True
+    assert manager._published_ports(manager.open5gs_config["amf"]) == {"38412/sctp": None}
+    assert manager._published_ports(manager.open5gs_config["upf"]) == {"8805/udp": None}
+    assert manager._published_ports({"ports": {"9090": "9090"}}) == {"9090": None}
+    assert manager._published_ports(manager.open5gs_config["nrf"]) is None
+
+
+def _component(comp_type, component_id, **properties):
+    return TopologyComponent(comp_type, component_id=component_id, properties=properties)
+
+
+def test_replicas_and_slice_instances_get_their_own_names_and_no_host_ports(manager):
+    amf = _component("amf", "amf1", name="amf", replicas=3)
+    upf = _component("upf", "upf1", name="upf", replicas="2")
+    smf = _component("smf", "smf1", name="smf")
+    gnb = _component("gnb", "gnb1", name="gnb", replicas=4)
+    ue = _component("ue", "ue1", name="ue", dnn="iot")
+    amf.links = ["n2"]
+
+    components = manager.expand_replicas(manager.expand_slices([amf, upf, smf, gnb, ue]))
+
+    names = [manager._component_name(component) for component in components]
+    assert names == ["amf", "amf-2", "amf-3", "upf", "upf-2", "smf", "gnb", "ue",
+                     "smf-iot-1-010203", "upf-iot-1-010203"]
+    assert components[1].links == ["n2"] and components[1].properties["replicas"] == 1
+    # Every AMF/UPF instance can run next to the others on one host
+    for publish in (False, True):
+        manager.publish_ports = publish
+        for component in components:
+            ports = manager._published_ports(manager.open5gs_config.get(component.component_type, {})) or {}
+            assert all(host_port is None for host_port in ports.values())
+
+
+def test_replicas_are_capped(manager):
+    components = manager.expand_replicas([_component("upf", "upf1", name="upf", replicas=100)])
+    assert len(components) == MAX_REPLICAS
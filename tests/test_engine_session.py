@@ -0,0 +1,45 @@
+import docker
+
+from simulation import engine_session
+from simulation.engine_session import RECONNECT_INTERVAL, EngineSession
+
+
+class FakeClient:
+    api = type("Api", (), {"api_version": "1.43", "base_url": "http+docker://localhost"})()
+
+
+def test_client_is_retried_after_a_failed_connect(monkeypatch):
+    attempts = []
+    now = [100.0]
+
+    def from_env(**kwargs):
+        attempts.append(kwargs)
+        if len(attempts) == 1:
+            raise docker.errors.DockerException("Error while fetching server API version")
+        return FakeClient()
+
+    monkeypatch.setattr(docker, "from_env", from_env)
+    monkeypatch.setattr(engine_session.time, "monotonic", lambda: now[0])
+    session = EngineSession(config_manager=object())
+
+    assert session.client is None
+    assert session.connect_error is not None
+    # Within the backoff the daemon is not asked again
+    now[0] += RECONNECT_INTERVAL / 2
+    assert session.client is None and len(attempts) == 1
+
+    now[0] += RECONNECT_INTERVAL
+    assert isinstance(session.client, FakeClient)
+    assert session.connect_error is None
+    assert session.client is session.client and len(attempts) == 2
+
+
+def test_missing_docker_package_is_not_retried(monkeypatch):
+    session = EngineSession(config_manager=object())
+    session._connect_error = ImportError("No module named 'docker'")
+    monkeypatch.setattr(engine_session.time, "monotonic", lambda: 1e9)
+    attempts = []
+    monkeypatch.setattr(session, "_connect", lambda: attempts.append(True))
+
+    assert session.client is None
+    assert attempts == []
@@ -0,0 +1,23 @@
+import threading
+
+from simulation.image_pipeline import ImagePipeline
+
+
+def test_shutdown_cancels_queued_jobs_and_keeps_running_ones():
+    pipeline = ImagePipeline(client=None, max_workers=1)
+    started, release = threading.Event(), threading.Event()
+
+    def build():
+        started.set()
+        return release.wait(5)
+
+    running = pipeline.submit("busy", build)
+    queued = pipeline.submit("queued", lambda: True)
+    started.wait(5)
+
+    pipeline.shutdown()
+    release.set()
+
+    assert queued.cancelled()
+    assert running.result(timeout=5) is True
+    assert pipeline.wait("queued") is False
@@ -0,0 +1,107 @@
+import ipaddress
+from types import SimpleNamespace
+
+import pytest
+
+from simulation.ipam import (AddressPlan, SubnetAllocator, plan_addresses, plan_run_addresses, split_subnet,
+                             static_address)
+from simulation.namespace import RunNamespace
+
+
+def _namespace(*reference_points):
+    namespace = RunNamespace("test")
+    namespace.attach_network(None, ipaddress.ip_network("10.96.0.0/20"))
+    for index, reference_point in enumerate(reference_points, start=1):
+        namespace.attach_network(None, ipaddress.ip_network(f"10.96.{index * 16}.0/20"), reference_point)
+    return namespace
+
+
+def _networks_for(comp_type):
+    return {"amf": ["n2", "sbi"], "gnb": ["n2", "n3"], "upf": ["n3", "n4"], "smf": ["n4", "sbi"]}[comp_type]
+
+
+def test_split_subnet_reserves_the_upper_half():
+    dynamic, static = split_subnet(ipaddress.ip_network("10.96.0.0/20"))
+    assert str(dynamic) == "10.96.0.0/21" and str(static) == "10.96.8.0/21"
+
+
+def test_plan_addresses_in_the_run_network_is_deterministic():
+    containers = [("mongodb", "mongodb"), ("amf", "amf"), ("gnb1", "gnb"), ("amf", "amf")]
+    plan = plan_addresses(_namespace(), containers)
+
+    assert plan.to_dict() == {"mongodb": {"run": "10.96.8.1"}, "amf": {"run": "10.96.8.2"},
+                              "gnb1": {"run": "10.96.8.3"}}
+    assert plan.ipv4_address("gnb1") == "10.96.8.3"
+    assert plan.ipv4_address("upf") is None
+    assert plan_addresses(_namespace(), containers).addresses == plan.addresses
+
+
+def test_plan_addresses_per_reference_point():
+    plan = plan_addresses(_namespace("n2", "n3", "n4", "sbi"),
+                          [("amf", "amf"), ("gnb", "gnb"), ("upf", "upf"), ("smf", "smf")], _networks_for)
+
+    assert plan.ipv4_address("amf") == {"n2": "10.96.24.1", "sbi": "10.96.72.1"}
+    assert plan.address("gnb") == "10.96.24.2"
+    assert plan.address("gnb", "n3") == "10.96.40.1"
+    # The gNB reaches the AMF over N2 and the UPF over N3; it shares nothing with the SMF
+    assert plan.reachable_address("amf", "gnb") == "10.96.24.1"
+    assert plan.reachable_address("upf", "gnb") == "10.96.40.2"
+    assert plan.reachable_address("smf", "gnb") is None
+    assert plan.hosts("gnb") == {"amf": "10.96.24.1", "gnb": "10.96.24.2", "upf": "10.96.40.2"}
+
+
+def test_plan_addresses_fails_when_the_static_range_runs_out():
+    namespace = RunNamespace("tiny")
+    namespace.attach_network(None, ipaddress.ip_network("10.96.0.0/29"))
+    with pytest.raises(RuntimeError, match="ue2"):
+        plan_addresses(namespace, [(f"ue{index}", "ue") for index in range(4)])
+
+
+def test_plan_run_addresses_adds_the_run_helpers():
+    components = [SimpleNamespace(component_type="amf", name="amf1"),
+                  SimpleNamespace(component_type="gnb", name="gnb1")]
+    plan = plan_run_addresses(_namespace(), components, lambda component: component.name)
+    assert list(plan.addresses) == ["mongodb", "internet-gw", "amf1", "gnb1"]
+
+    components.insert(0, SimpleNamespace(component_type="mongodb", name="db"))
+    plan = plan_run_addresses(_namespace(), components, lambda component: component.name)
+    assert list(plan.addresses) == ["internet-gw", "db", "amf1", "gnb1"]
+
+
+def test_resolve_type_hostnames():
+    plan = AddressPlan()
+    plan.add("amf1", "amf", {None: "10.96.8.1"})
+    plan.add("amf2", "amf", {None: "10.96.8.2"})
+    plan.add("smf1", "smf", {None: "10.96.8.3"})
+    hostnames = {"amf.test": "amf", "smf.test": "smf", "upf.test": "upf"}
+
+    assert plan.resolve("amf.test", "smf1", hostnames) == "10.96.8.1"
+    # A hostname of the asking container's own type is the container itself
+    assert plan.resolve("amf.test", "amf2", hostnames) == "10.96.8.2"
+    assert plan.resolve("upf.test", "smf1", hostnames) is None
+    assert plan.resolve("example.org", "smf1", hostnames) is None
+    assert plan.type_aliases(hostnames) == {"amf.test": "amf1", "smf.test": "smf1", "upf.test": None}
+    assert plan.hosts("smf1", plan.type_aliases(hostnames))["amf.test"] == "10.96.8.1"
+
+
+def test_hosts_skip_names_that_are_not_valid_hostnames():
+    plan = AddressPlan()
+    plan.add("amf", "amf", {None: "10.96.8.1"})
+    plan.add("gnb 1", "gnb", {None: "10.96.8.2"})
+    assert plan.hosts("amf") == {"amf": "10.96.8.1"}
+
+
+def test_static_address_falls_back_to_the_namespace():
+    namespace = _namespace()
+    plan = plan_addresses(namespace, [("amf", "amf")])
+    assert static_address(plan, namespace, "amf") == "10.96.8.1"
+    assert static_address(plan, namespace, "late") == "10.96.8.2"
+    assert static_address(None, namespace, "amf") == "10.96.8.3"
+
+
+def test_subnet_allocator_skips_used_and_reserved_subnets():
+    network = SimpleNamespace(name="other", attrs={"IPAM": {"Config": [{"Subnet": "10.96.0.0/20"}]}})
+    client = SimpleNamespace(networks=SimpleNamespace(list=lambda: [network]))
+    allocator = SubnetAllocator(client, pool="10.96.0.0/18", reserved=("10.96.16.0/24",))
+
+    assert [str(subnet) for subnet in allocator.candidates()] == ["10.96.32.0/20", "10.96.48.0/20"]
@@ -0,0 +1,63 @@
+from simulation.link_emulation import UNLIMITED_RATE, link_shaping, render_tc_script, split_tc_output, verify_tc_output
+
+SHAPED = {"rate_mbit": 100.0, "delay_ms": 20.0, "jitter_ms": 5.0, "loss_pct": 0.5}
+RATE_ONLY = {"rate_mbit": 10.0, "delay_ms": None, "jitter_ms": None, "loss_pct": None}
+
+TC_OUTPUT = """\
+qdisc htb 1: root refcnt 2 r2q 10 default 0x1 direct_packets_stat 0
+qdisc netem 10: parent 1:10 limit 1000 delay 20ms  5ms loss 0.5%
+class htb 1:1 root prio 0 rate 10Gbit ceil 10Gbit burst 0b cburst 0b
+class htb 1:10 root leaf 10: prio 0 rate 100Mbit ceil 100Mbit burst 1600b cburst 1600b
+class htb 1:11 root prio 0 rate 10Mbit ceil 10Mbit burst 1600b cburst 1600b
+"""
+
+
+def test_link_shaping_parses_units_and_ignores_unset_values():
+    assert link_shaping({"bandwidth": "100", "delay": "20ms", "jitter": 5, "loss": "0.5%"}) == SHAPED
+    assert link_shaping({"bandwidth": 10, "delay": "", "loss": "0"}) == RATE_ONLY
+    assert link_shaping({"name": "n2", "delay": "0"}) is None
+    assert link_shaping(None) is None
+
+
+def test_render_tc_script_installs_one_class_per_peer():
+    script = render_tc_script("10.0.0.2", [("10.0.0.3", SHAPED), ("10.0.0.4", RATE_ONLY)])
+    lines = script.splitlines()
+
+    assert lines[0] == "set -e"
+    assert "ip=10.0.0.2" in script
+    assert f'tc class add dev "$dev" parent 1: classid 1:1 htb rate {UNLIMITED_RATE}' in lines
+    assert 'tc class add dev "$dev" parent 1: classid 1:10 htb rate 100mbit ceil 100mbit' in lines
+    assert ('tc qdisc add dev "$dev" parent 1:10 handle 10: netem delay 20ms 5ms distribution normal loss 0.5%'
+            in lines)
+    assert 'tc filter add dev "$dev" parent 1: protocol ip prio 1 u32 match ip dst 10.0.0.3/32 flowid 1:10' in lines
+    assert 'tc class add dev "$dev" parent 1: classid 1:11 htb rate 10mbit ceil 10mbit' in lines
+    assert "handle 11: netem" not in script
+    assert lines[-3:] == ['echo "interface $dev"', 'tc qdisc show dev "$dev"', 'tc class show dev "$dev"']
+
+
+def test_render_tc_script_without_rules_only_clears_shaping():
+    script = render_tc_script("10.0.0.2", [])
+    assert 'tc qdisc del dev "$dev" root' in script
+    assert "tc qdisc add" not in script and "tc class add" not in script
+
+
+def test_long_delay_raises_the_netem_queue_limit():
+    script = render_tc_script("10.0.0.2", [("10.0.0.3", dict(SHAPED, rate_mbit=1000.0, delay_ms=100.0))])
+    assert "limit 12500" in script
+
+
+def test_verify_tc_output():
+    rules = [("10.0.0.3", SHAPED), ("10.0.0.4", RATE_ONLY)]
+    assert verify_tc_output(TC_OUTPUT, rules) == []
+
+    missing = verify_tc_output(TC_OUTPUT.replace("qdisc netem 10:", "qdisc pfifo 10:"), rules + [("10.0.0.5", SHAPED)])
+    assert missing == ["netem qdisc 10: for 10.0.0.3 is missing",
+                       "htb class 1:12 for 10.0.0.5 is missing",
+                       "netem qdisc 12: for 10.0.0.5 is missing"]
+
+
+def test_split_tc_output_per_interface():
+    output = f"interface eth0\n{TC_OUTPUT}interface eth1@if12\nqdisc noqueue 0: root\n"
+    sections = split_tc_output(output)
+    assert [interface for interface, _ in sections] == ["eth0", "eth1@if12"]
+    assert sections[0][1] == TC_OUTPUT.rstrip("\n")
@@ -0,0 +1,75 @@
+import pytest
+
+from utils.project_io import load_project_data, save_project_data
+from utils.project_profiles import COMPACT_FORMAT_VERSION, compact_project, expand_project, generate_value
+
+
+def _project(ue_count=5):
+    components = [{
+        "id": f"ue{index:02d}",
+        "type": "ue",
+        "x": float(index * 10),
+        "y": 200.0,
+        "properties": {
+            "name": f"ue_ue{index:02d}",
+            "imsi": f"9997000000000{index + 1:02d}",
+            "key": "465B5CE8B199B49FAA5F0A2EE238A6BC",
+            "apn": "internet",
+        },
+    } for index in range(ue_count)]
+    components.append({"id": "amf1", "type": "amf", "x": 0.0, "y": 0.0, "properties": {"name": "amf"}})
+    return {"components": components, "links": [{"source": "ue00", "target": "amf1"}], "settings": {}}
+
+
+def test_generate_value_keeps_zero_padding_and_prefix():
+    assert generate_value({"start": "001", "step": 2}, 3, "x", "ue") == "007"
+    assert generate_value({"start": "9", "prefix": "imsi-"}, 1, "x", "ue") == "imsi-10"
+    assert generate_value({"format": "{type}_{id}"}, 0, "ab12", "gnb") == "gnb_ab12"
+
+
+def test_compact_stores_shared_properties_once():
+    compact = compact_project(_project())
+    assert compact["format_version"] == COMPACT_FORMAT_VERSION
+    profile = compact["profiles"]["ue"]
+    assert profile["properties"] == {"apn": "internet", "key": "465B5CE8B199B49FAA5F0A2EE238A6BC"}
+    assert profile["generators"]["imsi"] == {"start": "999700000000001", "step": 1}
+    assert profile["generators"]["name"] == {"format": "{type}_{id}"}
+    assert all("overrides" not in component for component in compact["components"] if component.get("profile"))
+
+
+def test_single_components_stay_expanded():
+    compact = compact_project(_project())
+    assert "amf" not in compact["profiles"]
+    assert {"id": "amf1", "type": "amf", "x": 0.0, "y": 0.0, "properties": {"name": "amf"}} in compact["components"]
+
+
+def test_round_trip_restores_every_property():
+    project = _project()
+    project["components"][2]["properties"]["imsi"] = "999700000000042"
+    project["components"][3]["properties"]["extra"] = True
+    assert expand_project(compact_project(project)) == project
+
+
+def test_expand_rejects_unknown_profile():
+    with pytest.raises(ValueError):
+        expand_project({"profiles": {"ue": {"type": "ue"}}, "components": [{"id": "a", "profile": "gnb"}]})
+
+
+def test_expand_leaves_regular_projects_alone():
+    project = _project()
+    assert expand_project(project) is project
+
+
+@pytest.mark.parametrize("filename", ["lab.nfx", "lab.json", "lab.json.gz", "lab.yaml"])
+def test_compact_save_loads_back_expanded(tmp_path, filename):
+    project = _project(8)
+    path = str(tmp_path / filename)
+    save_project_data(project, path, compact=True)
+    assert load_project_data(path) == project
+
+
+def test_save_is_regular_unless_compact_is_asked(tmp_path):
+    path = str(tmp_path / "lab.json")
+    save_project_data(_project(), path)
+    with open(path) as file:
+        assert "profiles" not in file.read()
@@ -0,0 +1,116 @@
+import copy
+import json
+import pickle
+from types import MappingProxyType
+
+import pytest
+
+from models.property_map import PropertyMap, register_yaml_representers
+
+DEFAULTS = MappingProxyType({"capacity": 100, "region": "region1"})
+
+
+def _properties(**overrides):
+    return PropertyMap(DEFAULTS, overrides, name="amf_1")
+
+
+def test_reads_fall_through_to_defaults_and_name():
+    properties = _properties(replicas=2)
+    assert properties["capacity"] == 100
+    assert properties["name"] == "amf_1"
+    assert properties.get("replicas") == 2
+    assert properties.get("missing", "fallback") == "fallback"
+    assert dict(properties) == {"name": "amf_1", "capacity": 100, "region": "region1", "replicas": 2}
+    assert len(properties) == 4
+
+
+def test_missing_key_raises():
+    with pytest.raises(KeyError):
+        _properties()["missing"]
+
+
+def test_values_equal_to_a_default_are_not_stored():
+    properties = _properties()
+    properties["capacity"] = 100
+    properties["region"] = "region2"
+    assert properties.overrides() == {"region": "region2"}
+
+
+def test_deleting_a_default_hides_it_for_this_component_only():
+    properties, other = _properties(), _properties()
+    del properties["capacity"]
+    assert "capacity" not in properties
+    assert properties.get("capacity") is None
+    assert "capacity" in other
+    assert list(properties) == ["name", "region"]
+    with pytest.raises(KeyError):
+        del properties["capacity"]
+
+
+def test_deleted_default_can_be_set_again_to_its_default_value():
+    properties = _properties()
+    del properties["capacity"]
+    properties["capacity"] = 100
+    assert properties["capacity"] == 100
+    assert properties.overrides() == {"capacity": 100}
+
+
+def test_pop_and_popitem():
+    properties = _properties(replicas=3)
+    assert properties.pop("region") == "region1"
+    assert "region" not in properties
+    assert properties.pop("region", None) is None
+    with pytest.raises(KeyError):
+        properties.pop("region")
+    assert properties.popitem() == ("replicas", 3)
+
+
+def test_clear_removes_defaults_and_overrides():
+    properties = _properties(replicas=3)
+    del properties["capacity"]
+    properties["capacity"] = 5
+    properties.clear()
+    assert dict(properties) == {}
+    assert len(properties) == 0
+    with pytest.raises(KeyError):
+        PropertyMap().popitem()
+
+
+def test_setdefault_and_update():
+    properties = _properties()
+    assert properties.setdefault("capacity", 7) == 100
+    assert properties.setdefault("replicas", 2) == 2
+    properties.update({"region": "region3"}, tac=5)
+    assert properties.overrides() == {"replicas": 2, "region": "region3", "tac": 5}
+
+
+def test_equality_copy_and_pickle_give_plain_dicts():
+    properties = _properties(replicas=2)
+    expected = {"name": "amf_1", "capacity": 100, "region": "region1", "replicas": 2}
+    assert properties == expected
+    assert properties != {}
+    assert type(properties.copy()) is dict
+    assert type(pickle.loads(pickle.dumps(properties))) is dict
+    assert copy.deepcopy(properties) == expected
+    assert json.loads(json.dumps(properties)) == expected
+
+
+def test_json_project_save_keeps_the_defaults(tmp_path):
+    from utils.project_io import _dumps_json, load_project_data, save_project_data
+
+    properties = _properties(replicas=2)
+    expected = {"name": "amf_1", "capacity": 100, "region": "region1", "replicas": 2}
+    assert json.loads(_dumps_json({"properties": properties})) == {"properties": expected}
+
+    filename = str(tmp_path / "project.json")
+    save_project_data({"components": [{"type": "amf", "properties": properties}]}, filename)
+    assert load_project_data(filename)["components"][0]["properties"] == expected
+
+
+def test_yaml_dumps_a_plain_mapping():
+    yaml = pytest.importorskip("yaml")
+    register_yaml_representers(yaml)
+    properties = _properties(replicas=2)
+    del properties["region"]
+    text = yaml.safe_dump({"properties": properties}, sort_keys=True)
+    assert yaml.safe_load(text) == {"properties": {"name": "amf_1", "capacity": 100, "replicas": 2}}
@@ -0,0 +1,199 @@
+import struct
+
+import pytest
+
+from simulation.protocol_stats import (GTPU_PORT, H2_PREFACE, LINKTYPE_ETHERNET, LINKTYPE_LINUX_SLL,
+                                       LINKTYPE_LINUX_SLL2, NGAP_PORT, NGAP_PPID, PFCP_PORT, PcapStream,
+                                       ProtocolStats, decode_ip)
+
+RAW = 101
+AMF, GNB, SMF, UPF, NRF = "10.96.8.1", "10.96.8.2", "10.96.8.3", "10.96.8.4", "10.96.8.5"
+
+
+def _address(text):
+    return bytes(int(octet) for octet in text.split("."))
+
+
+def _ipv4(source, destination, protocol, payload, fragment=0):
+    return struct.pack("!BBHHHBBH4s4s", 0x45, 0, 20 + len(payload), 0, fragment, 64, protocol, 0,
+                       _address(source), _address(destination)) + payload
+
+
+def _udp(source_port, destination_port, payload):
+    return struct.pack("!HHHH", source_port, destination_port, 8 + len(payload), 0) + payload
+
+
+def _sctp(source_port, destination_port, *chunks):
+    return struct.pack("!HHII", source_port, destination_port, 0, 0) + b"".join(chunks)
+
+
+def _data_chunk(data, ppid=NGAP_PPID):
+    chunk = struct.pack("!BBHIHHI", 0, 0x03, 16 + len(data), 1, 0, 0, ppid) + data
+    return chunk + b"\0" * (-len(chunk) % 4)
+
+
+def _pfcp(message_type, sequence, seid=None):
+    if seid is None:
+        return struct.pack("!BBH", 0x20, message_type, 4) + sequence.to_bytes(3, "big") + b"\0"
+    return struct.pack("!BBHQ", 0x21, message_type, 12, seid) + sequence.to_bytes(3, "big") + b"\0"
+
+
+def _gtpu(teid, length, message_type=0xff):
+    return struct.pack("!BBHI", 0x30, message_type, length, teid)
+
+
+def _tcp(source_port, destination_port, sequence, data=b"", flags=0x18):
+    return struct.pack("!HHIIBBHHH", source_port, destination_port, sequence, 0, 5 << 4, flags, 65535, 0, 0) + data
+
+
+def _h2_frame(frame_type, stream_id, payload=b"", flags=0x04):
+    return len(payload).to_bytes(3, "big") + bytes([frame_type, flags]) + struct.pack("!I", stream_id) + payload
+
+
+def _pcap(linktype, packets, magic=0xa1b2c3d4, endian="<"):
+    data = struct.pack(f"{endian}IHHiIII", magic, 2, 4, 0, 0, 65535, linktype)
+    for seconds, fraction, frame in packets:
+        data += struct.pack(f"{endian}IIII", seconds, fraction, len(frame), len(frame) + 10) + frame
+    return data
+
+
+# pcap
+
+def test_pcap_stream_returns_whole_packets_from_any_chunking():
+    frames = [_ipv4(GNB, AMF, 132, b"a" * 30), _ipv4(AMF, GNB, 132, b"b" * 7)]
+    data = _pcap(RAW, [(100, 250000, frames[0]), (101, 0, frames[1])])
+    stream = PcapStream()
+
+    packets = []
+    for index in range(len(data)):
+        packets += stream.feed(data[index:index + 1])
+
+    assert packets == [(100.25, len(frames[0]) + 10, RAW, frames[0]), (101.0, len(frames[1]) + 10, RAW, frames[1])]
+    assert stream.buffer == b""
+
+
+def test_pcap_stream_big_endian_nanoseconds():
+    frame = _ipv4(GNB, AMF, 132, b"")
+    packets = PcapStream().feed(_pcap(LINKTYPE_LINUX_SLL2, [(5, 500000000, frame)], magic=0xa1b23c4d, endian=">"))
+    assert packets == [(5.5, len(frame) + 10, LINKTYPE_LINUX_SLL2, frame)]
+
+
+def test_pcap_stream_rejects_other_data():
+    with pytest.raises(ValueError, match="not a pcap stream"):
+        PcapStream().feed(b"tcpdump: eth0: No such device exists\n")
+
+
+def test_decode_ip_link_types():
+    packet = _ipv4(GNB, AMF, 132, b"payload")
+    expected = (GNB, AMF, 132, b"payload")
+    vlan = b"\0" * 12 + b"\x81\x00\x00\x01\x08\x00"
+
+    assert decode_ip(RAW, packet) == expected
+    assert decode_ip(LINKTYPE_ETHERNET, b"\0" * 12 + b"\x08\x00" + packet) == expected
+    assert decode_ip(LINKTYPE_ETHERNET, vlan + packet) == expected
+    assert decode_ip(LINKTYPE_LINUX_SLL, b"\0" * 14 + b"\x08\x00" + packet) == expected
+    assert decode_ip(LINKTYPE_LINUX_SLL2, b"\x08\x00" + b"\0" * 18 + packet) == expected
+    assert decode_ip(LINKTYPE_ETHERNET, b"\0" * 12 + b"\x86\xdd" + packet) is None
+    assert decode_ip(RAW, _ipv4(GNB, AMF, 17, b"x", fragment=10)) is None
+    assert decode_ip(999, packet) is None
+
+
+# Decoders
+
+def test_ngap_messages_per_procedure_and_outcome():
+    stats = ProtocolStats()
+    setup = _data_chunk(bytes([0x00, 21, 0x00]))
+    setup_response = _data_chunk(bytes([0x20, 21, 0x00]))
+    initial = _data_chunk(bytes([0x00, 15, 0x40]))
+    stats.add(1.0, 0, RAW, _ipv4(GNB, AMF, 132, _sctp(9487, NGAP_PORT, setup)))
+    stats.add(1.1, 0, RAW, _ipv4(AMF, GNB, 132, _sctp(NGAP_PORT, 9487, setup_response)))
+    # Several DATA chunks in one packet; other PPIDs and ports are not NGAP
+    stats.add(2.0, 0, RAW, _ipv4(GNB, AMF, 132, _sctp(9487, NGAP_PORT, initial, initial, _data_chunk(b"\0\0", 46))))
+    stats.add(2.0, 0, RAW, _ipv4(GNB, AMF, 132, _sctp(9487, 36412, initial)))
+
+    ngap = stats.to_dict()["ngap"]
+    assert ngap == {"InitialUEMessage": {"count": 2, "peak_per_s": 2},
+                    "NGSetup": {"count": 1, "peak_per_s": 1},
+                    "NGSetup (success)": {"count": 1, "peak_per_s": 1}}
+
+
+def test_pfcp_messages_and_request_latency():
+    stats = ProtocolStats()
+    stats.add(10.0, 0, RAW, _ipv4(SMF, UPF, 17, _udp(PFCP_PORT, PFCP_PORT, _pfcp(50, 7, seid=0))))
+    stats.add(10.004, 0, RAW, _ipv4(UPF, SMF, 17, _udp(PFCP_PORT, PFCP_PORT, _pfcp(51, 7, seid=1))))
+    stats.add(11.0, 0, RAW, _ipv4(SMF, UPF, 17, _udp(PFCP_PORT, PFCP_PORT, _pfcp(1, 8))))
+    # A response to another request sequence is not matched
+    stats.add(11.002, 0, RAW, _ipv4(UPF, SMF, 17, _udp(PFCP_PORT, PFCP_PORT, _pfcp(2, 9))))
+
+    pfcp = stats.to_dict()["pfcp"]
+    assert pfcp["messages"]["Session Establishment Request"]["count"] == 1
+    assert pfcp["messages"]["Heartbeat Response"]["count"] == 1
+    assert list(pfcp["latency"]) == ["Session Establishment"]
+    assert pfcp["latency"]["Session Establishment"]["count"] == 1
+    assert pfcp["latency"]["Session Establishment"]["p50_ms"] == pytest.approx(4.0)
+
+
+def test_gtpu_packets_and_bytes_per_teid():
+    stats = ProtocolStats()
+    for timestamp, teid, length in ((1.0, 1, 100), (1.5, 1, 50), (2.0, 2, 1400)):
+        stats.add(timestamp, 0, RAW, _ipv4(GNB, UPF, 17, _udp(GTPU_PORT, GTPU_PORT, _gtpu(teid, length))))
+    stats.add(2.0, 0, RAW, _ipv4(GNB, UPF, 17, _udp(GTPU_PORT, GTPU_PORT, _gtpu(0, 4, message_type=1))))
+
+    gtpu = stats.to_dict()["gtpu"]
+    assert (gtpu["packets"], gtpu["bytes"]) == (3, 1550)
+    assert (gtpu["peak_packets_per_s"], gtpu["peak_bytes_per_s"]) == (2, 1400)
+    assert gtpu["teids"] == {"0x00000002": {"packets": 1, "bytes": 1400}, "0x00000001": {"packets": 2, "bytes": 150}}
+    assert gtpu["other_messages"] == {"type 1": 1}
+
+
+def _sbi_exchange(stats, started, client_port, stream_id, status=b"\x88"):
+    request = _h2_frame(1, stream_id, b"\x83\x86")
+    response = _h2_frame(1, stream_id, status)
+    stats.add(started, 0, RAW, _ipv4(AMF, NRF, 6, _tcp(client_port, 7777, 1000 + stream_id, request)))
+    stats.add(started + 0.002, 0, RAW, _ipv4(NRF, AMF, 6, _tcp(7777, client_port, 5000 + stream_id, response)))
+
+
+def test_http2_requests_and_responses_per_server():
+    stats = ProtocolStats(names={NRF: "nrf"})
+    preface = H2_PREFACE + _h2_frame(4, 0)
+    stats.add(1.0, 0, RAW, _ipv4(AMF, NRF, 6, _tcp(40000, 7777, 0, preface[:10])))
+    stats.add(1.0, 0, RAW, _ipv4(AMF, NRF, 6, _tcp(40000, 7777, 10, preface[10:])))
+    _sbi_exchange(stats, 1.0, 40000, 1)
+    _sbi_exchange(stats, 1.5, 40001, 3, status=b"\x8d")
+    # Traffic outside the SBI port range is not counted
+    stats.add(2.0, 0, RAW, _ipv4(AMF, "10.96.8.9", 6, _tcp(40002, 8080, 0, _h2_frame(1, 1, b"\x83"))))
+
+    sbi = stats.to_dict()["sbi"]
+    assert list(sbi) == ["nrf"]
+    assert sbi["nrf"]["requests"] == sbi["nrf"]["responses"] == 2
+    assert sbi["nrf"]["status"] == {"200": 1, "404": 1}
+    assert sbi["nrf"]["p50_ms"] == pytest.approx(2.0)
+
+
+def test_http2_frames_split_over_segments():
+    stats = ProtocolStats()
+    frames = _h2_frame(0, 1, b"x" * 20) + _h2_frame(1, 5, b"\x82")
+    stats.add(1.0, 0, RAW, _ipv4(AMF, NRF, 6, _tcp(40000, 7777, 100, frames[:15])))
+    assert stats.totals["sbi"] == {}
+    stats.add(1.1, 0, RAW, _ipv4(AMF, NRF, 6, _tcp(40000, 7777, 115, frames[15:])))
+    assert stats.totals["sbi"] == {NRF: 1}
+
+    # FIN forgets the connection direction
+    stats.add(1.2, 0, RAW, _ipv4(AMF, NRF, 6, _tcp(40000, 7777, 100 + len(frames), flags=0x11)))
+    assert not stats._streams
+
+
+# Per-second buckets
+
+def test_out_of_order_packets_keep_the_buckets_sorted():
+    stats = ProtocolStats(window=10)
+    packet = _ipv4(GNB, UPF, 17, _udp(GTPU_PORT, GTPU_PORT, _gtpu(1, 10)))
+    for timestamp in (100.1, 103.0, 101.5, 103.2, 101.9, 102.0, 94.0, 85.0):
+        stats.add(timestamp, 0, RAW, packet)
+
+    assert [(second, bucket["gtpu:packets"]) for second, bucket in stats.seconds] == \
+        [(94, 1), (100, 1), (101, 2), (102, 1), (103, 2)]
+    assert [entry["t"] for entry in stats.to_dict()["timeline"]] == [9, 15, 16, 17, 18]
+
+    stats.add(111.0, 0, RAW, packet)
+    assert [second for second, _ in stats.seconds] == [102, 103, 111]
@@ -0,0 +1,114 @@
+from types import SimpleNamespace
+
+from simulation.capacity_planner import DENSIFY, CapacityPlan
+from simulation.ipam import AddressPlan
+from simulation.ran_plan import DEFAULT_TAC, cell_stats, linked_gnbs, nci_for, plan_ran
+
+
+def _component(name, comp_type, **properties):
+    return SimpleNamespace(name=name, component_type=comp_type, properties=properties, links=[])
+
+
+def _link(source, target):
+    link = SimpleNamespace(source=source, target=target)
+    source.links.append(link)
+    target.links.append(link)
+
+
+def _name(component):
+    return component.name
+
+
+def test_nci_is_the_gnb_id_followed_by_the_cell_id():
+    assert nci_for(1) == 0x000000010
+    assert nci_for(0x19B, id_length=22) == 0x19B << 14
+    assert nci_for(1).bit_length() <= 36
+
+
+def test_explicit_gnb_ids_are_kept_and_the_others_take_the_lowest_free():
+    gnbs = [_component("gnb1", "gnb"), _component("gnb2", "gnb", gnb_id="1", tac=7),
+            _component("gnb3", "gnb", gnb_id=0), _component("gnb4", "gnb", gnb_id="1")]
+    plan = plan_ran(gnbs, _name)
+
+    assert {name: cell["gnb_id"] for name, cell in plan.cells.items()} == {"gnb1": 2, "gnb2": 1, "gnb3": 3, "gnb4": 4}
+    assert plan.cell("gnb2") == {"gnb_id": 1, "nci": nci_for(1), "tac": 7}
+    assert plan.cell("gnb1")["tac"] == DEFAULT_TAC
+    assert plan.tacs() == [DEFAULT_TAC, 7]
+
+
+def test_out_of_range_gnb_id_is_replaced():
+    plan = plan_ran([_component("gnb1", "gnb", gnb_id=1 << 22)], _name, id_length=22)
+    assert plan.cell("gnb1")["gnb_id"] == 1
+
+
+def test_ues_search_their_linked_gnbs_or_all():
+    gnb1, gnb2 = _component("gnb1", "gnb"), _component("gnb2", "gnb")
+    ue1, ue2, amf = _component("ue1", "ue"), _component("ue2", "ue"), _component("amf", "amf")
+    _link(ue1, gnb2)
+    _link(amf, ue1)
+    plan = plan_ran([amf, gnb1, gnb2, ue1, ue2], _name)
+
+    assert plan.gnbs_for("ue1") == ["gnb2"]
+    assert plan.gnbs_for("ue2") == ["gnb1", "gnb2"]
+    assert plan.to_dict()["gnb1"]["ues"] == ["ue2"]
+    assert plan.to_dict()["gnb2"]["ues"] == ["ue1"]
+
+
+def test_gnb_config_helpers():
+    gnb1, gnb2, ue = _component("gnb1", "gnb", tac=3), _component("gnb2", "gnb"), _component("ue", "ue")
+    plan = plan_ran([gnb1, gnb2, ue], _name)
+    addresses = AddressPlan()
+    addresses.add("gnb1", "gnb", {None: "10.96.8.1"})
+    addresses.add("ue", "ue", {None: "10.96.8.2"})
+
+    assert plan.gnb_properties("gnb1", {"name": "gnb1"}) == {"name": "gnb1", "gnb_id": 1, "tac": 3}
+    assert plan.gnb_properties("other", None) == {}
+    assert plan.gnb_addresses("ue", addresses) == ["10.96.8.1"]
+
+    template = {"plmn_id": {"mcc": "999", "mnc": "70"}, "tac": 1}
+    tais = plan.amf_tais(template)
+    assert tais == [dict(template, tac=3), dict(template, tac=DEFAULT_TAC)]
+    assert tais[0]["plmn_id"] is not template["plmn_id"]
+
+
+def test_cell_stats_count_ues_for_their_first_gnb():
+    gnb1, gnb2 = _component("gnb1", "gnb"), _component("gnb2", "gnb")
+    ue1, ue2, ue3 = _component("ue1", "ue"), _component("ue2", "ue"), _component("ue3", "ue")
+    _link(ue2, gnb2)
+    _link(ue3, gnb2)
+    plan = plan_ran([gnb1, gnb2, ue1, ue2, ue3], _name)
+    registration = {
+        "ue1": {"registrations": 1, "pdu_sessions": 1, "registration_s": [0.4]},
+        "ue2": {"registrations": 1, "pdu_sessions": 0, "registration_s": [0.9]},
+        "ue3": {"registrations": 1, "pdu_sessions": 1, "registration_s": [0.3]},
+    }
+
+    stats = {cell["gnb"]: cell for cell in cell_stats(plan, registration, {"gnb1": True})}
+
+    assert stats["gnb1"]["ng_setup"] and not stats["gnb2"]["ng_setup"]
+    assert stats["gnb1"]["ues"] == 1 and stats["gnb1"]["registration_p50_s"] == 0.4
+    assert stats["gnb2"]["ues"] == 2 and stats["gnb2"]["pdu_sessions"] == 1
+    assert stats["gnb2"]["registration_p50_s"] == 0.9
+
+
+def test_densified_ues_keep_their_gnbs_and_count_in_their_cell():
+    gnb1, gnb2 = _component("gnb1", "gnb"), _component("gnb2", "gnb")
+    ues = [_component(f"ue{index}", "ue") for index in range(1, 6)]
+    for ue in ues[:3]:
+        _link(ue, gnb1)
+    for ue in ues[3:]:
+        _link(ue, gnb2)
+    _link(ues[2], gnb2)
+    capacity_plan = CapacityPlan(DENSIFY, 0, 0, {}, ues_per_container=4)
+    kept = capacity_plan.group_ues([gnb1, gnb2] + ues, key=lambda component: linked_gnbs(component, _name))
+
+    plan = plan_ran(kept, _name, ue_count=capacity_plan.ue_count)
+
+    assert linked_gnbs(ues[2], _name) == ("gnb1", "gnb2")
+    assert plan.ue_gnbs == {"ue1": ["gnb1"], "ue3": ["gnb1", "gnb2"], "ue4": ["gnb2"]}
+    assert plan.ue_counts == {"ue1": 2, "ue4": 2}
+    registration = {name: {"registrations": plan.ue_counts.get(name, 1), "pdu_sessions": 0, "registration_s": []}
+                    for name in plan.ue_gnbs}
+    stats = {cell["gnb"]: cell for cell in cell_stats(plan, registration, {})}
+    assert (stats["gnb1"]["ues"], stats["gnb1"]["registrations"]) == (3, 3)
+    assert (stats["gnb2"]["ues"], stats["gnb2"]["registrations"]) == (2, 2)
@@ -0,0 +1,56 @@
+import json
+
+from simulation.resource_history import MAX_RUNS, MEMORY_STEP, MIN_MEMORY, ResourceHistory
+
+MIB = 1024 ** 2
+DEFAULT = 256 * MIB
+
+
+def _history(tmp_path, runs):
+    history = ResourceHistory(str(tmp_path / "history.json"))
+    for peaks in runs:
+        history.record(peaks)
+    return history
+
+
+def _run(memory, oom_killed=False, limit=DEFAULT):
+    return {"upf": {"memory": memory, "cpus": 0.5, "limit": limit, "oom_killed": oom_killed}}
+
+
+def test_default_until_enough_runs(tmp_path):
+    history = _history(tmp_path, [_run(100 * MIB), _run(120 * MIB)])
+    assert history.memory_limit("upf", DEFAULT) == DEFAULT
+    assert history.memory_limit("amf", DEFAULT) == DEFAULT
+
+
+def test_limit_is_peak_times_headroom_rounded_up(tmp_path):
+    history = _history(tmp_path, [_run(100 * MIB), _run(121 * MIB), _run(90 * MIB)])
+    limit = history.memory_limit("upf", DEFAULT)
+    assert limit % MEMORY_STEP == 0
+    assert 121 * MIB * 1.5 <= limit < 121 * MIB * 1.5 + MEMORY_STEP
+
+
+def test_limit_never_below_the_minimum(tmp_path):
+    history = _history(tmp_path, [_run(MIB)] * 3)
+    assert history.memory_limit("upf", DEFAULT) == MIN_MEMORY
+
+
+def test_recent_oom_kill_doubles_the_largest_limit(tmp_path):
+    history = _history(tmp_path, [_run(100 * MIB), _run(100 * MIB), _run(250 * MIB, oom_killed=True)])
+    assert history.memory_limit("upf", DEFAULT) == 2 * DEFAULT
+
+
+def test_history_is_saved_and_trimmed(tmp_path):
+    history = _history(tmp_path, [_run(index * MIB) for index in range(1, MAX_RUNS + 3)])
+
+    with open(history.path) as file:
+        saved = json.load(file)
+    assert len(saved["upf"]) == MAX_RUNS
+    assert saved["upf"][0]["memory"] == 3 * MIB
+    assert ResourceHistory(history.path).peak_cpus("upf") == 0.5
+
+
+def test_unreadable_history_is_ignored(tmp_path):
+    path = tmp_path / "history.json"
+    path.write_text("{not json")
+    assert ResourceHistory(str(path)).memory_limit("upf", DEFAULT) == DEFAULT
@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+
+from simulation.capacity_planner import DENSIFY, CapacityPlan
+from simulation.ipam import AddressPlan
+from simulation.slicing import (DEFAULT_DNN, DEFAULT_SD, DEFAULT_SST, FIRST_IMSI, UE_POOL, dedicated_instances,
+                                missing_dedicated, plan_slices, provisioned_count, render_subscriber_script,
+                                slice_key, slice_name)
+
+
+def _component(name, comp_type, **properties):
+    return SimpleNamespace(name=name, component_type=comp_type, properties=properties, links=[])
+
+
+def _name(component):
+    return component.name
+
+
+def _two_slices():
+    return [
+        _component("amf", "amf"),
+        _component("smf1", "smf"), _component("upf1", "upf"),
+        _component("smf2", "smf", sst=2, sd="0x0000FF", dnn="iot"),
+        _component("upf2", "upf", sst="2", sd="ff", dnn="iot"),
+        _component("ue1", "ue"), _component("ue2", "ue", sst=2, sd="FF", dnn="iot"),
+    ]
+
+
+def test_slice_key_normalizes_sd_and_defaults():
+    assert slice_key({}) == (DEFAULT_SST, DEFAULT_SD, DEFAULT_DNN)
+    assert slice_key({"sst": "2", "sd": "0xFF", "dnn": "iot"}) == (2, "0000ff", "iot")
+    assert slice_key({"sst": "x", "sd": ""}) == (DEFAULT_SST, None, DEFAULT_DNN)
+    assert slice_key({"sd": "not-hex"})[1] is None
+    assert slice_name((2, "0000ff", "iot")) == "iot-2-0000ff"
+    assert slice_name((1, None, "internet")) == "internet-1"
+
+
+def test_single_slice_keeps_the_default_pool_and_subscriber():
+    plan = plan_slices([_component("smf", "smf"), _component("ue1", "ue"), _component("ue2", "ue")], _name)
+
+    assert not plan.sliced
+    assert plan.pools() == [UE_POOL]
+    assert plan.subscribers() == [(str(FIRST_IMSI), list(plan.slices.values()))]
+
+
+def test_topology_without_sliced_components_gets_the_default_slice():
+    plan = plan_slices([_component("amf", "amf")], _name)
+    assert list(plan.slices) == [slice_name((DEFAULT_SST, DEFAULT_SD, DEFAULT_DNN))]
+    assert plan.slices["internet-1-010203"]["gateway"] == "10.45.0.1"
+
+
+def test_slices_get_their_own_pools_and_subscribers():
+    components = _two_slices()
+    plan = plan_slices(components, _name, ue_count=lambda component: 3 if component.name == "ue1" else 1)
+
+    assert plan.sliced
+    assert plan.pools() == ["10.45.0.0/16", "10.46.0.0/16"]
+    assert plan.slice_name_of("upf2") == plan.slice_name_of("ue2") == "iot-2-0000ff"
+    assert plan.slice_of("amf")["dnn"] == DEFAULT_DNN
+    assert plan.nssai() == [{"sst": 1, "sd": "010203"}, {"sst": 2, "sd": "0000ff"}]
+    assert plan.imsis == {"ue1": (FIRST_IMSI, 3), "ue2": (FIRST_IMSI + 3, 1)}
+    subscribers = plan.subscribers()
+    assert [imsi for imsi, _ in subscribers] == [str(FIRST_IMSI + index) for index in range(4)]
+    assert subscribers[-1][1] == [plan.slices["iot-2-0000ff"]]
+    assert plan.to_dict()["iot-2-0000ff"]["members"] == ["smf2", "ue2", "upf2"]
+
+
+def test_densified_ues_keep_their_slice():
+    ues = [_component("ue1", "ue", dnn="a"), _component("ue2", "ue", dnn="b"),
+           _component("ue3", "ue", dnn="a"), _component("ue4", "ue", dnn="b")]
+    capacity_plan = CapacityPlan(DENSIFY, 0, 0, {}, ues_per_container=2)
+    kept = capacity_plan.group_ues(ues, key=lambda component: slice_key(component.properties))
+
+    plan = plan_slices(kept, _name, capacity_plan.ue_count)
+
+    assert plan.imsis == {"ue1": (FIRST_IMSI, 2), "ue2": (FIRST_IMSI + 2, 2)}
+    assert [(imsi, slices[0]["dnn"]) for imsi, slices in plan.subscribers()] == [
+        (str(FIRST_IMSI), "a"), (str(FIRST_IMSI + 1), "a"), (str(FIRST_IMSI + 2), "b"), (str(FIRST_IMSI + 3), "b")]
+
+
+def test_missing_dedicated_smf_and_upf():
+    components = [_component("smf", "smf"), _component("upf", "upf"), _component("ue", "ue", dnn="iot")]
+    assert missing_dedicated(components) == [("smf", (1, "010203", "iot")), ("upf", (1, "010203", "iot"))]
+    assert missing_dedicated(_two_slices()) == []
+    assert missing_dedicated([_component("ue", "ue", dnn="iot")]) == []
+
+
+def test_dedicated_instances_copy_the_first_of_their_type():
+    smf = _component("smf", "smf", image="open5gs", sst=1)
+    smf.links = ["n4"]
+    added = dedicated_instances([smf, _component("upf", "upf"), _component("ue", "ue", dnn="iot")])
+
+    assert [component.component_type for component in added] == ["smf", "upf"]
+    assert added[0].properties["name"] == "smf-iot-1-010203"
+    assert added[0].properties["image"] == "open5gs" and added[0].properties["dnn"] == "iot"
+    assert added[0].links == ["n4"] and added[0].links is not smf.links
+
+
+def _address_plan():
+    plan = AddressPlan()
+    for index, (name, comp_type) in enumerate((("smf1", "smf"), ("upf1", "upf"), ("smf2", "smf"), ("upf2", "upf"))):
+        plan.add(name, comp_type, {None: f"10.96.8.{index + 1}"})
+    return plan
+
+
+def test_render_config_puts_the_smf_and_upf_on_their_slice():
+    plan = plan_slices(_two_slices(), _name)
+    smf = {"smf": {"upf": [{"addr": "upf"}]}}
+    upf = {"upf": {}, "smf": {"pfcp": [{"addr": "smf"}]}}
+    amf = {"amf": {"plmn_support": [{"plmn_id": {"mcc": "999"}}]}}
+
+    plan.render_config(smf, "smf2", "smf", _address_plan())
+    plan.render_config(upf, "upf2", "upf", _address_plan())
+    plan.render_config(amf, "amf", "amf", _address_plan())
+
+    assert smf["smf"]["info"] == [{"s_nssai": [{"sst": 2, "sd": "0000ff", "dnn": ["iot"]}]}]
+    assert smf["smf"]["subnet"] == [{"addr": "10.46.0.1/16", "dnn": "iot"}]
+    assert smf["smf"]["upf"] == [{"addr": "10.96.8.4", "port": 8805}]
+    assert upf["upf"]["subnet"] == [{"addr": "10.46.0.1/16", "dnn": "iot", "dev": "ogstun"}]
+    assert upf["smf"]["pfcp"] == [{"addr": "10.96.8.3", "port": 8805}]
+    assert amf["amf"]["plmn_support"][0]["s_nssai"] == plan.nssai()
+
+
+def test_render_ue_config():
+    plan = plan_slices(_two_slices(), _name)
+    config = {"supi": "imsi-999700000000001", "sessions": [{"type": "IPv4", "apn": "internet"}]}
+
+    plan.render_ue_config(config, "ue2")
+
+    snssai = {"sst": 2, "sd": 0xff}
+    assert config["sessions"] == [{"type": "IPv4", "apn": "iot", "slice": snssai}]
+    assert config["configured-nssai"] == config["default-nssai"] == [snssai]
+    assert config["supi"] == f"imsi-{FIRST_IMSI + 1}"
+
+
+def test_subscriber_script_and_provisioned_count():
+    plan = plan_slices(_two_slices(), _name)
+    script = render_subscriber_script(plan)
+
+    assert "use open5gs" in script
+    assert f'"$in": ["{FIRST_IMSI}", "{FIRST_IMSI + 1}"]' in script
+    assert '"sst": NumberInt(2)' in script and '"value": NumberLong(1000000000)' in script
+    assert provisioned_count("switched to db open5gs\nSubscribers in database: 2\n") == 2
+    assert provisioned_count("MongoServerError: not primary") is None
+    assert provisioned_count(None) is None
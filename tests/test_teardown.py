@@ -0,0 +1,141 @@
+from simulation.namespace import LABEL_POOL, LABEL_RUN, NAME_PREFIX
+from simulation.teardown import format_report, teardown_run
+
+
+class FakeContainer:
+    def __init__(self, name, status="running", exits=True, remove_error=None, networks=()):
+        self.id = name
+        self.name = name
+        self.attrs = {"NetworkSettings": {"Networks": {network: {} for network in networks}}}
+        self.status = status
+        self.exits = exits
+        self.remove_error = remove_error
+        self.signals = []
+        self.removed = False
+
+    def kill(self, signal=None):
+        self.signals.append(signal)
+
+    def wait(self, timeout=None, condition=None):
+        if not self.exits:
+            raise TimeoutError("still running")
+
+    def remove(self, force=False, v=False):
+        if self.remove_error:
+            raise self.remove_error
+        self.removed = True
+
+
+class FakeNetwork:
+    def __init__(self, name):
+        self.name = name
+        self.removed = False
+
+    def remove(self):
+        self.removed = True
+
+
+class FakeCollection:
+    def __init__(self, by_filter):
+        self.by_filter = by_filter
+        self.queries = []
+
+    def list(self, all=False, filters=None):
+        self.queries.append(filters)
+        return list(self.by_filter.get(tuple(sorted(filters.items())), []))
+
+
+class FakeClient:
+    def __init__(self, containers, networks):
+        self.containers = FakeCollection(containers)
+        self.networks = FakeCollection(networks)
+
+
+class FakeSession:
+    def __init__(self):
+        self.forgotten = []
+
+    def forget_network(self, name):
+        self.forgotten.append(name)
+
+
+class NotFound(Exception):
+    status_code = 404
+
+
+def _key(**filters):
+    return tuple(sorted(filters.items()))
+
+
+def test_teardown_signals_waits_and_removes_the_run():
+    graceful = FakeContainer("nf5g-r1-amf")
+    stubborn = FakeContainer("nf5g-r1-upf", exits=False)
+    exited = FakeContainer("nf5g-r1-mongo", status="exited")
+    claimed = FakeContainer("nf5g-r1-ue", networks=["nf5g-r1"])
+    network = FakeNetwork("nf5g-r1")
+    client = FakeClient(
+        {_key(label=f"{LABEL_RUN}=r1"): [graceful, stubborn, exited],
+         _key(label=LABEL_POOL, name=f"{NAME_PREFIX}-r1-"): [claimed, graceful]},
+        {_key(label=f"{LABEL_RUN}=r1"): [network]})
+    session = FakeSession()
+
+    report = teardown_run(client, "r1", grace_period=5, session=session)
+
+    assert report["containers"] == [c.name for c in (graceful, stubborn, exited, claimed)]
+    assert sorted(report["graceful"]) == ["nf5g-r1-amf", "nf5g-r1-ue"]
+    assert report["forced"] == ["nf5g-r1-upf"]
+    assert exited.signals == [] and graceful.signals == ["SIGTERM"]
+    assert all(c.removed for c in (graceful, stubborn, exited, claimed))
+    assert network.removed and report["networks"] == ["nf5g-r1"]
+    assert session.forgotten == ["nf5g-r1"]
+    assert report["failed"] == {}
+
+
+def test_claimed_containers_of_a_longer_run_id_are_kept():
+    own = FakeContainer("nf5g-a-ue", networks=["nf5g-a-net"])
+    other = FakeContainer("nf5g-a-b-ue", networks=["nf5g-a-b-net"])
+    pooled = FakeContainer("nf5g-pool-ue-1", networks=["nf5g-pool"])
+    client = FakeClient(
+        # The name filter is a substring match and also returns run "a-b"
+        {_key(label=LABEL_POOL, name=f"{NAME_PREFIX}-a-"): [own, other, pooled]},
+        {_key(label=f"{LABEL_RUN}=a"): [FakeNetwork("nf5g-a-net")]})
+
+    report = teardown_run(client, "a", grace_period=0)
+
+    assert report["containers"] == ["nf5g-a-ue"]
+    assert own.removed and not other.removed and not pooled.removed
+
+
+def test_zero_grace_period_kills_without_waiting():
+    container = FakeContainer("nf5g-r2-amf")
+    client = FakeClient({_key(label=f"{LABEL_RUN}=r2"): [container]}, {})
+
+    report = teardown_run(client, "r2", grace_period=0, remove_networks=False)
+
+    assert report["graceful"] == [] and report["forced"] == ["nf5g-r2-amf"]
+    assert container.removed
+    assert client.networks.queries == []
+    assert "networks_s" not in report["timings"]
+
+
+def test_removal_errors_are_reported_but_missing_containers_are_not():
+    gone = FakeContainer("gone", status="exited", remove_error=NotFound("no such container"))
+    broken = FakeContainer("broken", status="exited", remove_error=RuntimeError("device busy"))
+    client = FakeClient({_key(label=f"{LABEL_RUN}=r3"): [gone, broken]}, {})
+
+    report = teardown_run(client, "r3")
+
+    assert report["failed"] == {"broken": "device busy"}
+    assert format_report(report).startswith("1 containers (0 stopped gracefully, 0 killed) and 0 networks")
+
+
+def test_teardown_of_every_run_drains_pools():
+    pooled = FakeContainer("nf5g-pool-ue-1", status="exited")
+    pool_network = FakeNetwork("nf5g-pool")
+    client = FakeClient({_key(label=LABEL_POOL): [pooled]}, {_key(label=LABEL_POOL): [pool_network]})
+
+    report = teardown_run(client)
+
+    assert client.containers.queries == [{"label": LABEL_RUN}, {"label": LABEL_POOL}]
+    assert pooled.removed and pool_network.removed
+    assert report["containers"] == ["nf5g-pool-ue-1"]